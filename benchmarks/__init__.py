@@ -0,0 +1,14 @@
+"""
+Benchmark suite of orion itself.
+
+Synthetic tests of configurable runs x metrics x changepoints are served by
+the in-memory FakeOpenSearch, and each stage of a run is timed and its peak
+memory traced: fetch (Matcher queries and response parsing), assemble
+(Utils metric dataframes), analyze (every built-in algorithm's _analyze),
+format (every formatter) and the HTML visualization. Results are compared
+against a stored baseline so orion's own performance regressions are caught
+like the ones it finds in the runs it analyzes.
+
+    python -m benchmarks
+    python -m benchmarks --save-baseline
+"""
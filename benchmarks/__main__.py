@@ -0,0 +1,97 @@
+"""
+Run the benchmark suite and compare it with the stored baseline.
+
+Exits 2 when a benchmark regressed, as orion does when it finds a
+regression.
+"""
+
+import argparse
+import fnmatch
+import logging
+import os
+import sys
+import tempfile
+
+from orion.logger import SingletonLogger
+from benchmarks.harness import calibrate, compare, format_comparisons, load_results, measure, save_results
+from benchmarks.suite import Scenario, collect
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def _options():
+    """Default command line options of orion, as a run gets them."""
+    from main import main as cli  # pylint: disable=import-outside-toplevel
+    options = cli.make_context("orion", ["--hunter-analyze", "--config", "benchmark.yaml"]).params
+    options.update(ackMap=None, metadata_index="perf-scale-ci", benchmark_index="ripsaw-kube-burner")
+    return options
+
+
+def main():
+    """Run the benchmarks"""
+    defaults = Scenario()
+    parser = argparse.ArgumentParser(description="Benchmark the stages of an orion run")
+    parser.add_argument("--runs", type=int, default=defaults.runs, help="runs of the synthetic test")
+    parser.add_argument("--metrics", type=int, default=defaults.metrics,
+                        help="metrics of the synthetic test, half of them aggregated")
+    parser.add_argument("--changepoints", type=int, default=defaults.changepoints,
+                        help="regressions in the synthetic runs")
+    parser.add_argument("--docs-per-metric", type=int, default=defaults.docs_per_metric,
+                        help="documents of each aggregated metric per run")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="minimum timed calls of each benchmark, fast ones are repeated more")
+    parser.add_argument("-k", "--select", default="*", metavar="PATTERN",
+                        help="only run the benchmarks matching a glob, e.g. 'analyze.*'")
+    parser.add_argument("--baseline", default=BASELINE, help="results to compare with")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store the results as the new baseline instead of comparing")
+    parser.add_argument("--output", help="also write the results to this file")
+    parser.add_argument("--time-tolerance", type=float, default=0.3,
+                        help="allowed relative increase of the fastest call")
+    parser.add_argument("--memory-tolerance", type=float, default=0.2,
+                        help="allowed relative increase of the peak memory")
+    args = parser.parse_args()
+
+    SingletonLogger(debug=logging.ERROR, name="Orion")
+
+    scenario = Scenario(args.runs, args.metrics, args.changepoints, args.docs_per_metric)
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        baseline = load_results(args.baseline)
+        if baseline["scenario"] != scenario.to_dict():
+            print(f"{args.baseline} was measured on {baseline['scenario']}, "
+                  f"not {scenario.to_dict()}; not comparing", file=sys.stderr)
+            baseline = None
+
+    calibration = calibrate()
+    with tempfile.TemporaryDirectory() as workdir:
+        benchmarks = [
+            benchmark for benchmark in collect(scenario, _options(), workdir)
+            if fnmatch.fnmatch(benchmark.name, args.select)
+        ]
+        results = []
+        for benchmark in benchmarks:
+            print(f"{benchmark.name} ...", file=sys.stderr)
+            results.append(measure(benchmark, repeat=args.repeat))
+
+    if args.output:
+        save_results(args.output, results, scenario.to_dict(), calibration)
+    if args.save_baseline:
+        save_results(args.baseline, results, scenario.to_dict(), calibration)
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+    reference, scale = {}, 1.0
+    if baseline is not None:
+        reference = {name: result for name, result in baseline["results"].items()
+                     if fnmatch.fnmatch(name, args.select)}
+        scale = calibration / baseline["calibration"]
+        print(f"This machine is {scale:.2f}x the baseline's calibration time", file=sys.stderr)
+    comparisons = compare(results, reference, args.time_tolerance, args.memory_tolerance, scale)
+    print(format_comparisons(comparisons))
+    regressed = [comparison.name for comparison in comparisons if comparison.regressions]
+    if regressed:
+        print(f"\n{len(regressed)} benchmarks regressed: {', '.join(regressed)}")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Measurement, storage and comparison of benchmark results.
+"""
+
+import gc
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Callable, Dict, List, Optional
+
+from tabulate import tabulate
+
+# Differences below these are noise whatever the ratio
+MIN_TIME_DELTA = 0.002
+MIN_MEMORY_DELTA = 256 * 1024
+# Fast benchmarks are repeated until they were timed for MIN_MEASURE_TIME
+MIN_MEASURE_TIME = 0.5
+MAX_REPEAT = 100
+
+
+@dataclass
+class Benchmark:
+    """A measured piece of work
+
+    Args:
+        name (str): stage.name of the benchmark
+        func (callable): the measured work, called with the setup arguments
+        setup (callable): returns the arguments of one call of func, it is
+            neither timed nor traced
+    """
+    name: str
+    func: Callable[..., Any]
+    setup: Callable[[], tuple] = tuple
+
+    @property
+    def stage(self) -> str:
+        """Stage of the benchmark, the part of its name before the dot"""
+        return self.name.split(".", 1)[0]
+
+
+@dataclass
+class Result:
+    """Measurements of a benchmark
+
+    Args:
+        name (str): stage.name of the benchmark
+        seconds (float): median wall time of a call
+        min_seconds (float): fastest call
+        peak_bytes (int): peak memory allocated by a call, as traced by
+            tracemalloc
+    """
+    name: str
+    seconds: float
+    min_seconds: float
+    peak_bytes: int
+
+
+@dataclass
+class Comparison:
+    """A result next to its baseline
+
+    Args:
+        name (str): stage.name of the benchmark
+        current (Result): this run, None when the benchmark is gone
+        baseline (Result): the baseline, None for a new benchmark
+        regressions (list): what got slower or bigger beyond the tolerances
+    """
+    name: str
+    current: Optional[Result]
+    baseline: Optional[Result]
+    regressions: List[str]
+
+
+def measure(benchmark: Benchmark, repeat: int = 3, warmup: int = 1,
+            min_time: float = MIN_MEASURE_TIME) -> Result:
+    """Time a benchmark, then trace the memory of one more call
+
+    Memory is traced in a separate call since tracemalloc slows down the
+    code it traces.
+
+    Args:
+        benchmark (Benchmark): benchmark to measure
+        repeat (int): minimum timed calls
+        warmup (int): untimed calls first, to fill caches and lazy imports
+        min_time (float): benchmarks faster than min_time / repeat are
+            repeated up to MAX_REPEAT times to be timed for min_time seconds
+
+    Returns:
+        Result: the measurements
+    """
+    elapsed = 0.0
+    for _ in range(warmup):
+        args = benchmark.setup()
+        start = time.perf_counter()
+        benchmark.func(*args)
+        elapsed = time.perf_counter() - start
+    if warmup and elapsed * repeat < min_time:
+        repeat = min(MAX_REPEAT, int(min_time / max(elapsed, 1e-6)) + 1)
+    times = []
+    for _ in range(repeat):
+        args = benchmark.setup()
+        gc.collect()
+        start = time.perf_counter()
+        benchmark.func(*args)
+        times.append(time.perf_counter() - start)
+    args = benchmark.setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        benchmark.func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return Result(benchmark.name, statistics.median(times), min(times), peak)
+
+
+def _calibration_work():
+    values = [(i * 7919) % 10007 for i in range(200000)]
+    counts = {}
+    for value in sorted(values):
+        counts[value % 97] = counts.get(value % 97, 0) + 1
+    return counts
+
+
+def calibrate(repeat: int = 5) -> float:
+    """Fastest time of a fixed pure Python workload
+
+    Baselines measured on another machine, or on a busier one, are scaled
+    by the ratio of the calibration times before comparing.
+
+    Args:
+        repeat (int): timed calls
+
+    Returns:
+        float: seconds
+    """
+    return measure(Benchmark("calibration", _calibration_work), repeat=repeat).min_seconds
+
+
+def save_results(path: str, results: List[Result], scenario: Dict[str, Any], calibration: float) -> None:
+    """Write results and the scenario they were measured on as JSON
+
+    Args:
+        path (str): output file
+        results (list): Result of every benchmark
+        scenario (dict): parameters of the synthetic data
+        calibration (float): calibrate() of the machine
+    """
+    data = {
+        "scenario": scenario,
+        "calibration": calibration,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {result.name: {k: v for k, v in asdict(result).items() if k != "name"}
+                    for result in results},
+    }
+    with open(path, "w", encoding="utf-8") as output:
+        json.dump(data, output, indent=2, sort_keys=True)
+        output.write("\n")
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    """Read results written by save_results
+
+    Args:
+        path (str): results file
+
+    Returns:
+        dict: the scenario, under "scenario", the calibration time, under
+            "calibration", and a Result by name, under "results"
+    """
+    with open(path, "r", encoding="utf-8") as data_file:
+        data = json.load(data_file)
+    data["results"] = {name: Result(name, **values) for name, values in data["results"].items()}
+    return data
+
+
+def compare(results: List[Result], baseline: Dict[str, Result], time_tolerance: float = 0.3,
+            memory_tolerance: float = 0.2, scale: float = 1.0) -> List[Comparison]:
+    """Compare results with a baseline
+
+    A benchmark regresses when its fastest call or its peak memory exceeds
+    the baseline by more than the relative tolerance, and by more than
+    MIN_TIME_DELTA or MIN_MEMORY_DELTA.
+
+    Args:
+        results (list): Result of every benchmark of this run
+        baseline (dict): baseline Result by name
+        time_tolerance (float): allowed relative increase of the fastest call
+        memory_tolerance (float): allowed relative peak memory increase
+        scale (float): factor of the baseline times, the calibration time
+            of this run over the one of the baseline
+
+    Returns:
+        list: Comparison of every benchmark of the run or of the baseline
+    """
+    baseline = {
+        name: replace(base, seconds=base.seconds * scale, min_seconds=base.min_seconds * scale)
+        for name, base in baseline.items()
+    }
+    comparisons = []
+    for result in results:
+        base = baseline.get(result.name)
+        regressions = []
+        if base is not None:
+            # the fastest call is the least disturbed by the rest of the machine
+            if (result.min_seconds > base.min_seconds * (1 + time_tolerance)
+                    and result.min_seconds - base.min_seconds > MIN_TIME_DELTA):
+                regressions.append(f"time x{result.min_seconds / base.min_seconds:.2f}")
+            if (result.peak_bytes > base.peak_bytes * (1 + memory_tolerance)
+                    and result.peak_bytes - base.peak_bytes > MIN_MEMORY_DELTA):
+                regressions.append(f"memory x{result.peak_bytes / max(base.peak_bytes, 1):.2f}")
+        comparisons.append(Comparison(result.name, result, base, regressions))
+    names = {result.name for result in results}
+    comparisons.extend(
+        Comparison(name, None, base, []) for name, base in baseline.items() if name not in names
+    )
+    return comparisons
+
+
+def _mib(size: int) -> str:
+    return f"{size / 2**20:.2f}"
+
+
+def format_comparisons(comparisons: List[Comparison]) -> str:
+    """Table of the results next to their baselines"""
+    rows = []
+    for comparison in comparisons:
+        current, base = comparison.current, comparison.baseline
+        if current is None:
+            verdict = "not run"
+        elif base is None:
+            verdict = "new"
+        else:
+            verdict = ", ".join(comparison.regressions) or "ok"
+        rows.append([
+            comparison.name,
+            f"{current.min_seconds * 1000:.1f}" if current else "-",
+            f"{base.min_seconds * 1000:.1f}" if base else "-",
+            _mib(current.peak_bytes) if current else "-",
+            _mib(base.peak_bytes) if base else "-",
+            verdict,
+        ])
+    headers = ["benchmark", "best ms", "baseline ms", "peak MiB", "baseline MiB", "verdict"]
+    return tabulate(rows, headers=headers)
@@ -0,0 +1,205 @@
+"""
+Synthetic scenario and the benchmarks of every stage of a run.
+
+The fetch benchmarks run Matcher against an in-process FakeOpenSearch, so
+they include its serving time, apart from fetch.parse_agg which only parses
+a recorded response. The later stages are measured on data prepared once:
+assembly builds the dataframes from already fetched batches, the algorithms
+analyze the assembled dataframe and the formatters and the visualization
+report the changepoints EDivisive finds in it.
+"""
+
+# pylint: disable = protected-access
+
+import copy
+import os
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List
+
+from opensearch_dsl.response import Response
+
+import orion.constants as cnsts
+from orion.algorithms import AlgorithmFactory
+from orion.algorithms.algorithmFactory import BUILTIN_ALGORITHMS
+from orion.fake_opensearch import FakeOpenSearch, generate_runs
+from orion.matcher import Matcher
+from orion.pipeline.formatters import FormatterFactory
+from orion.run_test import build_analysis_result
+from orion.utils import Utils
+from orion.visualization import VizData, generate_test_html
+
+from benchmarks.harness import Benchmark
+
+METADATA_INDEX = "perf-scale-ci"
+BENCHMARK_INDEX = "ripsaw-kube-burner"
+FORMATS = (cnsts.JSON, cnsts.TEXT, cnsts.JUNIT)
+
+
+@dataclass
+class Scenario:
+    """Size of the synthetic test
+
+    Args:
+        runs (int): runs of the test
+        metrics (int): metrics of the test, half of them aggregated
+        changepoints (int): regressions, evenly spread over the runs
+        docs_per_metric (int): documents of each aggregated metric per run,
+            standard metrics have one
+        seed (int): seed of the generated values
+    """
+    runs: int = 50
+    metrics: int = 20
+    changepoints: int = 1
+    docs_per_metric: int = 10
+    seed: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Parameters of the scenario"""
+        return asdict(self)
+
+
+class _Prefetched:
+    """Serves metric batches fetched beforehand, in place of a FetchCoordinator"""
+
+    def __init__(self, batches: Dict[str, List[Dict[str, Any]]]):
+        self.batches = batches
+
+    def get_agg_metrics_batch(self, match, uuids, metrics_list, timestamp_field="timestamp"):  # pylint: disable=unused-argument
+        """Batches of aggregated metrics"""
+        return {metric["name"]: self.batches[metric["name"]] for metric in metrics_list}
+
+    def get_results_batch(self, match, uuids, metrics_list, timestamp_field="timestamp",  # pylint: disable=unused-argument
+                          trim_source=False):  # pylint: disable=unused-argument
+        """Batches of standard metrics"""
+        return {metric["name"]: self.batches[metric["name"]] for metric in metrics_list}
+
+
+def _test_config(scenario: Scenario) -> Dict[str, Any]:
+    """Test configuration of the synthetic runs."""
+    aggregated = scenario.metrics // 2
+    metrics = [
+        {"name": f"agg{i}", "metricName.keyword": f"agg{i}", "metric_of_interest": "value",
+         "agg": {"agg_type": "avg"}}
+        for i in range(aggregated)
+    ] + [
+        {"name": f"std{i}", "metricName": f"std{i}", "metric_of_interest": "value"}
+        for i in range(scenario.metrics - aggregated)
+    ]
+    return {
+        "name": "benchmark",
+        "uuid_field": "uuid",
+        "version_field": "ocpVersion",
+        "metadata": {"benchmark.keyword": "node-density", "platform": "AWS"},
+        "metrics": metrics,
+    }
+
+
+def _store(scenario: Scenario, test: Dict[str, Any]) -> FakeOpenSearch:
+    """FakeOpenSearch holding the runs of the scenario."""
+    names = [metric["name"] for metric in test["metrics"]]
+    metadata, metric_docs = generate_runs(
+        runs=scenario.runs,
+        metrics={name: 100.0 * (position + 1) for position, name in enumerate(names)},
+        docs_per_metric={
+            name: scenario.docs_per_metric if name.startswith("agg") else 1 for name in names
+        },
+        regression_at=[
+            scenario.runs * (step + 1) // (scenario.changepoints + 1)
+            for step in range(scenario.changepoints)
+        ],
+        seed=scenario.seed,
+    )
+    store = FakeOpenSearch()
+    store.bulk_index(METADATA_INDEX, metadata, id_field="uuid")
+    store.bulk_index(BENCHMARK_INDEX, metric_docs)
+    return store
+
+
+def collect(scenario: Scenario, options: Dict[str, Any], workdir: str) -> List[Benchmark]:
+    """Prepare the data of every stage and return their benchmarks
+
+    Args:
+        scenario (Scenario): size of the synthetic test
+        options (dict): command line options the algorithms and formatters
+            run with
+        workdir (str): directory the HTML visualization is written to
+
+    Returns:
+        list: Benchmark of every stage, in pipeline order
+    """
+    test = _test_config(scenario)
+    client = _store(scenario, test).client()
+    agg_metrics = [metric for metric in test["metrics"] if "agg" in metric]
+    std_metrics = [metric for metric in test["metrics"] if "agg" not in metric]
+    meta_match = Matcher(index=METADATA_INDEX, es=client)
+    match = Matcher(index=BENCHMARK_INDEX, es=client)
+
+    runs = meta_match.get_uuid_by_metadata(test["metadata"], lookback_size=scenario.runs)
+    uuids = [run["uuid"] for run in runs]
+    agg_search = match.agg_batch_search(uuids, copy.deepcopy(agg_metrics), "timestamp")
+    agg_response = client.search(index=BENCHMARK_INDEX, body=agg_search.to_dict())
+    batches = {
+        **match.get_agg_metrics_batch(uuids, copy.deepcopy(agg_metrics)),
+        **match.get_results_batch(uuids, copy.deepcopy(std_metrics)),
+    }
+
+    utils = Utils(test["uuid_field"], test["version_field"])
+    utils.coordinator = _Prefetched(batches)
+    versions = {run["uuid"]: run["ocpVersion"] for run in runs}
+    build_urls = {run["uuid"]: run["buildUrl"] for run in runs}
+
+    def assemble(metrics):
+        frames, metrics_config, metadata_columns = utils.get_metric_data(uuids, metrics, match, 0)
+        frame = utils._assemble_dataframe(
+            frames, runs, build_urls, versions, {uuid: [] for uuid in uuids}, options
+        )
+        return frame, metrics_config, metadata_columns
+
+    dataframe, metrics_config, test["metadata_columns"] = assemble(copy.deepcopy(test["metrics"]))
+    factory = AlgorithmFactory()
+
+    def algorithm_setup(name):
+        def setup():
+            frame = dataframe.copy()
+            if name == cnsts.ISOLATION_FOREST:
+                frame = frame.dropna().reset_index()
+            return (factory.instantiate_algorithm(name, frame, test, options, metrics_config),)
+        return setup
+
+    edivisive = algorithm_setup(cnsts.EDIVISIVE)()[0]
+    _, change_points = edivisive.get_analysis_results()
+    result = build_analysis_result(
+        test, options, edivisive, metrics_config, change_points, edivisive.regression_flag
+    )
+    viz_data = VizData(
+        test_name=test["name"],
+        dataframe=dataframe,
+        metrics_config=metrics_config,
+        change_points_by_metric=change_points,
+        uuid_field=test["uuid_field"],
+        version_field=test["version_field"],
+    )
+    html_file = os.path.join(workdir, "benchmark.html")
+
+    benchmarks = [
+        Benchmark("fetch.uuid_lookup", lambda: meta_match.get_uuid_by_metadata(
+            test["metadata"], lookback_size=scenario.runs)),
+        Benchmark("fetch.agg_batch", lambda metrics: match.get_agg_metrics_batch(uuids, metrics),
+                  lambda: (copy.deepcopy(agg_metrics),)),
+        Benchmark("fetch.results_batch", lambda metrics: match.get_results_batch(uuids, metrics),
+                  lambda: (copy.deepcopy(std_metrics),)),
+        Benchmark("fetch.parse_agg", lambda: match.parse_batch_agg_results(
+            Response(search=agg_search, response=agg_response), agg_metrics)),
+        Benchmark("assemble.dataframe", assemble, lambda: (copy.deepcopy(test["metrics"]),)),
+    ]
+    benchmarks.extend(
+        Benchmark(f"analyze.{name}", lambda algorithm: algorithm._analyze(), algorithm_setup(name))
+        for name in BUILTIN_ALGORITHMS
+    )
+    benchmarks.extend(
+        Benchmark(f"format.{output_format}", FormatterFactory.get_formatter(output_format).format,
+                  lambda: (result,))
+        for output_format in FORMATS
+    )
+    benchmarks.append(Benchmark("report.html", lambda: generate_test_html(viz_data, html_file)))
+    return benchmarks
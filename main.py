@@ -5,264 +5,27 @@ This is the cli file for orion, tool to detect regressions using hunter
 # pylint: disable = import-error, line-too-long, no-member
 import json
 import logging
-import os
-from pathlib import Path
-import re
 import sys
 import warnings
-from typing import Any, Optional
+from typing import Any
 import click
 from orion.logger import SingletonLogger
-from orion.run_test import run
-from orion.pipeline.formatters import FormatterFactory
 from orion import constants as cnsts
-from orion.config import load_config, collect_pull_numbers
-from orion.visualization import generate_test_html
-from orion.reporting.standalone import load_json_files, generate_report
-from orion.reporting.summary import print_regression_summary
-from orion.ack_providers import AckProvider, FileAckProvider, JiraAckProvider
 from version import __version__
 
+# The analysis, output, report and ACK subsystems pull in pandas, otava,
+# scikit-learn, plotly, opensearch and jira. They are imported in the code
+# paths that use them, so --help, --version and --report start quickly;
+# test_startup.py enforces this. The --configs, --watch, --explain and
+# --serve runs are driven from orion/fleet.py, orion/watch.py,
+# orion/explain.py and orion/server.py.
+
 warnings.filterwarnings("ignore", message="Unverified HTTPS request.*")
 warnings.filterwarnings(
     "ignore", category=UserWarning, message=".*Connecting to.*verify_certs=False.*"
 )
 
 
-def build_viz_output_file(
-    output_base_path: str, test_name: str, run_type: str = ""
-) -> str:
-    """Build the output path for a visualization HTML file."""
-    suffix = f"_{run_type}" if run_type else ""
-    return f"{output_base_path}_{test_name}{suffix}_viz.html"
-
-
-def _format_pr_section(prs: list, prev_ver: str, bad_ver: str) -> str:
-    """Format the PR section of JIRA description."""
-    if not prs:
-        return ""
-
-    section = "h3. Related Pull Requests\n"
-    section += f"PRs introduced between {prev_ver} and {bad_ver}:\n\n"
-    for pr in prs:
-        if isinstance(pr, str):
-            section += f"* {pr}\n"
-        elif isinstance(pr, dict):
-            pr_url = pr.get("url", pr.get("html_url", ""))
-            pr_title = pr.get("title", "")
-            if pr_url and pr_title:
-                section += f"* [{pr_title}|{pr_url}]\n"
-            elif pr_url:
-                section += f"* {pr_url}\n"
-    section += "\n"
-    return section
-
-
-def _format_github_context(github_context: dict) -> str:
-    """Format the GitHub context section (commits and releases)."""
-    if not github_context:
-        return ""
-
-    repos = github_context.get("repositories", {})
-    if not repos:
-        return ""
-
-    section = "h3. GitHub Context\n"
-    for repo_name, repo_data in repos.items():
-        commits = repo_data.get("commits", {})
-        if commits.get("count", 0) > 0:
-            section += f"h4. {repo_name} - Commits ({commits['count']})\n"
-            for commit in commits.get("items", [])[:10]:
-                msg = commit.get("message", "").split("\n")[0][:80]
-                url = commit.get("html_url", "")
-                date = commit.get("commit_timestamp", "")
-                author = commit.get("commit_author", {}).get("email", "")
-                if url:
-                    section += f"* [{msg}|{url}] - {author} - {date}\n"
-                else:
-                    section += f"* {msg} - {author} - {date}\n"
-            if commits.get("count", 0) > 10:
-                section += f"* _... and {commits['count'] - 10} more commits_\n"
-            section += "\n"
-
-        releases = repo_data.get("releases", {})
-        if releases.get("count", 0) > 0:
-            section += f"h4. {repo_name} - Releases ({releases['count']})\n"
-            for release in releases.get("items", [])[:5]:
-                name = release.get("name", release.get("tag_name", ""))
-                url = release.get("html_url", "")
-                date = release.get("published_at", "")
-                if url:
-                    section += f"* [{name}|{url}] - {date}\n"
-                else:
-                    section += f"* {name} - {date}\n"
-            section += "\n"
-
-    return section
-
-
-def format_jira_description(regression: dict, metric_name: str, pct_change: float, build_id: str = "") -> str:
-    """
-    Format a rich JIRA description with all regression details.
-
-    Args:
-        regression: Regression data dictionary
-        metric_name: Name of the specific metric for this issue
-        pct_change: Percentage change for this metric
-        build_id: Build ID extracted from the build URL
-
-    Returns:
-        Formatted JIRA description text
-    """
-    # Build description using JIRA markup
-    desc = "h2. Performance Regression Detected by Orion\n\n"
-
-    # Basic info
-    desc += "h3. Changepoint Details\n"
-    desc += f"*Test:* {regression.get('test_name')}\n"
-    desc += f"*UUID:* {{{regression.get('uuid')}}}\n"
-    desc += f"*Version Change:* {regression.get('prev_ver')} → {regression.get('bad_ver')}\n"
-    if regression.get("timestamp"):
-        desc += f"*Timestamp:* {regression.get('timestamp')}\n"
-    if regression.get("buildUrl"):
-        desc += f"*Regressing build URL:* [View Build|{regression.get('buildUrl')}]\n"
-    if build_id:
-        desc += f"*Build ID:* {build_id}\n"
-
-    # If orion is running in Prow, add the current job build URL to the JIRA issue description
-    if os.getenv("PROW_JOB_ID") and os.getenv("JOB_NAME") and os.getenv("BUILD_ID"):
-        prow_base_url=f"https://prow.ci.openshift.org/view/gs/origin-ci-test/logs/{os.getenv('JOB_NAME')}/{os.getenv('BUILD_ID')}"
-        desc += f"*Created by job:* [{os.getenv('JOB_NAME')}|{prow_base_url}]\n"
-    desc += "\n"
-
-    # Primary metric for this issue
-    desc += "h3. Primary Regression\n"
-    desc += f"*Metric:* {metric_name}\n"
-    desc += f"*Change:* {pct_change:+.2f}%\n"
-    desc += "\n"
-
-    # All affected metrics
-    metrics_with_change = regression.get("metrics_with_change", [])
-    if len(metrics_with_change) > 1:
-        desc += "h3. All Affected Metrics\n"
-        desc += "|| Metric || Change || Value ||\n"
-        for metric in metrics_with_change:
-            labels = metric.get("labels", [])
-            label_str = f" ({', '.join(labels)})" if labels else ""
-            desc += f"| {metric.get('name')}{label_str} | {metric.get('percentage_change', 0):+.2f}% | {metric.get('value', 'N/A')} |\n"
-        desc += "\n"
-
-    # Add PR and GitHub context sections
-    desc += _format_pr_section(
-        regression.get("prs", []),
-        regression.get("prev_ver", ""),
-        regression.get("bad_ver", "")
-    )
-    desc += _format_github_context(regression.get("github_context"))
-
-    # Footer
-    desc += "----\n"
-    desc += "_This issue was automatically created by Orion regression detection._\n"
-
-    return desc
-
-
-def auto_create_jira_issues(regression_data: list, provider: AckProvider, logger) -> tuple[int, dict[str, list[str]]]:  # pylint: disable=too-many-locals
-    """
-    Automatically create JIRA issues for detected regressions.
-
-    Args:
-        regression_data: List of regression dictionaries from run()
-        provider: JIRA ACK provider to use for creation
-        logger: Logger instance
-
-    Returns:
-        Tuple of (created_count, issue_keys_by_test) where issue_keys_by_test
-        maps test_name to a list of created JIRA issue keys.
-    """
-    issue_keys_by_test: dict[str, list[str]] = {}
-    if not regression_data:
-        return 0, issue_keys_by_test
-
-    created_count = 0
-    skipped_count = 0
-
-    for regression in regression_data:
-        uuid = regression.get("uuid")
-        if not uuid:
-            logger.warning("Skipping JIRA creation: no UUID in regression data")
-            continue
-
-        # Create JIRA issue for each regressed metric
-        for metric_info in regression.get("metrics_with_change", []):
-            metric_name = metric_info.get("name")
-            if not metric_name:
-                continue
-
-            pct_change = metric_info.get("percentage_change", 0)
-
-            logger.info(
-                "Creating JIRA issue for regression: test=%s, uuid=%s, metric=%s, change=%+.2f%%",
-                regression.get("test_name"), uuid[:8], metric_name, pct_change
-            )
-
-            try:
-                # Normalize versions to short format (e.g., "4.22" from "4.22.0-ec.3")
-                bad_ver = regression.get("bad_ver")
-                prev_ver = regression.get("prev_ver")
-
-                # Extract Build ID from Build URL (once, for use in both rich and simple formats)
-                build_url = regression.get("buildUrl", "")
-                build_id = build_url.rstrip('/').split('/')[-1] if build_url else ""
-
-                issue_key = provider.create_ack(
-                    uuid=uuid,
-                    metric=metric_name,
-                    reason=format_jira_description(regression, metric_name, pct_change, build_id),
-                    version=str(bad_ver)[:4].rstrip('.') if bad_ver else None,
-                    test=regression.get("benchmark_type") or regression.get("test_name"),
-                    build_url=build_url,
-                    build_id=build_id,
-                    pct_change=f"{pct_change:+.2f}",
-                    prev_version=str(prev_ver)[:4].rstrip('.') if prev_ver else None
-                )
-
-                if issue_key:
-                    created_count += 1
-                    logger.info("✓ Created JIRA issue %s for %s / %s", issue_key, uuid[:8], metric_name)
-                    test_name = regression.get("test_name")
-                    if test_name:
-                        issue_keys_by_test.setdefault(test_name, []).append(issue_key)
-                else:
-                    skipped_count += 1
-                    logger.debug("Skipped (likely already exists): %s / %s", uuid[:8], metric_name)
-
-            except Exception as e:  # pylint: disable=broad-exception-caught
-                logger.error("Failed to create JIRA issue for %s / %s: %s", uuid[:8], metric_name, e)
-                skipped_count += 1
-
-    if created_count > 0:
-        logger.info("📝 Created %d JIRA issue(s) for regressions", created_count)
-    if skipped_count > 0:
-        logger.debug("Skipped %d issue(s) (already exist or failed)", skipped_count)
-
-    return created_count, issue_keys_by_test
-
-
-def _attach_viz_to_jira(
-    jira_provider, issue_keys_by_test: dict[str, list[str]],
-    output_base_path: str, run_type: str, logger
-) -> None:
-    """Attach generated HTML visualization files to their corresponding JIRA issues."""
-    for test_name, keys in issue_keys_by_test.items():
-        viz_file = build_viz_output_file(output_base_path, test_name, run_type)
-        if not os.path.isfile(viz_file):
-            logger.debug("Viz file not found for %s, skipping attachment", test_name)
-            continue
-        for issue_key in keys:
-            jira_provider.attach_file(issue_key, viz_file)
-
-
 class Dictionary(click.ParamType):
     """Class to define a custom click type for dictionaries
 
@@ -271,6 +34,8 @@ class Dictionary(click.ParamType):
     """
     name = "dictionary"
     def convert(self, value: Any, param: Any, ctx: Any) -> dict:
+        if isinstance(value, dict):
+            return value
         return json.loads(value)
 
 class List(click.ParamType):
@@ -325,94 +90,18 @@ def validate_anomaly_options(ctx, param, value: Any) -> Any: # pylint: disable =
     return value
 
 
-def _resolve_template_variable(value: str, input_vars: dict) -> str:
-    """Resolve template variable like {{VERSION}} from input_vars."""
-    if not value or "{{" not in str(value):
-        return str(value).strip('"')
-
-    match = re.search(r'\{\{\s*(\w+)\s*\}\}', str(value))
-    if match:
-        var_name = match.group(1)
-        return input_vars.get(var_name) or input_vars.get(var_name.lower())
-    return value
-
-
-def _extract_version_and_test(config: dict, input_vars: dict) -> tuple:
-    """Extract version and test type from config."""
-    if "tests" not in config or not config["tests"]:
-        return None, None
-
-    test = config["tests"][0]
-    metadata = test.get("metadata", {})
-
-    # Resolve version
-    version_field = test.get("version_field", "ocpVersion")
-    version = _resolve_template_variable(metadata.get(version_field, ""), input_vars)
-
-    # Resolve test type
-    test_type = _resolve_template_variable(metadata.get("benchmark.keyword", ""), input_vars)
-
-    return version, test_type
-
-
-def _create_jira_provider(kwargs: dict, config: dict, logger) -> JiraAckProvider:
-    """Create and initialize a JIRA ACK provider."""
-    jira_url = kwargs.get("jira_url") or config.get("jira_url")
-    if not jira_url:
-        logger.error("JIRA URL required when --jira-ack is enabled. Use --jira-url or set JIRA_URL env var")
-        sys.exit(1)
-
-    try:
-        provider = JiraAckProvider(
-            jira_url=jira_url,
-            project=kwargs.get("jira_project", "PERFSCALE"),
-            component=kwargs.get("jira_component", "CPT_ISSUES"),
-            token=kwargs.get("jira_token") or config.get("jira_token"),
-            email=kwargs.get("jira_email") or config.get("jira_email"),
-            uuid_field=config.get("jira_uuid_field", "description"),
-            metric_field=config.get("jira_metric_field", "labels"),
-            status=kwargs.get("jira_status_filter") or None,
-        )
-        logger.info("✓ JIRA ACK provider initialized: %s/%s",
-                   provider.project, provider.component)
-        return provider
-    except Exception as e:  # pylint: disable=broad-exception-caught
-        logger.error("Failed to initialize JIRA provider: %s", e)
-        logger.error("See JIRA_PERMISSIONS_TROUBLESHOOTING.md for help")
-        sys.exit(1)
-
-
-def get_ack_providers(kwargs: dict, config: dict, logger) -> tuple[list[AckProvider], Optional[str], Optional[str]]:
-    """
-    Factory function to create ACK providers based on configuration.
-
-    Args:
-        kwargs: CLI arguments
-        config: Loaded configuration dict
-        logger: Logger instance
-
-    Returns:
-        Tuple of (list of ACK provider instances, version string, test type string)
+def validate_algorithms(ctx, param, value: Any) -> Any: # pylint: disable = W0613
+    """ validate the names given to --algorithms
     """
-    providers = []
-
-    # Extract version and test type from config
-    version, test_type = _extract_version_and_test(config, kwargs["input_vars"])
-
-    # JIRA provider
-    if kwargs.get("jira_ack"):
-        providers.append(_create_jira_provider(kwargs, config, logger))
-
-    # Manual ACK files (processed if provided via --ack)
-    if kwargs.get("ack"):
-        for ack_file in [f.strip() for f in kwargs["ack"].split(",") if f.strip()]:
-            providers.append(FileAckProvider(ack_file))
-            logger.info("✓ Manual file ACK provider initialized: %s", ack_file)
-
-    return providers, version, test_type
+    if not value:
+        return []
+    from orion.consensus import parse_algorithms  # pylint: disable=import-outside-toplevel
+    try:
+        return parse_algorithms(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e)) from e
 
 
-# pylint: disable=too-many-locals
 @click.version_option(version=__version__, message="%(prog)s %(version)s")
 @click.command(context_settings={"show_default": True, "max_content_width": 180})
 @click.option(
@@ -420,7 +109,7 @@ def get_ack_providers(kwargs: dict, config: dict, logger) -> tuple[list[AckProvi
     is_flag=True,
     help="Generate percent difference in comparison",
     cls=MutuallyExclusiveOption,
-    mutually_exclusive=["anomaly_detection","hunter_analyze"],
+    mutually_exclusive=["anomaly_detection","hunter_analyze","hunter_fast","cusum","algorithms"],
 )
 @click.option("--filter", is_flag=True, help="Generate percent difference in comparison")
 @click.option(
@@ -431,6 +120,17 @@ def get_ack_providers(kwargs: dict, config: dict, logger) -> tuple[list[AckProvi
     help="Launch interactive wizard to configure all options conversationally",
 )
 @click.option("--config", help="Path to the configuration file", required=False, default=None)
+@click.option("--configs", default=None, help="Comma-separated config files or glob patterns (e.g. 'examples/*.yaml') analyzed in one process with a shared OpenSearch client, ACK providers and worker pool; each config is reported as a separate --config run")
+@click.option("--fleet-workers", type=int, default=4, help="Number of tests analyzed concurrently with --configs")
+@click.option("--explain", is_flag=True, default=False, help="Print the searches each test would issue with their estimated hits, round trips and bytes, and flag costly metrics, without running the analysis")
+@click.option("--watch", is_flag=True, default=False, help="Keep running and analyze the tests of --config only when new runs land in the metadata index")
+@click.option("--watch-interval", type=float, default=cnsts.WATCH_INTERVAL, help="Seconds between two --watch polls of the metadata index")
+@click.option("--watch-state", default=None, help="Directory to keep the newest analyzed run of each --watch test, so a restarted watcher only analyzes newer runs")
+@click.option("--serve", is_flag=True, default=False, help="Run as a service accepting analysis jobs over an HTTP/JSON API, keeping OpenSearch clients, ACKs, configs and fetched data warm between jobs")
+@click.option("--serve-host", default="127.0.0.1", help="Address the --serve API listens on")
+@click.option("--serve-port", type=int, default=8080, help="Port the --serve API listens on")
+@click.option("--serve-workers", type=int, default=4, help="Number of jobs analyzed concurrently with --serve")
+@click.option("--serve-config-dir", default=None, help="Directory the config paths of --serve jobs are read from; without it, jobs must send their config as config_content")
 @click.option("--ack", default="", help="Optional ack YAML to ack known regressions (can specify multiple files separated by comma)")
 @click.option("--jira-ack", is_flag=True, default=False, help="Use JIRA to track and retrieve acknowledgments instead of YAML files")
 @click.option("--jira-url", default="https://issues.redhat.com", envvar="JIRA_URL", help="JIRA instance URL (e.g., https://issues.redhat.com). Can be set via JIRA_URL env var")
@@ -456,17 +156,46 @@ def get_ack_providers(kwargs: dict, config: dict, logger) -> tuple[list[AckProvi
     is_flag=True,
     help="run hunter analyze",
     cls=MutuallyExclusiveOption,
-    mutually_exclusive=["anomaly_detection","cmr"],
+    mutually_exclusive=["anomaly_detection","cmr","hunter_fast","cusum","algorithms"],
+)
+@click.option(
+    "--hunter-fast",
+    is_flag=True,
+    help="run hunter analyze on orion's NumPy E-Divisive engine (same changepoints, faster on long series and many metrics)",
+    cls=MutuallyExclusiveOption,
+    mutually_exclusive=["anomaly_detection","cmr","hunter_analyze","cusum","algorithms"],
 )
 @click.option("--anomaly-window", type=int, callback=validate_anomaly_options, help="set window size for moving average for anomaly-detection")
 @click.option("--min-anomaly-percent", type=int, callback=validate_anomaly_options, help="set minimum percentage difference from moving average for data point to be detected as anomaly")
+@click.option("--anomaly-model-dir", default=None, help="Directory to keep the fitted isolation forest of each test, so later runs only score the runs they have not seen. Models are pickled: use a directory only you can write to; model files owned by another user or writable by others are ignored")
+@click.option("--anomaly-refit-hours", type=float, default=cnsts.ANOMALY_REFIT_HOURS, help="Refit a model stored with --anomaly-model-dir once it is older than this many hours")
 @click.option(
     "--anomaly-detection",
     is_flag=True,
     help="run anomaly detection algorithm powered by isolation forest",
     cls=MutuallyExclusiveOption,
-    mutually_exclusive=["hunter_analyze","cmr"],
+    mutually_exclusive=["hunter_analyze","cmr","hunter_fast","cusum","algorithms"],
+)
+@click.option(
+    "--cusum",
+    is_flag=True,
+    help="run the online CUSUM detector, which only needs the runs appended since the last invocation when used with --online-state",
+    cls=MutuallyExclusiveOption,
+    mutually_exclusive=["anomaly_detection","cmr","hunter_analyze","hunter_fast","algorithms"],
+)
+@click.option(
+    "--algorithms",
+    type=List(),
+    default=None,
+    callback=validate_algorithms,
+    help="Comma-separated algorithms to run on the same fetched data (edivisive, edivisive_fast, isolation, cmr, cusum), reporting each algorithm's changepoints and their consensus",
+    cls=MutuallyExclusiveOption,
+    mutually_exclusive=["anomaly_detection","cmr","hunter_analyze","hunter_fast","cusum"],
 )
+@click.option("--consensus-min", type=int, default=None, help="Number of --algorithms that must flag the same metric within --consensus-tolerance runs for a consensus changepoint (default: a majority)")
+@click.option("--consensus-tolerance", type=click.IntRange(min=0), default=cnsts.CONSENSUS_TOLERANCE, help="Runs apart that changepoints of --algorithms may be and still agree; 0 requires the same run")
+@click.option("--cusum-threshold", type=float, default=cnsts.CUSUM_THRESHOLD, help="CUSUM decision threshold, in standard deviations of the reference runs")
+@click.option("--online-state", default=None, help="Directory to keep the CUSUM state of each test between runs")
 @click.option(
     "-o",
     "--output-format",
@@ -486,6 +215,10 @@ def get_ack_providers(kwargs: dict, config: dict, logger) -> tuple[list[AckProvi
 @click.option("--collapse", is_flag=True, help="For text output: only print regression summary to stdout (full table always saved to file). For JSON output: only include changepoint context rows.")
 @click.option("--node-count", default=False, help="Match any node iterations count")
 @click.option("--lookback-size", type=int, default=10000, help="Maximum number of entries to be looked back")
+@click.option("--analysis-workers", type=int, default=1, help="Number of processes to split the metrics of a test across during analysis (jobs used to fit the isolation forest with --anomaly-detection)")
+@click.option("--incremental-state", default=None, help="Directory to keep the Hunter analysis state of each test, so the next run only re-analyzes the runs appended since")
+@click.option("--incremental-overlap", type=int, default=0, help="Extra points before the appended runs to re-analyze with --incremental-state")
+@click.option("--stream-metrics", is_flag=True, default=False, help="Merge each metric as soon as its chunk is fetched and only fetch the fields needed, bounding memory for very large configs")
 @click.option("--es-server", type=str, envvar="ES_SERVER", help="Elasticsearch endpoint where test data is stored, can be set via env var ES_SERVER", default="")
 @click.option("--benchmark-index", type=str, envvar=["ES_BENCHMARK_INDEX", "es_benchmark_index"],  help="Index where test data is stored, can be set via env var ES_BENCHMARK_INDEX or es_benchmark_index", default="")
 @click.option("--metadata-index", type=str, envvar=["ES_METADATA_INDEX", "es_metadata_index"],  help="Index where metadata is stored, can be set via env var ES_METADATA_INDEX or es_metadata_index", default="")
@@ -493,7 +226,13 @@ def get_ack_providers(kwargs: dict, config: dict, logger) -> tuple[list[AckProvi
 @click.option("--display", type=List(), default=["buildUrl"], help="Add metadata field as a column in the output (e.g. ocpVirt, upstreamJob)")
 @click.option("--pr-analysis", is_flag=True, help="Analyze PRs for regressions", default=False)
 @click.option("--pull-number", type=int, multiple=True, help="PR number(s) to analyze (repeatable, e.g. --pull-number 1234 --pull-number 5678)")
+@click.option("--baseline-cache", default=None, help="Directory to share the periodic baseline analysis between --pr-analysis runs of the same config and test")
+@click.option("--baseline-cache-max-age", type=float, default=6, help="Maximum age in hours of a cached periodic baseline before it is recomputed")
 @click.option("--viz", is_flag=True, default=False, help="Generate interactive HTML visualizations alongside output")
+@click.option("--save-snapshot", default=None, help="Directory to save the fetched data of each test, for later re-analysis with --from-snapshot")
+@click.option("--from-snapshot", default=None, help="Directory of data snapshots saved by a previous run with --save-snapshot; re-runs the analysis without querying ES/OS")
+@click.option("--record", default=None, help="Directory to save every ES/OS request and response of the run to, for a later --replay")
+@click.option("--replay", default=None, help="Directory of ES/OS traffic saved by a previous run with --record; serves every request from it without network")
 @click.option(
     "--report",
     default=None,
@@ -519,14 +258,28 @@ def main(**kwargs):
         level = logging.DEBUG if kwargs["debug"] else logging.INFO
         logger = SingletonLogger(debug=level, name="Orion")
         logger.info("Orion version: %s", __version__)
+        from orion.reporting.standalone import load_json_files, generate_report  # pylint: disable=import-outside-toplevel
         files = [f.strip() for f in report_value.split(",") if f.strip()]
         data = load_json_files(files)
         has_regression = generate_report(data)
         sys.exit(2 if has_regression else 0)
 
-    # --config is required for normal operation
-    if not kwargs.get("config"):
-        click.echo("Error: --config is required (unless using --report with JSON file paths or --interactive mode / -i)", err=True)
+    if kwargs.get("serve"):
+        level = logging.DEBUG if kwargs["debug"] else logging.INFO
+        logger = SingletonLogger(debug=level, name="Orion")
+        logger.info("Orion version: %s", __version__)
+        # pylint: disable=import-outside-toplevel
+        from orion.cassette import prepare_cassette
+        from orion.server import run_service
+        prepare_cassette(kwargs, logger)
+        sys.exit(run_service(kwargs, logger, main))
+
+    # --config (or --configs) is required for normal operation
+    if not kwargs.get("config") and not kwargs.get("configs"):
+        click.echo("Error: --config or --configs is required (unless using --report with JSON file paths, --serve or --interactive mode / -i)", err=True)
+        sys.exit(1)
+    if kwargs.get("config") and kwargs.get("configs"):
+        click.echo("Error: --config and --configs are mutually exclusive", err=True)
         sys.exit(1)
 
     level = logging.DEBUG if kwargs["debug"] else logging.INFO
@@ -534,9 +287,35 @@ def main(**kwargs):
         level = logging.ERROR
     logger = SingletonLogger(debug=level, name="Orion")
     logger.info("🏹 Starting Orion (%s) in command-line mode", __version__)
+    # pylint: disable=import-outside-toplevel
+    from orion.cassette import prepare_cassette
+    prepare_cassette(kwargs, logger)
+
+    if kwargs.get("configs") and (kwargs.get("watch") or kwargs.get("explain")):
+        logger.error("--watch and --explain take a single --config")
+        sys.exit(1)
+    if kwargs.get("watch"):
+        from orion.watch import run_watch
+        try:
+            sys.exit(run_watch(kwargs, logger))
+        except KeyboardInterrupt:
+            logger.info("Stopping watch")
+            sys.exit(0)
+    if kwargs.get("configs"):
+        from orion.fleet import run_fleet
+        sys.exit(run_fleet(kwargs, logger))
+
+    from orion.ack_providers import AckIndex, JiraAckProvider
+    from orion.ack_providers.factory import create_jira_provider, get_ack_providers
+    from orion.config import load_config, prepare_run
+    from orion.reporting.results import write_results
+    from orion.run_test import run
 
     # Load config first (needed for auto-detection)
     kwargs["config"] = load_config(kwargs["config"], kwargs["input_vars"])
+    if kwargs.get("explain"):
+        from orion.explain import run_explain
+        sys.exit(run_explain(kwargs, logger))
 
     # Handle ACK loading using provider system
     providers, version, test_type = get_ack_providers(kwargs, kwargs["config"], logger)
@@ -551,232 +330,20 @@ def main(**kwargs):
 
     # If --jira-auto-create without --jira-ack, create a Jira provider for issue creation only
     if kwargs.get("jira_auto_create") and not jira_provider:
-        jira_provider = _create_jira_provider(kwargs, kwargs["config"], logger)
-
-    if providers:
-        # Collect ACKs from all providers
-        all_acks = []
-        for provider in providers:
-            try:
-                acks = provider.get_acks(version=version, test_type=test_type)
-                if acks:
-                    all_acks.extend(acks)
-                    logger.info(
-                        "✓ Loaded %d ACK entries from %s (version=%s, test=%s)",
-                        len(acks),
-                        provider.__class__.__name__,
-                        version or "all",
-                        test_type or "all"
-                    )
-            except Exception as e:  # pylint: disable=broad-exception-caught
-                logger.error("Failed to load ACKs from %s: %s", provider.__class__.__name__, e)
-
-        # Merge and deduplicate
-        if all_acks:
-            # Use the base provider's merge method to deduplicate
-            merged_acks = providers[0].merge_acks([all_acks])
-            kwargs["ackMap"] = {"ack": merged_acks}
-            logger.info("✓ Total ACK entries loaded: %d (after deduplication)", len(merged_acks))
-        else:
-            kwargs["ackMap"] = None
-            logger.debug("No ACK entries loaded")
-    else:
-        kwargs["ackMap"] = None
-        logger.info("No ACK providers configured")
-
-    if not kwargs["metadata_index"] or not kwargs["es_server"]:
-        logger.error("metadata-index and es-server flags must be provided")
-        sys.exit(1)
-    if kwargs["pr_analysis"]:
-        input_vars = kwargs["input_vars"]
-        required_var_env = {
-            "jobtype": ["JOBTYPE", "jobtype"],
-            "pull_number": ["PULL_NUMBER", "pull_number"],
-            "organization": ["ORGANIZATION", "organization"],
-            "repository": ["REPOSITORY", "repository"],
-        }
+        jira_provider = create_jira_provider(kwargs, kwargs["config"], logger)
 
-        # Fill missing required vars from environment when available.
-        for key, env_keys in required_var_env.items():
-            if key not in input_vars or str(input_vars.get(key, "")).strip() == "":
-                for env_key in env_keys:
-                    env_val = os.getenv(env_key)
-                    if env_val is not None and str(env_val).strip() != "":
-                        input_vars[key] = str(env_val).strip()
-                        break
+    kwargs["ackMap"] = AckIndex(providers).ack_map(version=version, test_type=test_type)
 
-        missing_vars = []
-        if "jobtype" not in input_vars:
-            missing_vars.append("jobtype")
-        if "organization" not in input_vars:
-            missing_vars.append("organization")
-        if "repository" not in input_vars:
-            missing_vars.append("repository")
-
-        try:
-            pull_numbers = collect_pull_numbers(kwargs, input_vars)
-        except ValueError as exc:
-            logger.error("Invalid pull number: %s", exc)
-            sys.exit(1)
-        if not pull_numbers:
-            missing_vars.append("pull_number (via --pull-number, "
-                                "--input-vars pull_number, or pull_numbers)")
-        if missing_vars:
-            logger.error(
-                "Missing required input variables: %s",
-                ", ".join(missing_vars),
-            )
-            sys.exit(1)
-        kwargs["pull_numbers"] = pull_numbers
-        logger.info("PR analysis for pull numbers: %s", pull_numbers)
+    prepare_run(kwargs, logger)
+    if kwargs.get("record") or kwargs.get("replay"):
+        from orion.matcher import Matcher
+        kwargs["_es_client"] = Matcher.create_client(
+            kwargs["es_server"], verify_certs=False, record=kwargs.get("record"), replay=kwargs.get("replay")
+        )
     results, results_pull, analyses_by_pr = run(**kwargs)
-    is_pull = bool(results_pull.analyses)
-
-    # Auto-create JIRA issues for regressions if enabled
-    issue_keys_by_test = {}
-    issue_keys_by_test_pull_by_pr: dict[int, dict[str, list[str]]] = {}
-    if kwargs.get("jira_auto_create") and jira_provider:
-        formatter_for_regression = FormatterFactory.get_formatter(cnsts.JSON)
-        if results.regression_flag:
-            logger.info("Auto-creating JIRA issues for detected regressions...")
-            all_reg_data = []
-            for analysis in results.analyses:
-                all_reg_data.extend(
-                    formatter_for_regression.extract_regression_data(analysis)
-                )
-            created, issue_keys_by_test = auto_create_jira_issues(all_reg_data, jira_provider, logger)
-            if created == 0 and all_reg_data:
-                logger.warning(
-                    "No JIRA issues were created. This may be due to permissions. "
-                    "See JIRA_PERMISSIONS_TROUBLESHOOTING.md for help."
-                )
-        if is_pull and results_pull.regression_flag:
-            logger.info("Auto-creating JIRA issues for pull request regressions...")
-            for pr_num, pr_analyses in analyses_by_pr.items():
-                pr_reg_data = []
-                for analysis in pr_analyses:
-                    if analysis.regression_flag:
-                        pr_reg_data.extend(
-                            formatter_for_regression.extract_regression_data(analysis)
-                        )
-                if not pr_reg_data:
-                    continue
-                created, issue_keys = auto_create_jira_issues(pr_reg_data, jira_provider, logger)
-                if created == 0 and pr_reg_data:
-                    logger.warning(
-                        "No JIRA issues were created for PR %s. This may be due to permissions. "
-                        "See JIRA_PERMISSIONS_TROUBLESHOOTING.md for help.",
-                        pr_num,
-                    )
-                issue_keys_by_test_pull_by_pr[pr_num] = issue_keys
-
-    formatter = FormatterFactory.get_formatter(kwargs["output_format"])
-    has_regression = False
-    all_regression_data = []
-
-    if not results.analyses:
-        logger.error("Terminating test")
-        sys.exit(0)
-
-    if is_pull:
-        for analysis in results.analyses:
-            test_name = analysis.test_name
-            pulls = []
-            for pr_num in results_pull.prs:
-                pr_analyses = analyses_by_pr.get(pr_num, [])
-                pull_analysis = next(
-                    (a for a in pr_analyses if a.test_name == test_name),
-                    None,
-                )
-                pulls.append((pr_num, pull_analysis))
-            formatter.print_and_save_pr(
-                analysis,
-                pulls,
-                kwargs["save_output_path"],
-            )
-
-            if analysis.regression_flag:
-                has_regression = True
-                regression_data = formatter.extract_regression_data(
-                    analysis
-                )
-                all_regression_data.extend(regression_data)
-    else:
-        for analysis in results.analyses:
-            formatted = formatter.format(analysis)
-            formatter.save(
-                analysis.test_name,
-                formatted[analysis.test_name],
-                kwargs["save_output_path"],
-            )
-            formatter.print_output(
-                analysis.test_name,
-                formatted[analysis.test_name],
-                analysis,
-            )
-
-            if analysis.regression_flag:
-                has_regression = True
-                regression_data = formatter.extract_regression_data(
-                    analysis
-                )
-                all_regression_data.extend(regression_data)
-
-    # Prow CI: always save JSON regardless of output format
-    prow_job_id = os.getenv("PROW_JOB_ID")
-    if (
-        prow_job_id
-        and prow_job_id.strip()
-        and kwargs["output_format"] != cnsts.JSON
-    ):
-        json_formatter = FormatterFactory.get_formatter(cnsts.JSON)
-        for analysis in results.analyses:
-            json_formatted = json_formatter.format(analysis)
-            json_formatter.save(
-                analysis.test_name,
-                json_formatted[analysis.test_name],
-                kwargs["save_output_path"],
-            )
-
-    if kwargs["output_format"] != cnsts.JSON:
-        if has_regression:
-            print_regression_summary(all_regression_data)
-        else:
-            print("No regressions found")
-
-    if kwargs.get("viz"):
-        try:
-            output_base_path = str(Path(kwargs['save_output_path']).with_suffix(''))
-            for viz_data in results.viz_data:
-                run_type = "periodic" if is_pull else ""
-                output_file = build_viz_output_file(
-                    output_base_path, viz_data.test_name, run_type
-                )
-                generate_test_html(viz_data, output_file)
-            if is_pull:
-                for pr_num, viz_data in results_pull.viz_data:
-                    output_file = build_viz_output_file(
-                        output_base_path, viz_data.test_name, f"pull_{pr_num}"
-                    )
-                    generate_test_html(viz_data, output_file)
-        except Exception as e:  # pylint: disable=broad-except
-            logger.warning("Visualization generation failed: %s", e)
-
-    # Attach HTML visualizations to JIRA issues
-    if kwargs.get("viz") and kwargs.get("jira_auto_create") and jira_provider:
-        try:
-            output_base_path = str(Path(kwargs['save_output_path']).with_suffix(''))
-            _attach_viz_to_jira(jira_provider, issue_keys_by_test, output_base_path,
-                                "periodic" if is_pull else "", logger)
-            for pr_num in kwargs.get("pull_numbers", []):
-                issue_keys_for_pr = issue_keys_by_test_pull_by_pr.get(pr_num, {})
-                _attach_viz_to_jira(jira_provider, issue_keys_for_pr, output_base_path,
-                                    f"pull_{pr_num}", logger)
-        except Exception as e:  # pylint: disable=broad-except
-            logger.warning("JIRA attachment failed: %s", e)
-
-    if has_regression:
-        sys.exit(2)
+    exit_code = write_results(kwargs, (results, results_pull, analyses_by_pr), jira_provider, logger)
+    if exit_code:
+        sys.exit(exit_code)
 
 
 if __name__ == "__main__":
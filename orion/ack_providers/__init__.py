@@ -8,5 +8,6 @@ Supports file-based (YAML) and JIRA-based tracking.
 from orion.ack_providers.base import AckProvider
 from orion.ack_providers.file_provider import FileAckProvider
 from orion.ack_providers.jira_provider import JiraAckProvider
+from orion.ack_providers.index import AckIndex
 
-__all__ = ["AckProvider", "FileAckProvider", "JiraAckProvider"]
+__all__ = ["AckProvider", "FileAckProvider", "JiraAckProvider", "AckIndex"]
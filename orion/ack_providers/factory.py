@@ -0,0 +1,113 @@
+"""
+Module for creating the ACK providers of a run.
+
+The --ack, --jira-ack and --jira-auto-create options of a --config,
+--configs, --watch or --serve run are turned into providers here.
+"""
+
+import re
+import sys
+from typing import Optional
+
+from orion.ack_providers.base import AckProvider
+from orion.ack_providers.file_provider import FileAckProvider
+from orion.ack_providers.jira_provider import JiraAckProvider
+
+
+def _resolve_template_variable(value: str, input_vars: dict) -> str:
+    """Resolve template variable like {{VERSION}} from input_vars."""
+    if not value or "{{" not in str(value):
+        return str(value).strip('"')
+
+    match = re.search(r'\{\{\s*(\w+)\s*\}\}', str(value))
+    if match:
+        var_name = match.group(1)
+        return input_vars.get(var_name) or input_vars.get(var_name.lower())
+    return value
+
+
+def extract_version_and_test(config: dict, input_vars: dict) -> tuple:
+    """Extract version and test type from config."""
+    if "tests" not in config or not config["tests"]:
+        return None, None
+
+    test = config["tests"][0]
+    metadata = test.get("metadata", {})
+
+    # Resolve version
+    version_field = test.get("version_field", "ocpVersion")
+    version = _resolve_template_variable(metadata.get(version_field, ""), input_vars)
+
+    # Resolve test type
+    test_type = _resolve_template_variable(metadata.get("benchmark.keyword", ""), input_vars)
+
+    return version, test_type
+
+
+def create_jira_provider(kwargs: dict, config: dict, logger) -> JiraAckProvider:
+    """Create and initialize a JIRA ACK provider."""
+    jira_url = kwargs.get("jira_url") or config.get("jira_url")
+    if not jira_url:
+        logger.error("JIRA URL required when --jira-ack is enabled. Use --jira-url or set JIRA_URL env var")
+        sys.exit(1)
+
+    try:
+        provider = JiraAckProvider(
+            jira_url=jira_url,
+            project=kwargs.get("jira_project", "PERFSCALE"),
+            component=kwargs.get("jira_component", "CPT_ISSUES"),
+            token=kwargs.get("jira_token") or config.get("jira_token"),
+            email=kwargs.get("jira_email") or config.get("jira_email"),
+            uuid_field=config.get("jira_uuid_field", "description"),
+            metric_field=config.get("jira_metric_field", "labels"),
+            status=kwargs.get("jira_status_filter") or None,
+        )
+        logger.info("✓ JIRA ACK provider initialized: %s/%s",
+                   provider.project, provider.component)
+        return provider
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.error("Failed to initialize JIRA provider: %s", e)
+        logger.error("See JIRA_PERMISSIONS_TROUBLESHOOTING.md for help")
+        sys.exit(1)
+
+
+def jira_settings(kwargs: dict, config: dict) -> Optional[tuple]:
+    """Settings of the JIRA provider a config would get, None when it gets none."""
+    if not kwargs.get("jira_ack") and not kwargs.get("jira_auto_create"):
+        return None
+    return tuple(
+        config.get(name)
+        for name in ("jira_url", "jira_token", "jira_email", "jira_uuid_field", "jira_metric_field")
+    )
+
+
+def get_ack_providers(
+    kwargs: dict, config: dict, logger
+) -> tuple[list[AckProvider], Optional[str], Optional[str]]:
+    """
+    Factory function to create ACK providers based on configuration.
+
+    Args:
+        kwargs: CLI arguments
+        config: Loaded configuration dict
+        logger: Logger instance
+
+    Returns:
+        Tuple of (list of ACK provider instances, version string, test type string)
+    """
+    providers = []
+
+    # Extract version and test type from config
+    version, test_type = extract_version_and_test(config, kwargs["input_vars"])
+
+    # JIRA provider
+    if kwargs.get("jira_ack"):
+        providers.append(create_jira_provider(kwargs, config, logger))
+
+    # Manual ACK files (processed if provided via --ack)
+    if kwargs.get("ack"):
+        for ack_file in [f.strip() for f in kwargs["ack"].split(",") if f.strip()]:
+            providers.append(FileAckProvider(ack_file))
+            logger.info("✓ Manual file ACK provider initialized: %s", ack_file)
+
+    return providers, version, test_type
@@ -0,0 +1,75 @@
+"""
+orion.ack_providers.index
+
+Merged ACK map of several providers, queried once per version and test type.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from orion.ack_providers.base import AckProvider
+from orion.logger import SingletonLogger
+
+
+class AckIndex:  # pylint: disable=too-few-public-methods
+    """
+    ACK maps of a set of providers, keyed by version and test type.
+
+    Every provider is queried once per (version, test type); configs that
+    share them, as in --configs fleet runs, reuse the merged map.
+
+    Args:
+        providers: ACK providers to query
+    """
+
+    def __init__(self, providers: List[AckProvider]):
+        self.providers = providers
+        self.logger = SingletonLogger.get_logger("Orion")
+        self._ack_maps: Dict[Tuple[Optional[str], Optional[str]], Optional[Dict[str, Any]]] = {}
+
+    def ack_map(
+        self,
+        version: Optional[str] = None,
+        test_type: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Merged and deduplicated ACK entries of all providers.
+
+        Args:
+            version: Optional version filter
+            test_type: Optional test type filter
+
+        Returns:
+            {"ack": [...]} or None when no provider returned an entry
+        """
+        key = (version, test_type)
+        if key not in self._ack_maps:
+            self._ack_maps[key] = self._load(version, test_type)
+        return self._ack_maps[key]
+
+    def _load(self, version: Optional[str], test_type: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not self.providers:
+            self.logger.info("No ACK providers configured")
+            return None
+        all_acks = []
+        for provider in self.providers:
+            try:
+                acks = provider.get_acks(version=version, test_type=test_type)
+                if acks:
+                    all_acks.extend(acks)
+                    self.logger.info(
+                        "✓ Loaded %d ACK entries from %s (version=%s, test=%s)",
+                        len(acks),
+                        provider.__class__.__name__,
+                        version or "all",
+                        test_type or "all"
+                    )
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                self.logger.error("Failed to load ACKs from %s: %s", provider.__class__.__name__, e)
+
+        if not all_acks:
+            self.logger.debug("No ACK entries loaded")
+            return None
+        # Use the base provider's merge method to deduplicate
+        merged_acks = self.providers[0].merge_acks([all_acks])
+        self.logger.info("✓ Total ACK entries loaded: %d (after deduplication)", len(merged_acks))
+        return {"ack": merged_acks}
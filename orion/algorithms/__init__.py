@@ -1,8 +1,24 @@
 """
 Init for pkg module
+
+Algorithm classes are imported on first access so that importing the
+package does not load every algorithm's dependencies.
 """
 
-from .edivisive.edivisive import EDivisive
-from .isolationforest.isolationForest import IsolationForestWeightedMean
+import importlib
+
 from .algorithmFactory import AlgorithmFactory
 from .algorithm import Algorithm
+
+_LAZY_EXPORTS = {
+    "EDivisive": ".edivisive.edivisive",
+    "EDivisiveFast": ".edivisive_fast.edivisive_fast",
+    "CUSUM": ".cusum.cusum",
+    "IsolationForestWeightedMean": ".isolationforest.isolationForest",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        return getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,11 +1,78 @@
 """
 Algorithm Factory to choose avaiable algorithms
+
+Algorithms are looked up by name in a registry of "module:Class" targets and
+their module is only imported when the algorithm is instantiated, so runs
+that never use e.g. the isolation forest never import scikit-learn.
+Installed packages can add algorithms through the "orion.algorithms" entry
+point group:
+
+    [project.entry-points."orion.algorithms"]
+    my-algorithm = "my_package.module:MyAlgorithm"
 """
+import importlib
+import logging
+from functools import lru_cache
+from importlib.metadata import entry_points
+from typing import Dict
 import pandas as pd
 import orion.constants as cnsts
-from .edivisive import EDivisive
-from .isolationforest import IsolationForestWeightedMean
-from .cmr import CMR
+from .algorithm import Algorithm
+
+ENTRY_POINT_GROUP = "orion.algorithms"
+
+BUILTIN_ALGORITHMS = {
+    cnsts.EDIVISIVE: "orion.algorithms.edivisive.edivisive:EDivisive",
+    cnsts.EDIVISIVE_FAST: "orion.algorithms.edivisive_fast.edivisive_fast:EDivisiveFast",
+    cnsts.ISOLATION_FOREST: "orion.algorithms.isolationforest.isolationForest:IsolationForestWeightedMean",
+    cnsts.CMR: "orion.algorithms.cmr.cmr:CMR",
+    cnsts.CUSUM: "orion.algorithms.cusum.cusum:CUSUM",
+}
+
+
+@lru_cache(maxsize=1)
+def registered_algorithms() -> Dict[str, str]:
+    """Return every available algorithm name and its "module:Class" target
+
+    Built-in algorithms cannot be replaced by entry points with the same name.
+
+    Returns:
+        dict: algorithm name to target
+    """
+    logger = logging.getLogger("Orion")
+    registry = {}
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        if entry_point.name in BUILTIN_ALGORITHMS:
+            logger.warning(
+                "Ignoring algorithm entry point %s: the name is taken by a built-in algorithm",
+                entry_point.name,
+            )
+            continue
+        registry[entry_point.name] = entry_point.value
+    registry.update(BUILTIN_ALGORITHMS)
+    return registry
+
+
+def load_algorithm(algorithm: str) -> type:
+    """Import the class of a registered algorithm
+
+    Args:
+        algorithm (str): Name of the algorithm
+
+    Raises:
+        ValueError: When the algorithm is not registered or is not an Algorithm
+
+    Returns:
+        type: Algorithm subclass
+    """
+    target = registered_algorithms().get(algorithm)
+    if target is None:
+        raise ValueError("Invalid algorithm called")
+    module_name, _, class_name = target.partition(":")
+    algorithm_class = getattr(importlib.import_module(module_name), class_name)
+    if not (isinstance(algorithm_class, type) and issubclass(algorithm_class, Algorithm)):
+        raise ValueError(f"Algorithm {algorithm} ({target}) is not an Algorithm subclass")
+    return algorithm_class
 
 
 class AlgorithmFactory: # pylint: disable= too-few-public-methods, too-many-arguments, line-too-long
@@ -33,10 +100,4 @@ class AlgorithmFactory: # pylint: disable= too-few-public-methods, too-many-argu
         Returns:
             Algorithm : Algorithm
         """
-        if algorithm == cnsts.EDIVISIVE:
-            return EDivisive(dataframe, test, options, metrics_config)
-        if algorithm == cnsts.ISOLATION_FOREST:
-            return IsolationForestWeightedMean(dataframe, test, options, metrics_config)
-        if algorithm == cnsts.CMR:
-            return CMR(dataframe, test, options, metrics_config)
-        raise ValueError("Invalid algorithm called")
+        return load_algorithm(algorithm)(dataframe, test, options, metrics_config)
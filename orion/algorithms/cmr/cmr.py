@@ -44,19 +44,6 @@ class CMR(Algorithm):
         df, change_points_by_metric = self.run_cmr(self.dataframe)
         series.data= df
 
-        for metric, cps in change_points_by_metric.items():
-            direction = self.metrics_config[metric]["direction"]
-            if direction != 0:
-                filtered = []
-                for cp in cps:
-                    delta = cp.stats.mean_2 - cp.stats.mean_1
-                    if abs(cp.stats.mean_1) < 1e-12:
-                        if abs(delta) > 1e-12 and delta * direction > 0:
-                            filtered.append(cp)
-                    elif (delta / cp.stats.mean_1 * 100) * direction > 0:
-                        filtered.append(cp)
-                change_points_by_metric[metric] = filtered
-
         self.regression_flag = any(change_points_by_metric.values())
 
         return series, change_points_by_metric
@@ -72,27 +59,55 @@ class CMR(Algorithm):
         Returns:
             pd.Dataframe, dict[metric_name, ChangePoint]: Returned data frame and change points
         """
-        metric_columns = self.metrics_config.keys()
-        change_points_by_metric={ k:[] for k in metric_columns }
-
-        for column in metric_columns:
-
-            change_point = ChangePoint(metric=column,
-                                index=1,
-                                qhat=0.0,
-                                time=0,
-                                stats=TTestStats(
-                                        mean_1=dataframe_list[column][0],
-                                        mean_2=dataframe_list[column][1],
-                                        std_1=0.0,
-                                        std_2=0.0,
-                                        pvalue=1.0
-                                    ))
-            change_points_by_metric[column].append(change_point)
-
-        # based on change point generate pass/fail
+        change_points_by_metric = self.compare(dataframe_list.iloc[[0]], dataframe_list.iloc[[1]])[0]
         return dataframe_list, change_points_by_metric
 
+    def compare(self, baseline: pd.DataFrame, current_runs: pd.DataFrame):
+        """
+        Percent difference of every current run against a single baseline row, as array operations
+
+        Metrics moving against their configured direction are dropped.
+
+        Args:
+            baseline (pd.DataFrame): single baseline row
+            current_runs (pd.DataFrame): runs to compare, one row each
+
+        Returns:
+            list[dict[metric_name, ChangePoint]]: change points of every current run, in order
+        """
+        metric_columns = list(self.metrics_config.keys())
+        previous = baseline[metric_columns].to_numpy(dtype=float)[0]
+        current = current_runs[metric_columns].to_numpy(dtype=float)
+        directions = numpy.array([self.metrics_config[metric]["direction"] for metric in metric_columns])
+
+        delta = current - previous
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            pct_change = delta / previous * 100
+            keep = (directions == 0) | numpy.where(
+                numpy.abs(previous) < 1e-12,
+                (numpy.abs(delta) > 1e-12) & (delta * directions > 0),
+                pct_change * directions > 0,
+            )
+
+        results = []
+        for row in range(len(current)):
+            change_points_by_metric = { k:[] for k in metric_columns }
+            for col in numpy.flatnonzero(keep[row]):
+                metric = metric_columns[col]
+                change_points_by_metric[metric].append(ChangePoint(metric=metric,
+                                    index=1,
+                                    qhat=0.0,
+                                    time=0,
+                                    stats=TTestStats(
+                                            mean_1=previous[col],
+                                            mean_2=current[row, col],
+                                            std_1=0.0,
+                                            std_2=0.0,
+                                            pvalue=1.0
+                                        )))
+            results.append(change_points_by_metric)
+        return results
+
     def combine_and_average_runs(self, dataFrame: pd.DataFrame):
         """
         If more than 1 previous run, mean data together into 1 single row
@@ -104,25 +119,32 @@ class CMR(Algorithm):
         Returns:
             pd.Dataframe: data frame of most recent run and averaged previous runs
         """
-        i = 0
-
         last_row = dataFrame.tail(1)
-        dF = dataFrame[:-1]
-        data2 = {}
-
-        metric_columns = list(dataFrame.columns)
-        for column in metric_columns:
-
-            if isinstance(dF.loc[0, column], (numpy.float64, numpy.int64)):
-                mean = dF[column].mean()
-                data2[column] = [mean]
-            else:
-                column_list = dF[column].tolist()
-                # Convert each item to string to handle lists, UUIDs, and other non-string types
-                non_numeric_joined_list = ','.join(str(item) for item in column_list)
-                data2[column] = [non_numeric_joined_list]
-            i += 1
-        df2 = pd.DataFrame(data2)
+        df2 = self.average_runs(dataFrame[:-1])
 
         result = pd.concat([df2, last_row], ignore_index=True)
         return result
+
+    @staticmethod
+    def average_runs(dataFrame: pd.DataFrame):
+        """
+        Collapse runs into a single row: columns whose first value is a
+        float64 or int64 are averaged and the values of the other columns
+        are joined with commas
+
+        Args:
+            dataFrame (pd.DataFrame): runs to combine
+
+        Returns:
+            pd.Dataframe: single row data frame with the columns of dataFrame
+        """
+        numeric_columns = [
+            column for column in dataFrame.columns
+            if isinstance(dataFrame[column].iloc[0], (numpy.float64, numpy.int64))
+        ]
+        other_columns = dataFrame.columns.difference(numeric_columns, sort=False)
+        combined = dataFrame[numeric_columns].mean()
+        if len(other_columns):
+            # Convert each item to string to handle lists, UUIDs, and other non-string types
+            combined = pd.concat([combined, dataFrame[other_columns].astype(str).agg(",".join)])
+        return pd.DataFrame({column: [combined[column]] for column in dataFrame.columns})
@@ -0,0 +1,4 @@
+"""
+Init for the online CUSUM Algorithm
+"""
+from .cusum import CUSUM
@@ -0,0 +1,87 @@
+"""Online CUSUM Algorithm"""
+
+# pylint: disable = line-too-long
+import logging
+from typing import Dict, List
+import pandas as pd
+from otava.analysis import ChangePoint, TTestStats
+from otava.series import Series
+from otava.series import ChangePoint as SeriesChangePoint
+from orion import constants as cnsts
+from orion.algorithms.edivisive.edivisive import EDivisive
+from orion.algorithms.cusum.online import (
+    MAX_CHANGE_POINTS,
+    load_state,
+    new_metric_state,
+    new_state,
+    save_state,
+    state_path,
+    update,
+)
+
+logger = logging.getLogger("Orion")
+
+
+class CUSUM(EDivisive):
+    """Two-sided CUSUM detector updated one run at a time
+
+    With --online-state the running sums of every metric are kept between
+    invocations and only runs newer than the last processed one are fed to
+    them; without it the whole window is replayed. Changepoints are reported
+    at the run that crossed the threshold, and ack, direction, threshold and
+    correlation filtering are inherited from EDivisive.
+
+    Args:
+        EDivisive (EDivisive): Inherits
+    """
+
+    def _compute_change_points(self, series: Series) -> Dict[str, List[ChangePoint]]:
+        threshold = float(self.options.get("cusum_threshold") or cnsts.CUSUM_THRESHOLD)
+        state_dir = self.options.get("online_state")
+        path = state_path(state_dir, self.test) if state_dir else None
+        state = load_state(path, threshold) if path else new_state(threshold)
+
+        uuids = [str(uuid) for uuid in self.dataframe[self.test["uuid_field"]]]
+        times = [int(t) for t in series.time]
+        last_timestamp = state["last_timestamp"]
+        new_rows = [i for i, t in enumerate(times) if last_timestamp is None or t > last_timestamp]
+
+        metrics_state = {}
+        for metric, data in series.data.items():
+            metric_state = state["metrics"].get(metric) or new_metric_state()
+            values = list(data)
+            for i in new_rows:
+                if values[i] is None or pd.isna(values[i]):
+                    continue
+                detection = update(metric_state, float(values[i]), threshold)
+                if detection is not None:
+                    mean_1, std_1, mean_2 = detection
+                    state["change_points"].append({
+                        "uuid": uuids[i], "metric": metric,
+                        "mean_1": mean_1, "std_1": std_1, "mean_2": mean_2,
+                    })
+            metrics_state[metric] = metric_state
+        state["metrics"] = metrics_state
+        state["change_points"] = state["change_points"][-MAX_CHANGE_POINTS:]
+        if new_rows:
+            state["last_timestamp"] = max(times[i] for i in new_rows)
+        logger.info("CUSUM processed %d new runs of %d", len(new_rows), len(times))
+        if path:
+            save_state(path, state)
+
+        positions = {uuid: i for i, uuid in enumerate(uuids)}
+        change_points_by_metric = {metric: [] for metric in series.data}
+        for detected in state["change_points"]:
+            index = positions.get(detected["uuid"])
+            if index is None or detected["metric"] not in change_points_by_metric:
+                continue
+            change_points_by_metric[detected["metric"]].append(
+                SeriesChangePoint(
+                    index=index, qhat=0.0, time=series.time[index], metric=detected["metric"],
+                    stats=TTestStats(
+                        mean_1=detected["mean_1"], mean_2=detected["mean_2"],
+                        std_1=detected["std_1"], std_2=0.0, pvalue=1.0,
+                    ),
+                )
+            )
+        return change_points_by_metric
@@ -0,0 +1,169 @@
+"""
+Online two-sided CUSUM state.
+
+Every metric keeps a few running sums: the count, mean and sum of squared
+deviations (Welford) of its reference runs, and the positive and negative
+CUSUM excursions with their length and sum. A new run updates them in O(1),
+so with a state file only the runs appended since the last invocation are
+processed.
+"""
+
+import json
+import math
+import os
+import tempfile
+from typing import Any, Dict, Optional, Tuple
+
+from orion.logger import SingletonLogger
+from orion.snapshot import snapshot_path, snapshot_run_type
+
+STATE_VERSION = 1
+# Allowed drift, in reference standard deviations, before the sums grow
+DRIFT = 0.5
+# Runs used to estimate the reference mean and deviation before detecting
+WARMUP = 10
+# Detected changepoints kept in the state so later runs can report them
+MAX_CHANGE_POINTS = 50
+
+
+def state_path(state_dir: str, test: Dict[str, Any]) -> str:
+    """Build the path of the CUSUM state file of a test
+
+    Args:
+        state_dir (str): directory holding the state files
+        test (dict): test configuration
+
+    Returns:
+        str: path to the state file
+    """
+    return snapshot_path(
+        state_dir, test["name"], snapshot_run_type(test), extension="cusum.json"
+    )
+
+
+def new_state(threshold: float) -> Dict[str, Any]:
+    """Return an empty test state for the given decision threshold."""
+    return {
+        "version": STATE_VERSION,
+        "threshold": threshold,
+        "drift": DRIFT,
+        "warmup": WARMUP,
+        "last_timestamp": None,
+        "metrics": {},
+        "change_points": [],
+    }
+
+
+def new_metric_state() -> Dict[str, Any]:
+    """Return the running sums of a metric that has not seen any run."""
+    return {
+        "n": 0, "mean": 0.0, "m2": 0.0,
+        "pos": 0.0, "pos_count": 0, "pos_sum": 0.0,
+        "neg": 0.0, "neg_count": 0, "neg_sum": 0.0,
+    }
+
+
+def load_state(path: str, threshold: float) -> Dict[str, Any]:
+    """Load the CUSUM state of a test
+
+    Args:
+        path (str): state file
+        threshold (float): decision threshold of the current run
+
+    Returns:
+        dict: stored state, or an empty one when there is no usable state
+    """
+    logger = SingletonLogger.get_logger("Orion")
+    state = new_state(threshold)
+    if not os.path.isfile(path):
+        return state
+    try:
+        with open(path, "r", encoding="utf-8") as state_file:
+            stored = json.load(state_file)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning("Could not read CUSUM state %s: %s", path, e)
+        return state
+    if any(stored.get(key) != state[key] for key in ("version", "threshold", "drift", "warmup")):
+        logger.info("CUSUM state %s does not match this analysis, ignoring it", path)
+        return state
+    return stored
+
+
+def save_state(path: str, state: Dict[str, Any]) -> None:
+    """Store the CUSUM state of a test
+
+    Args:
+        path (str): state file
+        state (dict): state to store
+    """
+    logger = SingletonLogger.get_logger("Orion")
+    state_dir = os.path.dirname(path) or "."
+    os.makedirs(state_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=state_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as state_file:
+            json.dump(state, state_file)
+        os.replace(tmp_path, path)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning("Could not store CUSUM state %s: %s", path, e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _add_reference(metric_state: Dict[str, Any], value: float) -> None:
+    metric_state["n"] += 1
+    delta = value - metric_state["mean"]
+    metric_state["mean"] += delta / metric_state["n"]
+    metric_state["m2"] += delta * (value - metric_state["mean"])
+
+
+def _reference_std(metric_state: Dict[str, Any]) -> float:
+    std = math.sqrt(metric_state["m2"] / (metric_state["n"] - 1)) if metric_state["n"] > 1 else 0.0
+    # Constant metrics still need a scale so any change stands out
+    return max(std, abs(metric_state["mean"]) * 1e-3, 1e-12)
+
+
+def update(
+    metric_state: Dict[str, Any], value: float, threshold: float
+) -> Optional[Tuple[float, float, float]]:
+    """Feed the value of one new run to the running sums of a metric
+
+    The value is standardized against the reference runs before being added
+    to them. When one of the sums goes over the threshold the metric starts
+    over with this run as its first reference run.
+
+    Args:
+        metric_state (dict): running sums, updated in place
+        value (float): metric value of the new run
+        threshold (float): decision threshold in standard deviations
+
+    Returns:
+        tuple: (reference mean, reference std, mean since the shift started)
+        when a change is detected, None otherwise
+    """
+    if metric_state["n"] < WARMUP:
+        _add_reference(metric_state, value)
+        return None
+    std = _reference_std(metric_state)
+    score = (value - metric_state["mean"]) / std
+    metric_state["pos"] = max(0.0, metric_state["pos"] + score - DRIFT)
+    metric_state["neg"] = max(0.0, metric_state["neg"] - score - DRIFT)
+    for side in ("pos", "neg"):
+        if metric_state[side] > 0:
+            metric_state[f"{side}_count"] += 1
+            metric_state[f"{side}_sum"] += value
+        else:
+            metric_state[f"{side}_count"] = 0
+            metric_state[f"{side}_sum"] = 0.0
+    for side in ("pos", "neg"):
+        if metric_state[side] > threshold:
+            detection = (
+                metric_state["mean"], std,
+                metric_state[f"{side}_sum"] / metric_state[f"{side}_count"],
+            )
+            metric_state.clear()
+            metric_state.update(new_metric_state())
+            _add_reference(metric_state, value)
+            return detection
+    _add_reference(metric_state, value)
+    return None
@@ -1,15 +1,38 @@
 """EDivisive Algorithm from apache_otava"""
 
 # pylint: disable = line-too-long
+import bisect
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List
 import pandas as pd
-from otava.analysis import ChangePoint
+from otava.analysis import ChangePoint, fill_missing
+from otava.series import AnalysisOptions, Series
+from otava.series import ChangePoint as SeriesChangePoint
 from orion.algorithms.algorithm import Algorithm
+from orion.algorithms.edivisive.incremental import (
+    incremental_change_points,
+    load_state,
+    save_state,
+    state_path,
+)
 
 logger = logging.getLogger("Orion")
 
 
+def _analyze_metrics(test_name, time, metrics, data) -> Dict[str, List[ChangePoint]]:
+    """Run otava on a subset of the metrics of a series in a worker process."""
+    series = Series(
+        test_name=test_name,
+        branch=None,
+        time=time,
+        metrics=metrics,
+        data=data,
+        attributes={},
+    )
+    return series.analyze().change_points
+
+
 class EDivisive(Algorithm):
     """Implementation of the EDivisive algorithm using apache_otava
 
@@ -23,16 +46,17 @@ class EDivisive(Algorithm):
             self.dataframe["timestamp"] = pd.to_datetime(self.dataframe["timestamp"])
             self.dataframe["timestamp"] = self.dataframe["timestamp"].astype(int) // 10**9
         series = self.setup_series()
-        change_points_by_metric = series.analyze().change_points
+        change_points_by_metric = self._compute_change_points(series)
 
         # Process if we have ack'ed regression
         ackSet = set()
         acked_uuids = []
         if self.options["ackMap"] is not None:
+            positions = self._uuid_positions(series)
             for ack in self.options["ackMap"]["ack"]:
-                pos = series.find_by_attribute("uuid",ack["uuid"])
-                if len(pos) > 0 :
-                    ackSet.add(str(pos[0]) + "_" + ack["metric"])
+                pos = positions.get(ack["uuid"])
+                if pos is not None:
+                    ackSet.add(str(pos) + "_" + ack["metric"])
                     acked_uuids.append(f"{ack['uuid']} ({ack['metric']})")
         if acked_uuids and not self._acked_logged:
             logger.info("ACKed UUIDs: %s", ", ".join(acked_uuids))
@@ -61,19 +85,103 @@ class EDivisive(Algorithm):
 
 
 
+    def _compute_change_points(self, series: Series) -> Dict[str, List[ChangePoint]]:
+        """Run otava on every metric of the series
+
+        With --analysis-workers N > 1 the metrics are split into N groups that
+        are analyzed in separate processes, and the per-metric results are
+        merged back in the original metric order.
+        """
+        if self.options.get("incremental_state"):
+            return self._compute_incremental(series)
+        workers = min(int(self.options.get("analysis_workers") or 1), len(series.data))
+        if workers <= 1:
+            return series.analyze().change_points
+
+        metric_names = list(series.data.keys())
+        groups = [metric_names[i::workers] for i in range(workers)]
+        logger.info("Analyzing %d metrics on %d processes", len(metric_names), workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    _analyze_metrics,
+                    series.test_name,
+                    list(series.time),
+                    {name: series.metrics[name] for name in group},
+                    {name: list(series.data[name]) for name in group},
+                )
+                for group in groups
+            ]
+            partial_results = {}
+            for future in futures:
+                partial_results.update(future.result())
+        return {name: partial_results[name] for name in metric_names}
+
+    def _compute_incremental(self, series: Series) -> Dict[str, List[ChangePoint]]:
+        """Compute changepoints reusing the state saved by the previous run
+
+        Metrics whose shared runs are unchanged only have the tail of the
+        series re-split; the others are analyzed from scratch. The state is
+        rewritten with this analysis afterwards.
+        """
+        analysis_options = AnalysisOptions()
+        path = state_path(self.options["incremental_state"], self.test)
+        previous = load_state(path, analysis_options)
+        overlap = int(self.options.get("incremental_overlap") or 0)
+        uuids = list(self.dataframe[self.test["uuid_field"]])
+
+        change_points_by_metric = {}
+        states = {}
+        reused = 0
+        for metric, data in series.data.items():
+            values = list(data)
+            fill_missing(values)
+            change_points, states[metric], was_reused = incremental_change_points(
+                values, uuids, previous.get(metric), analysis_options, overlap
+            )
+            reused += was_reused
+            change_points_by_metric[metric] = self._series_change_points(series, metric, change_points)
+        logger.info(
+            "Incremental analysis reused the previous state of %d of %d metrics",
+            reused, len(series.data),
+        )
+        save_state(path, analysis_options, states)
+        return change_points_by_metric
+
+    @staticmethod
+    def _series_change_points(series: Series, metric: str, change_points) -> List[ChangePoint]:
+        """Place the changepoints of one metric on the time axis of the series"""
+        return [
+            SeriesChangePoint(
+                index=cp.index, qhat=0.0, time=series.time[cp.index],
+                metric=metric, stats=cp.stats,
+            )
+            for cp in change_points
+        ]
+
+    @staticmethod
+    def _uuid_positions(series: Series) -> Dict[str, int]:
+        """Map every run uuid to its first position in the series, as find_by_attribute"""
+        positions = {}
+        for position, uuid in enumerate(series.attributes.get("uuid", [])):
+            positions.setdefault(uuid, position)
+        return positions
+
     def _depending_metric_has_chagepoint(self, change_points_by_metric: Dict[str, List[ChangePoint]], ackSet, metric, index) -> bool:
         depending_metric = self.metrics_config[metric]["correlation"]
         context = self.metrics_config[metric]["context"]
         if depending_metric not in change_points_by_metric.keys():
             return False
         changepoint_list = change_points_by_metric[depending_metric]
-        for i in range(len(changepoint_list)-1, -1, -1):
-            if (changepoint_list[i].index >= index-context) and (changepoint_list[i].index <= index+context):
-                if (self._has_changepoint(depending_metric, changepoint_list, i) or
-                    self._is_acked(ackSet, changepoint_list, i) or
-                    self._is_under_threshold(depending_metric, changepoint_list, i)):
-                    return False
-                return True
+        # Changepoint lists are sorted by index, so the last changepoint inside
+        # the context window is the last one at or before index+context
+        i = bisect.bisect_right(changepoint_list, index+context, key=lambda cp: cp.index) - 1
+        if i >= 0 and changepoint_list[i].index >= index-context:
+            if (self._has_changepoint(depending_metric, changepoint_list, i) or
+                self._is_acked(ackSet, changepoint_list, i) or
+                self._is_under_threshold(depending_metric, changepoint_list, i)):
+                return False
+            return True
         return False
 
 
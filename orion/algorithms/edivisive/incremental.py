@@ -0,0 +1,193 @@
+"""
+Incremental E-Divisive state.
+
+The state of a test stores, per metric, the runs and values of the last
+analysis together with its weak and final changepoints, as JSON. When runs
+were only appended to the previous series, otava only re-splits the tail of
+the series after the last stable weak changepoint, plus an optional overlap.
+"""
+
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from otava.analysis import TTestStats, compute_change_points
+from otava.change_point_divisive.base import ChangePoint
+from otava.series import AnalysisOptions
+
+from orion.logger import SingletonLogger
+from orion.snapshot import snapshot_path, snapshot_run_type
+
+STATE_VERSION = 2
+
+
+def state_path(state_dir: str, test: Dict[str, Any]) -> str:
+    """Build the path of the incremental state file of a test
+
+    Args:
+        state_dir (str): directory holding the state files
+        test (dict): test configuration
+
+    Returns:
+        str: path to the state file
+    """
+    return snapshot_path(state_dir, test["name"], snapshot_run_type(test))
+
+
+def _json_default(value: Any) -> Any:
+    """Convert the numpy scalars otava returns for json.dump."""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _change_point_to_json(change_point: ChangePoint) -> Dict[str, Any]:
+    stats = change_point.stats
+    return {
+        "index": change_point.index, "qhat": change_point.qhat,
+        "stats": {
+            "pvalue": stats.pvalue, "mean_1": stats.mean_1, "mean_2": stats.mean_2,
+            "std_1": stats.std_1, "std_2": stats.std_2,
+        },
+    }
+
+
+def _change_point_from_json(payload: Dict[str, Any]) -> ChangePoint:
+    return ChangePoint(
+        index=payload["index"], qhat=payload["qhat"], stats=TTestStats(**payload["stats"])
+    )
+
+
+def _metric_to_json(state: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "uuids": state["uuids"],
+        "values": state["values"],
+        "weak": [_change_point_to_json(cp) for cp in state["weak"]],
+        "change_points": [_change_point_to_json(cp) for cp in state["change_points"]],
+    }
+
+
+def _metric_from_json(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "uuids": payload["uuids"],
+        "values": payload["values"],
+        "weak": [_change_point_from_json(cp) for cp in payload["weak"]],
+        "change_points": [_change_point_from_json(cp) for cp in payload["change_points"]],
+    }
+
+
+def load_state(path: str, analysis_options: AnalysisOptions) -> Dict[str, Any]:
+    """Load the per-metric state of a previous analysis
+
+    Args:
+        path (str): state file
+        analysis_options (AnalysisOptions): options of the current analysis
+
+    Returns:
+        dict: metric name to state, empty when there is no usable state
+    """
+    logger = SingletonLogger.get_logger("Orion")
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as state_file:
+            payload = json.load(state_file)
+        if payload.get("version") != STATE_VERSION or \
+                payload.get("analysis_options") != analysis_options.to_json():
+            logger.info("Incremental state %s does not match this analysis, ignoring it", path)
+            return {}
+        return {metric: _metric_from_json(state) for metric, state in payload["metrics"].items()}
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning("Could not read incremental state %s: %s", path, e)
+        return {}
+
+
+def save_state(path: str, analysis_options: AnalysisOptions, metrics: Dict[str, Any]) -> None:
+    """Store the per-metric state of an analysis
+
+    Args:
+        path (str): state file
+        analysis_options (AnalysisOptions): options of the analysis
+        metrics (dict): metric name to state
+    """
+    logger = SingletonLogger.get_logger("Orion")
+    state_dir = os.path.dirname(path) or "."
+    os.makedirs(state_dir, exist_ok=True)
+    payload = {
+        "version": STATE_VERSION,
+        "analysis_options": analysis_options.to_json(),
+        "metrics": {metric: _metric_to_json(state) for metric, state in metrics.items()},
+    }
+    fd, tmp_path = tempfile.mkstemp(dir=state_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as state_file:
+            json.dump(payload, state_file, default=_json_default)
+        os.replace(tmp_path, path)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning("Could not store incremental state %s: %s", path, e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _appended(previous: Dict[str, Any], uuids: List[str], values: List[float]) -> Optional[int]:
+    """Return how many runs were appended if the previous runs are unchanged."""
+    prev_uuids = previous["uuids"]
+    shared = len(prev_uuids)
+    if not prev_uuids or shared > len(uuids) or list(uuids[:shared]) != prev_uuids:
+        return None
+    current = np.asarray(values[:shared], dtype=float)
+    before = np.asarray(previous["values"], dtype=float)
+    if not np.array_equal(current, before, equal_nan=True):
+        return None
+    return len(uuids) - shared
+
+
+def incremental_change_points(
+    values: List[float],
+    uuids: List[str],
+    previous: Optional[Dict[str, Any]],
+    analysis_options: AnalysisOptions,
+    overlap: int = 0,
+) -> Tuple[list, Dict[str, Any], bool]:
+    """Compute the changepoints of one metric, reusing a previous analysis
+
+    Args:
+        values (list): metric values, missing values already filled
+        uuids (list): run uuid of every value
+        previous (dict): state of the previous analysis of the metric, if any
+        analysis_options (AnalysisOptions): otava analysis options
+        overlap (int): extra points before otava's incremental window to recompute
+
+    Returns:
+        tuple: (change points, new state of the metric, whether the previous
+        state was reused)
+    """
+    appended = _appended(previous, uuids, values) if previous else None
+    window_len = analysis_options.window_len
+    if appended == 0:
+        change_points, weak = list(previous["change_points"]), previous["weak"]
+    elif appended is not None:
+        # otava re-splits everything after this index; drop the old weak
+        # changepoints there so the tail is computed from scratch.
+        new_points = appended + overlap
+        recompute_from = len(values) - new_points - 4 * window_len
+        old_weak = [cp for cp in previous["weak"] if 0 < cp.index < recompute_from]
+        change_points, weak = compute_change_points(
+            values, window_len, analysis_options.max_pvalue, analysis_options.min_magnitude,
+            new_data=new_points, old_weak_cp=old_weak,
+        )
+    else:
+        # Runs that dropped out of the lookback shift otava's split windows,
+        # so anything but appended runs is analyzed from scratch.
+        change_points, weak = compute_change_points(
+            values, window_len, analysis_options.max_pvalue, analysis_options.min_magnitude,
+        )
+    state = {
+        "uuids": list(uuids),
+        "values": list(values),
+        "weak": list(weak),
+        "change_points": list(change_points),
+    }
+    return change_points, state, appended is not None
@@ -0,0 +1,4 @@
+"""
+Init for the NumPy E-Divisive Algorithm
+"""
+from .edivisive_fast import EDivisiveFast
@@ -0,0 +1,33 @@
+"""EDivisive Algorithm on the NumPy engine"""
+
+from typing import Dict, List
+from otava.analysis import ChangePoint, fill_missing
+from otava.series import AnalysisOptions, Series
+from orion.algorithms.edivisive.edivisive import EDivisive
+from orion.algorithms.edivisive_fast.engine import compute_change_points
+
+
+class EDivisiveFast(EDivisive):
+    """EDivisive with changepoints computed by orion's NumPy engine
+
+    Finds the same changepoints as otava's Series.analyze(); ack, direction,
+    threshold and correlation filtering are inherited from EDivisive.
+
+    Args:
+        EDivisive (EDivisive): Inherits
+    """
+
+    def _compute_change_points(self, series: Series) -> Dict[str, List[ChangePoint]]:
+        analysis_options = AnalysisOptions()
+        change_points_by_metric = {}
+        for metric, data in series.data.items():
+            values = list(data)
+            fill_missing(values)
+            change_points = compute_change_points(
+                values,
+                window_len=analysis_options.window_len,
+                max_pvalue=analysis_options.max_pvalue,
+                min_magnitude=analysis_options.min_magnitude,
+            )
+            change_points_by_metric[metric] = self._series_change_points(series, metric, change_points)
+        return change_points_by_metric
@@ -0,0 +1,250 @@
+"""
+NumPy E-Divisive engine.
+
+Reproduces otava's default Hunter analysis (sliding-window split with the
+E-Divisive energy statistic, Student's t-test significance and the bottom-up
+merge step) with the same candidate selection rules, so both engines find the
+same changepoints. It differs in how the work is done:
+
+- the pairwise distances of a window are turned into one 2D prefix sum, so
+  the energy statistic of every (tau, kappa) split of any interval is read
+  from it instead of being rebuilt from cumulative sums per interval
+- the best candidate of an interval is cached until the interval is split
+- t-test p-values are computed in closed form with scipy.special.stdtr
+  instead of going through scipy.stats for every comparison
+"""
+
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+import numpy as np
+from otava.analysis import TTestStats
+from otava.change_point_divisive.base import ChangePoint
+from scipy import special
+
+
+def _first_pass_pvalue(max_pvalue: float) -> float:
+    """Relaxed p-value of the split step, as in otava.analysis.compute_change_points."""
+    if max_pvalue < 0.05:
+        return max_pvalue * 10
+    if max_pvalue < 0.5:
+        return max_pvalue * 2
+    return max_pvalue
+
+
+def ttest(left: np.ndarray, right: np.ndarray) -> TTestStats:
+    """Two-sided equal-variance t-test of two segments
+
+    Matches otava's TTestSignificanceTester.compare, which passes the
+    population standard deviations to scipy's ttest_ind_from_stats.
+
+    Args:
+        left (np.ndarray): values before the changepoint
+        right (np.ndarray): values from the changepoint on
+
+    Returns:
+        TTestStats: means, standard deviations and p-value
+    """
+    n_l = len(left)
+    n_r = len(right)
+    if n_l == 0 or n_r == 0:
+        raise ValueError
+    # Same reductions as np.mean / np.std, without their dispatch overhead
+    mean_l = left.sum() / n_l
+    mean_r = right.sum() / n_r
+    std_l = np.sqrt(np.square(left - mean_l).sum() / n_l) if n_l >= 2 else 0.0
+    std_r = np.sqrt(np.square(right - mean_r).sum() / n_r) if n_r >= 2 else 0.0
+    if n_l + n_r > 2:
+        var_l = 0.0 if n_l == 1 else std_l ** 2
+        var_r = 0.0 if n_r == 1 else std_r ** 2
+        df = n_l + n_r - 2.0
+        svar = ((n_l - 1) * var_l + (n_r - 1) * var_r) / df
+        denom = np.sqrt(svar * (1.0 / n_l + 1.0 / n_r))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.divide(mean_l - mean_r, denom)
+        p = 2 * special.stdtr(df, -np.abs(t))  # pylint: disable=no-member
+    else:
+        p = 1.0
+    return TTestStats(mean_1=mean_l, mean_2=mean_r, std_1=std_l, std_2=std_r, pvalue=p)
+
+
+class _Window:  # pylint: disable=too-few-public-methods
+    """Energy statistic of all splits of the intervals of one window."""
+
+    def __init__(self, values: np.ndarray):
+        self.size = len(values)
+        distances = np.abs(values[:, None] - values[None, :])
+        # prefix[a, b] = sum of distances[i, j] for i < a, j < b and i < j
+        self.prefix = np.zeros((self.size + 1, self.size + 1))
+        self.prefix[1:, 1:] = np.triu(distances, k=1).cumsum(axis=0).cumsum(axis=1)
+        self._candidates = {}
+
+    def candidate(self, start: int, end: int):
+        """Return (tau, qhat) maximizing the energy statistic on [start, end)."""
+        key = (start, end)
+        if key not in self._candidates:
+            self._candidates[key] = self._best_split(start, end)
+        return self._candidates[key]
+
+    def _best_split(self, start, end):
+        size = end - start
+        a_coefs, b_coefs, c_coefs = _coefficients(size)
+        # Row i is tau = i + 1, column j is kappa = j + 2, relative to start
+        block = self.prefix[start:end + 1, start:end + 1]
+        diagonal = block.diagonal()
+        first_row = block[0]
+        pairs = block[1:size, 2:size + 1]
+        within_left = (diagonal[1:size] - first_row[1:size])[:, None]
+        within_right = diagonal[None, 2:size + 1] - pairs
+        cross = (pairs - first_row[None, 2:size + 1]
+                 - diagonal[1:size, None] + first_row[1:size, None])
+        q = a_coefs * cross - b_coefs * within_left - c_coefs * within_right
+        i, j = divmod(int(np.argmax(q)), q.shape[1])
+        return start + i + 1, q[i, j]
+
+
+@lru_cache(maxsize=512)
+def _coefficients(size: int):
+    """Weights of the cross and within pair sums for an interval of size points
+
+    They are computed as in otava's PairDistanceCalculator so ties are broken
+    the same way, and are zero where tau and kappa do not describe two
+    non-empty segments.
+    """
+    taus = np.arange(1, size)[:, None]
+    kappas = np.arange(2, size + 1)[None, :]
+    valid = kappas > taus
+    n_left = taus
+    n_right = kappas - taus
+    a_coefs = np.where(valid, 2 / kappas, 0.0)
+    b_den = kappas * (n_left - 1)
+    b_coefs = np.divide(
+        2 * n_right, b_den, out=np.zeros((size - 1, size - 1)),
+        where=valid & (b_den != 0),
+    )
+    c_den = kappas * (n_right - 1)
+    c_coefs = np.divide(
+        2 * n_left, c_den, out=np.zeros((size - 1, size - 1)),
+        where=valid & (c_den != 0),
+    )
+    return a_coefs, b_coefs, c_coefs
+
+
+def _intervals(indexes: List[int], size: int) -> List[tuple]:
+    bounds = [0] + indexes + [size]
+    return [(bounds[k], bounds[k + 1]) for k in range(len(bounds) - 1)
+            if bounds[k] != bounds[k + 1]]
+
+
+def _detect(values: np.ndarray, max_pvalue: float) -> List[ChangePoint]:
+    """E-Divisive on one window, as otava's ChangePointDetector."""
+    window = _Window(values)
+    found = []
+    while True:
+        intervals = _intervals([cp.index for cp in found], len(values))
+        candidates = [
+            (window.candidate(start, end), start, end) for start, end in intervals if end - start > 1
+        ]
+        if not candidates:
+            break
+        # max keeps the first of equal candidates, like a strict comparison
+        (tau, qhat), start, end = max(candidates, key=lambda candidate: candidate[0][1])
+        stats = ttest(values[start:tau], values[tau:end])
+        # NaN p-values (constant segments) are not significant
+        if not stats.pvalue <= max_pvalue:
+            break
+        found.append(ChangePoint(index=tau, qhat=qhat, stats=stats))
+        found.sort(key=lambda point: point.index)
+    return found
+
+
+def _with_stats(change_points: List[ChangePoint], values: np.ndarray) -> List[ChangePoint]:
+    """Recompute the stats of each changepoint against its neighbouring segments."""
+    bounds = [0] + [cp.index for cp in change_points] + [len(values)]
+    return [
+        ChangePoint(
+            index=cp.index, qhat=cp.qhat,
+            stats=ttest(values[bounds[k]:bounds[k + 1]], values[bounds[k + 1]:bounds[k + 2]]),
+        )
+        for k, cp in enumerate(change_points)
+    ]
+
+
+def split(values: np.ndarray, window_len: int, max_pvalue: float) -> List[ChangePoint]:
+    """Sliding-window split step (weak changepoints)
+
+    Args:
+        values (np.ndarray): metric values
+        window_len (int): window length
+        max_pvalue (float): first pass p-value
+
+    Returns:
+        list: weak changepoints sorted by index
+    """
+    step = int(window_len / 2)
+    start = 0
+    change_points = {}
+    while start < len(values):
+        end = min(start + window_len, len(values))
+        found = _detect(values[start:end], max_pvalue)
+        for cp in found:
+            cp.index += start
+            change_points.setdefault(cp.index, cp)
+        last = found[-1].index if found else 0
+        start = max(last, start + step)
+    return _with_stats(sorted(change_points.values(), key=lambda cp: cp.index), values)
+
+
+def merge(change_points: List[ChangePoint], values: np.ndarray,
+          max_pvalue: float, min_magnitude: float) -> List[ChangePoint]:
+    """Bottom-up merge step, as otava.analysis.merge
+
+    Args:
+        change_points (list): weak changepoints, modified in place
+        values (np.ndarray): metric values
+        max_pvalue (float): maximum accepted p-value
+        min_magnitude (float): minimum accepted relative change
+
+    Returns:
+        list: remaining changepoints
+    """
+    while change_points:
+        weakest = max(change_points, key=lambda c: c.stats.pvalue)
+        if weakest.stats.pvalue < max_pvalue:
+            weakest = min(change_points, key=lambda c: c.stats.change_magnitude())
+            if weakest.stats.change_magnitude() > min_magnitude:
+                return change_points
+        position = change_points.index(weakest)
+        del change_points[position]
+        bounds = [0] + [cp.index for cp in change_points] + [len(values)]
+        for k in (position, position + 1):
+            if 0 <= k < len(change_points):
+                cp = change_points[k]
+                change_points[k] = ChangePoint(
+                    index=cp.index, qhat=cp.qhat,
+                    stats=ttest(values[bounds[k]:bounds[k + 1]], values[bounds[k + 1]:bounds[k + 2]]),
+                )
+    return change_points
+
+
+def compute_change_points(
+    values: Sequence[Optional[float]],
+    window_len: int = 50,
+    max_pvalue: float = 0.001,
+    min_magnitude: float = 0.0,
+) -> List[ChangePoint]:
+    """Hunter changepoints of one metric
+
+    Args:
+        values (list): metric values, missing values already filled
+        window_len (int): split window length
+        max_pvalue (float): maximum accepted p-value
+        min_magnitude (float): minimum accepted relative change
+
+    Returns:
+        list: changepoints with TTestStats, sorted by index
+    """
+    assert window_len >= 2, "Window length must be at least 2"
+    series = np.asarray(values, dtype=np.float64)
+    weak = split(series, window_len, _first_pass_pvalue(max_pvalue))
+    return merge(weak, series, max_pvalue, min_magnitude)
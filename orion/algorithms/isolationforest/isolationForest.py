@@ -1,11 +1,20 @@
 # pylint: disable = too-many-locals, line-too-long
 """The implementation module for Isolation forest and weighted mean"""
 from sklearn.ensemble import IsolationForest
+import numpy as np
 import pandas as pd
 from otava.analysis import TTestStats
 from otava.series import  ChangePoint
+from orion import constants as cnsts
 from orion.logger import SingletonLogger
 from orion.algorithms.algorithm import Algorithm
+from orion.algorithms.isolationforest.model_store import (
+    load_model,
+    model_path,
+    needs_refit,
+    new_model,
+    save_model,
+)
 
 
 class IsolationForestWeightedMean(Algorithm):
@@ -27,52 +36,94 @@ class IsolationForestWeightedMean(Algorithm):
         if not (pd.api.types.is_numeric_dtype(self.dataframe["timestamp"]) and self.dataframe["timestamp"].astype(int).min() > 1e9):
             self.dataframe["timestamp"] = pd.to_datetime(self.dataframe["timestamp"])
             self.dataframe["timestamp"] = self.dataframe["timestamp"].astype(int) // 10**9
-        dataframe = self.dataframe.copy(deep=True)
         series = self.setup_series()
 
         logger = SingletonLogger.get_logger("Orion")
         logger.info("Starting analysis using Isolation Forest")
-        metric_columns = self.metrics_config.keys()
-        dataframe_with_metrics = dataframe[metric_columns]
-        model = IsolationForest(contamination="auto", random_state=42)
-        model.fit(dataframe_with_metrics)
-        predictions = model.predict(dataframe_with_metrics)
-        dataframe["is_anomaly"] = predictions
-        anomaly_scores = model.decision_function(dataframe_with_metrics)
-        # Add anomaly scores to the DataFrame
-        dataframe["anomaly_score"] = anomaly_scores
+        metric_columns = list(self.metrics_config.keys())
+        dataframe_with_metrics = self.dataframe[metric_columns]
+        # predict() is decision_function() < 0, so score the runs only once
+        is_anomaly = self._anomaly_scores(dataframe_with_metrics) < 0
 
         # Calculate moving average for each metric
         window_size = (5 if self.options.get("anomaly_window",None) is None else int(self.options.get("anomaly_window",None)))
-        moving_averages = dataframe_with_metrics.rolling(window=window_size).mean()
+        moving_averages = dataframe_with_metrics.rolling(window=window_size).mean().to_numpy(dtype=float)
+        values = dataframe_with_metrics.to_numpy(dtype=float)
+        min_percent = (10 if self.options.get("min_anomaly_percent",None) is None else int(self.options.get("min_anomaly_percent",None)))
+        directions = np.array([self.metrics_config[feature]["direction"] for feature in metric_columns])
 
-        # Initialize percentage change columns for all metrics
-        for feature in dataframe_with_metrics.columns:
-            dataframe[f"{feature}_pct_change"] = 0.0
+        # runs x metrics masks; NaN percent changes (warm-up rows) never match
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pct_change = (values - moving_averages) / moving_averages * 100
+            selected = (
+                is_anomaly[:, None]
+                & (np.abs(pct_change) > min_percent)
+                & ((pct_change * directions > 0) | (directions == 0))
+            )
 
         change_points_by_metric={ k:[] for k in metric_columns }
-
-        for idx, row in dataframe.iterrows():
-            if row["is_anomaly"] == -1:
-                for feature in metric_columns:
-                    pct_change = (
-                        (row[feature] - moving_averages.at[idx, feature])
-                        / moving_averages.at[idx, feature]
-                    ) * 100
-                    if abs(pct_change) > (10 if self.options.get("min_anomaly_percent",None) is None else int(self.options.get("min_anomaly_percent",None))):
-                        if (pct_change * self.metrics_config[feature]["direction"] > 0) or self.metrics_config[feature]["direction"]==0:
-                            change_point = ChangePoint(index=idx,
-                                                    qhat=0.0,
-                                                    metric=feature,
-                                                    time=row['timestamp'],
-                                                    stats=TTestStats(
-                                                        mean_1=moving_averages.at[idx, feature],
-                                                        mean_2=row[feature],
-                                                        std_1=0.0,
-                                                        std_2=0.0,
-                                                        pvalue=1.0
-                                                    ))
-                            change_points_by_metric[feature].append(change_point)
+        index = self.dataframe.index
+        timestamps = self.dataframe["timestamp"].to_numpy()
+        for col, feature in enumerate(metric_columns):
+            for row in np.flatnonzero(selected[:, col]):
+                change_point = ChangePoint(index=index[row],
+                                        qhat=0.0,
+                                        metric=feature,
+                                        time=timestamps[row],
+                                        stats=TTestStats(
+                                            mean_1=moving_averages[row, col],
+                                            mean_2=values[row, col],
+                                            std_1=0.0,
+                                            std_2=0.0,
+                                            pvalue=1.0
+                                        ))
+                change_points_by_metric[feature].append(change_point)
         if [val for li in change_points_by_metric.values() for val in li]:
             self.regression_flag=True
         return series, change_points_by_metric
+
+    def _fit(self, dataframe_with_metrics: pd.DataFrame) -> IsolationForest:
+        n_jobs = int(self.options.get("analysis_workers") or 1)
+        model = IsolationForest(contamination="auto", random_state=42, n_jobs=n_jobs)
+        model.fit(dataframe_with_metrics)
+        return model
+
+    def _anomaly_scores(self, dataframe_with_metrics: pd.DataFrame) -> np.ndarray:
+        """Score every run, reusing the stored model with --anomaly-model-dir
+
+        Args:
+            dataframe_with_metrics (pd.DataFrame): metric values of the runs
+
+        Returns:
+            np.ndarray: decision_function score of every run, negative for anomalies
+        """
+        model_dir = self.options.get("anomaly_model_dir")
+        if not model_dir:
+            return self._fit(dataframe_with_metrics).decision_function(dataframe_with_metrics)
+
+        logger = SingletonLogger.get_logger("Orion")
+        metric_columns = list(dataframe_with_metrics.columns)
+        path = model_path(model_dir, self.test, metric_columns, self.options)
+        uuids = [str(uuid) for uuid in self.dataframe[self.test["uuid_field"]]]
+        refit_hours = float(self.options.get("anomaly_refit_hours") or cnsts.ANOMALY_REFIT_HOURS)
+        stored = load_model(path, metric_columns)
+        if stored is not None and needs_refit(stored, refit_hours):
+            logger.info("Isolation forest model %s is stale or has drifted, refitting", path)
+            stored = None
+
+        if stored is None:
+            model = self._fit(dataframe_with_metrics)
+            stored = new_model(model, metric_columns, uuids, model.decision_function(dataframe_with_metrics))
+        else:
+            new_rows = [i for i, uuid in enumerate(uuids) if uuid not in stored["scores"]]
+            if new_rows:
+                new_scores = stored["model"].decision_function(dataframe_with_metrics.iloc[new_rows])
+                stored["scores"].update(zip((uuids[i] for i in new_rows), (float(s) for s in new_scores)))
+                stored["scored_since_fit"] += len(new_rows)
+                stored["anomalies_since_fit"] += int((new_scores < 0).sum())
+            logger.info("Reused isolation forest model %s, scored %d new runs", path, len(new_rows))
+
+        # Only keep the scores of the runs still in the window
+        stored["scores"] = {uuid: stored["scores"][uuid] for uuid in uuids}
+        save_model(path, stored)
+        return np.array([stored["scores"][uuid] for uuid in uuids])
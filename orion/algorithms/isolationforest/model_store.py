@@ -0,0 +1,156 @@
+"""
+Persisted isolation forest models.
+
+A fitted model is stored per test, metric set and lookback window together
+with the anomaly score of every run it has scored. Later invocations reuse
+the model and the stored scores, and only score the runs they have not seen.
+The model is refit when it is older than the refit interval or when the new
+runs look much more anomalous than the training runs did.
+
+Models are pickled, so loading one runs code from the file: only model files
+owned by the current user and not writable by anyone else are loaded.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import stat
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import sklearn
+
+from orion.logger import SingletonLogger
+from orion.snapshot import snapshot_path, snapshot_run_type
+
+MODEL_VERSION = 1
+# Refit once the anomaly share of the runs scored since the fit exceeds the
+# training share by this much
+DRIFT_MARGIN = 0.25
+# Minimum runs scored since the fit before the drift check applies
+DRIFT_MIN_RUNS = 5
+# Options that select the training window of the model
+WINDOW_OPTIONS = ("lookback", "since", "lookback_size", "uuid", "baseline")
+
+
+def model_path(model_dir: str, test: Dict[str, Any], metric_columns: List[str],
+               options: Dict[str, Any]) -> str:
+    """Build the path of the stored model of a test
+
+    Args:
+        model_dir (str): directory holding the models
+        test (dict): test configuration
+        metric_columns (list): metrics the model is trained on
+        options (dict): command line options, for the lookback window
+
+    Returns:
+        str: path to the model file
+    """
+    key = json.dumps(
+        {
+            "metrics": sorted(metric_columns),
+            "window": {name: options.get(name) for name in WINDOW_OPTIONS},
+        },
+        sort_keys=True, default=str,
+    )
+    digest = hashlib.sha256(key.encode()).hexdigest()[:12]
+    return snapshot_path(
+        model_dir, test["name"], snapshot_run_type(test), extension=f"{digest}.iforest.pkl"
+    )
+
+
+def _untrusted_reason(path: str) -> Optional[str]:
+    """Tell why a model file may have been written by someone else, if it may."""
+    file_stat = os.stat(path)
+    if hasattr(os, "getuid") and file_stat.st_uid != os.getuid():
+        return f"it is owned by uid {file_stat.st_uid}"
+    if file_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        return "it is writable by other users"
+    return None
+
+
+def load_model(path: str, metric_columns: List[str]) -> Optional[Dict[str, Any]]:
+    """Load a stored model
+
+    Args:
+        path (str): model file
+        metric_columns (list): metrics of the current analysis, in order
+
+    Returns:
+        dict: stored model and scores, None when there is no usable model
+    """
+    logger = SingletonLogger.get_logger("Orion")
+    if not os.path.isfile(path):
+        return None
+    try:
+        reason = _untrusted_reason(path)
+        if reason is not None:
+            logger.warning("Not loading isolation forest model %s: %s, refitting", path, reason)
+            return None
+        with open(path, "rb") as model_file:
+            stored = pickle.load(model_file)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning("Could not read isolation forest model %s: %s", path, e)
+        return None
+    if stored.get("version") != MODEL_VERSION or \
+            stored.get("sklearn") != sklearn.__version__ or \
+            stored.get("columns") != list(metric_columns):
+        logger.info("Isolation forest model %s does not match this analysis, refitting", path)
+        return None
+    return stored
+
+
+def save_model(path: str, stored: Dict[str, Any]) -> None:
+    """Store a model and its scores
+
+    Args:
+        path (str): model file
+        stored (dict): model, scores and counters
+    """
+    logger = SingletonLogger.get_logger("Orion")
+    model_dir = os.path.dirname(path) or "."
+    os.makedirs(model_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=model_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as model_file:
+            pickle.dump(stored, model_file)
+        os.replace(tmp_path, path)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning("Could not store isolation forest model %s: %s", path, e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def new_model(model, metric_columns: List[str], uuids: List[str], scores) -> Dict[str, Any]:
+    """Wrap a freshly fitted model and the scores of its training runs."""
+    return {
+        "version": MODEL_VERSION,
+        "sklearn": sklearn.__version__,
+        "columns": list(metric_columns),
+        "fitted_at": time.time(),
+        "model": model,
+        "train_share": float((scores < 0).mean()) if len(scores) else 0.0,
+        "scores": dict(zip(uuids, (float(score) for score in scores))),
+        "scored_since_fit": 0,
+        "anomalies_since_fit": 0,
+    }
+
+
+def needs_refit(stored: Dict[str, Any], refit_hours: float) -> bool:
+    """Tell whether a stored model is too old or has drifted
+
+    Args:
+        stored (dict): stored model and counters
+        refit_hours (float): maximum age of the model in hours
+
+    Returns:
+        bool: True when the model must be refit
+    """
+    if time.time() - stored["fitted_at"] > refit_hours * 3600:
+        return True
+    scored = stored["scored_since_fit"]
+    if scored < DRIFT_MIN_RUNS:
+        return False
+    return stored["anomalies_since_fit"] / scored > stored["train_share"] + DRIFT_MARGIN
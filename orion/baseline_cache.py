@@ -0,0 +1,279 @@
+"""
+Module for sharing the periodic baseline analysis between PR analyses.
+
+In --pr-analysis mode every job re-analyzes the same periodic runs for a
+test. BaselineCache stores the periodic (AnalysisResult, VizData) tuple on
+disk as JSON, keyed by everything that affects it, so later jobs within the
+configured freshness only fetch their own pull-job runs.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from otava.analysis import TTestStats
+from otava.series import ChangePoint, Metric, Series
+
+from orion.logger import SingletonLogger
+from orion.pipeline.analysis_result import AnalysisResult
+from orion.snapshot import dataframe_from_json, dataframe_to_json
+from orion.visualization import VizData
+
+BASELINE_VERSION = 1
+
+# Options that cannot change the periodic analysis and are left out of its
+# cache key. Every other option, including ones added later, is part of it.
+BASELINE_KEY_EXCLUDED_OPTIONS = (
+    "config", "configs", "config_content", "input_vars", "interactive",
+    "pr_analysis", "pull_number", "pull_numbers",
+    "baseline_cache", "baseline_cache_max_age",
+    "save_data_path", "save_output_path", "save_snapshot", "record",
+    "output_format", "debug", "report", "explain", "fleet_workers",
+    "watch", "watch_interval", "watch_state",
+    "serve", "serve_host", "serve_port", "serve_workers", "serve_config_dir",
+    "ack", "jira_ack", "jira_url", "jira_project", "jira_component",
+    "jira_token", "jira_email", "jira_auto_create", "jira_status_filter",
+    "analysis_workers", "stream_metrics",
+)
+
+
+def _json_default(value: Any) -> Any:
+    """Convert the numpy scalars found in analysis results for json.dump."""
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def _series_to_json(values: pd.Series) -> Dict[str, Any]:
+    return {"name": values.name, "index": list(values.index), "data": list(values)}
+
+
+def _series_from_json(payload: Dict[str, Any]) -> pd.Series:
+    return pd.Series(payload["data"], index=payload["index"], name=payload["name"]).infer_objects()
+
+
+def _change_points_to_json(change_points: Dict[str, List[ChangePoint]]) -> Dict[str, Any]:
+    return {
+        metric: [
+            {
+                "index": cp.index, "qhat": cp.qhat, "time": cp.time, "metric": cp.metric,
+                "stats": {
+                    "mean_1": cp.stats.mean_1, "mean_2": cp.stats.mean_2,
+                    "std_1": cp.stats.std_1, "std_2": cp.stats.std_2,
+                    "pvalue": cp.stats.pvalue,
+                },
+            }
+            for cp in cps
+        ]
+        for metric, cps in change_points.items()
+    }
+
+
+def _change_points_from_json(payload: Dict[str, Any]) -> Dict[str, List[ChangePoint]]:
+    return {
+        metric: [
+            ChangePoint(
+                index=cp["index"], qhat=cp["qhat"], time=cp["time"], metric=cp["metric"],
+                stats=TTestStats(**cp["stats"]),
+            )
+            for cp in cps
+        ]
+        for metric, cps in payload.items()
+    }
+
+
+def _otava_series_to_json(series: Series) -> Dict[str, Any]:
+    return {
+        "test_name": series.test_name,
+        "branch": series.branch,
+        "time": list(series.time),
+        "metrics": {
+            name: {"direction": metric.direction, "scale": metric.scale}
+            for name, metric in series.metrics.items()
+        },
+        "data": {name: list(values) for name, values in series.data.items()},
+        "attributes": {name: list(values) for name, values in series.attributes.items()},
+    }
+
+
+def _otava_series_from_json(payload: Dict[str, Any]) -> Series:
+    return Series(
+        test_name=payload["test_name"],
+        branch=payload["branch"],
+        time=payload["time"],
+        metrics={
+            name: Metric(metric["direction"], metric["scale"])
+            for name, metric in payload["metrics"].items()
+        },
+        data={name: pd.Series(values) for name, values in payload["data"].items()},
+        attributes={name: pd.Series(values) for name, values in payload["attributes"].items()},
+    )
+
+
+def baseline_to_json(value: Tuple[AnalysisResult, Optional[VizData]]) -> Dict[str, Any]:
+    """Convert a periodic (analysis, viz_data) tuple to JSON-compatible data
+
+    Args:
+        value (tuple): (AnalysisResult, VizData or None)
+
+    Returns:
+        dict: payload for baseline_from_json
+    """
+    analysis, viz_data = value
+    payload = {
+        "version": BASELINE_VERSION,
+        "analysis": {
+            "test_name": analysis.test_name,
+            "test": analysis.test,
+            "dataframe": dataframe_to_json(analysis.dataframe),
+            "metrics_config": analysis.metrics_config,
+            "change_points_by_metric": _change_points_to_json(analysis.change_points_by_metric),
+            "series": _otava_series_to_json(analysis.series),
+            "regression_flag": analysis.regression_flag,
+            "avg_values": _series_to_json(analysis.avg_values),
+            "collapse": analysis.collapse,
+            "display_fields": analysis.display_fields,
+            "column_group_size": analysis.column_group_size,
+            "uuid_field": analysis.uuid_field,
+            "version_field": analysis.version_field,
+            "sippy_pr_search": analysis.sippy_pr_search,
+            "github_repos": analysis.github_repos,
+            "change_points_by_algorithm": {
+                name: _change_points_to_json(cps)
+                for name, cps in analysis.change_points_by_algorithm.items()
+            },
+        },
+        "viz": None,
+    }
+    if viz_data is not None:
+        payload["viz"] = {
+            "test_name": viz_data.test_name,
+            "dataframe": dataframe_to_json(viz_data.dataframe),
+            "metrics_config": viz_data.metrics_config,
+            "change_points_by_metric": _change_points_to_json(viz_data.change_points_by_metric),
+            "uuid_field": viz_data.uuid_field,
+            "version_field": viz_data.version_field,
+            "acked_entries": viz_data.acked_entries,
+        }
+    return payload
+
+
+def baseline_from_json(payload: Dict[str, Any]) -> Tuple[AnalysisResult, Optional[VizData]]:
+    """Rebuild a periodic (analysis, viz_data) tuple from baseline_to_json data
+
+    Args:
+        payload (dict): data written by baseline_to_json
+
+    Returns:
+        tuple: (AnalysisResult, VizData or None)
+    """
+    analysis = dict(payload["analysis"])
+    analysis["dataframe"] = dataframe_from_json(analysis["dataframe"])
+    analysis["change_points_by_metric"] = _change_points_from_json(analysis["change_points_by_metric"])
+    analysis["series"] = _otava_series_from_json(analysis["series"])
+    analysis["avg_values"] = _series_from_json(analysis["avg_values"])
+    analysis["change_points_by_algorithm"] = {
+        name: _change_points_from_json(cps)
+        for name, cps in analysis["change_points_by_algorithm"].items()
+    }
+    viz_data = None
+    if payload["viz"] is not None:
+        viz = dict(payload["viz"])
+        viz["dataframe"] = dataframe_from_json(viz["dataframe"])
+        viz["change_points_by_metric"] = _change_points_from_json(viz["change_points_by_metric"])
+        viz_data = VizData(**viz)
+    return AnalysisResult(**analysis), viz_data
+
+
+class BaselineCache:
+    """On-disk cache of periodic analyses shared across PR analysis runs
+
+    Args:
+        cache_dir (str): directory holding the cached baselines
+        max_age_hours (float): baselines older than this are recomputed
+    """
+
+    def __init__(self, cache_dir: str, max_age_hours: float = 6):
+        self.cache_dir = cache_dir
+        self.max_age_seconds = max_age_hours * 3600
+        self.logger = SingletonLogger.get_logger("Orion")
+
+    @staticmethod
+    def key(test: Dict[str, Any], options: Dict[str, Any]) -> str:
+        """Build the cache key of a periodic test analysis
+
+        Args:
+            test (dict): periodic test configuration
+            options (dict): options for the run
+
+        Returns:
+            str: hex digest identifying the analysis
+        """
+        relevant = {
+            name: value for name, value in options.items()
+            if name not in BASELINE_KEY_EXCLUDED_OPTIONS and not name.startswith("_")
+        }
+        payload = json.dumps(
+            {"test": test, "options": relevant}, sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Tuple[AnalysisResult, Optional[VizData]]]:
+        """Return the cached (analysis, viz_data) tuple if it is still fresh
+
+        Args:
+            key (str): cache key from BaselineCache.key
+
+        Returns:
+            tuple: (AnalysisResult, VizData) or None on a miss
+        """
+        path = self._path(key)
+        try:
+            age = time.time() - os.path.getmtime(path)
+        except OSError:
+            return None
+        if age > self.max_age_seconds:
+            self.logger.info("Periodic baseline %s is stale (%.0f minutes old)", key[:12], age / 60)
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as cache_file:
+                payload = json.load(cache_file)
+            if payload.get("version") != BASELINE_VERSION:
+                raise ValueError(f"unsupported version {payload.get('version')}")
+            value = baseline_from_json(payload)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            self.logger.warning("Could not read periodic baseline %s: %s", path, e)
+            return None
+        self.logger.info("Reusing periodic baseline %s (%.0f minutes old)", key[:12], age / 60)
+        return value
+
+    def put(self, key: str, value: Tuple[AnalysisResult, Optional[VizData]]) -> None:
+        """Store an (analysis, viz_data) tuple
+
+        The file is written to a temporary name first and then renamed, so
+        concurrent jobs never read a partial baseline.
+
+        Args:
+            key (str): cache key from BaselineCache.key
+            value (tuple): (AnalysisResult, VizData)
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as cache_file:
+                json.dump(baseline_to_json(value), cache_file, default=_json_default)
+            os.replace(tmp_path, self._path(key))
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            self.logger.warning("Could not store periodic baseline %s: %s", key[:12], e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self.logger.info("Stored periodic baseline %s", key[:12])
@@ -0,0 +1,285 @@
+"""
+Module for recording and replaying the OpenSearch traffic of a run.
+
+With --record every request the OpenSearch client sends and the response it
+gets back are saved to a cassette directory; with --replay the responses are
+served from that directory and no request leaves the process. A replayed
+run gets exactly the data of the recorded one, so a slow or wrong production
+run can be profiled, benchmarked and debugged offline.
+
+Requests are keyed by a hash of their method, path, parameters and body,
+with JSON bodies canonicalized so the order of their keys, and of the values
+of terms queries, does not matter; the host is not part of the key. Each key
+is a gzipped JSON file holding the request and its responses in the order
+they were received, which a replay serves in the same order, the last one
+answering any further request.
+Cassettes hold the requests and responses only, no credentials or headers.
+
+Lookback queries bound their range from the current time, so the time a run
+is recorded at is saved too, and a replay computes its lookback from it.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from opensearchpy import Connection, Urllib3HttpConnection
+from opensearchpy.exceptions import ConnectionError as OpenSearchConnectionError, TransportError
+
+import orion.constants as cnsts
+from orion.logger import SingletonLogger
+
+CASSETTE_VERSION = 1
+# File of the cassette metadata, next to the request files
+CASSETTE_META = "cassette.json"
+
+
+def _sort_terms(value: Any) -> Any:
+    """Sort the values of terms queries, which match whatever their order."""
+    if isinstance(value, list):
+        return [_sort_terms(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    canonical = {key: _sort_terms(item) for key, item in value.items()}
+    terms = canonical.get("terms")
+    if isinstance(terms, dict):
+        # uuid lists are built from sets, in a different order every process
+        canonical["terms"] = {
+            field: sorted(values, key=str) if isinstance(values, list) else values
+            for field, values in terms.items()
+        }
+    return canonical
+
+
+def _canonical_body(body: Any) -> Any:
+    """JSON value of a request body, or its text when it is not JSON."""
+    if body is None:
+        return None
+    if isinstance(body, bytes):
+        body = body.decode("utf-8")
+    if not isinstance(body, str):
+        return _sort_terms(body)
+    try:
+        return _sort_terms(json.loads(body))
+    except ValueError:
+        pass
+    # _bulk and _msearch bodies are one JSON document per line
+    try:
+        return [_sort_terms(json.loads(line)) for line in body.splitlines() if line.strip()]
+    except ValueError:
+        return body
+
+
+def canonical_request(method: str, url: str, params: Optional[Dict[str, Any]] = None,
+                      body: Any = None) -> Dict[str, Any]:
+    """Request as it is keyed in a cassette
+
+    Args:
+        method (str): HTTP method
+        url (str): path and query string of the request
+        params (dict): query parameters
+        body: request body, as bytes, text or a JSON value
+
+    Returns:
+        dict: method, path, sorted parameters and JSON body
+    """
+    path, _, query = url.partition("?")
+    merged = dict(pair.split("=", 1) if "=" in pair else (pair, "") for pair in query.split("&") if pair)
+    merged.update({key: str(value) for key, value in (params or {}).items()})
+    return {
+        "method": method.upper(),
+        "path": path,
+        "params": dict(sorted(merged.items())),
+        "body": _canonical_body(body),
+    }
+
+
+def request_key(request: Dict[str, Any]) -> str:
+    """Hash of a canonical request"""
+    text = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """Request/response pairs of a directory, shared by the connections of a client
+
+    Args:
+        directory (str): cassette directory, created when recording
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.logger = SingletonLogger.get_logger("Orion")
+        self._lock = threading.Lock()
+        self._recorded = {}
+        self._played = {}
+
+    def path(self, key: str) -> str:
+        """File of a request key"""
+        return os.path.join(self.directory, f"{key}.json.gz")
+
+    def save_reference_time(self) -> datetime:
+        """Save the current time as the one the recorded run computes its lookback from
+
+        Returns:
+            datetime: the current time, in UTC
+        """
+        now = datetime.now(timezone.utc)
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, CASSETTE_META)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as meta_file:
+            json.dump({"version": CASSETTE_VERSION, "reference_time": now.isoformat()}, meta_file)
+        os.replace(f"{path}.tmp", path)
+        return now
+
+    def reference_time(self) -> Optional[datetime]:
+        """Time the recorded run computed its lookback from
+
+        Returns:
+            datetime: the time saved by save_reference_time, None when the
+                cassette has none
+        """
+        path = os.path.join(self.directory, CASSETTE_META)
+        if not os.path.isfile(path):
+            self.logger.warning("No %s in %s, lookback is computed from the current time",
+                                CASSETTE_META, self.directory)
+            return None
+        with open(path, "r", encoding="utf-8") as meta_file:
+            return datetime.fromisoformat(json.load(meta_file)["reference_time"])
+
+    def record(self, request: Dict[str, Any], status: int, content_type: Optional[str], body: str) -> None:
+        """Append a response to the ones of its request
+
+        A request recorded for the first time by this instance replaces any
+        older recording of it in the directory.
+
+        Args:
+            request (dict): canonical_request of the request
+            status (int): HTTP status of the response
+            content_type (str): content type of the response
+            body (str): raw response body
+        """
+        key = request_key(request)
+        with self._lock:
+            responses = self._recorded.setdefault(key, [])
+            responses.append({"status": status, "content_type": content_type, "body": body})
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.path(key)
+            payload = {"version": CASSETTE_VERSION, "request": request, "responses": responses}
+            with gzip.open(f"{path}.tmp", "wt", encoding="utf-8") as cassette_file:
+                json.dump(payload, cassette_file)
+            os.replace(f"{path}.tmp", path)
+
+    def play(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Next recorded response of a request
+
+        Args:
+            request (dict): canonical_request of the request
+
+        Returns:
+            dict: status, content_type and body of the response, None when
+                the request was not recorded
+        """
+        key = request_key(request)
+        path = self.path(key)
+        if not os.path.isfile(path):
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as cassette_file:
+            payload = json.load(cassette_file)
+        if payload.get("version") != CASSETTE_VERSION:
+            self.logger.error("Unsupported cassette version %s in %s", payload.get("version"), path)
+            return None
+        with self._lock:
+            position = self._played.get(key, 0)
+            self._played[key] = position + 1
+        responses = payload["responses"]
+        return responses[min(position, len(responses) - 1)]
+
+
+class RecordingConnection(Urllib3HttpConnection):
+    """Connection saving every response it gets to a cassette
+
+    Args:
+        cassette (Cassette): cassette the responses are recorded to
+    """
+
+    def __init__(self, cassette: Cassette = None, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def perform_request(self, method, url, params=None, body=None, timeout=None, ignore=(), headers=None):
+        # pylint: disable=too-many-arguments
+        request = canonical_request(method, url, params, body)
+        try:
+            status, response_headers, raw = super().perform_request(
+                method, url, params, body, timeout=timeout, ignore=ignore, headers=headers
+            )
+        except TransportError as e:
+            # HTTP errors are replayed too, connection failures are not recorded
+            if isinstance(e.status_code, int):
+                info = e.info if isinstance(e.info, str) else json.dumps(e.info)
+                self.cassette.record(request, e.status_code, "application/json", info)
+            raise
+        self.cassette.record(request, status, response_headers.get("content-type"), raw)
+        return status, response_headers, raw
+
+
+class ReplayConnection(Connection):
+    """Connection answering from a cassette, without any network
+
+    Args:
+        cassette (Cassette): cassette the responses are served from
+    """
+
+    def __init__(self, cassette: Cassette = None, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def perform_request(self, method, url, params=None, body=None, timeout=None, ignore=(), headers=None):
+        # pylint: disable=too-many-arguments
+        request = canonical_request(method, url, params, body)
+        response = self.cassette.play(request)
+        if response is None:
+            raise OpenSearchConnectionError(
+                "N/A",
+                f"No response recorded for {request['method']} {request['path']} in "
+                f"{self.cassette.directory} (key {request_key(request)}); re-record the run with --record",
+                None,
+            )
+        status, content_type, raw = response["status"], response["content_type"], response["body"]
+        ignore = (ignore,) if isinstance(ignore, int) else ignore
+        if not 200 <= status < 300 and status not in ignore:
+            self._raise_error(status, raw, content_type)
+        return status, {"content-type": content_type or "application/json"}, raw
+
+
+def prepare_cassette(kwargs: dict, logger) -> None:
+    """
+    Validate the --record and --replay options.
+
+    A replay needs no OpenSearch server, so --es-server defaults to a
+    placeholder with --replay, and computes its lookback from the time the
+    run was recorded at; exits when the options conflict.
+
+    Args:
+        kwargs: CLI arguments, updated with es_server and _reference_time
+        logger: Logger instance
+    """
+    if kwargs.get("record") and kwargs.get("replay"):
+        logger.error("--record and --replay are mutually exclusive")
+        sys.exit(1)
+    if (kwargs.get("record") or kwargs.get("replay")) and kwargs.get("from_snapshot"):
+        logger.error("--record and --replay cannot be used with --from-snapshot, which does not query ES/OS")
+        sys.exit(1)
+    if kwargs.get("replay") and not kwargs.get("es_server"):
+        kwargs["es_server"] = cnsts.REPLAY_ES_SERVER
+    if kwargs.get("record") or kwargs.get("replay"):
+        if kwargs.get("record"):
+            kwargs["_reference_time"] = Cassette(kwargs["record"]).save_reference_time()
+        else:
+            kwargs["_reference_time"] = Cassette(kwargs["replay"]).reference_time()
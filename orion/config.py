@@ -7,16 +7,77 @@ import sys
 import os
 import re
 import copy
-from typing import Any, Dict, List
-from collections import Counter
+import hashlib
+import json
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter, OrderedDict
 import jinja2
 import yaml
 from orion.logger import SingletonLogger
 
+# libyaml's C loader when PyYAML was built with it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Compiled configs and rendered referenced files of this process, each kept
+# to the _CACHE_SIZE most recently used entries. Both are keyed by path and
+# input variables: compiled configs hold the digest of their template and
+# the mtimes of the files they were merged from, rendered files their own
+# mtime and size. An entry whose files changed is replaced.
+_CACHE_SIZE = 256
+_COMPILED_CONFIGS: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+_RENDERED_FILES: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+
+def clear_config_cache() -> None:
+    """Drop the compiled configs and rendered files cached by load_config"""
+    with _CACHE_LOCK:
+        _COMPILED_CONFIGS.clear()
+        _RENDERED_FILES.clear()
+    _compile_template.cache_clear()
+
+
+def _cache_get(cache: OrderedDict, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+    """Return a cached entry and mark it as the most recently used."""
+    with _CACHE_LOCK:
+        entry = cache.get(key)
+        if entry is not None:
+            cache.move_to_end(key)
+        return entry
+
+
+def _cache_put(cache: OrderedDict, key: Tuple[str, str], entry: Dict[str, Any]) -> None:
+    """Store an entry, replacing the previous one of its key, and evict the least recently used."""
+    with _CACHE_LOCK:
+        cache[key] = entry
+        cache.move_to_end(key)
+        while len(cache) > _CACHE_SIZE:
+            cache.popitem(last=False)
+
+
+def _vars_digest(env_vars: Dict[str, Any]) -> str:
+    """Digest of the variables a config is rendered with."""
+    encoded = json.dumps(env_vars, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime, size) of a file, None when it cannot be read."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
 
 def load_config(config_path: str, input_vars: Dict[str, Any]) -> Dict[str, Any]:
     """Loads config file
 
+    The compiled config is cached for the process and reused while the
+    template, its input variables and the files it references are unchanged.
+
     Args:
         config_path (str): file path to config file
         input_vars (Dict[str, Any]): dictionary of input variables
@@ -28,6 +89,42 @@ def load_config(config_path: str, input_vars: Dict[str, Any]) -> Dict[str, Any]:
     env_vars = {k.lower(): v for k, v in os.environ.items()}
     env_vars.update(input_vars)
     template_content = load_read_file(config_path, logger)
+    cache_key = (os.path.abspath(config_path), _vars_digest(env_vars))
+    template_digest = hashlib.sha256(template_content.encode("utf-8")).hexdigest()
+    compiled = _cache_get(_COMPILED_CONFIGS, cache_key)
+    if compiled is not None and compiled["template"] == template_digest and all(
+        _file_signature(path) == signature for path, signature in compiled["files"].items()
+    ):
+        logger.debug("Using compiled config of %s", config_path)
+        return copy.deepcopy(compiled["config"])
+
+    referenced = {}
+    rendered_config = _compile_config(template_content, config_path, env_vars, referenced, logger)
+    _cache_put(_COMPILED_CONFIGS, cache_key, {
+        "template": template_digest,
+        "config": copy.deepcopy(rendered_config),
+        "files": referenced,
+    })
+    return rendered_config
+
+
+def _compile_config(template_content: str,
+                    config_path: str,
+                    env_vars: Dict[str, Any],
+                    referenced: Dict[str, Any],
+                    logger: SingletonLogger) -> Dict[str, Any]:
+    """Renders a config template and merges the files it references
+
+    Args:
+        template_content (str): content of the config file
+        config_path (str): file path to config file
+        env_vars (Dict[str, Any]): dictionary of input variables
+        referenced (Dict[str, Any]): filled with the (mtime, size) of every referenced file
+        logger (SingletonLogger): logger instance
+
+    Returns:
+        Dict[str, Any]: dictionary of the config file
+    """
     rendered_config = render_template(template_content, env_vars, logger)
 
     # Get the directory of the config file for resolving relative paths
@@ -39,7 +136,8 @@ def load_config(config_path: str, input_vars: Dict[str, Any]) -> Dict[str, Any]:
             rendered_config["parentConfig"],
             config_dir,
             env_vars,
-            logger
+            logger,
+            referenced
         )
 
     parent_metrics = []
@@ -48,7 +146,8 @@ def load_config(config_path: str, input_vars: Dict[str, Any]) -> Dict[str, Any]:
             rendered_config["metricsFile"],
             config_dir,
             env_vars,
-            logger
+            logger,
+            referenced
         )
 
     metrics = []
@@ -60,10 +159,10 @@ def load_config(config_path: str, input_vars: Dict[str, Any]) -> Dict[str, Any]:
         test.setdefault("uuid_field", "uuid")
         test.setdefault("version_field", "ocpVersion")
         if "local_config" in test:
-            local_config = load_config_file(test["local_config"], config_dir, env_vars, logger)
+            local_config = load_config_file(test["local_config"], config_dir, env_vars, logger, referenced)
             test["metadata"] = merge_configs(test.get("metadata", {}), local_config)
         if "local_metrics" in test:
-            local_metrics = load_config_file(test["local_metrics"], config_dir, env_vars, logger)
+            local_metrics = load_config_file(test["local_metrics"], config_dir, env_vars, logger, referenced)
             test["metrics"] = merge_lists(test.get("metrics", []), local_metrics)
         if parent_config and not test["IgnoreGlobal"]:
             test["metadata"] = merge_configs(test.get("metadata", {}), parent_config)
@@ -121,7 +220,7 @@ def load_ack(ack: str, version: str = None, test_type: str = None) -> Dict[str,A
     logger = SingletonLogger.get_logger("Orion")
     template_content = load_read_file(ack, logger)
     try:
-        rendered_config = yaml.safe_load(template_content)
+        rendered_config = yaml.load(template_content, Loader=YAML_LOADER)
     except Exception as e:  # pylint: disable=broad-exception-caught
         logger.error("An error occurred: %s", e)
         sys.exit(1)
@@ -189,14 +288,20 @@ def merge_ack_files(ack_maps: List[Dict[str, Any]]) -> Dict[str, Any]:
 def load_config_file(config_file: str,
                     config_dir: str,
                     env_vars: Dict[str, Any],
-                    logger: SingletonLogger) -> Dict[str, Any]:
+                    logger: SingletonLogger,
+                    referenced: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Loads parent config file content.
 
+    The rendered content is cached for the process, keyed by the file and
+    the input variables, and re-rendered when the file's mtime or size
+    changes.
+
     Args:
         config_file (str): path to the config file
         config_dir (str): directory of the config file
         env_vars (Dict[str, Any]): dictionary of input variables
         logger (SingletonLogger): logger instance
+        referenced (Dict[str, Any]): if given, the (mtime, size) of the file is recorded in it
     """
     # Determine if path is absolute or relative
     if os.path.isabs(config_file):
@@ -204,10 +309,21 @@ def load_config_file(config_file: str,
     else:
         # Resolve relative path relative to config file directory
         config_path = os.path.join(config_dir, config_file)
+    config_path = os.path.abspath(config_path)
+    signature = _file_signature(config_path)
+    if referenced is not None:
+        referenced[config_path] = signature
+    cache_key = (config_path, _vars_digest(env_vars))
+    cached = _cache_get(_RENDERED_FILES, cache_key)
+    if signature is not None and cached is not None and cached["signature"] == signature:
+        return copy.deepcopy(cached["rendered"])
     config_content = load_read_file(config_path, logger)
     # Load YAML content from config file
     # Render with Jinja2 if it contains templates
-    return render_template(config_content, env_vars, logger)
+    rendered = render_template(config_content, env_vars, logger)
+    if signature is not None:
+        _cache_put(_RENDERED_FILES, cache_key, {"signature": signature, "rendered": copy.deepcopy(rendered)})
+    return rendered
 
 
 def load_read_file(file_path: str, logger: SingletonLogger) -> str:
@@ -238,13 +354,18 @@ def render_template(template: str, env_vars: Dict[str, Any], logger: SingletonLo
         env_vars (Dict[str, Any]): dictionary of input variables
         logger (SingletonLogger): logger instance
     """
-    template = jinja2.Template(template, undefined=jinja2.StrictUndefined)
     try:
-        rendered_config_yaml = template.render(env_vars)
+        rendered_config_yaml = _compile_template(template).render(env_vars)
     except jinja2.exceptions.UndefinedError as e:
         logger.critical("Jinja rendering error: %s, define it through the input-variables flag", e)
         sys.exit(1)
-    return yaml.safe_load(rendered_config_yaml)
+    return yaml.load(rendered_config_yaml, Loader=YAML_LOADER)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _compile_template(template: str) -> jinja2.Template:
+    """Compiled Jinja2 template of a config file."""
+    return jinja2.Template(template, undefined=jinja2.StrictUndefined)
 
 
 def merge_configs(config: Dict[str, Any], inherited_config: Dict[str, Any]) -> Dict[str, Any]:
@@ -369,6 +490,79 @@ def collect_pull_numbers(kwargs: dict, input_vars: dict) -> list:
                 numbers.add(parsed)
     return sorted(numbers)
 
+
+def prepare_pr_analysis(kwargs: dict, logger) -> None:
+    """
+    Validate the --pr-analysis inputs and resolve the pull numbers.
+
+    Missing input variables are filled from the environment; exits when a
+    required one is still missing.
+
+    Args:
+        kwargs: CLI arguments, updated with pull_numbers
+        logger: Logger instance
+    """
+    input_vars = kwargs["input_vars"]
+    required_var_env = {
+        "jobtype": ["JOBTYPE", "jobtype"],
+        "pull_number": ["PULL_NUMBER", "pull_number"],
+        "organization": ["ORGANIZATION", "organization"],
+        "repository": ["REPOSITORY", "repository"],
+    }
+
+    # Fill missing required vars from environment when available.
+    for key, env_keys in required_var_env.items():
+        if key not in input_vars or str(input_vars.get(key, "")).strip() == "":
+            for env_key in env_keys:
+                env_val = os.getenv(env_key)
+                if env_val is not None and str(env_val).strip() != "":
+                    input_vars[key] = str(env_val).strip()
+                    break
+
+    missing_vars = []
+    if "jobtype" not in input_vars:
+        missing_vars.append("jobtype")
+    if "organization" not in input_vars:
+        missing_vars.append("organization")
+    if "repository" not in input_vars:
+        missing_vars.append("repository")
+
+    try:
+        pull_numbers = collect_pull_numbers(kwargs, input_vars)
+    except ValueError as exc:
+        logger.error("Invalid pull number: %s", exc)
+        sys.exit(1)
+    if not pull_numbers:
+        missing_vars.append("pull_number (via --pull-number, "
+                            "--input-vars pull_number, or pull_numbers)")
+    if missing_vars:
+        logger.error(
+            "Missing required input variables: %s",
+            ", ".join(missing_vars),
+        )
+        sys.exit(1)
+    kwargs["pull_numbers"] = pull_numbers
+    logger.info("PR analysis for pull numbers: %s", pull_numbers)
+
+
+def prepare_run(kwargs: dict, logger) -> None:
+    """
+    Validate the data source of a --config run and prepare its PR analysis.
+
+    Exits unless the run reads a --from-snapshot or has both --metadata-index
+    and --es-server.
+
+    Args:
+        kwargs: CLI arguments, updated with pull_numbers in --pr-analysis runs
+        logger: Logger instance
+    """
+    if not kwargs.get("from_snapshot") and (not kwargs["metadata_index"] or not kwargs["es_server"]):
+        logger.error("metadata-index and es-server flags must be provided")
+        sys.exit(1)
+    if kwargs["pr_analysis"]:
+        prepare_pr_analysis(kwargs, logger)
+
+
 def expand_fan_out(metrics: List[Dict[str, Any]], logger: SingletonLogger) -> List[Dict[str, Any]]:
     """Expands metrics with fan_out into multiple individual metrics.
 
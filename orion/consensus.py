@@ -0,0 +1,191 @@
+"""
+Module for running several algorithms on one fetched dataset.
+
+With --algorithms the data of a test is fetched and assembled once, every
+selected algorithm runs on its own copy of that frame, and their changepoints
+are mapped back onto the runs of the shared frame by uuid. A changepoint is
+reported when enough algorithms flag the same metric within a few runs of
+each other.
+"""
+
+import dataclasses
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from otava.series import ChangePoint
+
+import orion.constants as cnsts
+from orion.algorithms import Algorithm, AlgorithmFactory
+from orion.algorithms.algorithmFactory import registered_algorithms
+
+# --algorithms names and the algorithm they select; any other registered
+# algorithm, such as one added through an entry point, is used by its name
+ALGORITHM_NAMES = {
+    "edivisive": cnsts.EDIVISIVE,
+    "edivisive_fast": cnsts.EDIVISIVE_FAST,
+    "isolation": cnsts.ISOLATION_FOREST,
+    "cmr": cnsts.CMR,
+    "cusum": cnsts.CUSUM,
+}
+
+
+def parse_algorithms(names: Optional[List[str]]) -> List[str]:
+    """Validate --algorithms names
+
+    Args:
+        names (list): names given on the command line
+
+    Raises:
+        ValueError: on unknown or repeated names
+
+    Returns:
+        list: the names, stripped, with built-in names lower-cased, in the given order
+    """
+    parsed = []
+    for name in names or []:
+        name = name.strip()
+        if name:
+            parsed.append(name.lower() if name.lower() in ALGORITHM_NAMES else name)
+    registered = registered_algorithms()
+    unknown = [name for name in parsed if name not in ALGORITHM_NAMES and name not in registered]
+    if unknown:
+        plugins = sorted(set(registered) - set(ALGORITHM_NAMES.values()))
+        raise ValueError(
+            f"unknown algorithm(s) {', '.join(unknown)}, "
+            f"choose from {', '.join(list(ALGORITHM_NAMES) + plugins)}"
+        )
+    if len(set(parsed)) != len(parsed):
+        raise ValueError("algorithms must not be repeated")
+    return parsed
+
+
+def required_votes(algorithm_count: int, consensus_min: Optional[int]) -> int:
+    """Number of algorithms that must agree, a majority by default."""
+    if consensus_min:
+        return min(int(consensus_min), algorithm_count)
+    return algorithm_count // 2 + 1
+
+
+def numeric_timestamps(dataframe: pd.DataFrame) -> pd.DataFrame:
+    """Convert the timestamp column to epoch seconds, as the algorithms do."""
+    timestamps = dataframe["timestamp"]
+    if not (pd.api.types.is_numeric_dtype(timestamps) and timestamps.astype(int).min() > 1e9):
+        dataframe["timestamp"] = pd.to_datetime(dataframe["timestamp"])
+        dataframe["timestamp"] = dataframe["timestamp"].astype(int) // 10**9
+    return dataframe
+
+
+def run_algorithms(
+    names: List[str],
+    dataframe: pd.DataFrame,
+    test: Dict[str, Any],
+    options: Dict[str, Any],
+    metrics_config: Dict[str, Dict[str, Any]],
+) -> Dict[str, Algorithm]:
+    """Run the selected algorithms concurrently on copies of one frame
+
+    Args:
+        names (list): --algorithms names
+        dataframe (pd.DataFrame): assembled data of the test
+        test (dict): test configuration
+        options (dict): command line options
+        metrics_config (dict): metrics configuration
+
+    Returns:
+        dict: name to analyzed algorithm, in the order of names
+    """
+    factory = AlgorithmFactory()
+    algorithms = {}
+    for name in names:
+        algorithm_name = ALGORITHM_NAMES.get(name, name)
+        frame = dataframe.copy(deep=True)
+        if algorithm_name == cnsts.ISOLATION_FOREST:
+            frame = frame.dropna().reset_index()
+        algorithms[name] = factory.instantiate_algorithm(
+            algorithm_name, frame, test, options, metrics_config
+        )
+    with ThreadPoolExecutor(max_workers=len(algorithms)) as executor:
+        futures = [
+            executor.submit(algorithm.get_analysis_results)
+            for algorithm in algorithms.values()
+        ]
+        for future in futures:
+            future.result()
+    return algorithms
+
+
+def align_change_points(
+    algorithm: Algorithm, dataframe: pd.DataFrame, uuid_field: str
+) -> Dict[str, List[ChangePoint]]:
+    """Re-index the changepoints of an algorithm onto the shared frame
+
+    Each algorithm reports positions in its own frame (CMR collapses the
+    history into one row, isolation forest drops incomplete runs), so the
+    changepoints are matched to the shared frame by run uuid.
+
+    Args:
+        algorithm (Algorithm): analyzed algorithm
+        dataframe (pd.DataFrame): shared frame, timestamps in epoch seconds
+        uuid_field (str): field holding the run uuid
+
+    Returns:
+        dict: metric to changepoints at shared frame positions
+    """
+    positions = {uuid: i for i, uuid in enumerate(dataframe[uuid_field])}
+    own_uuids = list(algorithm.dataframe[uuid_field])
+    timestamps = list(dataframe["timestamp"])
+    _, change_points_by_metric = algorithm.get_analysis_results()
+    aligned = {}
+    for metric, change_points in change_points_by_metric.items():
+        aligned[metric] = []
+        for change_point in change_points:
+            position = positions.get(own_uuids[change_point.index])
+            if position is not None:
+                aligned[metric].append(dataclasses.replace(
+                    change_point, index=position, time=timestamps[position]
+                ))
+    return aligned
+
+
+def consensus_change_points(
+    change_points_by_algorithm: Dict[str, Dict[str, List[ChangePoint]]],
+    metrics: List[str],
+    votes: int,
+    tolerance: int = 0,
+) -> Dict[str, List[ChangePoint]]:
+    """Keep the changepoints flagged by at least votes algorithms
+
+    The changepoints of a metric are grouped from the earliest one: a group
+    holds every changepoint at most tolerance runs after its first one. A
+    group flagged by at least votes algorithms is reported as the
+    changepoint of the first algorithm, in --algorithms order, in the group.
+
+    Args:
+        change_points_by_algorithm (dict): name to aligned changepoints
+        metrics (list): metric names
+        votes (int): number of algorithms that must agree
+        tolerance (int): runs apart that agreeing changepoints may be, 0 for
+            the same run only
+
+    Returns:
+        dict: metric to consensus changepoints sorted by index
+    """
+    flagged = {metric: [] for metric in metrics}
+    for order, change_points_by_metric in enumerate(change_points_by_algorithm.values()):
+        for metric, change_points in change_points_by_metric.items():
+            if metric in flagged:
+                flagged[metric].extend((cp.index, order, cp) for cp in change_points)
+    consensus = {metric: [] for metric in metrics}
+    for metric, entries in flagged.items():
+        entries.sort(key=lambda entry: entry[:2])
+        start = 0
+        while start < len(entries):
+            end = start
+            while end < len(entries) and entries[end][0] - entries[start][0] <= tolerance:
+                end += 1
+            group = entries[start:end]
+            if len({order for _, order, _ in group}) >= votes:
+                consensus[metric].append(min(group, key=lambda entry: (entry[1], entry[0]))[2])
+            start = end
+    return consensus
@@ -5,11 +5,13 @@ Module for storing constants across orion.
 """
 
 EDIVISIVE="EDivisive"
+EDIVISIVE_FAST="EDivisiveFast"
 ISOLATION_FOREST="IsolationForest"
 JSON="json"
 TEXT="text"
 JUNIT="junit"
 CMR="cmr"
+CUSUM="CUSUM"
 
 # Window expansion: when a changepoint is in the first 5 points, we re-validate by
 # fetching up to 5 more data points from the past. These values are fixed for consistency.
@@ -18,10 +20,10 @@ CMR="cmr"
 # algorithm, a minimum of 5 points prior and 5 after a point are needed to better include
 # a point as a changepoint; we chose 5 for this buffer for that reason.
 #
-# EXPAND_POINTS (5): When expanding, we use unbounded lookback (no time window) and
-# set lookback_size = current_points + 5 so we get up to 5 additional points from the
-# past. Run frequency varies by team; unbounded + cap guarantees we take only what
-# we need and don't depend on a fixed number of days.
+# EXPAND_POINTS (5): When expanding, we look up at most 5 runs older than the oldest
+# run already fetched (no time window) and fetch metrics only for those runs. Run
+# frequency varies by team; unbounded + cap guarantees we take only what we need and
+# don't depend on a fixed number of days.
 #
 CHANGEPOINT_BUFFER = 5
 EXPAND_POINTS = 5
@@ -31,3 +33,44 @@ EXPAND_POINTS = 5
 # exhausts memory during DataFrame merges. Chunking at 15 keeps each
 # round-trip manageable while still reducing total queries vs one-at-a-time.
 BATCH_METRIC_CHUNK_SIZE = 15
+
+# Maximum time in seconds a thread waits for the other PR analysis threads
+# to request the same metric chunk before querying on its own. Threads that
+# are all blocked on a query trigger it right away, so this only bounds the
+# wait for threads still busy elsewhere (e.g. looking up PR creation dates).
+FETCH_COALESCE_WAIT = 2.0
+
+# Default decision threshold of the online CUSUM detector, in standard
+# deviations of the reference runs. With its 0.5 drift allowance a stable
+# normal metric raises a false alarm roughly once every 450 runs.
+CUSUM_THRESHOLD = 5.0
+
+# Default --consensus-tolerance: runs apart that changepoints of a metric may
+# be and still count as agreeing. CMR only flags the latest run, while an
+# E-Divisive split or an anomaly lands on the run the shift started at.
+CONSENSUS_TOLERANCE = 2
+
+# Maximum age in hours of a model stored with --anomaly-model-dir before it
+# is refit on the current window.
+ANOMALY_REFIT_HOURS = 24.0
+
+# Orion service (--serve): finished jobs kept for the status endpoint.
+SERVE_MAX_JOBS = 1000
+
+# Seconds after which the metric rows shared by the jobs of --serve or the
+# cycles of --watch are dropped, so that runs still being indexed when first
+# queried are fetched again.
+METRIC_ROWS_TTL = 3600.0
+
+# Default seconds between two --watch polls of the metadata index.
+WATCH_INTERVAL = 300.0
+
+# --explain: default OpenSearch search.max_buckets, above which an
+# aggregation chunk is flagged, and estimated response bytes of one
+# aggregated metric value of one run.
+EXPLAIN_MAX_BUCKETS = 65535
+EXPLAIN_AGG_ROW_BYTES = 120
+
+# Address given to the OpenSearch client of a --replay run without
+# --es-server; replayed requests never leave the process.
+REPLAY_ES_SERVER = "http://replay.invalid:9200"
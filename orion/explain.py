@@ -0,0 +1,345 @@
+"""
+Module for estimating the cost of a config before running it.
+
+--explain walks every test the way a run would, without fetching its metric
+data: it renders the searches of the metadata lookup, of the group_by
+discovery and of every metric chunk, and estimates their hits, round trips
+and response bytes with _count queries and size-0 aggregations. Metrics
+likely to page through many search_size batches, to return several
+documents per run, or aggregation chunks over the bucket limit are flagged.
+"""
+
+import copy
+import json
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List
+
+from tabulate import tabulate
+
+import orion.constants as cnsts
+from orion.config import expand_group_by
+from orion.logger import SingletonLogger
+from orion.matcher import GROUP_BY_MAX_VALUES, Matcher
+from orion.run_test import get_start_timestamp
+from orion.utils import Utils
+
+# Metric fields that get_metric_data removes before building the queries
+METRIC_META_FIELDS = ("labels", "direction", "threshold", "timestamp", "correlation", "context", "group_by")
+
+
+@dataclass
+class PlannedSearch:  # pylint: disable=too-many-instance-attributes
+    """A search a run would issue, with its estimated cost
+
+    Args:
+        stage (str): metadata lookup, group_by discovery, aggregation chunk
+            or standard chunk
+        index (str): index searched
+        body (dict): search body
+        metrics (list): metrics of the search
+        hits (int): estimated documents matched
+        round_trips (int): estimated requests
+        bytes (int): estimated response bytes
+        warnings (list): likely problems of the search
+    """
+    stage: str
+    index: str
+    body: Dict[str, Any]
+    metrics: List[str] = field(default_factory=list)
+    hits: int = 0
+    round_trips: int = 1
+    bytes: int = 0
+    warnings: List[str] = field(default_factory=list)
+
+
+@dataclass
+class TestPlan:
+    """Searches of one test
+
+    Args:
+        name (str): test name
+        runs (int): runs the test would analyze
+        searches (list): PlannedSearch of the test, in order
+        warnings (list): likely problems of the test
+    """
+    __test__ = False
+    name: str
+    runs: int = 0
+    searches: List[PlannedSearch] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+    @property
+    def round_trips(self) -> int:
+        """Estimated requests of the test"""
+        return sum(search.round_trips for search in self.searches)
+
+    @property
+    def bytes(self) -> int:
+        """Estimated response bytes of the test"""
+        return sum(search.bytes for search in self.searches)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON view of the plan"""
+        return {
+            "test": self.name,
+            "runs": self.runs,
+            "round_trips": self.round_trips,
+            "bytes": self.bytes,
+            "warnings": self.warnings,
+            "searches": [asdict(search) for search in self.searches],
+        }
+
+
+def explain_test(test: Dict[str, Any], match: Matcher, options: Dict[str, Any]) -> TestPlan:
+    """Plan the searches of a test and estimate their cost
+
+    Runs the metadata lookup, the group_by discovery and one size-0 count
+    aggregation per metric chunk; no metric data is fetched.
+
+    Args:
+        test (dict): test configuration, left unchanged
+        match (Matcher): matcher on the metadata index of the test
+        options (dict): command line options
+
+    Returns:
+        TestPlan: the searches of the test
+    """
+    logger = SingletonLogger.get_logger("Orion")
+    test = copy.deepcopy(test)
+    plan = TestPlan(test["name"])
+    utils = Utils(test["uuid_field"], test["version_field"])
+    timestamp_field = test.get("timestamp", "timestamp")
+
+    metadata = (
+        utils.extract_metadata_from_test(test)
+        if options["uuid"] in ("", None)
+        else utils.get_metadata_with_uuid(options["uuid"], match)
+    )
+    since_date = None
+    if options.get("since"):
+        try:
+            since_date = datetime.strptime(options["since"], "%Y-%m-%d")
+        except ValueError:
+            logger.warning("Invalid since date format: %s. Expected YYYY-MM-DD", options["since"])
+    lookback_size = options["lookback_size"]
+    search = match.uuid_search(
+        metadata, get_start_timestamp(options, test, False), lookback_size, timestamp_field, since_date
+    )
+    matched = search.count()
+    runs = min(matched, lookback_size)
+    sample = search.extra(size=1).execute().hits.hits
+    sample_bytes = len(json.dumps(sample[0].to_dict().get("_source", {}))) if sample else 0
+    lookup = PlannedSearch(
+        "metadata lookup", match.index, search.to_dict(), hits=runs,
+        # a last empty page ends the lookup unless lookback_size is reached
+        round_trips=1 if runs in (0, lookback_size) else 2,
+        bytes=runs * sample_bytes,
+    )
+    if matched > lookback_size:
+        lookup.warnings.append(
+            f"{matched} runs match, only the newest {lookback_size} (--lookback-size) are analyzed"
+        )
+    plan.searches.append(lookup)
+
+    if options["baseline"] not in ("", None):
+        uuids = [uuid for uuid in options["baseline"].replace(" ", ",").split(",") if uuid]
+        uuids.append(options["uuid"])
+    else:
+        hits = match.query_index(
+            search.source([test["uuid_field"]]), return_all=True, max_hits=lookback_size
+        )
+        uuids = list(dict.fromkeys(
+            Matcher._get_nested(hit.to_dict()["_source"], test["uuid_field"])  # pylint: disable=protected-access
+            for hit in hits
+        ))
+    if not uuids:
+        plan.warnings.append("no run matches the metadata, the test would end the run")
+        return plan
+    plan.runs = len(uuids)
+    match.index = options.get("benchmark_index") or test.get("benchmark_index")
+
+    metrics = []
+    for metric in test["metrics"]:
+        if "group_by" not in metric:
+            metrics.append(metric)
+            continue
+        group_by = metric["group_by"] if isinstance(metric["group_by"], list) else [metric["group_by"]]
+        template = {k: v for k, v in metric.items() if k != "group_by"}
+        discovery = match.field_values_search(template, group_by[0], uuids)
+        expanded = expand_group_by([metric], match, uuids, logger)
+        step = PlannedSearch(
+            "group_by discovery", match.index, discovery.to_dict(), metrics=[metric["name"]],
+            hits=len(expanded), bytes=len(expanded) * cnsts.EXPLAIN_AGG_ROW_BYTES,
+        )
+        if len(expanded) >= GROUP_BY_MAX_VALUES:
+            step.warnings.append(
+                f"{metric['name']}: discovery returns at most {GROUP_BY_MAX_VALUES} values of "
+                f"{group_by[0]}, further values are dropped"
+            )
+        plan.searches.append(step)
+        metrics.extend(expanded)
+
+    for stage, timestamp, chunk in _metric_chunks(metrics, timestamp_field):
+        plan.searches.append(_explain_chunk(stage, timestamp, chunk, match, uuids, options))
+    return plan
+
+
+def _metric_chunks(metrics: List[Dict[str, Any]], timestamp_field: str):
+    """Chunks of the batched metric queries, as get_metric_data builds them."""
+    groups = {"aggregation chunk": {}, "standard chunk": {}}
+    for metric in metrics:
+        stage = "aggregation chunk" if "agg" in metric else "standard chunk"
+        query_metric = {k: v for k, v in metric.items() if k not in METRIC_META_FIELDS}
+        groups[stage].setdefault(metric.get("timestamp", timestamp_field), []).append(query_metric)
+    for stage, by_timestamp in groups.items():
+        for timestamp, group in by_timestamp.items():
+            for i in range(0, len(group), cnsts.BATCH_METRIC_CHUNK_SIZE):
+                yield stage, timestamp, group[i:i + cnsts.BATCH_METRIC_CHUNK_SIZE]
+
+
+def _explain_chunk(stage, timestamp, chunk, match, uuids, options) -> PlannedSearch:  # pylint: disable=too-many-arguments
+    """Estimate one metric chunk from a count of the documents of each metric."""
+    names = [metric["name"] for metric in chunk]
+    if stage == "aggregation chunk":
+        search = match.agg_batch_search(uuids, chunk, timestamp)
+        counts = match.metric_doc_counts(uuids, chunk)
+        step = PlannedSearch(
+            stage, match.index, search.to_dict(), metrics=names,
+            hits=sum(count for count, _ in counts.values()),
+            bytes=len(uuids) * len(chunk) * cnsts.EXPLAIN_AGG_ROW_BYTES,
+        )
+        # one bucket per run, each with one filter bucket per metric
+        buckets = len(uuids) * (1 + len(chunk))
+        if buckets > cnsts.EXPLAIN_MAX_BUCKETS:
+            step.warnings.append(
+                f"{buckets} buckets exceed the default search.max_buckets of {cnsts.EXPLAIN_MAX_BUCKETS}"
+            )
+    else:
+        search, filter_fields = match.results_batch_search(uuids, chunk, timestamp)
+        source_fields = None
+        if options.get("stream_metrics"):
+            source_fields = match.trimmed_source_fields(chunk, filter_fields, timestamp)
+            search = search.source(includes=source_fields)
+        counts = match.metric_doc_counts(uuids, chunk, source_fields)
+        hits = sum(count for count, _ in counts.values())
+        step = PlannedSearch(
+            stage, match.index, search.to_dict(), metrics=names, hits=hits,
+            # search_after pages, ended by an empty one
+            round_trips=hits // match.search_size + 1,
+            bytes=sum(count * size for count, size in counts.values()),
+        )
+        for name, (count, _) in counts.items():
+            if count > match.search_size:
+                step.warnings.append(
+                    f"{name}: {count} documents exceed search_size {match.search_size}, "
+                    f"{count // match.search_size + 1} pages"
+                )
+            elif count > len(uuids):
+                step.warnings.append(
+                    f"{name}: {count / len(uuids):.1f} documents per run, "
+                    "consider narrowing its filters or using an agg"
+                )
+    for name, (count, _) in counts.items():
+        if not count:
+            step.warnings.append(f"{name}: no document matches")
+    return step
+
+
+def format_bytes(size: int) -> str:
+    """Human readable size"""
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def _abbreviate(body: Any) -> Any:
+    """Shorten long value lists, such as the UUIDs of a terms query."""
+    if isinstance(body, dict):
+        return {k: _abbreviate(v) for k, v in body.items()}
+    if isinstance(body, list):
+        if len(body) > 3 and all(isinstance(v, str) for v in body):
+            return body[:2] + [f"... {len(body) - 2} more"]
+        return [_abbreviate(v) for v in body]
+    return body
+
+
+def format_plans(plans: List[TestPlan], output_format: str = cnsts.TEXT) -> str:
+    """Report of the query plans
+
+    Args:
+        plans (list): TestPlan of every test
+        output_format (str): json for the exact search bodies as JSON, text
+            for tables with abbreviated bodies
+
+    Returns:
+        str: the report
+    """
+    totals = {
+        "round_trips": sum(plan.round_trips for plan in plans),
+        "bytes": sum(plan.bytes for plan in plans),
+    }
+    if output_format == cnsts.JSON:
+        report = {"tests": [plan.to_dict() for plan in plans], "total": totals}
+        return json.dumps(report, indent=2, default=str)
+
+    sections = []
+    for plan in plans:
+        title = f"{plan.name} | Query plan ({plan.runs} runs)"
+        rows = [
+            [position, search.stage, search.index, len(search.metrics) or "-", search.hits,
+             search.round_trips, format_bytes(search.bytes)]
+            for position, search in enumerate(plan.searches, start=1)
+        ]
+        lines = [title, "=" * len(title), tabulate(
+            rows, headers=["#", "search", "index", "metrics", "est. hits", "round trips", "est. bytes"],
+        )]
+        for position, search in enumerate(plan.searches, start=1):
+            lines.append(f"\n#{position} {search.stage}: {json.dumps(_abbreviate(search.body), default=str)}")
+        warnings = plan.warnings + [w for search in plan.searches for w in search.warnings]
+        if warnings:
+            lines.append("\nWarnings:")
+            lines.extend(f"  - {warning}" for warning in warnings)
+        lines.append(f"\nTotal: {plan.round_trips} round trips, ~{format_bytes(plan.bytes)}")
+        sections.append("\n".join(lines))
+    sections.append(
+        f"All tests: {totals['round_trips']} round trips, ~{format_bytes(totals['bytes'])}"
+    )
+    return "\n\n".join(sections)
+
+
+def run_explain(kwargs: dict, logger) -> int:
+    """Print the searches of every test of --config with their estimated cost
+
+    Args:
+        kwargs (dict): command line options, with the loaded config
+        logger (SingletonLogger): logger instance
+
+    Returns:
+        int: 1 on invalid options, else 0
+    """
+    if kwargs.get("from_snapshot") or kwargs.get("pr_analysis"):
+        logger.error("--explain plans the searches of a periodic run and cannot be used with "
+                     "--from-snapshot or --pr-analysis")
+        return 1
+    if not kwargs["metadata_index"] or not kwargs["es_server"]:
+        logger.error("metadata-index and es-server flags must be provided")
+        return 1
+    plans = []
+    es_client = Matcher.create_client(
+        kwargs["es_server"], verify_certs=False, record=kwargs.get("record"), replay=kwargs.get("replay")
+    )
+    for test in kwargs["config"]["tests"]:
+        if "metadata" not in test:
+            continue
+        match = Matcher(
+            index=kwargs["metadata_index"] or test["metadata_index"],
+            version_field=test["version_field"],
+            uuid_field=test["uuid_field"],
+            es=es_client,
+        )
+        plans.append(explain_test(test, match, kwargs))
+    print(format_plans(plans, kwargs["output_format"]))
+    return 0
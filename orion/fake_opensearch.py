@@ -0,0 +1,1173 @@
+# pylint: disable = too-many-lines
+"""
+Module providing an in-memory stand-in for OpenSearch.
+
+FakeOpenSearch keeps documents in memory and answers the subset of the
+search API Orion uses, so query building and pagination can be exercised
+end to end without a cluster:
+
+- queries: bool, match, match_phrase, term, terms, wildcard, prefix, range,
+  exists, match_all
+- search: size, from, sort, search_after, _source filtering, track_total_hits
+- aggregations: terms, filter, avg, sum, min, max, value_count, percentiles,
+  top_hits
+
+Fields are mapped as OpenSearch maps them dynamically: ISO dates become date
+fields, other strings analyzed text fields with an exact ``.keyword``
+sub-field, and numbers and booleans keep their type. The result window and
+bucket limits of a default cluster are enforced, and search_after skips
+documents tied with the last sort value, as a cluster does. Hits are not
+scored and percentiles are interpolated linearly instead of with t-digest.
+
+The fake is reached in-process with client(), which goes through the
+opensearch-py transport, or over HTTP with create_server(). The HTTP endpoint
+also takes the index and _bulk calls of hack/ci-tests, so the integration
+data can be loaded the way CI loads it:
+
+    python -m orion.fake_opensearch --port 9200
+    python hack/ci-tests/load_metrics_to_opensearch.py --all --es-server http://localhost:9200
+"""
+
+import argparse
+import functools
+import gzip
+import json
+import random
+import re
+import threading
+import uuid as uuid_lib
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from urllib.parse import parse_qs, unquote, urlparse
+
+from opensearchpy import OpenSearch
+from opensearchpy.connection import Connection
+
+# Limits of a default cluster
+MAX_RESULT_WINDOW = 10000
+MAX_BUCKETS = 65535
+TRACK_TOTAL_HITS = 10000
+KEYWORD_IGNORE_ABOVE = 256
+DEFAULT_PERCENTS = (1.0, 5.0, 25.0, 50.0, 75.0, 95.0, 99.0)
+VERSION = "2.18.0"
+
+_DATE = re.compile(
+    r"^\d{4}-\d{2}-\d{2}(?:T\d{2}(?::\d{2}(?::\d{2}(?:[.,]\d{1,9})?)?)?(?:Z|[+-]\d{2}:?\d{2})?)?$"
+)
+_WORD = re.compile(r"\w+(?:[.']\w+)*")
+# the standard tokenizer only keeps a dot between two letters or two digits
+_MIXED_DOT = re.compile(r"(?<=\d)[.'](?=\D)|(?<=\D)[.'](?=\d)")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_METRIC_AGGS = ("avg", "sum", "min", "max", "value_count")
+
+
+class FakeOpenSearchError(Exception):
+    """Error answered with an OpenSearch error body
+
+    Args:
+        status (int): HTTP status
+        error_type (str): OpenSearch exception type
+        reason (str): error message
+    """
+
+    def __init__(self, status: int, error_type: str, reason: str):
+        super().__init__(reason)
+        self.status = status
+        self.error_type = error_type
+        self.reason = reason
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Error body, as a cluster returns it"""
+        cause = {"type": self.error_type, "reason": self.reason}
+        return {"error": {"root_cause": [cause], **cause}, "status": self.status}
+
+
+class _Document:  # pylint: disable=too-few-public-methods
+    """An indexed document with its flattened field values."""
+
+    __slots__ = ("index", "id", "seq", "source", "fields")
+
+    def __init__(self, index: str, doc_id: str, seq: int, source: Dict[str, Any]):
+        self.index = index
+        self.id = doc_id
+        self.seq = seq
+        self.source = source
+        self.fields = _flatten(source)
+
+
+def _flatten(source: Dict[str, Any], prefix: str = "", fields: Dict[str, list] = None) -> Dict[str, list]:
+    """Values of every leaf field by dotted path; arrays give several values."""
+    fields = {} if fields is None else fields
+    for key, value in source.items():
+        path = f"{prefix}{key}"
+        for item in value if isinstance(value, list) else [value]:
+            if isinstance(item, dict):
+                _flatten(item, f"{path}.", fields)
+            elif item is not None:
+                fields.setdefault(path, []).append(item)
+    return fields
+
+
+@functools.lru_cache(maxsize=65536)
+def _epoch_millis(value: str) -> Optional[int]:
+    """Milliseconds since the epoch of an ISO date, None when it is not one."""
+    if not _DATE.match(value):
+        return None
+    text = value.replace("Z", "+00:00").replace(",", ".")
+    # fromisoformat takes at most microseconds
+    text = re.sub(r"(\.\d{6})\d+", r"\1", text)
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return (parsed - _EPOCH) // timedelta(milliseconds=1)
+
+
+def _format_millis(millis: float) -> str:
+    """strict_date_optional_time rendering of epoch milliseconds"""
+    millis = int(millis)
+    stamp = _EPOCH + timedelta(milliseconds=millis)
+    return stamp.strftime("%Y-%m-%dT%H:%M:%S.") + f"{millis % 1000:03d}Z"
+
+
+@functools.lru_cache(maxsize=65536)
+def _tokens(text: str) -> Tuple[str, ...]:
+    """Terms of a text value, close to the standard analyzer."""
+    tokens = []
+    for word in _WORD.findall(text.lower()):
+        tokens.extend(_MIXED_DOT.split(word))
+    return tuple(tokens)
+
+
+def _as_string(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _field_type(value: Any) -> Optional[str]:
+    """Dynamic mapping of a JSON value"""
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "long"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        return "date" if _epoch_millis(value) is not None else "text"
+    return None
+
+
+def _coerce(field_type: str, value: Any, field: str = "", strict: bool = False) -> Any:
+    """Value as a field of the given type indexes it
+
+    Args:
+        field_type (str): mapped type, keyword for a .keyword sub-field
+        value: document or query value
+        field (str): field name, for errors
+        strict (bool): raise on values the field cannot hold, as query
+            values do, instead of returning None, as document values do
+
+    Returns:
+        the comparable value
+    """
+    coerced = None
+    if field_type in ("text", "keyword"):
+        coerced = _as_string(value)
+    elif field_type == "date":
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            coerced = int(value)
+        else:
+            coerced = _epoch_millis(str(value))
+    elif field_type in ("long", "float"):
+        if not isinstance(value, bool):
+            try:
+                coerced = float(value)
+            except (TypeError, ValueError):
+                coerced = None
+    elif field_type == "boolean":
+        if isinstance(value, bool):
+            coerced = value
+        elif str(value).lower() in ("true", "false"):
+            coerced = str(value).lower() == "true"
+    if coerced is None and strict:
+        raise FakeOpenSearchError(
+            400, "query_shard_exception",
+            f"failed to create query: cannot parse [{value}] as a {field_type} for [{field}]",
+        )
+    return coerced
+
+
+@functools.lru_cache(maxsize=4096)
+def _wildcard_regex(pattern: str, case_insensitive: bool = False) -> re.Pattern:
+    regex = "".join(".*" if c == "*" else "." if c == "?" else re.escape(c) for c in pattern)
+    return re.compile(f"^{regex}$", re.DOTALL | (re.IGNORECASE if case_insensitive else 0))
+
+
+def _fielddata_error(field: str) -> FakeOpenSearchError:
+    """Error of sorting or aggregating on a text field"""
+    return FakeOpenSearchError(
+        400, "illegal_argument_exception",
+        f"Text fields are not optimised for operations that require per-document field data "
+        f"like aggregations and sorting, so these operations are disabled by default. Please "
+        f"use a keyword field instead. Alternatively, set fielddata=true on [{field}]",
+    )
+
+
+def _field_query(body: Any, query_name: str) -> Tuple[str, Any]:
+    """(field, parameters) of a single-field query"""
+    fields = [key for key in body if key not in ("boost", "_name")]
+    if len(fields) != 1:
+        raise FakeOpenSearchError(
+            400, "parsing_exception", f"[{query_name}] query doesn't support multiple fields, found {fields}"
+        )
+    return fields[0], body[fields[0]]
+
+
+def _source_paths(spec: Any) -> Tuple[Optional[List[str]], List[str]]:
+    """(includes, excludes) of a _source parameter, includes None for everything"""
+    if spec is None or spec is True:
+        return None, []
+    if spec is False:
+        return [], []
+    if isinstance(spec, str):
+        return [spec], []
+    if isinstance(spec, list):
+        return spec, []
+    includes = spec.get("includes", spec.get("include"))
+    excludes = spec.get("excludes", spec.get("exclude")) or []
+    if isinstance(includes, str):
+        includes = [includes]
+    if isinstance(excludes, str):
+        excludes = [excludes]
+    return includes or None, excludes
+
+
+def _filter_source(source: Any, includes: Optional[List[str]], excludes: List[str], prefix: str = "") -> Any:
+    """Source keeping the included and dropping the excluded paths"""
+    if isinstance(source, list):
+        return [_filter_source(item, includes, excludes, prefix) for item in source]
+    if not isinstance(source, dict):
+        return source
+    filtered = {}
+    for key, value in source.items():
+        path = f"{prefix}{key}"
+        if any(_wildcard_regex(p).match(path) for p in excludes):
+            continue
+        if includes is None or any(_wildcard_regex(p).match(path) for p in includes):
+            filtered[key] = _filter_source(value, None, excludes, f"{path}.")
+        elif isinstance(value, (dict, list)) and any(
+            p.startswith(f"{path}.") or p.startswith("*") for p in includes
+        ):
+            nested = _filter_source(value, includes, excludes, f"{path}.")
+            if nested:
+                filtered[key] = nested
+    return filtered
+
+
+def _percentile(values: List[float], percent: float) -> Optional[float]:
+    if not values:
+        return None
+    rank = percent / 100 * (len(values) - 1)
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+class FakeOpenSearch:
+    """In-memory OpenSearch indices answering the search API Orion uses
+
+    Args:
+        max_result_window (int): largest from + size of a search
+        max_buckets (int): most terms buckets of a response
+    """
+
+    def __init__(self, max_result_window: int = MAX_RESULT_WINDOW, max_buckets: int = MAX_BUCKETS):
+        self.max_result_window = max_result_window
+        self.max_buckets = max_buckets
+        self.requests = 0
+        self._indices: Dict[str, Dict[str, _Document]] = {}
+        self._mappings: Dict[str, Dict[str, str]] = {}
+        self._seq = 0
+        self._lock = threading.RLock()
+
+    # Indexing
+
+    def create_index(self, index: str) -> None:
+        """Create an empty index
+
+        Args:
+            index (str): index name
+
+        Raises:
+            FakeOpenSearchError: when the index exists
+        """
+        with self._lock:
+            if index in self._indices:
+                raise FakeOpenSearchError(
+                    400, "resource_already_exists_exception", f"index [{index}] already exists"
+                )
+            self._indices[index] = {}
+            self._mappings[index] = {}
+
+    def index(self, index: str, document: Dict[str, Any], doc_id: Optional[str] = None) -> str:
+        """Index a document, replacing the one with the same id
+
+        Args:
+            index (str): index name, created when missing
+            document (dict): document source
+            doc_id (str): document id, generated when None
+
+        Returns:
+            str: the document id
+        """
+        with self._lock:
+            docs = self._indices.setdefault(index, {})
+            mapping = self._mappings.setdefault(index, {})
+            doc_id = str(doc_id) if doc_id is not None else uuid_lib.uuid4().hex
+            self._seq += 1
+            doc = _Document(index, doc_id, self._seq, document)
+            for path, values in doc.fields.items():
+                if path not in mapping and _field_type(values[0]) is not None:
+                    mapping[path] = _field_type(values[0])
+            docs[doc_id] = doc
+            return doc_id
+
+    def bulk_index(self, index: str, documents: List[Dict[str, Any]], id_field: Optional[str] = None) -> int:
+        """Index many documents
+
+        Args:
+            index (str): index name, created when missing
+            documents (list): document sources
+            id_field (str): field holding the document id, generated when None
+
+        Returns:
+            int: number of documents indexed
+        """
+        for document in documents:
+            self.index(index, document, document.get(id_field) if id_field else None)
+        return len(documents)
+
+    def load_json(self, path: str, index: str, metrics_index: Optional[str] = None) -> int:
+        """Index the documents of a JSON file
+
+        Args:
+            path (str): a JSON array of documents, or an object with metadata
+                and metrics arrays like hack/ci-tests/rhoso.json
+            index (str): index of an array, or of the metadata documents
+            metrics_index (str): index of the metrics documents
+
+        Returns:
+            int: number of documents indexed
+        """
+        with open(path, "r", encoding="utf-8") as data_file:
+            data = json.load(data_file)
+        if isinstance(data, list):
+            return self.bulk_index(index, data)
+        if not isinstance(data, dict) or "metadata" not in data or "metrics" not in data:
+            raise ValueError(f"{path} is neither an array of documents nor a metadata/metrics object")
+        return (self.bulk_index(index, data["metadata"])
+                + self.bulk_index(metrics_index or index, data["metrics"]))
+
+    def count_documents(self, index: str = "_all") -> int:
+        """Documents of the indices matching an index expression"""
+        return len(self._resolve(index))
+
+    # Search
+
+    def search(self, index: str, body: Optional[Dict[str, Any]] = None,
+               params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Answer a _search request
+
+        Args:
+            index (str): index expression, comma separated names or patterns
+            body (dict): search body
+            params (dict): URL parameters
+
+        Returns:
+            dict: the search response
+
+        Raises:
+            FakeOpenSearchError: on a request a cluster would reject
+        """
+        return self._search(self._resolve(index), body or {}, params or {})
+
+    def _search(self, docs: List[_Document], body: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+        """Search over the given documents"""
+        size = int(params.get("size", body.get("size", 10)))
+        start = int(params.get("from", body.get("from", 0)))
+        if start + size > self.max_result_window:
+            raise FakeOpenSearchError(
+                400, "illegal_argument_exception",
+                f"Result window is too large, from + size must be less than or equal to: "
+                f"[{self.max_result_window}] but was [{start + size}]. See the scroll api for a "
+                "more efficient way to request large data sets.",
+            )
+        predicate = self._compile(body.get("query", {"match_all": {}}))
+        matched = [doc for doc in docs if predicate(doc)]
+
+        sort = self._sort_spec(body.get("sort"))
+        keys = {}
+        if sort:
+            keys = {
+                doc.seq: [self._sort_value(doc, field, order) for field, order in sort] for doc in matched
+            }
+            ordered = matched
+            for position, (_, order) in reversed(list(enumerate(sort))):
+                present = [doc for doc in ordered if keys[doc.seq][position] is not None]
+                missing = [doc for doc in ordered if keys[doc.seq][position] is None]
+                present.sort(key=lambda doc, p=position: keys[doc.seq][p], reverse=order == "desc")
+                ordered = present + missing
+            matched = ordered
+        top = matched
+        if "search_after" in body:
+            if not sort:
+                raise FakeOpenSearchError(
+                    400, "illegal_argument_exception", "Sort must contain at least one field."
+                )
+            after = body["search_after"]
+            top = [doc for doc in matched if self._is_after(keys[doc.seq], after, sort)]
+        top = top[start:start + size]
+
+        includes, excludes = _source_paths(body.get("_source"))
+        hits = []
+        for doc in top:
+            hit = {"_index": doc.index, "_id": doc.id, "_score": None if sort else 1.0}
+            if includes != []:
+                hit["_source"] = _filter_source(doc.source, includes, excludes)
+            if sort:
+                hit["sort"] = keys[doc.seq]
+            hits.append(hit)
+
+        response = {
+            "took": 1,
+            "timed_out": False,
+            "_shards": {"total": 1, "successful": 1, "skipped": 0, "failed": 0},
+            "hits": {"max_score": None if sort or not hits else 1.0, "hits": hits},
+        }
+        total = self._total(len(matched), body.get("track_total_hits", params.get("track_total_hits")))
+        if total is not None:
+            response["hits"]["total"] = total
+        aggs = body.get("aggs", body.get("aggregations"))
+        if aggs:
+            response["aggregations"] = self._aggregate(aggs, matched, [0])
+        return response
+
+    def count(self, index: str, body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Answer a _count request
+
+        Args:
+            index (str): index expression
+            body (dict): body with an optional query
+
+        Returns:
+            dict: the count response
+        """
+        predicate = self._compile((body or {}).get("query", {"match_all": {}}))
+        count = sum(1 for doc in self._resolve(index) if predicate(doc))
+        return {"count": count, "_shards": {"total": 1, "successful": 1, "skipped": 0, "failed": 0}}
+
+    @staticmethod
+    def _total(count: int, track: Any) -> Optional[Dict[str, Any]]:
+        if track in (False, "false"):
+            return None
+        limit = TRACK_TOTAL_HITS
+        if track in (True, "true"):
+            limit = count
+        elif track is not None:
+            limit = int(track)
+        if count > limit:
+            return {"value": limit, "relation": "gte"}
+        return {"value": count, "relation": "eq"}
+
+    def _resolve(self, index: Any) -> List[_Document]:
+        """Documents of the indices matching an index expression"""
+        with self._lock:
+            return [doc for name in self._resolve_names(index) for doc in list(self._indices[name].values())]
+
+    def _resolve_names(self, index: Any) -> List[str]:
+        """Names of the indices matching an index expression"""
+        names = index if isinstance(index, (list, tuple)) else str(index or "_all").split(",")
+        with self._lock:
+            selected = []
+            for name in (name.strip() for name in names):
+                if name in ("", "_all", "*"):
+                    selected.extend(self._indices)
+                elif "*" in name or "?" in name:
+                    pattern = _wildcard_regex(name)
+                    selected.extend(existing for existing in self._indices if pattern.match(existing))
+                elif name in self._indices:
+                    selected.append(name)
+                else:
+                    raise FakeOpenSearchError(404, "index_not_found_exception", f"no such index [{name}]")
+            return list(dict.fromkeys(selected))
+
+    def _values(self, doc: _Document, field: str) -> Tuple[Optional[str], list]:
+        """(mapped type, values) of a field of a document"""
+        if field.endswith(".keyword"):
+            path = field[:-len(".keyword")]
+            if self._mappings[doc.index].get(path) != "text":
+                return "keyword", []
+            return "keyword", [
+                _as_string(value) for value in doc.fields.get(path, ())
+                if len(_as_string(value)) <= KEYWORD_IGNORE_ABOVE
+            ]
+        field_type = self._mappings[doc.index].get(field)
+        if field_type is None:
+            return None, []
+        return field_type, [
+            value for value in (_coerce(field_type, raw) for raw in doc.fields.get(field, ()))
+            if value is not None
+        ]
+
+    # Queries
+
+    def _compile(self, query: Dict[str, Any]) -> Callable[[_Document], bool]:
+        """Predicate of a query"""
+        if not isinstance(query, dict) or len(query) != 1:
+            raise FakeOpenSearchError(
+                400, "parsing_exception", f"malformed query, expected a single key: {query}"
+            )
+        (name, body), = query.items()
+        builder = {
+            "match_all": lambda body: lambda doc: True,
+            "match_none": lambda body: lambda doc: False,
+            "bool": self._bool,
+            "match": self._match,
+            "match_phrase": self._match_phrase,
+            "term": self._term,
+            "terms": self._terms_query,
+            "wildcard": self._wildcard,
+            "prefix": self._prefix,
+            "range": self._range,
+            "exists": self._exists,
+        }.get(name)
+        if builder is None:
+            raise FakeOpenSearchError(400, "parsing_exception", f"unknown query [{name}]")
+        return builder(body)
+
+    def _bool(self, body: Dict[str, Any]) -> Callable[[_Document], bool]:
+        def clauses(occur):
+            value = body.get(occur, [])
+            return [self._compile(clause) for clause in (value if isinstance(value, list) else [value])]
+
+        must = clauses("must") + clauses("filter")
+        must_not = clauses("must_not")
+        should = clauses("should")
+        minimum = body.get("minimum_should_match")
+        if minimum is None:
+            minimum = 0 if must else 1
+        elif isinstance(minimum, str) and minimum.endswith("%"):
+            minimum = len(should) * int(minimum[:-1]) // 100
+        minimum = min(int(minimum), len(should)) if should else 0
+
+        def predicate(doc):
+            if not all(clause(doc) for clause in must):
+                return False
+            if any(clause(doc) for clause in must_not):
+                return False
+            return minimum == 0 or sum(1 for clause in should if clause(doc)) >= minimum
+        return predicate
+
+    def _match(self, body: Dict[str, Any]) -> Callable[[_Document], bool]:
+        field, spec = _field_query(body, "match")
+        query, operator = spec, "or"
+        if isinstance(spec, dict):
+            query, operator = spec.get("query"), str(spec.get("operator", "or")).lower()
+        wanted = _tokens(_as_string(query))
+
+        def predicate(doc):
+            field_type, values = self._values(doc, field)
+            if not values:
+                return False
+            if field_type == "text":
+                terms = {token for value in values for token in _tokens(value)}
+                if not wanted:
+                    return False
+                if operator == "and":
+                    return all(token in terms for token in wanted)
+                return any(token in terms for token in wanted)
+            return _coerce(field_type, query, field, strict=True) in values
+        return predicate
+
+    def _match_phrase(self, body: Dict[str, Any]) -> Callable[[_Document], bool]:
+        field, spec = _field_query(body, "match_phrase")
+        query = spec.get("query") if isinstance(spec, dict) else spec
+        wanted = _tokens(_as_string(query))
+
+        def predicate(doc):
+            field_type, values = self._values(doc, field)
+            if field_type != "text":
+                return bool(values) and _coerce(field_type, query, field, strict=True) in values
+            for value in values:
+                tokens = _tokens(value)
+                if any(tokens[i:i + len(wanted)] == wanted for i in range(len(tokens) - len(wanted) + 1)):
+                    return bool(wanted)
+            return False
+        return predicate
+
+    def _term(self, body: Dict[str, Any]) -> Callable[[_Document], bool]:
+        field, spec = _field_query(body, "term")
+        value = spec.get("value") if isinstance(spec, dict) else spec
+        return self._terms_query({field: [value]})
+
+    def _terms_query(self, body: Dict[str, Any]) -> Callable[[_Document], bool]:
+        field, wanted = _field_query(body, "terms")
+        if not isinstance(wanted, list):
+            raise FakeOpenSearchError(400, "parsing_exception", "[terms] query does not support lookups here")
+
+        def predicate(doc):
+            field_type, values = self._values(doc, field)
+            if not values:
+                return False
+            if field_type == "text":
+                terms = {token for value in values for token in _tokens(value)}
+                return any(_as_string(value) in terms for value in wanted)
+            targets = {_coerce(field_type, value, field, strict=True) for value in wanted}
+            return any(value in targets for value in values)
+        return predicate
+
+    def _pattern_query(self, body: Dict[str, Any], name: str, to_regex) -> Callable[[_Document], bool]:
+        field, spec = _field_query(body, name)
+        if isinstance(spec, dict):
+            pattern = spec.get("value", spec.get(name))
+            regex = to_regex(_as_string(pattern), bool(spec.get("case_insensitive")))
+        else:
+            regex = to_regex(_as_string(spec), False)
+
+        def predicate(doc):
+            field_type, values = self._values(doc, field)
+            if field_type == "text":
+                values = [token for value in values for token in _tokens(value)]
+            elif field_type != "keyword":
+                return False
+            return any(regex.match(value) for value in values)
+        return predicate
+
+    def _wildcard(self, body: Dict[str, Any]) -> Callable[[_Document], bool]:
+        return self._pattern_query(body, "wildcard", _wildcard_regex)
+
+    def _prefix(self, body: Dict[str, Any]) -> Callable[[_Document], bool]:
+        return self._pattern_query(
+            body, "prefix",
+            lambda prefix, insensitive: re.compile(re.escape(prefix), re.IGNORECASE if insensitive else 0),
+        )
+
+    def _range(self, body: Dict[str, Any]) -> Callable[[_Document], bool]:
+        field, bounds = _field_query(body, "range")
+        checks = {
+            "gt": lambda value, bound: value > bound,
+            "gte": lambda value, bound: value >= bound,
+            "lt": lambda value, bound: value < bound,
+            "lte": lambda value, bound: value <= bound,
+        }
+        wanted = [(checks[op], bound) for op, bound in bounds.items() if op in checks and bound is not None]
+
+        def predicate(doc):
+            field_type, values = self._values(doc, field)
+            if not values:
+                return False
+            limits = [(check, _coerce(field_type, bound, field, strict=True)) for check, bound in wanted]
+            return any(all(check(value, bound) for check, bound in limits) for value in values)
+        return predicate
+
+    def _exists(self, body: Dict[str, Any]) -> Callable[[_Document], bool]:
+        field = body["field"]
+        return lambda doc: bool(self._values(doc, field)[1])
+
+    # Sorting
+
+    @staticmethod
+    def _sort_spec(sort: Any) -> List[Tuple[str, str]]:
+        """(field, order) of every sort key"""
+        if sort is None:
+            return []
+        specs = []
+        for item in sort if isinstance(sort, list) else [sort]:
+            if isinstance(item, str):
+                specs.append((item, "desc" if item == "_score" else "asc"))
+                continue
+            (field, order), = item.items()
+            if isinstance(order, dict):
+                order = order.get("order", "desc" if field == "_score" else "asc")
+            specs.append((field, str(order).lower()))
+        return specs
+
+    def _sort_value(self, doc: _Document, field: str, order: str) -> Any:
+        if field == "_doc":
+            return doc.seq
+        if field == "_score":
+            return 1.0
+        field_type, values = self._values(doc, field)
+        if field_type == "text":
+            raise _fielddata_error(field)
+        if not values:
+            return None
+        value = min(values) if order == "asc" else max(values)
+        if field_type == "long":
+            return int(value)
+        return value
+
+    @staticmethod
+    def _is_after(values: list, after: list, sort: List[Tuple[str, str]]) -> bool:
+        """Whether sort values come strictly after search_after values"""
+        for value, bound, (_, order) in zip(values, after, sort):
+            if isinstance(value, (int, float)) and isinstance(bound, str):
+                bound = _epoch_millis(bound) if _epoch_millis(bound) is not None else float(bound)
+            if value == bound:
+                continue
+            if value is None:
+                return True
+            if bound is None:
+                return False
+            return value > bound if order == "asc" else value < bound
+        return False
+
+    # Aggregations
+
+    def _aggregate(self, aggs: Dict[str, Any], docs: List[_Document], buckets: List[int]) -> Dict[str, Any]:
+        """Results of the aggregations over documents
+
+        Args:
+            aggs (dict): aggregations by name
+            docs (list): documents of the parent bucket
+            buckets (list): single counter of the terms buckets created
+        """
+        results = {}
+        for name, spec in aggs.items():
+            sub_aggs = spec.get("aggs", spec.get("aggregations", {}))
+            kinds = [kind for kind in spec if kind not in ("aggs", "aggregations", "meta")]
+            if len(kinds) != 1:
+                raise FakeOpenSearchError(
+                    400, "parsing_exception", f"Expected one aggregation type for [{name}], found {kinds}"
+                )
+            kind = kinds[0]
+            params = spec[kind]
+            if kind == "terms":
+                results[name] = self._terms_agg(params, docs, sub_aggs, buckets)
+            elif kind == "filter":
+                predicate = self._compile(params)
+                selected = [doc for doc in docs if predicate(doc)]
+                results[name] = {"doc_count": len(selected), **self._aggregate(sub_aggs, selected, buckets)}
+            elif kind in _METRIC_AGGS:
+                results[name] = self._metric_agg(kind, params, docs)
+            elif kind == "percentiles":
+                results[name] = self._percentiles_agg(params, docs)
+            elif kind == "top_hits":
+                results[name] = self._top_hits_agg(params, docs)
+            else:
+                raise FakeOpenSearchError(400, "parsing_exception", f"Unknown aggregation type [{kind}]")
+        return results
+
+    def _terms_agg(self, params, docs, sub_aggs, buckets) -> Dict[str, Any]:
+        field = params["field"]
+        groups: Dict[Any, List[_Document]] = {}
+        field_type = None
+        for doc in docs:
+            doc_type, values = self._values(doc, field)
+            if doc_type == "text":
+                raise _fielddata_error(field)
+            field_type = field_type or doc_type
+            for value in dict.fromkeys(values):
+                groups.setdefault(value, []).append(doc)
+
+        order = params.get("order", {"_count": "desc"})
+        (order_key, direction), = (order[0] if isinstance(order, list) else order).items()
+        ranked = sorted(groups.items(), key=lambda item: item[0])
+        if order_key == "_count":
+            ranked.sort(key=lambda item: len(item[1]), reverse=direction == "desc")
+        elif direction == "desc":
+            ranked.reverse()
+        minimum = int(params.get("min_doc_count", 1))
+        ranked = [item for item in ranked if len(item[1]) >= minimum]
+        size = int(params.get("size", 10))
+
+        buckets[0] += min(size, len(ranked))
+        if buckets[0] > self.max_buckets:
+            raise FakeOpenSearchError(
+                400, "too_many_buckets_exception",
+                f"Trying to create too many buckets. Must be less than or equal to: [{self.max_buckets}] "
+                f"but was [{buckets[0]}]. This limit can be set by changing the [search.max_buckets] "
+                "cluster level setting.",
+            )
+        result = []
+        for key, group in ranked[:size]:
+            bucket = {"key": int(key) if field_type in ("long", "date") else key, "doc_count": len(group)}
+            if field_type == "date":
+                bucket["key_as_string"] = _format_millis(key)
+            elif field_type == "boolean":
+                bucket.update(key=int(key), key_as_string=_as_string(key))
+            bucket.update(self._aggregate(sub_aggs, group, buckets))
+            result.append(bucket)
+        return {
+            "doc_count_error_upper_bound": 0,
+            "sum_other_doc_count": sum(len(group) for _, group in ranked[size:]),
+            "buckets": result,
+        }
+
+    def _numeric_values(self, kind: str, field: str, docs: List[_Document]) -> Tuple[Optional[str], list]:
+        field_type = None
+        values = []
+        for doc in docs:
+            doc_type, doc_values = self._values(doc, field)
+            if doc_type == "text":
+                raise _fielddata_error(field)
+            if doc_type == "keyword" and kind != "value_count" and doc_values:
+                raise FakeOpenSearchError(
+                    400, "illegal_argument_exception",
+                    f"Field [{field}] of type [keyword] is not supported for aggregation [{kind}]",
+                )
+            field_type = field_type or doc_type
+            values.extend(doc_values)
+        if kind != "value_count":
+            values = [float(value) for value in values]
+        return field_type, values
+
+    def _metric_agg(self, kind: str, params: Dict[str, Any], docs: List[_Document]) -> Dict[str, Any]:
+        field_type, values = self._numeric_values(kind, params["field"], docs)
+        if kind == "value_count":
+            return {"value": len(values)}
+        value = {
+            "avg": lambda: sum(values) / len(values) if values else None,
+            "sum": lambda: float(sum(values)),
+            "min": lambda: min(values) if values else None,
+            "max": lambda: max(values) if values else None,
+        }[kind]()
+        result = {"value": value}
+        if field_type == "date" and value is not None:
+            result["value_as_string"] = _format_millis(value)
+        return result
+
+    def _percentiles_agg(self, params: Dict[str, Any], docs: List[_Document]) -> Dict[str, Any]:
+        _, values = self._numeric_values("percentiles", params["field"], docs)
+        values.sort()
+        percents = params.get("percents") or DEFAULT_PERCENTS
+        return {"values": {str(float(p)): _percentile(values, float(p)) for p in percents}}
+
+    def _top_hits_agg(self, params: Dict[str, Any], docs: List[_Document]) -> Dict[str, Any]:
+        body = {key: params[key] for key in ("sort", "_source", "from") if key in params}
+        body["size"] = params.get("size", 3)
+        body["track_total_hits"] = True
+        return {"hits": self._search(docs, body, {})["hits"]}
+
+    # REST API
+
+    def perform_request(self, method: str, url: str, params: Optional[Dict[str, Any]] = None,
+                        body: Any = None) -> Tuple[int, Any]:
+        """Answer a REST request
+
+        Args:
+            method (str): HTTP method
+            url (str): request path, optionally with a query string
+            params (dict): URL parameters
+            body: request body, JSON or NDJSON for _bulk, bytes, str or dict
+
+        Returns:
+            tuple: HTTP status and JSON response
+        """
+        self.requests += 1
+        parsed = urlparse(url)
+        params = {**{k: v[-1] for k, v in parse_qs(parsed.query).items()}, **(params or {})}
+        parts = [unquote(part) for part in parsed.path.split("/") if part]
+        if isinstance(body, bytes):
+            if body[:2] == b"\x1f\x8b":
+                body = gzip.decompress(body)
+            body = body.decode("utf-8")
+        method = method.upper()
+        try:
+            return self._route(method, parts, params, body)
+        except FakeOpenSearchError as e:
+            return e.status, e.to_dict()
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            error = FakeOpenSearchError(400, "parsing_exception", f"{type(e).__name__}: {e}")
+            return error.status, error.to_dict()
+
+    def _route(self, method: str, parts: List[str], params: Dict[str, Any], body: Any) -> Tuple[int, Any]:
+        # pylint: disable=too-many-return-statements,too-many-branches
+        def json_body():
+            if body in (None, ""):
+                return {}
+            return json.loads(body) if isinstance(body, str) else body
+
+        shards = {"total": 1, "successful": 1, "failed": 0}
+        if not parts:
+            return 200, {
+                "name": "fake-opensearch",
+                "cluster_name": "fake-opensearch",
+                "version": {"distribution": "opensearch", "number": VERSION},
+                "tagline": "The OpenSearch Project: https://opensearch.org/",
+            }
+        if parts == ["_cluster", "health"]:
+            return 200, {"cluster_name": "fake-opensearch", "status": "green", "number_of_nodes": 1}
+        if parts[-1] == "_refresh":
+            return 200, {"_shards": shards}
+        if parts[-1] == "_bulk":
+            return 200, self._bulk(parts[0] if len(parts) == 2 else None, body or "")
+        if parts[-1] in ("_search", "_count"):
+            index = parts[0] if len(parts) == 2 else "_all"
+            if parts[-1] == "_count":
+                return 200, self.count(index, json_body())
+            return 200, self.search(index, json_body(), params)
+
+        index = parts[0]
+        if len(parts) == 1:
+            if method == "HEAD":
+                return (200 if index in self._indices else 404), {}
+            if method == "PUT":
+                self.create_index(index)
+                return 200, {"acknowledged": True, "shards_acknowledged": True, "index": index}
+            if method == "DELETE":
+                with self._lock:
+                    for name in self._resolve_names(index):
+                        self._indices.pop(name, None)
+                        self._mappings.pop(name, None)
+                return 200, {"acknowledged": True}
+        if len(parts) in (2, 3) and parts[1] in ("_doc", "_create"):
+            doc_id = parts[2] if len(parts) == 3 else None
+            if method == "GET" and doc_id is not None:
+                doc = self._indices.get(index, {}).get(doc_id)
+                if doc is None:
+                    return 404, {"_index": index, "_id": doc_id, "found": False}
+                return 200, {"_index": index, "_id": doc_id, "found": True, "_source": doc.source}
+            if method in ("PUT", "POST"):
+                created = doc_id is None or doc_id not in self._indices.get(index, {})
+                doc_id = self.index(index, json_body(), doc_id)
+                return (201 if created else 200), {
+                    "_index": index, "_id": doc_id, "_shards": shards,
+                    "result": "created" if created else "updated",
+                }
+        if len(parts) == 2 and parts[1] == "_mapping":
+            return 200, {
+                name: {"mappings": {"properties": dict(self._mappings[name])}}
+                for name in self._resolve_names(index)
+            }
+        raise FakeOpenSearchError(
+            400, "illegal_argument_exception",
+            f"no handler found for uri [/{'/'.join(parts)}] and method [{method}]",
+        )
+
+    def _bulk(self, default_index: Optional[str], body: str) -> Dict[str, Any]:
+        """Answer a _bulk request of index, create and delete actions"""
+        lines = [line for line in body.splitlines() if line.strip()]
+        items = []
+        position = 0
+        while position < len(lines):
+            (action, meta), = json.loads(lines[position]).items()
+            position += 1
+            index = meta.get("_index", default_index)
+            doc_id = meta.get("_id")
+            if action == "delete":
+                removed = self._indices.get(index, {}).pop(str(doc_id), None)
+                items.append({action: {"_index": index, "_id": doc_id, "status": 200 if removed else 404,
+                                       "result": "deleted" if removed else "not_found"}})
+                continue
+            source = json.loads(lines[position])
+            position += 1
+            exists = doc_id is not None and str(doc_id) in self._indices.get(index, {})
+            if action == "create" and exists:
+                error = FakeOpenSearchError(
+                    409, "version_conflict_engine_exception",
+                    f"[{doc_id}]: version conflict, document already exists",
+                )
+                items.append({action: {"_index": index, "_id": doc_id, "status": 409,
+                                       "error": error.to_dict()["error"]}})
+                continue
+            if action == "update":
+                if not exists:
+                    items.append({action: {"_index": index, "_id": doc_id, "status": 404,
+                                           "error": {"type": "document_missing_exception"}}})
+                    continue
+                source = {**self._indices[index][str(doc_id)].source, **source.get("doc", {})}
+            doc_id = self.index(index, source, doc_id)
+            items.append({action: {"_index": index, "_id": doc_id, "status": 200 if exists else 201,
+                                   "result": "updated" if exists else "created"}})
+        return {
+            "took": 1,
+            "errors": any(item[next(iter(item))]["status"] >= 300 for item in items),
+            "items": items,
+        }
+
+    # Clients
+
+    def client(self) -> OpenSearch:
+        """opensearch-py client answered in-process by this instance
+
+        Returns:
+            OpenSearch: client to pass to Matcher(es=...) or as _es_client
+        """
+        return OpenSearch(
+            [{"host": "fake-opensearch", "port": 9200}],
+            connection_class=FakeConnection,
+            store=self,
+            max_retries=0,
+        )
+
+    def create_server(self, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+        """HTTP endpoint of this instance, not yet serving
+
+        Args:
+            host (str): address to listen on
+            port (int): port to listen on, 0 picks a free one
+
+        Returns:
+            ThreadingHTTPServer: call serve_forever() to handle requests
+        """
+        return ThreadingHTTPServer((host, port), _handler(self))
+
+
+class FakeConnection(Connection):
+    """opensearch-py connection answering from a FakeOpenSearch instead of a socket
+
+    Args:
+        store (FakeOpenSearch): instance answering the requests
+    """
+
+    def __init__(self, store: FakeOpenSearch = None, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+
+    def perform_request(self, method, url, params=None, body=None, timeout=None, ignore=(), headers=None):
+        # pylint: disable=too-many-arguments
+        status, response = self.store.perform_request(method, url, dict(params or {}), body)
+        raw = json.dumps(response)
+        ignore = (ignore,) if isinstance(ignore, int) else ignore
+        if not 200 <= status < 300 and status not in ignore:
+            self._raise_error(status, raw, "application/json")
+        return status, {"content-type": "application/json"}, raw
+
+
+def _handler(store: FakeOpenSearch):
+    """Request handler class bound to a FakeOpenSearch."""
+
+    class Handler(BaseHTTPRequestHandler):
+        """REST API of the fake"""
+
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+            pass
+
+        def _dispatch(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else None
+            if body and self.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            status, response = store.perform_request(self.command, self.path, None, body)
+            payload = b"" if self.command == "HEAD" else json.dumps(response, default=str).encode("utf-8")
+            self.send_response(status)
+            for name, value in (("Content-Type", "application/json"), ("Content-Length", str(len(payload)))):
+                self.send_header(name, value)
+            self.end_headers()
+            if payload:
+                self.wfile.write(payload)
+
+        do_GET = do_POST = do_PUT = do_DELETE = do_HEAD = _dispatch
+
+    return Handler
+
+
+def generate_runs(  # pylint: disable=too-many-arguments,too-many-locals
+    runs: int = 30,
+    metrics: Optional[Dict[str, float]] = None,
+    benchmark: str = "node-density",
+    start: str = "2026-01-01T00:00:00Z",
+    interval: timedelta = timedelta(days=1),
+    docs_per_metric: Union[int, Dict[str, int]] = 1,
+    regression_at: Union[int, Sequence[int], None] = None,
+    regression: float = 1.5,
+    noise: float = 0.02,
+    seed: int = 0,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Synthetic runs in the layout of the hack/ci-tests data
+
+    Args:
+        runs (int): number of runs, oldest first
+        metrics (dict): mean value by metricName
+        benchmark (str): benchmark of the runs
+        start (str): timestamp of the first run
+        interval (timedelta): time between runs
+        docs_per_metric (int): documents of each metric per run, or a count
+            by metricName
+        regression_at (int): first run whose values are scaled by regression,
+            or a list of them, each scaling the runs from there on once more
+        regression (float): factor of each regression
+        noise (float): relative standard deviation of the values
+        seed (int): seed, the same arguments give the same documents
+
+    Returns:
+        tuple: metadata documents and metric documents
+    """
+    rng = random.Random(seed)
+    metrics = metrics or {"podReadyLatency": 1000.0, "kubeletCPU": 20.0}
+    if regression_at is None:
+        regression_at = []
+    elif isinstance(regression_at, int):
+        regression_at = [regression_at]
+    first = _EPOCH + timedelta(milliseconds=_epoch_millis(start))
+    metadata_docs, metric_docs = [], []
+    for run in range(runs):
+        run_uuid = str(uuid_lib.UUID(int=rng.getrandbits(128), version=4))
+        stamp = first + run * interval
+        nightly = stamp.strftime("%Y-%m-%d-%H%M%S")
+        metadata_docs.append({
+            "uuid": run_uuid,
+            "benchmark": benchmark,
+            "platform": "AWS",
+            "clusterType": "self-managed",
+            "masterNodesCount": 3,
+            "workerNodesCount": 24,
+            "networkType": "OVNKubernetes",
+            "ocpVersion": f"4.20.0-0.nightly-{nightly}",
+            "ocpMajorVersion": "4.20",
+            "jobStatus": "success",
+            "jobType": "periodic",
+            "pullNumber": "0",
+            "buildUrl": f"https://prow.ci/{run_uuid}",
+            "timestamp": stamp.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        })
+        scale = regression ** sum(run >= step for step in regression_at)
+        for name, mean in metrics.items():
+            count = docs_per_metric.get(name, 1) if isinstance(docs_per_metric, dict) else docs_per_metric
+            for position in range(count):
+                metric_docs.append({
+                    "uuid": run_uuid,
+                    "timestamp": (stamp + timedelta(seconds=30 * position)).strftime(
+                        "%Y-%m-%dT%H:%M:%S.000Z"
+                    ),
+                    "metricName": name,
+                    "jobName": benchmark,
+                    "value": mean * scale * (1 + rng.gauss(0, noise)),
+                    "metadata": {"ocpMajorVersion": "4.20", "ocpVersion": f"4.20.0-0.nightly-{nightly}"},
+                })
+    return metadata_docs, metric_docs
+
+
+def main():
+    """Serve a FakeOpenSearch over HTTP"""
+    parser = argparse.ArgumentParser(description="In-memory OpenSearch stand-in for tests and benchmarks")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=9200, help="port to listen on")
+    parser.add_argument(
+        "--load", action="append", default=[], metavar="INDEX=PATH",
+        help="index the documents of a JSON file, may be repeated",
+    )
+    args = parser.parse_args()
+    store = FakeOpenSearch()
+    for spec in args.load:
+        index, _, path = spec.partition("=")
+        print(f"Loaded {store.load_json(path, index)} documents from {path} into {index}")
+    server = store.create_server(args.host, args.port)
+    print(f"Fake OpenSearch listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Module for coalescing concurrent batched metric queries.
+
+In --pr-analysis mode the periodic run and every pull request of a test are
+analyzed in parallel threads. They issue the same batched metric queries and
+only differ in their UUID sets. FetchCoordinator merges such requests into a
+single query over the union of UUIDs and hands every requester back only the
+rows of its own UUIDs.
+"""
+
+import json
+import threading
+import time
+from typing import Any, Dict, List
+
+from orion.constants import FETCH_COALESCE_WAIT
+from orion.logger import SingletonLogger
+from orion.matcher import Matcher
+
+
+class _Batch:  # pylint: disable=too-few-public-methods
+    """A pending coalesced query and its outcome."""
+
+    def __init__(self):
+        self.uuids = set()
+        self.requesters = 0
+        self.ready = False
+        self.done = False
+        self.result = None
+        self.error = None
+
+
+class FetchCoordinator:  # pylint: disable=too-many-instance-attributes
+    """Merges concurrent get_agg_metrics_batch/get_results_batch calls
+
+    The first thread asking for a (query type, index, metric chunk,
+    timestamp field) becomes the leader of a batch. It waits until every
+    participant is blocked on some batch at the same time, which releases
+    all open batches, or FETCH_COALESCE_WAIT seconds pass. It then queries
+    the union of the collected UUIDs.
+
+    Args:
+        participants (int): number of threads sharing this coordinator
+        uuid_field (str): field holding the run UUID
+        max_wait (float): maximum seconds a leader waits for others
+        planner (QueryPlanner): fleet-wide planner the coalesced queries go
+            through, the matcher is queried directly when None
+    """
+
+    def __init__(self, participants: int, uuid_field: str = "uuid",
+                 max_wait: float = FETCH_COALESCE_WAIT, planner=None):
+        self.uuid_field = uuid_field
+        self.max_wait = max_wait
+        self.planner = planner
+        self.logger = SingletonLogger.get_logger("Orion")
+        self._cond = threading.Condition()
+        self._active = participants
+        self._waiting = 0
+        self._open = {}
+
+    def leave(self) -> None:
+        """Mark one participant as finished so leaders stop waiting for it."""
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def get_agg_metrics_batch(
+        self, match: Matcher, uuids: List[str],
+        metrics_list: List[Dict[str, Any]], timestamp_field: str = "timestamp"
+    ) -> Dict[str, List[Dict[Any, Any]]]:
+        """Coalesced Matcher.get_agg_metrics_batch"""
+        return self._fetch("agg", match, uuids, metrics_list, timestamp_field)
+
+    def get_results_batch(
+        self, match: Matcher, uuids: List[str],
+        metrics_list: List[Dict[str, Any]], timestamp_field: str = "timestamp",
+        trim_source: bool = False
+    ) -> Dict[str, List[Dict[Any, Any]]]:
+        """Coalesced Matcher.get_results_batch"""
+        return self._fetch(
+            "std", match, uuids, metrics_list, timestamp_field, trim_source
+        )
+
+    def _fetch(self, kind, match, uuids, metrics_list, timestamp_field,
+               trim_source=False):
+        key = (
+            kind,
+            match.index,
+            json.dumps(metrics_list, sort_keys=True, default=str),
+            timestamp_field,
+            trim_source,
+        )
+        with self._cond:
+            batch = self._open.get(key)
+            leader = batch is None
+            if leader:
+                batch = _Batch()
+                self._open[key] = batch
+            batch.uuids.update(uuids)
+            batch.requesters += 1
+            self._waiting += 1
+            self._cond.notify_all()
+            if leader:
+                deadline = time.monotonic() + self.max_wait
+                while not batch.ready and self._waiting < self._active:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._waiting >= self._active:
+                    # Nobody else can join any open batch: release them all
+                    for pending in self._open.values():
+                        pending.ready = True
+                    self._cond.notify_all()
+                del self._open[key]
+                self._waiting -= 1
+                union = sorted(batch.uuids)
+            else:
+                while not batch.done:
+                    self._cond.wait()
+                self._waiting -= 1
+
+        if leader:
+            if batch.requesters > 1:
+                self.logger.info(
+                    "Coalesced %d %s batch requests into one query over %d UUIDs",
+                    batch.requesters, kind, len(union),
+                )
+            try:
+                if self.planner is not None:
+                    if kind == "agg":
+                        batch.result = self.planner.get_agg_metrics_batch(
+                            match, union, metrics_list, timestamp_field
+                        )
+                    else:
+                        batch.result = self.planner.get_results_batch(
+                            match, union, metrics_list, timestamp_field, trim_source=trim_source
+                        )
+                elif kind == "agg":
+                    batch.result = match.get_agg_metrics_batch(
+                        union, metrics_list, timestamp_field
+                    )
+                else:
+                    batch.result = match.get_results_batch(
+                        union, metrics_list, timestamp_field, trim_source=trim_source
+                    )
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                batch.error = e
+            with self._cond:
+                batch.done = True
+                self._cond.notify_all()
+
+        if batch.error is not None:
+            raise batch.error
+        return self._split(batch.result, set(uuids))
+
+    def _split(self, result, uuids):
+        """Keep only the rows belonging to the requester's UUIDs."""
+        return {
+            name: [
+                row for row in rows
+                if Matcher._get_nested(row, self.uuid_field) in uuids  # pylint: disable=protected-access
+            ]
+            for name, rows in result.items()
+        }
@@ -0,0 +1,239 @@
+"""
+Module for analyzing many config files in one process.
+
+With --configs every matching config file is loaded once, the tests of all
+configs are scheduled on one worker pool sharing an OpenSearch client and an
+ACK index, and the results are grouped back per config so each config is
+reported exactly as a separate --config run would report it.
+"""
+
+import concurrent.futures
+import glob
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from orion.ack_providers import AckIndex, JiraAckProvider
+from orion.ack_providers.factory import (
+    create_jira_provider, extract_version_and_test, get_ack_providers, jira_settings,
+)
+from orion.config import load_config, prepare_pr_analysis
+from orion.logger import SingletonLogger
+from orion.matcher import Matcher
+from orion.query_planner import QueryPlanner
+from orion.reporting.results import write_results
+from orion.run_test import TestResults, run
+
+
+@dataclass
+class FleetConfig:
+    """One config of a fleet run
+
+    Args:
+        path (str): config file
+        kwargs (dict): command line options of its run, with the loaded
+            config and its ackMap
+        results (tuple): (results, results_pull, analyses_by_pr) as returned by run
+        exit_code (int): exit code of a test that stopped the run, 0 otherwise
+    """
+    path: str
+    kwargs: Dict[str, Any]
+    results: Optional[Tuple[TestResults, TestResults, Dict[int, List]]] = None
+    exit_code: int = 0
+
+
+def expand_config_paths(patterns: str) -> List[str]:
+    """Expand --configs glob patterns
+
+    Args:
+        patterns (str): comma-separated file paths or glob patterns
+
+    Raises:
+        ValueError: when a pattern matches no file
+
+    Returns:
+        list: config files, sorted per pattern, without repeats
+    """
+    paths = []
+    for pattern in [p.strip() for p in patterns.split(",") if p.strip()]:
+        matches = sorted(p for p in glob.glob(pattern) if os.path.isfile(p))
+        if not matches:
+            raise ValueError(f"no config file matches {pattern}")
+        paths.extend(p for p in matches if p not in paths)
+    return paths
+
+
+def _run_test(kwargs: Dict[str, Any], test: Dict[str, Any]) -> Any:
+    """Run one test of a config, as run() would within the config's run."""
+    test_kwargs = dict(kwargs)
+    test_kwargs["config"] = {**kwargs["config"], "tests": [test]}
+    try:
+        return run(**test_kwargs)
+    except SystemExit as e:
+        # A test without data ends a separate run; only end its config here
+        if e.code is None:
+            return 0
+        return e.code if isinstance(e.code, int) else 1
+
+
+def merge_results(
+    parts: List[Tuple[TestResults, TestResults, Dict[int, List]]],
+    pull_numbers: List[int],
+) -> Tuple[TestResults, TestResults, Dict[int, List]]:
+    """Combine the per-test run results of a config, in test order
+
+    Args:
+        parts (list): run() results of every test
+        pull_numbers (list): pull requests of the run
+
+    Returns:
+        tuple: (results, results_pull, analyses_by_pr) as run() returns them
+    """
+    analyses_by_pr = {}
+    for _, _, by_pr in parts:
+        for pr_num, analyses in by_pr.items():
+            analyses_by_pr.setdefault(pr_num, []).extend(analyses)
+    results = TestResults(
+        analyses=[a for part in parts for a in part[0].analyses],
+        regression_flag=any(part[0].regression_flag for part in parts),
+        prs=[],
+        viz_data=[v for part in parts for v in part[0].viz_data],
+    )
+    results_pull = TestResults(
+        analyses=[a for analyses in analyses_by_pr.values() for a in analyses],
+        regression_flag=any(part[1].regression_flag for part in parts),
+        prs=pull_numbers,
+        viz_data=[v for part in parts for v in part[1].viz_data],
+    )
+    return results, results_pull, analyses_by_pr
+
+
+def run_configs(configs: List[FleetConfig], workers: int) -> List[FleetConfig]:
+    """Run the tests of all configs on one worker pool
+
+    Fills results, or exit_code when a test ended its config's run, of
+    every config.
+
+    Args:
+        configs (list): configs to analyze
+        workers (int): number of tests analyzed concurrently
+
+    Returns:
+        list: the configs, in the given order
+    """
+    logger = SingletonLogger.get_logger("Orion")
+    jobs = [
+        (position, test)
+        for position, config in enumerate(configs)
+        for test in config.kwargs["config"]["tests"]
+    ]
+    logger.info(
+        "Analyzing %d tests of %d configs with %d workers",
+        len(jobs), len(configs), workers,
+    )
+    test_results = [[] for _ in configs]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [
+            (position, executor.submit(_run_test, configs[position].kwargs, test))
+            for position, test in jobs
+        ]
+        for position, future in futures:
+            test_results[position].append(future.result())
+
+    for config, parts in zip(configs, test_results):
+        exit_codes = [part for part in parts if isinstance(part, int)]
+        if exit_codes:
+            # The first test that ended the run decides, as in a separate run
+            config.exit_code = exit_codes[0]
+        else:
+            config.results = merge_results(parts, config.kwargs.get("pull_numbers", []))
+    return configs
+
+
+def run_fleet(kwargs: dict, logger) -> int:  # pylint: disable=too-many-branches, too-many-locals
+    """Analyze every config matched by --configs in one process
+
+    The configs share one OpenSearch client, one query planner fetching each
+    metric of each run once, and one worker pool for their tests. Configs
+    with the same JIRA settings share one set of ACK providers, queried once
+    per version and test type.
+    Each config is then reported exactly as a separate --config run.
+
+    Args:
+        kwargs (dict): command line options
+        logger (SingletonLogger): logger instance
+
+    Returns:
+        int: 1 if a config failed, else 2 if a regression was found, else
+        the exit code of a config that stopped early, else 0
+    """
+    try:
+        paths = expand_config_paths(kwargs["configs"])
+    except ValueError as e:
+        logger.error("Invalid --configs: %s", e)
+        return 1
+    logger.info("Fleet run over %d configs", len(paths))
+
+    if not kwargs.get("from_snapshot") and (not kwargs["metadata_index"] or not kwargs["es_server"]):
+        logger.error("metadata-index and es-server flags must be provided")
+        return 1
+    if kwargs["pr_analysis"]:
+        prepare_pr_analysis(kwargs, logger)
+
+    configs = []
+    exit_codes = {}
+    for path in paths:
+        try:
+            configs.append(FleetConfig(path, dict(kwargs, config=load_config(path, kwargs["input_vars"]))))
+        except SystemExit as e:
+            logger.error("Config %s could not be loaded", path)
+            exit_codes[path] = e.code if isinstance(e.code, int) else 1
+    if not configs:
+        return 1
+
+    # Configs with the same JIRA settings share their ACK providers
+    ack_by_jira_settings = {}
+    jira_providers = {}
+    for config in configs:
+        settings = jira_settings(kwargs, config.kwargs["config"])
+        if settings not in ack_by_jira_settings:
+            providers, _, _ = get_ack_providers(kwargs, config.kwargs["config"], logger)
+            jira_provider = next((p for p in providers if isinstance(p, JiraAckProvider)), None)
+            if kwargs.get("jira_auto_create") and not jira_provider:
+                jira_provider = create_jira_provider(kwargs, config.kwargs["config"], logger)
+            ack_by_jira_settings[settings] = (AckIndex(providers), jira_provider)
+        ack_index, jira_providers[config.path] = ack_by_jira_settings[settings]
+        version, test_type = extract_version_and_test(config.kwargs["config"], kwargs["input_vars"])
+        config.kwargs["ackMap"] = ack_index.ack_map(version=version, test_type=test_type)
+    es_client = None
+    planner = None
+    if not kwargs.get("from_snapshot"):
+        es_client = Matcher.create_client(
+            kwargs["es_server"], verify_certs=False, pool_maxsize=max(5, kwargs["fleet_workers"]),
+            record=kwargs.get("record"), replay=kwargs.get("replay"),
+        )
+        planner = QueryPlanner()
+        planner.plan([test for config in configs for test in config.kwargs["config"]["tests"]])
+    for config in configs:
+        config.kwargs["_es_client"] = es_client
+        config.kwargs["_query_planner"] = planner
+
+    run_configs(configs, kwargs["fleet_workers"])
+    if planner is not None:
+        planner.log_summary()
+    for config in configs:
+        if config.results is None:
+            exit_codes[config.path] = config.exit_code
+            continue
+        logger.info("Results of %s", config.path)
+        exit_codes[config.path] = write_results(
+            config.kwargs, config.results, jira_providers[config.path], logger
+        )
+
+    for path in paths:
+        logger.info("%s: exit code %d", path, exit_codes[path])
+    codes = set(exit_codes.values())
+    for code in (1, 2):
+        if code in codes:
+            return code
+    return max(codes)
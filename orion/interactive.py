@@ -273,8 +273,10 @@ def _build_cli_command(params: dict) -> str:  # pylint: disable=too-many-branche
     # Boolean flags
     flag_map = {
         "hunter_analyze": "--hunter-analyze",
+        "hunter_fast": "--hunter-fast",
         "cmr": "--cmr",
         "anomaly_detection": "--anomaly-detection",
+        "cusum": "--cusum",
         "filter": "--filter",
         "node_count": "--node-count",
         "sippy_pr_search": "--sippy-pr-search",
@@ -454,12 +456,18 @@ def _section_algorithm(params: dict) -> None:
             questionary.Choice(
                 "Hunter Analyze  — changepoint detection  (default)", "hunter_analyze"
             ),
+            questionary.Choice(
+                "Hunter Fast     — same changepoints, NumPy engine", "hunter_fast"
+            ),
             questionary.Choice(
                 "CMR             — comparative metric regression", "cmr"
             ),
             questionary.Choice(
                 "Anomaly Detect  — isolation forest", "anomaly_detection"
             ),
+            questionary.Choice(
+                "CUSUM           — online per-run check", "cusum"
+            ),
             questionary.Choice(
                 "Filter          — percent difference only", "filter"
             ),
@@ -468,8 +476,10 @@ def _section_algorithm(params: dict) -> None:
     )
 
     params["hunter_analyze"] = algorithm == "hunter_analyze"
+    params["hunter_fast"] = algorithm == "hunter_fast"
     params["cmr"] = algorithm == "cmr"
     params["anomaly_detection"] = algorithm == "anomaly_detection"
+    params["cusum"] = algorithm == "cusum"
     params["filter"] = algorithm == "filter"
     params["anomaly_window"] = None
     params["min_anomaly_percent"] = None
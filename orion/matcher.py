@@ -1,8 +1,9 @@
 """metadata matcher"""
 
-# pylint: disable = invalid-name, invalid-unary-operand-type, no-member
+# pylint: disable = invalid-name, invalid-unary-operand-type, no-member, too-many-lines
+import json
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
 
 # pylint: disable=import-error
@@ -10,11 +11,14 @@ import pandas as pd
 from opensearchpy import OpenSearch
 from opensearchpy.exceptions import ConnectionError as OpenSearchConnectionError
 from opensearch_dsl import Search, Q
+from orion.cassette import Cassette, RecordingConnection, ReplayConnection
 from orion.logger import SingletonLogger
 
+# Distinct values returned by a group_by discovery query
+GROUP_BY_MAX_VALUES = 1000
 
 
-class Matcher:
+class Matcher:  # pylint: disable=too-many-public-methods
     """
     A class used to match or interact with an Elasticsearch index for performance scale testing.
 
@@ -24,6 +28,7 @@ class Matcher:
         verify_certs (bool): Whether to verify SSL certificates when connecting to Elasticsearch.
         version_field (str): Name of the field containing the OpenShift version.
         uuid_field (str): Name of the field containing the UUID.
+        es (OpenSearch): Client shared with other matchers, a new one is created when None.
     """
 
     # pylint: disable=too-many-arguments
@@ -33,21 +38,45 @@ class Matcher:
         es_server: str = "https://localhost:9200",
         verify_certs: bool = True,
         version_field: str = "ocpVersion",
-        uuid_field: str = "uuid"
+        uuid_field: str = "uuid",
+        es: OpenSearch = None,
     ):
         self.index = index
         self.search_size = 10000
         self.logger = SingletonLogger.get_logger("Orion")
-        self.es = OpenSearch(es_server,
-                             timeout=30,
-                             verify_certs=verify_certs,
-                             http_compress=True,
-                             max_retries=3,
-                             retry_on_timeout=True,
-                             pool_maxsize=5)
+        self.es = es if es is not None else self.create_client(es_server, verify_certs)
         self.version_field = version_field
         self.uuid_field = uuid_field
 
+    @staticmethod
+    def create_client(es_server: str, verify_certs: bool = True, pool_maxsize: int = 5,
+                      record: Optional[str] = None, replay: Optional[str] = None) -> OpenSearch:
+        """Create an OpenSearch client
+
+        Args:
+            es_server (str): Elasticsearch endpoint
+            verify_certs (bool): Whether to verify SSL certificates
+            pool_maxsize (int): connections kept open per node
+            record (str): cassette directory to save every request and
+                response to
+            replay (str): cassette directory to answer every request from,
+                nothing is sent to es_server
+
+        Returns:
+            OpenSearch: client, safe to share between threads
+        """
+        options = {"max_retries": 3, "retry_on_timeout": True}
+        if replay:
+            options = {"connection_class": ReplayConnection, "cassette": Cassette(replay), "max_retries": 0}
+        elif record:
+            options.update(connection_class=RecordingConnection, cassette=Cassette(record))
+        return OpenSearch(es_server,
+                          timeout=30,
+                          verify_certs=verify_certs,
+                          http_compress=True,
+                          pool_maxsize=pool_maxsize,
+                          **options)
+
     def get_metadata_by_uuid(self, uuid: str) -> dict:
         """Returns back metadata when uuid is given
 
@@ -102,37 +131,45 @@ class Matcher:
             search_after = response.hits[-1].meta.sort
         return all_hits
 
-    # pylint: disable=too-many-locals
-    def get_uuid_by_metadata(
+    def iter_hit_pages(self, search: Search):
+        """Yield the hits of a query one search_after page at a time
+
+        Unlike query_index(return_all=True) the pages are not accumulated, so
+        callers can reduce each page and let the raw hits go.
+
+        Args:
+            search (Search): Search object with query and sort
+        """
+        self.logger.info("Streaming query against index: %s", self.index)
+        self.logger.debug("Executing query \r\n%s", search.to_dict())
+        search_after = None
+        while True:
+            if search_after:
+                search = search.extra(search_after=search_after)
+            response = search.execute()
+            hits = response.hits.hits
+            if not hits:
+                break
+            yield hits
+            search_after = response.hits[-1].meta.sort
+
+    def metadata_query(
         self,
         metadata: Dict[str, Any],
         lookback_date: datetime = None,
-        lookback_size: int = 10000,
         timestamp_field: str = "timestamp",
         since_date: datetime = None,
-        additional_fields: List[str] = None
-    ) -> List[Dict[str, str]]:
-        """gets uuid by metadata
+    ) -> Q:
+        """Query matching the runs of the given metadata
 
         Args:
             metadata (Dict[str, Any]): metadata of the runs
-            lookback_date (datetime, optional):
-            The cutoff date to get the uuids from. Defaults to None.
-            lookback_size (int, optional):
-            Maximum number of runs to get, gets the latest. Defaults to 10000.
-
-            lookback_size and lookback_date get the data on the
-            precedency of whichever cutoff comes first.
-            Similar to a car manufacturer's warranty limits.
+            lookback_date (datetime, optional): only runs after this date
             timestamp_field (str): timestamp field in data
-            since_date (datetime, optional):
-            The end date to bound the range to. If provided, results will be 
-            bounded between lookback_date and since_date. Defaults to None.
-            additional_fields (List[str], optional): Additional fields to include
-            in the result. Defaults to None.
+            since_date (datetime, optional): only runs before this date
 
         Returns:
-            List[Dict[str, str]]: List of dictionaries with uuid, buildURL and ocpVersion as keys
+            Q: bool query used by get_uuid_by_metadata
         """
         must_clause = []
         must_not_clause = []
@@ -170,18 +207,120 @@ class Matcher:
         elif since_date:
             # Only upper bound with since_date
             filter_clause.append(Q("range", **{timestamp_field: {"lt": since_date}}))
-        query = Q(
+        return Q(
             "bool",
             must=must_clause,
             must_not=must_not_clause,
             filter=filter_clause,
         )
+
+    def count_runs_since(
+        self,
+        metadata: Dict[str, Any],
+        watermark: str,
+        timestamp_field: str = "timestamp",
+    ) -> int:
+        """Count the runs of the given metadata newer than a timestamp
+
+        Args:
+            metadata (Dict[str, Any]): metadata of the runs
+            watermark (str): timestamp of the newest run already seen
+            timestamp_field (str): timestamp field in data
+
+        Returns:
+            int: number of newer runs
+        """
+        query = self.metadata_query(metadata, watermark, timestamp_field)
+        self.logger.debug("Counting runs newer than %s in %s", watermark, self.index)
+        return Search(using=self.es, index=self.index).query(query).count()
+
+    def latest_run_timestamp(
+        self,
+        metadata: Dict[str, Any],
+        timestamp_field: str = "timestamp",
+    ) -> str:
+        """Timestamp of the newest run of the given metadata
+
+        Args:
+            metadata (Dict[str, Any]): metadata of the runs
+            timestamp_field (str): timestamp field in data
+
+        Returns:
+            str: timestamp as stored, None when no run matches
+        """
         s = (
+            Search(using=self.es, index=self.index)
+            .query(self.metadata_query(metadata, timestamp_field=timestamp_field))
+            .sort({timestamp_field: {"order": "desc"}})
+            .source([timestamp_field])
+            .extra(size=1)
+        )
+        hits = s.execute().hits.hits
+        if not hits:
+            return None
+        return self._get_nested(hits[0].to_dict()["_source"], timestamp_field)
+
+    def uuid_search(
+        self,
+        metadata: Dict[str, Any],
+        lookback_date: datetime = None,
+        lookback_size: int = 10000,
+        timestamp_field: str = "timestamp",
+        since_date: datetime = None,
+    ) -> Search:
+        """Search issued by get_uuid_by_metadata, newest runs first
+
+        Args:
+            metadata (Dict[str, Any]): metadata of the runs
+            lookback_date (datetime, optional): only runs after this date
+            lookback_size (int): maximum number of runs
+            timestamp_field (str): timestamp field in data
+            since_date (datetime, optional): only runs before this date
+
+        Returns:
+            Search: the metadata lookup, not executed
+        """
+        query = self.metadata_query(metadata, lookback_date, timestamp_field, since_date)
+        return (
             Search(using=self.es, index=self.index)
             .query(query)
             .sort({timestamp_field: {"order": "desc"}})
             .extra(size=lookback_size)
         )
+
+    # pylint: disable=too-many-locals
+    def get_uuid_by_metadata(
+        self,
+        metadata: Dict[str, Any],
+        lookback_date: datetime = None,
+        lookback_size: int = 10000,
+        timestamp_field: str = "timestamp",
+        since_date: datetime = None,
+        additional_fields: List[str] = None
+    ) -> List[Dict[str, str]]:
+        """gets uuid by metadata
+
+        Args:
+            metadata (Dict[str, Any]): metadata of the runs
+            lookback_date (datetime, optional):
+            The cutoff date to get the uuids from. Defaults to None.
+            lookback_size (int, optional):
+            Maximum number of runs to get, gets the latest. Defaults to 10000.
+
+            lookback_size and lookback_date get the data on the
+            precedency of whichever cutoff comes first.
+            Similar to a car manufacturer's warranty limits.
+            timestamp_field (str): timestamp field in data
+            since_date (datetime, optional):
+            The end date to bound the range to. If provided, results will be 
+            bounded between lookback_date and since_date. Defaults to None.
+            additional_fields (List[str], optional): Additional fields to include
+            in the result. Defaults to None.
+
+        Returns:
+            List[Dict[str, str]]: List of dictionaries with uuid, buildURL and ocpVersion as keys
+        """
+        s = self.uuid_search(metadata, lookback_date, lookback_size, timestamp_field, since_date)
         all_hits = self.query_index(s, return_all=True, max_hits=lookback_size)
         uuids_docs = []
         for hit in all_hits:
@@ -429,25 +568,21 @@ class Matcher:
             res.append(data)
         return res
 
-    def get_agg_metrics_batch(
+    def agg_batch_search(
         self, uuids: List[str],
         metrics_list: List[Dict[str, Any]],
         timestamp_field: str = "timestamp"
-    ) -> Dict[str, List[Dict[Any, Any]]]:
-        """Execute a single ES query with multiple sub-aggregations, one per metric.
+    ) -> Search:
+        """Search issued by get_agg_metrics_batch: one filtered sub-aggregation per metric
 
         Args:
             uuids: List of UUIDs to filter on.
-            metrics_list: List of metric config dicts, each with 'name',
-                          'metric_of_interest', 'agg' block, and filter fields.
+            metrics_list: List of metric config dicts.
             timestamp_field: Timestamp field name.
 
         Returns:
-            Dict mapping metric name -> list of parsed result dicts.
+            Search: the size-0 aggregation query, not executed
         """
-        if not metrics_list:
-            return {}
-
         query = Q(
             "bool",
             must=[Q("terms", **{self.uuid_field + ".keyword": uuids})],
@@ -469,17 +604,7 @@ class Matcher:
             agg_type = metric["agg"]["agg_type"]
             field = metric["metric_of_interest"]
 
-            metric_filter_clauses = [
-                Q("match", **{k: v})
-                for k, v in metric.items()
-                if k not in ("name", "metric_of_interest", "not", "agg", "type", "group_by")
-            ]
-            not_clauses = [
-                ~Q("match", **{k: v})
-                for k, v in metric.get("not", {}).items()
-            ]
-            metric_filter = Q("bool", must=metric_filter_clauses + not_clauses)
-            filtered_bucket = uuid_bucket.bucket(agg_name, "filter", metric_filter)
+            filtered_bucket = uuid_bucket.bucket(agg_name, "filter", self._metric_filter(metric))
 
             if agg_type == "percentiles":
                 percents = metric["agg"].get("percents")
@@ -494,7 +619,84 @@ class Matcher:
                 filtered_bucket.metric(field, "value_count", field=field)
             else:
                 filtered_bucket.metric(field, agg_type, field=field)
+        return search
+
+    @staticmethod
+    def _metric_filter(metric: Dict[str, Any]) -> Q:
+        """Filter selecting the documents of a metric."""
+        metric_filter_clauses = [
+            Q("match", **{k: v})
+            for k, v in metric.items()
+            if k not in ("name", "metric_of_interest", "not", "agg", "type", "group_by")
+        ]
+        not_clauses = [
+            ~Q("match", **{k: v})
+            for k, v in metric.get("not", {}).items()
+        ]
+        return Q("bool", must=metric_filter_clauses + not_clauses)
+
+    def metric_doc_counts(
+        self, uuids: List[str],
+        metrics_list: List[Dict[str, Any]],
+        source_fields: List[str] = None
+    ) -> Dict[str, Tuple[int, int]]:
+        """Count the documents of each metric over the given runs
+
+        A single size-0 query with one filter aggregation per metric, each
+        sampling one document, so result sizes can be estimated without
+        fetching them.
+
+        Args:
+            uuids: List of UUIDs to filter on.
+            metrics_list: List of metric config dicts.
+            source_fields: Fields of the sampled document, all when None.
+
+        Returns:
+            Dict mapping metric name -> (document count, bytes of the sampled
+            document source, 0 when there is none).
+        """
+        if not metrics_list:
+            return {}
+        search = (
+            Search(using=self.es, index=self.index)
+            .query(Q("bool", must=[Q("terms", **{self.uuid_field + ".keyword": uuids})]))
+            .extra(size=0)
+        )
+        for metric in metrics_list:
+            search.aggs.bucket(metric["name"], "filter", self._metric_filter(metric)).metric(
+                "sample", "top_hits", size=1,
+                _source=source_fields if source_fields is not None else True,
+            )
+        self.logger.debug("Executing count query \r\n%s", search.to_dict())
+        aggregations = search.execute().to_dict().get("aggregations", {})
+        counts = {}
+        for metric in metrics_list:
+            bucket = aggregations.get(metric["name"], {})
+            samples = bucket.get("sample", {}).get("hits", {}).get("hits", [])
+            sample_bytes = len(json.dumps(samples[0].get("_source", {}))) if samples else 0
+            counts[metric["name"]] = (bucket.get("doc_count", 0), sample_bytes)
+        return counts
 
+    def get_agg_metrics_batch(
+        self, uuids: List[str],
+        metrics_list: List[Dict[str, Any]],
+        timestamp_field: str = "timestamp"
+    ) -> Dict[str, List[Dict[Any, Any]]]:
+        """Execute a single ES query with multiple sub-aggregations, one per metric.
+
+        Args:
+            uuids: List of UUIDs to filter on.
+            metrics_list: List of metric config dicts, each with 'name',
+                          'metric_of_interest', 'agg' block, and filter fields.
+            timestamp_field: Timestamp field name.
+
+        Returns:
+            Dict mapping metric name -> list of parsed result dicts.
+        """
+        if not metrics_list:
+            return {}
+
+        search = self.agg_batch_search(uuids, metrics_list, timestamp_field)
         self.logger.info(
             "Executing batched aggregation query for %d metrics against index %s",
             len(metrics_list), self.index,
@@ -560,13 +762,27 @@ class Matcher:
 
         return results
 
-    def get_results_batch(
+    @staticmethod
+    def batch_filter_fields(metric: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Fields a batched standard query matches the documents of a metric on
+
+        Args:
+            metric: metric config dict
+
+        Returns:
+            tuple: (fields the documents must match, fields they must not match)
+        """
+        excluded_keys = {"name", "metric_of_interest", "not", "type", "group_by"}
+        match_fields = {k: v for k, v in metric.items() if k not in excluded_keys}
+        return match_fields, metric.get("not", {})
+
+    def results_batch_search(
         self,
         uuids: List[str],
         metrics_list: List[Dict[str, Any]],
-        timestamp_field: str = "timestamp"
-    ) -> Dict[str, List[Dict[Any, Any]]]:
-        """Fetch multiple standard metrics in a single ES query using an OR filter.
+        timestamp_field: str = "timestamp",
+    ) -> Tuple[Search, List[Tuple[str, Dict[str, Any], Dict[str, Any]]]]:
+        """Search issued by get_results_batch: the documents of any of the metrics
 
         Args:
             uuids: List of UUIDs.
@@ -574,26 +790,19 @@ class Matcher:
             timestamp_field: Timestamp field name.
 
         Returns:
-            Dict mapping metric name -> list of hit _source dicts.
+            tuple: the query, not executed, and the (name, match fields, not
+            fields) of every metric used to route its hits
         """
-        if not metrics_list:
-            return {}
-
-        excluded_keys = {"name", "metric_of_interest", "not", "type", "group_by"}
         filter_fields_by_metric = []
         should_clauses = []
         for metric in metrics_list:
-            match_fields = {
-                k: v for k, v in metric.items()
-                if k not in excluded_keys
-            }
+            match_fields, not_fields = self.batch_filter_fields(metric)
             filter_clauses = [Q("match", **{k: v}) for k, v in match_fields.items()]
             not_clauses = [
                 ~Q("match", **{k: v})
-                for k, v in metric.get("not", {}).items()
+                for k, v in not_fields.items()
             ]
             should_clauses.append(Q("bool", must=filter_clauses + not_clauses))
-            not_fields = metric.get("not", {})
             filter_fields_by_metric.append((metric["name"], match_fields, not_fields))
 
         query = Q(
@@ -608,39 +817,97 @@ class Matcher:
             .extra(size=self.search_size)
             .sort({timestamp_field: {"order": "desc"}})
         )
+        return search, filter_fields_by_metric
+
+    def trimmed_source_fields(
+        self,
+        metrics_list: List[Dict[str, Any]],
+        filter_fields_by_metric: List[Tuple[str, Dict[str, Any], Dict[str, Any]]],
+        timestamp_field: str = "timestamp",
+    ) -> List[str]:
+        """Fields fetched by get_results_batch with trim_source
 
+        Args:
+            metrics_list: List of metric config dicts.
+            filter_fields_by_metric: as returned by results_batch_search
+            timestamp_field: Timestamp field name.
+
+        Returns:
+            list: sorted source fields
+        """
+        fields = {self.uuid_field, timestamp_field}
+        for metric, (_, match_fields, not_fields) in zip(metrics_list, filter_fields_by_metric):
+            fields.add(metric["metric_of_interest"])
+            fields.update(k.replace(".keyword", "") for k in match_fields)
+            fields.update(k.replace(".keyword", "") for k in not_fields)
+        return sorted(fields)
+
+    def get_results_batch(
+        self,
+        uuids: List[str],
+        metrics_list: List[Dict[str, Any]],
+        timestamp_field: str = "timestamp",
+        trim_source: bool = False
+    ) -> Dict[str, List[Dict[Any, Any]]]:
+        """Fetch multiple standard metrics in a single ES query using an OR filter.
+
+        Args:
+            uuids: List of UUIDs.
+            metrics_list: List of metric config dicts.
+            timestamp_field: Timestamp field name.
+            trim_source: Only fetch the uuid, timestamp, metric value and filter
+                fields of each document and route hits page by page instead of
+                collecting every raw hit first.
+
+        Returns:
+            Dict mapping metric name -> list of hit _source dicts.
+        """
+        if not metrics_list:
+            return {}
+
+        search, filter_fields_by_metric = self.results_batch_search(uuids, metrics_list, timestamp_field)
         self.logger.info(
             "Executing batched standard query for %d metrics against index %s",
             len(metrics_list), self.index,
         )
 
+        results = {m["name"]: [] for m in metrics_list}
+        if trim_source:
+            search = search.source(
+                includes=self.trimmed_source_fields(metrics_list, filter_fields_by_metric, timestamp_field)
+            )
+            for hits in self.iter_hit_pages(search):
+                for hit in hits:
+                    self._route_batch_doc(
+                        hit.to_dict()["_source"], filter_fields_by_metric, results
+                    )
+            return results
+
         all_hits = self.query_index(search, return_all=True)
         runs = [hit.to_dict()["_source"] for hit in all_hits]
-
-        results = {m["name"]: [] for m in metrics_list}
         for doc in runs:
-            matched = False
-            for metric_name, match_fields, not_fields in filter_fields_by_metric:
-                matches_positive = all(
-                    self._get_nested(doc, k.replace(".keyword", "")) == v
-                    for k, v in match_fields.items()
-                )
-                matches_negative = all(
-                    self._get_nested(doc, k.replace(".keyword", "")) != v
-                    for k, v in not_fields.items()
-                )
-                if matches_positive and matches_negative:
-                    results[metric_name].append(doc)
-                    matched = True
-                    break
-            if not matched:
-                self.logger.debug(
-                    "Document did not match any metric filter: %s",
-                    doc.get(self.uuid_field)
-                )
-
+            self._route_batch_doc(doc, filter_fields_by_metric, results)
         return results
 
+    def _route_batch_doc(self, doc, filter_fields_by_metric, results):
+        """Append a batched standard hit to the first metric whose filters it matches."""
+        for metric_name, match_fields, not_fields in filter_fields_by_metric:
+            matches_positive = all(
+                self._get_nested(doc, k.replace(".keyword", "")) == v
+                for k, v in match_fields.items()
+            )
+            matches_negative = all(
+                self._get_nested(doc, k.replace(".keyword", "")) != v
+                for k, v in not_fields.items()
+            )
+            if matches_positive and matches_negative:
+                results[metric_name].append(doc)
+                return
+        self.logger.debug(
+            "Document did not match any metric filter: %s",
+            doc.get(self.uuid_field)
+        )
+
     def convert_to_df(
         self, data: Dict[Any, Any],
         columns: List[str] = None,
@@ -710,16 +977,13 @@ class Matcher:
                 return v
         return v
 
-    def discover_field_values(
+    def field_values_search(
         self,
         metric: Dict[str, Any],
         field: str,
         uuids: List[str],
-    ) -> List[str]:
-        """Query OpenSearch for distinct values of a field, scoped by metric filters.
-
-        Builds a bool query from the metric's filter fields (excluding reserved
-        keys) and the UUID list, then runs a terms aggregation on the target field.
+    ) -> Search:
+        """Search issued by discover_field_values
 
         Args:
             metric: metric dict (group_by already popped)
@@ -727,7 +991,7 @@ class Matcher:
             uuids: UUIDs to scope the query
 
         Returns:
-            Sorted list of distinct string values.
+            Search: the size-0 terms aggregation, not executed
         """
         reserved_keys = {
             "name", "metric_of_interest", "not", "agg", "type",
@@ -754,8 +1018,29 @@ class Matcher:
             .query(query)
             .extra(size=0)
         )
-        search.aggs.bucket("group_values", "terms", field=field, size=1000)
+        search.aggs.bucket("group_values", "terms", field=field, size=GROUP_BY_MAX_VALUES)
+        return search
 
+    def discover_field_values(
+        self,
+        metric: Dict[str, Any],
+        field: str,
+        uuids: List[str],
+    ) -> List[str]:
+        """Query OpenSearch for distinct values of a field, scoped by metric filters.
+
+        Builds a bool query from the metric's filter fields (excluding reserved
+        keys) and the UUID list, then runs a terms aggregation on the target field.
+
+        Args:
+            metric: metric dict (group_by already popped)
+            field: the OpenSearch field to aggregate on
+            uuids: UUIDs to scope the query
+
+        Returns:
+            Sorted list of distinct string values.
+        """
+        search = self.field_values_search(metric, field, uuids)
         self.logger.debug("group_by discovery query for field '%s': %s", field, search.to_dict())
         try:
             result = search.execute()
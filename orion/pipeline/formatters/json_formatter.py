@@ -28,6 +28,14 @@ class JsonFormatter(BaseFormatter):
             }
             entry["is_changepoint"] = False
 
+        # --algorithms: which algorithms flagged each metric of a run
+        for name, change_points in data.change_points_by_algorithm.items():
+            for key, value in change_points.items():
+                for change_point in value:
+                    dataframe_json[change_point.index]["metrics"][key].setdefault(
+                        "algorithms", []
+                    ).append(name)
+
         github_client = BaseFormatter._get_github_client(data.github_repos)
 
         for key, value in data.change_points_by_metric.items():
@@ -102,12 +110,12 @@ class JsonFormatter(BaseFormatter):
                      is_pull: bool = False) -> None:
         print(formatted)
 
-    def print_and_save_pr(
+    def format_pr(
         self,
         periodic: AnalysisResult,
         pulls: List[Tuple[int, Optional[AnalysisResult]]],
-        save_output_path: str,
-    ) -> None:
+    ) -> dict:
+        """Combined PR output: periodic rows, their averages and every pull."""
         formatted_periodic = self.format(periodic)
         avg_formatted = self.format_average(periodic)
         results_json = {
@@ -125,7 +133,15 @@ class JsonFormatter(BaseFormatter):
             else:
                 pulls_data.append({"pr": pr_num, "data": []})
         results_json["pulls"] = pulls_data
-        combined = json.dumps(results_json, indent=2)
+        return results_json
+
+    def print_and_save_pr(
+        self,
+        periodic: AnalysisResult,
+        pulls: List[Tuple[int, Optional[AnalysisResult]]],
+        save_output_path: str,
+    ) -> None:
+        combined = json.dumps(self.format_pr(periodic, pulls), indent=2)
         print(combined)
         base = os.path.splitext(save_output_path)[0]
         output_file = f"{base}_{periodic.test_name}.json"
@@ -10,7 +10,7 @@ from tabulate import tabulate
 from orion.pipeline.analysis_result import AnalysisResult, group_change_points_by_time
 from orion.pipeline.formatters.base import BaseFormatter
 from orion.pipeline.formatters.json_formatter import JsonFormatter
-from orion.reporting import Report, ReportType
+from orion.reporting.report import Report, ReportType
 
 
 class TextFormatter(BaseFormatter):
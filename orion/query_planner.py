@@ -0,0 +1,235 @@
+"""
+Module for deduplicating metric queries across the tests of a fleet run.
+
+Configs run together with --configs often share their metricsFile and most of
+their metadata, so their tests query the same metrics over overlapping UUID
+sets. QueryPlanner compiles every metric into a normalized spec (index,
+filter fields, metric_of_interest, agg, timestamp field) and fetches each
+(spec, UUID) pair once; later requests are answered from the rows already
+fetched, and only their missing UUIDs are queried.
+
+A batched standard query hands every document to the first metric of the
+batch whose filters it matches. The spec of a standard metric therefore also
+holds the filters of the metrics before it in its batch that a document may
+match as well, and its missing rows are fetched with the batch it was
+requested in, so every test gets the rows it would have fetched on its own.
+"""
+
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+from orion.logger import SingletonLogger
+from orion.matcher import Matcher
+
+# Metric fields that do not change the query of a metric
+NON_QUERY_FIELDS = frozenset({
+    "name", "type", "labels", "direction", "threshold", "correlation", "context",
+})
+
+
+def normalize_metric(metric: Dict[str, Any]) -> str:
+    """Normalized spec of a metric: its query fields, sorted
+
+    Args:
+        metric (dict): metric definition
+
+    Returns:
+        str: JSON encoding of the fields that select and aggregate the data
+    """
+    return json.dumps(
+        {k: v for k, v in metric.items() if k not in NON_QUERY_FIELDS},
+        sort_keys=True, default=str,
+    )
+
+
+class QueryPlanner:
+    """Fetches each (metric spec, UUID) pair of a fleet run once
+
+    Exposes the batch methods of FetchCoordinator, so it is used by Utils as
+    its coordinator, or behind a FetchCoordinator in --pr-analysis runs.
+    Concurrent requests for the same pairs wait for the thread fetching them.
+    """
+
+    def __init__(self):
+        self.logger = SingletonLogger.get_logger("Orion")
+        self._cond = threading.Condition()
+        self._rows = {}
+        self._inflight = {}
+        self.requested_pairs = 0
+        self.fetched_pairs = 0
+        self.queries = 0
+
+    def plan(self, tests: List[Dict[str, Any]]) -> int:
+        """Compile the metrics of every test into normalized specs
+
+        Args:
+            tests (list): test configurations of the fleet
+
+        Returns:
+            int: number of distinct specs
+        """
+        definitions = [
+            (test.get("index"), normalize_metric(metric))
+            for test in tests
+            for metric in test.get("metrics", [])
+        ]
+        distinct = len(set(definitions))
+        self.logger.info(
+            "Query plan: %d metric definitions of %d tests compile to %d distinct specs",
+            len(definitions), len(tests), distinct,
+        )
+        return distinct
+
+    def dedup_ratio(self) -> Optional[float]:
+        """Requested (spec, UUID) pairs per fetched pair, None before any request."""
+        if not self.fetched_pairs:
+            return None
+        return self.requested_pairs / self.fetched_pairs
+
+    def log_summary(self) -> None:
+        """Log the number of queries and the dedup ratio."""
+        ratio = self.dedup_ratio()
+        self.logger.info(
+            "Query planner: %d (spec, UUID) pairs requested, %d fetched in %d queries, dedup ratio %s",
+            self.requested_pairs, self.fetched_pairs, self.queries,
+            f"{ratio:.2f}" if ratio is not None else "n/a",
+        )
+
+    def get_agg_metrics_batch(
+        self, match: Matcher, uuids: List[str],
+        metrics_list: List[Dict[str, Any]], timestamp_field: str = "timestamp"
+    ) -> Dict[str, List[Dict[Any, Any]]]:
+        """Deduplicated Matcher.get_agg_metrics_batch"""
+        return self._fetch("agg", match, uuids, metrics_list, timestamp_field)
+
+    def get_results_batch(
+        self, match: Matcher, uuids: List[str],
+        metrics_list: List[Dict[str, Any]], timestamp_field: str = "timestamp",
+        trim_source: bool = False
+    ) -> Dict[str, List[Dict[Any, Any]]]:
+        """Deduplicated Matcher.get_results_batch"""
+        return self._fetch("std", match, uuids, metrics_list, timestamp_field, trim_source)
+
+    @staticmethod
+    def _filters_overlap(first, second) -> bool:
+        """Tell whether a document may match the batch filters of two metrics."""
+        (match_first, not_first), (match_second, not_second) = first, second
+        if any(match_first[k] != match_second[k] for k in match_first.keys() & match_second.keys()):
+            return False
+        return not any(
+            k in not_other and not_other[k] == v
+            for match_fields, not_other in ((match_first, not_second), (match_second, not_first))
+            for k, v in match_fields.items()
+        )
+
+    def _batch_context(self, kind, metrics_list):
+        """Filters of the earlier metrics of a batch that take documents from each metric."""
+        if kind != "std":
+            return [() for _ in metrics_list]
+        filters = [Matcher.batch_filter_fields(metric) for metric in metrics_list]
+        return [
+            tuple(sorted({
+                json.dumps(earlier, sort_keys=True, default=str)
+                for earlier in filters[:position]
+                if self._filters_overlap(earlier, filters[position])
+            }))
+            for position in range(len(metrics_list))
+        ]
+
+    @staticmethod
+    def _spec(kind, match, metric, timestamp_field, trim_source, context=()):
+        return (kind, match.index, match.uuid_field, timestamp_field, trim_source,
+                normalize_metric(metric), context)
+
+    def _fetch(self, kind, match, uuids, metrics_list, timestamp_field,
+               trim_source=False):
+        uuids = list(dict.fromkeys(uuids))
+        spec_by_name = {
+            metric["name"]: self._spec(kind, match, metric, timestamp_field, trim_source, context)
+            for metric, context in zip(metrics_list, self._batch_context(kind, metrics_list))
+        }
+        metric_by_spec = {}
+        for metric in metrics_list:
+            metric_by_spec.setdefault(spec_by_name[metric["name"]], metric)
+        with self._cond:
+            self.requested_pairs += len(metric_by_spec) * len(uuids)
+
+        while True:
+            with self._cond:
+                claimed = {}
+                waiting = False
+                for spec in metric_by_spec:
+                    rows = self._rows.setdefault(spec, {})
+                    inflight = self._inflight.setdefault(spec, set())
+                    missing = [u for u in uuids if u not in rows and u not in inflight]
+                    if missing:
+                        inflight.update(missing)
+                        claimed[spec] = missing
+                    elif any(u not in rows for u in uuids):
+                        waiting = True
+                if not claimed:
+                    if not waiting:
+                        return {
+                            name: [row for u in uuids for row in self._rows[spec][u]]
+                            for name, spec in spec_by_name.items()
+                        }
+                    self._cond.wait()
+                    continue
+            try:
+                if kind == "agg":
+                    self._query(match, claimed, metric_by_spec, timestamp_field)
+                else:
+                    self._query_batch(match, uuids, claimed, metrics_list, spec_by_name,
+                                      timestamp_field, trim_source)
+            finally:
+                with self._cond:
+                    for spec, missing in claimed.items():
+                        self._inflight[spec].difference_update(missing)
+                    self._cond.notify_all()
+
+    def _query(self, match, claimed, metric_by_spec, timestamp_field):
+        """Query the claimed aggregation pairs, one batch per set of missing UUIDs."""
+        groups = {}
+        for spec, missing in claimed.items():
+            groups.setdefault(tuple(missing), []).append(spec)
+        for missing, specs in groups.items():
+            # Specs of different tests may share a name, query them under their position
+            metrics_list = [
+                dict(metric_by_spec[spec], name=f"spec{position}")
+                for position, spec in enumerate(specs)
+            ]
+            result = match.get_agg_metrics_batch(list(missing), metrics_list, timestamp_field)
+            self._store(match, {
+                spec: (missing, result.get(f"spec{position}", []))
+                for position, spec in enumerate(specs)
+            })
+
+    def _query_batch(self, match, uuids, claimed, metrics_list, spec_by_name,
+                     timestamp_field, trim_source):
+        """Query the claimed standard pairs with the batch they were requested in."""
+        claimed_uuids = set().union(*claimed.values())
+        missing = [u for u in uuids if u in claimed_uuids]
+        result = match.get_results_batch(
+            missing, metrics_list, timestamp_field, trim_source=trim_source
+        )
+        self._store(match, {
+            spec: (claimed[spec], result.get(name, []))
+            for name, spec in spec_by_name.items()
+            if spec in claimed
+        })
+
+    def _store(self, match, fetched):
+        """Keep the rows of every (spec, UUID) pair of a query, by spec."""
+        by_spec = {}
+        for spec, (missing, result_rows) in fetched.items():
+            rows = by_spec.setdefault(spec, {u: [] for u in missing})
+            for row in result_rows:
+                uuid = Matcher._get_nested(row, match.uuid_field)  # pylint: disable=protected-access
+                if uuid in rows:
+                    rows[uuid].append(row)
+        with self._cond:
+            self.queries += 1
+            for spec, rows in by_spec.items():
+                self._rows[spec].update(rows)
+                self.fetched_pairs += len(rows)
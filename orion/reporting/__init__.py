@@ -1,7 +1,22 @@
 """
 Init for pkg module
+
+Report is imported on first access so that the standalone --report mode and
+the regression summary do not load otava.
 """
 
-from .report import Report, ReportType
+import importlib
+
 from .standalone import load_json_files, generate_report
 from .summary import print_regression_summary
+
+_LAZY_EXPORTS = {
+    "Report": ".report",
+    "ReportType": ".report",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        return getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
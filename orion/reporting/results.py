@@ -0,0 +1,414 @@
+# pylint: disable = line-too-long
+"""
+Module for reporting the results of a run.
+
+Prints and saves the output of every analysis, creates JIRA issues for the
+regressions with --jira-auto-create and writes the --viz visualizations,
+the same way for --config, --configs and --watch runs.
+"""
+
+import os
+from pathlib import Path
+
+from orion import constants as cnsts
+from orion.ack_providers.base import AckProvider
+from orion.pipeline.formatters import FormatterFactory
+from orion.reporting.summary import print_regression_summary
+
+
+def build_viz_output_file(
+    output_base_path: str, test_name: str, run_type: str = ""
+) -> str:
+    """Build the output path for a visualization HTML file."""
+    suffix = f"_{run_type}" if run_type else ""
+    return f"{output_base_path}_{test_name}{suffix}_viz.html"
+
+
+def _format_pr_section(prs: list, prev_ver: str, bad_ver: str) -> str:
+    """Format the PR section of JIRA description."""
+    if not prs:
+        return ""
+
+    section = "h3. Related Pull Requests\n"
+    section += f"PRs introduced between {prev_ver} and {bad_ver}:\n\n"
+    for pr in prs:
+        if isinstance(pr, str):
+            section += f"* {pr}\n"
+        elif isinstance(pr, dict):
+            pr_url = pr.get("url", pr.get("html_url", ""))
+            pr_title = pr.get("title", "")
+            if pr_url and pr_title:
+                section += f"* [{pr_title}|{pr_url}]\n"
+            elif pr_url:
+                section += f"* {pr_url}\n"
+    section += "\n"
+    return section
+
+
+def _format_github_context(github_context: dict) -> str:
+    """Format the GitHub context section (commits and releases)."""
+    if not github_context:
+        return ""
+
+    repos = github_context.get("repositories", {})
+    if not repos:
+        return ""
+
+    section = "h3. GitHub Context\n"
+    for repo_name, repo_data in repos.items():
+        commits = repo_data.get("commits", {})
+        if commits.get("count", 0) > 0:
+            section += f"h4. {repo_name} - Commits ({commits['count']})\n"
+            for commit in commits.get("items", [])[:10]:
+                msg = commit.get("message", "").split("\n")[0][:80]
+                url = commit.get("html_url", "")
+                date = commit.get("commit_timestamp", "")
+                author = commit.get("commit_author", {}).get("email", "")
+                if url:
+                    section += f"* [{msg}|{url}] - {author} - {date}\n"
+                else:
+                    section += f"* {msg} - {author} - {date}\n"
+            if commits.get("count", 0) > 10:
+                section += f"* _... and {commits['count'] - 10} more commits_\n"
+            section += "\n"
+
+        releases = repo_data.get("releases", {})
+        if releases.get("count", 0) > 0:
+            section += f"h4. {repo_name} - Releases ({releases['count']})\n"
+            for release in releases.get("items", [])[:5]:
+                name = release.get("name", release.get("tag_name", ""))
+                url = release.get("html_url", "")
+                date = release.get("published_at", "")
+                if url:
+                    section += f"* [{name}|{url}] - {date}\n"
+                else:
+                    section += f"* {name} - {date}\n"
+            section += "\n"
+
+    return section
+
+
+def format_jira_description(regression: dict, metric_name: str, pct_change: float, build_id: str = "") -> str:
+    """
+    Format a rich JIRA description with all regression details.
+
+    Args:
+        regression: Regression data dictionary
+        metric_name: Name of the specific metric for this issue
+        pct_change: Percentage change for this metric
+        build_id: Build ID extracted from the build URL
+
+    Returns:
+        Formatted JIRA description text
+    """
+    # Build description using JIRA markup
+    desc = "h2. Performance Regression Detected by Orion\n\n"
+
+    # Basic info
+    desc += "h3. Changepoint Details\n"
+    desc += f"*Test:* {regression.get('test_name')}\n"
+    desc += f"*UUID:* {{{regression.get('uuid')}}}\n"
+    desc += f"*Version Change:* {regression.get('prev_ver')} → {regression.get('bad_ver')}\n"
+    if regression.get("timestamp"):
+        desc += f"*Timestamp:* {regression.get('timestamp')}\n"
+    if regression.get("buildUrl"):
+        desc += f"*Regressing build URL:* [View Build|{regression.get('buildUrl')}]\n"
+    if build_id:
+        desc += f"*Build ID:* {build_id}\n"
+
+    # If orion is running in Prow, add the current job build URL to the JIRA issue description
+    if os.getenv("PROW_JOB_ID") and os.getenv("JOB_NAME") and os.getenv("BUILD_ID"):
+        prow_base_url=f"https://prow.ci.openshift.org/view/gs/origin-ci-test/logs/{os.getenv('JOB_NAME')}/{os.getenv('BUILD_ID')}"
+        desc += f"*Created by job:* [{os.getenv('JOB_NAME')}|{prow_base_url}]\n"
+    desc += "\n"
+
+    # Primary metric for this issue
+    desc += "h3. Primary Regression\n"
+    desc += f"*Metric:* {metric_name}\n"
+    desc += f"*Change:* {pct_change:+.2f}%\n"
+    desc += "\n"
+
+    # All affected metrics
+    metrics_with_change = regression.get("metrics_with_change", [])
+    if len(metrics_with_change) > 1:
+        desc += "h3. All Affected Metrics\n"
+        desc += "|| Metric || Change || Value ||\n"
+        for metric in metrics_with_change:
+            labels = metric.get("labels", [])
+            label_str = f" ({', '.join(labels)})" if labels else ""
+            desc += f"| {metric.get('name')}{label_str} | {metric.get('percentage_change', 0):+.2f}% | {metric.get('value', 'N/A')} |\n"
+        desc += "\n"
+
+    # Add PR and GitHub context sections
+    desc += _format_pr_section(
+        regression.get("prs", []),
+        regression.get("prev_ver", ""),
+        regression.get("bad_ver", "")
+    )
+    desc += _format_github_context(regression.get("github_context"))
+
+    # Footer
+    desc += "----\n"
+    desc += "_This issue was automatically created by Orion regression detection._\n"
+
+    return desc
+
+
+def auto_create_jira_issues(regression_data: list, provider: AckProvider, logger) -> tuple[int, dict[str, list[str]]]:  # pylint: disable=too-many-locals
+    """
+    Automatically create JIRA issues for detected regressions.
+
+    Args:
+        regression_data: List of regression dictionaries from run()
+        provider: JIRA ACK provider to use for creation
+        logger: Logger instance
+
+    Returns:
+        Tuple of (created_count, issue_keys_by_test) where issue_keys_by_test
+        maps test_name to a list of created JIRA issue keys.
+    """
+    issue_keys_by_test: dict[str, list[str]] = {}
+    if not regression_data:
+        return 0, issue_keys_by_test
+
+    created_count = 0
+    skipped_count = 0
+
+    for regression in regression_data:
+        uuid = regression.get("uuid")
+        if not uuid:
+            logger.warning("Skipping JIRA creation: no UUID in regression data")
+            continue
+
+        # Create JIRA issue for each regressed metric
+        for metric_info in regression.get("metrics_with_change", []):
+            metric_name = metric_info.get("name")
+            if not metric_name:
+                continue
+
+            pct_change = metric_info.get("percentage_change", 0)
+
+            logger.info(
+                "Creating JIRA issue for regression: test=%s, uuid=%s, metric=%s, change=%+.2f%%",
+                regression.get("test_name"), uuid[:8], metric_name, pct_change
+            )
+
+            try:
+                # Normalize versions to short format (e.g., "4.22" from "4.22.0-ec.3")
+                bad_ver = regression.get("bad_ver")
+                prev_ver = regression.get("prev_ver")
+
+                # Extract Build ID from Build URL (once, for use in both rich and simple formats)
+                build_url = regression.get("buildUrl", "")
+                build_id = build_url.rstrip('/').split('/')[-1] if build_url else ""
+
+                issue_key = provider.create_ack(
+                    uuid=uuid,
+                    metric=metric_name,
+                    reason=format_jira_description(regression, metric_name, pct_change, build_id),
+                    version=str(bad_ver)[:4].rstrip('.') if bad_ver else None,
+                    test=regression.get("benchmark_type") or regression.get("test_name"),
+                    build_url=build_url,
+                    build_id=build_id,
+                    pct_change=f"{pct_change:+.2f}",
+                    prev_version=str(prev_ver)[:4].rstrip('.') if prev_ver else None
+                )
+
+                if issue_key:
+                    created_count += 1
+                    logger.info("✓ Created JIRA issue %s for %s / %s", issue_key, uuid[:8], metric_name)
+                    test_name = regression.get("test_name")
+                    if test_name:
+                        issue_keys_by_test.setdefault(test_name, []).append(issue_key)
+                else:
+                    skipped_count += 1
+                    logger.debug("Skipped (likely already exists): %s / %s", uuid[:8], metric_name)
+
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                logger.error("Failed to create JIRA issue for %s / %s: %s", uuid[:8], metric_name, e)
+                skipped_count += 1
+
+    if created_count > 0:
+        logger.info("📝 Created %d JIRA issue(s) for regressions", created_count)
+    if skipped_count > 0:
+        logger.debug("Skipped %d issue(s) (already exist or failed)", skipped_count)
+
+    return created_count, issue_keys_by_test
+
+
+def _attach_viz_to_jira(
+    jira_provider, issue_keys_by_test: dict[str, list[str]],
+    output_base_path: str, run_type: str, logger
+) -> None:
+    """Attach generated HTML visualization files to their corresponding JIRA issues."""
+    for test_name, keys in issue_keys_by_test.items():
+        viz_file = build_viz_output_file(output_base_path, test_name, run_type)
+        if not os.path.isfile(viz_file):
+            logger.debug("Viz file not found for %s, skipping attachment", test_name)
+            continue
+        for issue_key in keys:
+            jira_provider.attach_file(issue_key, viz_file)
+
+
+def write_results(kwargs: dict, run_results: tuple, jira_provider, logger) -> int:  # pylint: disable=too-many-locals, too-many-branches, too-many-statements
+    """
+    Report the results of a run: JIRA issues, printed and saved outputs,
+    regression summary and visualizations.
+
+    Args:
+        kwargs: CLI arguments of the run
+        run_results: (results, results_pull, analyses_by_pr) returned by run()
+        jira_provider: JIRA provider for --jira-auto-create, or None
+        logger: Logger instance
+
+    Returns:
+        Exit code of the run: 2 when a regression was found, 0 otherwise
+    """
+    results, results_pull, analyses_by_pr = run_results
+    is_pull = bool(results_pull.analyses)
+
+    # Auto-create JIRA issues for regressions if enabled
+    issue_keys_by_test = {}
+    issue_keys_by_test_pull_by_pr: dict[int, dict[str, list[str]]] = {}
+    if kwargs.get("jira_auto_create") and jira_provider:
+        formatter_for_regression = FormatterFactory.get_formatter(cnsts.JSON)
+        if results.regression_flag:
+            logger.info("Auto-creating JIRA issues for detected regressions...")
+            all_reg_data = []
+            for analysis in results.analyses:
+                all_reg_data.extend(
+                    formatter_for_regression.extract_regression_data(analysis)
+                )
+            created, issue_keys_by_test = auto_create_jira_issues(all_reg_data, jira_provider, logger)
+            if created == 0 and all_reg_data:
+                logger.warning(
+                    "No JIRA issues were created. This may be due to permissions. "
+                    "See JIRA_PERMISSIONS_TROUBLESHOOTING.md for help."
+                )
+        if is_pull and results_pull.regression_flag:
+            logger.info("Auto-creating JIRA issues for pull request regressions...")
+            for pr_num, pr_analyses in analyses_by_pr.items():
+                pr_reg_data = []
+                for analysis in pr_analyses:
+                    if analysis.regression_flag:
+                        pr_reg_data.extend(
+                            formatter_for_regression.extract_regression_data(analysis)
+                        )
+                if not pr_reg_data:
+                    continue
+                created, issue_keys = auto_create_jira_issues(pr_reg_data, jira_provider, logger)
+                if created == 0 and pr_reg_data:
+                    logger.warning(
+                        "No JIRA issues were created for PR %s. This may be due to permissions. "
+                        "See JIRA_PERMISSIONS_TROUBLESHOOTING.md for help.",
+                        pr_num,
+                    )
+                issue_keys_by_test_pull_by_pr[pr_num] = issue_keys
+
+    formatter = FormatterFactory.get_formatter(kwargs["output_format"])
+    has_regression = False
+    all_regression_data = []
+
+    if not results.analyses:
+        logger.error("Terminating test")
+        return 0
+
+    if is_pull:
+        for analysis in results.analyses:
+            test_name = analysis.test_name
+            pulls = []
+            for pr_num in results_pull.prs:
+                pr_analyses = analyses_by_pr.get(pr_num, [])
+                pull_analysis = next(
+                    (a for a in pr_analyses if a.test_name == test_name),
+                    None,
+                )
+                pulls.append((pr_num, pull_analysis))
+            formatter.print_and_save_pr(
+                analysis,
+                pulls,
+                kwargs["save_output_path"],
+            )
+
+            if analysis.regression_flag:
+                has_regression = True
+                regression_data = formatter.extract_regression_data(
+                    analysis
+                )
+                all_regression_data.extend(regression_data)
+    else:
+        for analysis in results.analyses:
+            formatted = formatter.format(analysis)
+            formatter.save(
+                analysis.test_name,
+                formatted[analysis.test_name],
+                kwargs["save_output_path"],
+            )
+            formatter.print_output(
+                analysis.test_name,
+                formatted[analysis.test_name],
+                analysis,
+            )
+
+            if analysis.regression_flag:
+                has_regression = True
+                regression_data = formatter.extract_regression_data(
+                    analysis
+                )
+                all_regression_data.extend(regression_data)
+
+    # Prow CI: always save JSON regardless of output format
+    prow_job_id = os.getenv("PROW_JOB_ID")
+    if (
+        prow_job_id
+        and prow_job_id.strip()
+        and kwargs["output_format"] != cnsts.JSON
+    ):
+        json_formatter = FormatterFactory.get_formatter(cnsts.JSON)
+        for analysis in results.analyses:
+            json_formatted = json_formatter.format(analysis)
+            json_formatter.save(
+                analysis.test_name,
+                json_formatted[analysis.test_name],
+                kwargs["save_output_path"],
+            )
+
+    if kwargs["output_format"] != cnsts.JSON:
+        if has_regression:
+            print_regression_summary(all_regression_data)
+        else:
+            print("No regressions found")
+
+    if kwargs.get("viz"):
+        try:
+            from orion.visualization import generate_test_html  # pylint: disable=import-outside-toplevel
+            output_base_path = str(Path(kwargs['save_output_path']).with_suffix(''))
+            for viz_data in results.viz_data:
+                run_type = "periodic" if is_pull else ""
+                output_file = build_viz_output_file(
+                    output_base_path, viz_data.test_name, run_type
+                )
+                generate_test_html(viz_data, output_file)
+            if is_pull:
+                for pr_num, viz_data in results_pull.viz_data:
+                    output_file = build_viz_output_file(
+                        output_base_path, viz_data.test_name, f"pull_{pr_num}"
+                    )
+                    generate_test_html(viz_data, output_file)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning("Visualization generation failed: %s", e)
+
+    # Attach HTML visualizations to JIRA issues
+    if kwargs.get("viz") and kwargs.get("jira_auto_create") and jira_provider:
+        try:
+            output_base_path = str(Path(kwargs['save_output_path']).with_suffix(''))
+            _attach_viz_to_jira(jira_provider, issue_keys_by_test, output_base_path,
+                                "periodic" if is_pull else "", logger)
+            for pr_num in kwargs.get("pull_numbers", []):
+                issue_keys_for_pr = issue_keys_by_test_pull_by_pr.get(pr_num, {})
+                _attach_viz_to_jira(jira_provider, issue_keys_for_pr, output_base_path,
+                                    f"pull_{pr_num}", logger)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning("JIRA attachment failed: %s", e)
+
+    return 2 if has_regression else 0
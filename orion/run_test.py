@@ -13,6 +13,10 @@ from orion.utils import Utils, get_subtracted_timestamp
 from orion.github_client import GitHubClient
 from orion.visualization import VizData
 from orion.pipeline.analysis_result import AnalysisResult
+from orion.snapshot import load_snapshot
+from orion.baseline_cache import BaselineCache
+from orion.fetch_coordinator import FetchCoordinator
+from orion import consensus
 
 
 class TestResults(NamedTuple):
@@ -35,10 +39,14 @@ def get_algorithm_type(kwargs):
     """
     if kwargs["hunter_analyze"]:
         algorithm_name = cnsts.EDIVISIVE
+    elif kwargs.get("hunter_fast"):
+        algorithm_name = cnsts.EDIVISIVE_FAST
     elif kwargs["anomaly_detection"]:
         algorithm_name = cnsts.ISOLATION_FOREST
     elif kwargs['cmr']:
         algorithm_name = cnsts.CMR
+    elif kwargs.get("cusum"):
+        algorithm_name = cnsts.CUSUM
     else:
         algorithm_name = None
     return algorithm_name
@@ -63,6 +71,11 @@ def run(**kwargs: dict[str, Any]) -> Tuple[
     regression_flag_pull = False
     all_viz_data = []
     all_viz_data_pull = []
+    baseline_cache = None
+    if pr_analysis and kwargs.get("baseline_cache"):
+        baseline_cache = BaselineCache(
+            kwargs["baseline_cache"], kwargs.get("baseline_cache_max_age", 6)
+        )
 
     for test in config["tests"]:
         if "metadata" in test:
@@ -81,9 +94,25 @@ def run(**kwargs: dict[str, Any]) -> Tuple[
                     test_periodic["metadata"]["pullNumber"] = 0
                     test_periodic["metadata"]["organization"] = ""
                     test_periodic["metadata"]["repository"] = ""
-                    future_periodic = executor.submit(
-                        analyze, test_periodic, kwargs, False
+                    cached_periodic = None
+                    if baseline_cache is not None:
+                        baseline_key = BaselineCache.key(test_periodic, kwargs)
+                        cached_periodic = baseline_cache.get(baseline_key)
+                    participants = len(prs_to_analyze) + (
+                        1 if cached_periodic is None else 0
                     )
+                    coordinator = None
+                    if participants > 1:
+                        coordinator = FetchCoordinator(
+                            participants, test["uuid_field"],
+                            planner=kwargs.get("_query_planner"),
+                        )
+                    future_periodic = None
+                    if cached_periodic is None:
+                        future_periodic = executor.submit(
+                            analyze_participant, test_periodic, kwargs,
+                            False, coordinator,
+                        )
 
                     pull_futures = {}
                     for pr_num in prs_to_analyze:
@@ -94,17 +123,30 @@ def run(**kwargs: dict[str, Any]) -> Tuple[
                         test_pull["metadata"]["jobType"] = "pull"
                         test_pull["metadata"]["pullNumber"] = pr_num
                         pull_futures[pr_num] = executor.submit(
-                            analyze, test_pull, kwargs, True
+                            analyze_participant, test_pull, kwargs,
+                            True, coordinator,
                         )
 
-                    all_futures = [future_periodic] + list(
-                        pull_futures.values()
-                    )
+                    all_futures = list(pull_futures.values())
+                    if future_periodic is not None:
+                        all_futures.append(future_periodic)
                     concurrent.futures.wait(all_futures)
 
-                    periodic_analysis, periodic_viz = (
-                        future_periodic.result()
-                    )
+                    if cached_periodic is not None:
+                        periodic_analysis, periodic_viz = cached_periodic
+                        save_cached_data(test_periodic, kwargs, periodic_analysis)
+                    else:
+                        periodic_analysis, periodic_viz = (
+                            future_periodic.result()
+                        )
+                        if (
+                            baseline_cache is not None
+                            and periodic_analysis is not None
+                        ):
+                            baseline_cache.put(
+                                baseline_key,
+                                (periodic_analysis, periodic_viz),
+                            )
                     if periodic_analysis is not None:
                         analyses.append(periodic_analysis)
                         if periodic_analysis.regression_flag:
@@ -171,8 +213,10 @@ def get_start_timestamp(kwargs: Dict[str, Any], test: Dict[str, Any], is_pull: b
         if kwargs.get("lookback"):
             return get_subtracted_timestamp(kwargs["lookback"], kwargs["since"])
         return ""
+    # --record and --replay pin the time the lookback is computed from
     return (
-        get_subtracted_timestamp(kwargs["lookback"]) if kwargs.get("lookback") else ""
+        get_subtracted_timestamp(kwargs["lookback"], kwargs.get("_reference_time"))
+        if kwargs.get("lookback") else ""
     )
 
 def has_early_changepoint_raw(
@@ -198,34 +242,74 @@ def clear_early_changepoints_raw(
     return cleaned
 
 
-def analyze(test, kwargs, is_pull=False):
+def save_cached_data(test, kwargs, analysis):
+    """Write the data of a cached periodic analysis to --save-data-path.
+
+    A cache hit fetches nothing, so the CSV process_test would have written
+    is written from the cached analysis instead.
+    """
+    if kwargs.get("from_snapshot") or not kwargs.get("save_data_path"):
+        return
+    output_file_path = f"{kwargs['save_data_path'].split('.')[0]}-{test['name']}.csv"
+    analysis.dataframe.to_csv(output_file_path)
+
+
+def analyze_participant(test, kwargs, is_pull, coordinator):
+    """Run analyze() as one of the threads sharing a FetchCoordinator.
+
+    Leaves the coordinator once done, so other threads stop waiting for it.
+    """
+    if coordinator is None:
+        return analyze(test, kwargs, is_pull)
+    try:
+        return analyze(test, kwargs, is_pull, coordinator)
+    finally:
+        coordinator.leave()
+
+
+def analyze(test, kwargs, is_pull=False, coordinator=None):
     """Analyze a test and return raw results without formatting.
 
+    Args:
+        coordinator (FetchCoordinator, optional): shared with the other
+            analyses of the same test to coalesce metric queries.
+
     Returns:
         Tuple[Optional[AnalysisResult], Optional[VizData]]:
             (None, None) for PR paths with no data.
             Calls sys.exit(3) for non-PR paths with no data.
     """
-    matcher = Matcher(
-        index=kwargs["metadata_index"] or test["metadata_index"],
-        es_server=kwargs["es_server"],
-        verify_certs=False,
-        version_field=test["version_field"],
-        uuid_field=test["uuid_field"],
-    )
-    utils = Utils(test["uuid_field"], test["version_field"])
     logger = SingletonLogger.get_logger("Orion")
-    start_timestamp = get_start_timestamp(kwargs, test, is_pull)
-    fingerprint_matched_df, metrics_config = utils.process_test(
-        test, matcher, kwargs, start_timestamp
-    )
+    from_snapshot = kwargs.get("from_snapshot")
+    if from_snapshot:
+        matcher = None
+        utils = None
+        fingerprint_matched_df, metrics_config = load_snapshot(
+            from_snapshot, test
+        )
+    else:
+        matcher = Matcher(
+            index=kwargs["metadata_index"] or test["metadata_index"],
+            es_server=kwargs["es_server"],
+            verify_certs=False,
+            version_field=test["version_field"],
+            uuid_field=test["uuid_field"],
+            es=kwargs.get("_es_client"),
+        )
+        utils = Utils(test["uuid_field"], test["version_field"])
+        utils.coordinator = coordinator if coordinator is not None else kwargs.get("_query_planner")
+        start_timestamp = get_start_timestamp(kwargs, test, is_pull)
+        fingerprint_matched_df, metrics_config = utils.process_test(
+            test, matcher, kwargs, start_timestamp
+        )
 
     if fingerprint_matched_df is None:
         if is_pull:
             return None, None
         sys.exit(3)
 
-    metrics = list(metrics_config.keys())
+    if kwargs.get("algorithms"):
+        return analyze_consensus(test, kwargs, fingerprint_matched_df, metrics_config)
 
     algorithm_name = get_algorithm_type(kwargs)
     if algorithm_name is None:
@@ -234,6 +318,7 @@ def analyze(test, kwargs, is_pull=False):
 
     logger.info("Comparison algorithm: %s", algorithm_name)
 
+    raw_df = fingerprint_matched_df
     if algorithm_name == cnsts.ISOLATION_FOREST:
         fingerprint_matched_df = fingerprint_matched_df.dropna().reset_index()
 
@@ -251,7 +336,23 @@ def analyze(test, kwargs, is_pull=False):
     final_algorithm = algorithm
     expanded_algorithm = None
 
-    if regression_flag and algorithm_name != cnsts.CMR and has_early_changepoint_raw(
+    if (
+        from_snapshot
+        and regression_flag
+        and algorithm_name not in (cnsts.CMR, cnsts.CUSUM)
+        and has_early_changepoint_raw(change_points_by_metric, max_early_index=cnsts.CHANGEPOINT_BUFFER)
+    ):
+        logger.info(
+            "Changepoint in buffer (first %d points): window expansion is not "
+            "available from a snapshot; skipping early changepoint (test=%s)",
+            cnsts.CHANGEPOINT_BUFFER,
+            test["name"],
+        )
+        change_points_by_metric = clear_early_changepoints_raw(
+            change_points_by_metric, cnsts.CHANGEPOINT_BUFFER
+        )
+        regression_flag = any(change_points_by_metric.values())
+    elif regression_flag and algorithm_name not in (cnsts.CMR, cnsts.CUSUM) and has_early_changepoint_raw(
         change_points_by_metric, max_early_index=cnsts.CHANGEPOINT_BUFFER
     ):
         logger.info(
@@ -260,26 +361,26 @@ def analyze(test, kwargs, is_pull=False):
             cnsts.CHANGEPOINT_BUFFER,
             test["name"],
         )
-        expanded_kwargs = copy.deepcopy(kwargs)
+        expanded_kwargs = copy.copy(kwargs)
         expanded_kwargs["lookback"] = ""
         if not is_pull:
             expanded_kwargs["_unbounded_lookback"] = True
-        current_points = len(fingerprint_matched_df)
-        required_lookback_size = current_points + cnsts.EXPAND_POINTS
-        expanded_kwargs["lookback_size"] = required_lookback_size
+        current_points = len(raw_df)
         logger.info(
-            "Window expansion: unbounded lookback, lookback_size -> %d",
-            required_lookback_size,
+            "Window expansion: fetching up to %d runs older than the current window",
+            cnsts.EXPAND_POINTS,
         )
 
         expanded_start_timestamp = get_start_timestamp(
             expanded_kwargs, test, is_pull
         )
-        matcher.index = expanded_kwargs.get("metadata_index") or test.get(
-            "metadata_index"
-        )
-        expanded_fingerprint_matched_df, _ = utils.process_test(
-            test, matcher, expanded_kwargs, expanded_start_timestamp
+        expanded_fingerprint_matched_df = utils.expand_window(
+            test,
+            matcher,
+            expanded_kwargs,
+            raw_df,
+            expanded_start_timestamp,
+            cnsts.EXPAND_POINTS,
         )
 
         expanded_points = (
@@ -290,7 +391,7 @@ def analyze(test, kwargs, is_pull=False):
 
         if (
             expanded_fingerprint_matched_df is not None
-            and expanded_points > len(fingerprint_matched_df)
+            and expanded_points > current_points
         ):
             if algorithm_name == cnsts.ISOLATION_FOREST:
                 expanded_fingerprint_matched_df = (
@@ -363,7 +464,23 @@ def analyze(test, kwargs, is_pull=False):
             acked_entries=acked_entries,
         )
 
-    series = final_algorithm.setup_series()
+    analysis_result = build_analysis_result(
+        test, kwargs, final_algorithm, metrics_config,
+        change_points_by_metric, regression_flag,
+    )
+    return analysis_result, viz_data
+
+
+def build_analysis_result(
+    test, kwargs, algorithm, metrics_config, change_points_by_metric,
+    regression_flag, change_points_by_algorithm=None,
+):
+    """Wrap the changepoints of an analyzed algorithm into an AnalysisResult.
+
+    The average values are taken over the runs before the first changepoint.
+    """
+    metrics = list(metrics_config.keys())
+    series = algorithm.setup_series()
 
     min_cp_index = None
     for cps in change_points_by_metric.values():
@@ -372,14 +489,14 @@ def analyze(test, kwargs, is_pull=False):
                 min_cp_index = cp.index
 
     if min_cp_index is not None and min_cp_index > 0:
-        avg_values = final_algorithm.dataframe[metrics].iloc[:min_cp_index].mean()
+        avg_values = algorithm.dataframe[metrics].iloc[:min_cp_index].mean()
     else:
-        avg_values = final_algorithm.dataframe[metrics].mean()
+        avg_values = algorithm.dataframe[metrics].mean()
 
-    analysis_result = AnalysisResult(
+    return AnalysisResult(
         test_name=test["name"],
         test=test,
-        dataframe=final_algorithm.dataframe.copy(),
+        dataframe=algorithm.dataframe.copy(),
         metrics_config=metrics_config,
         change_points_by_metric=change_points_by_metric,
         series=series,
@@ -392,5 +509,61 @@ def analyze(test, kwargs, is_pull=False):
         version_field=test["version_field"],
         sippy_pr_search=kwargs.get("sippy_pr_search", False),
         github_repos=kwargs.get("github_repos", []),
+        change_points_by_algorithm=change_points_by_algorithm or {},
+    )
+
+
+def analyze_consensus(test, kwargs, dataframe, metrics_config):
+    """Run every --algorithms algorithm on the fetched data of a test.
+
+    Returns:
+        Tuple[AnalysisResult, Optional[VizData]]: the result holds the
+            changepoints of every algorithm and their consensus.
+    """
+    logger = SingletonLogger.get_logger("Orion")
+    names = consensus.parse_algorithms(kwargs["algorithms"])
+    votes = consensus.required_votes(len(names), kwargs.get("consensus_min"))
+    logger.info(
+        "Comparison algorithms: %s (consensus of %d)", ", ".join(names), votes
+    )
+    dataframe = consensus.numeric_timestamps(dataframe.copy())
+    algorithms = consensus.run_algorithms(
+        names, dataframe, test, kwargs, metrics_config
+    )
+    change_points_by_algorithm = {
+        name: consensus.align_change_points(algorithm, dataframe, test["uuid_field"])
+        for name, algorithm in algorithms.items()
+    }
+    for name, change_points in change_points_by_algorithm.items():
+        logger.info(
+            "%s found %d changepoints (test=%s)",
+            name, sum(len(cps) for cps in change_points.values()), test["name"],
+        )
+    tolerance = kwargs.get("consensus_tolerance")
+    change_points_by_metric = consensus.consensus_change_points(
+        change_points_by_algorithm, list(metrics_config.keys()), votes,
+        cnsts.CONSENSUS_TOLERANCE if tolerance is None else tolerance,
+    )
+    regression_flag = any(change_points_by_metric.values())
+
+    # Any algorithm that keeps the whole frame can describe the shared runs
+    shared = AlgorithmFactory().instantiate_algorithm(
+        cnsts.EDIVISIVE, dataframe, test, kwargs, metrics_config
+    )
+    viz_data = None
+    if kwargs.get("viz"):
+        ack_map = kwargs.get("ackMap")
+        viz_data = VizData(
+            test_name=test["name"],
+            dataframe=dataframe.copy(),
+            metrics_config=metrics_config,
+            change_points_by_metric=change_points_by_metric,
+            uuid_field=test["uuid_field"],
+            version_field=test["version_field"],
+            acked_entries=ack_map.get("ack", []) if ack_map is not None else [],
+        )
+    analysis_result = build_analysis_result(
+        test, kwargs, shared, metrics_config, change_points_by_metric,
+        regression_flag, change_points_by_algorithm,
     )
     return analysis_result, viz_data
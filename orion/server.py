@@ -0,0 +1,467 @@
+"""
+Module for running Orion as a long-running service.
+
+With --serve, Orion listens for analysis jobs over HTTP instead of running
+one config and exiting. Jobs run on a background worker pool that keeps its
+OpenSearch clients, ACK index, compiled configs and fetched metric rows warm
+between jobs, and their results are the JSON that --output-format json
+prints.
+
+Endpoints:
+    GET  /health        service status and version
+    POST /jobs          submit {"config": path or "config_content": text,
+                        "options": {CLI option: value}}, returns the job id;
+                        config paths are only accepted inside the
+                        --serve-config-dir directory
+    GET  /jobs          status of every kept job
+    GET  /jobs/<id>     status and result of a job; ?wait=N blocks up to N
+                        seconds for it to finish
+"""
+
+import concurrent.futures
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid as uuid_lib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+import click
+
+import orion.constants as cnsts
+from orion.ack_providers import AckIndex
+from orion.ack_providers.factory import extract_version_and_test, get_ack_providers
+from orion.config import load_config, prepare_run
+from orion.logger import SingletonLogger
+from orion.matcher import Matcher
+from orion.pipeline.formatters import FormatterFactory
+from orion.query_planner import QueryPlanner
+from orion.run_test import run
+from version import __version__
+
+# Options of the service itself, which a --serve job cannot override. The API
+# is unauthenticated, so this includes every option naming a file or
+# directory to read, write or unpickle, and the ES/OS server to query.
+SERVE_FIXED_OPTIONS = frozenset({
+    "serve", "serve_host", "serve_port", "serve_workers", "serve_config_dir",
+    "explain", "watch", "watch_interval", "watch_state", "config", "configs",
+    "fleet_workers", "report", "interactive", "debug", "output_format", "ack",
+    "jira_ack", "jira_url", "jira_project", "jira_component", "jira_token",
+    "jira_email", "jira_auto_create", "jira_status_filter",
+    "save_data_path", "save_output_path", "anomaly_model_dir", "online_state",
+    "incremental_state", "baseline_cache", "save_snapshot", "from_snapshot",
+    "record", "replay", "es_server", "metadata_index",
+})
+ALGORITHM_OPTIONS = ("cmr", "hunter_analyze", "hunter_fast", "anomaly_detection", "cusum", "algorithms")
+
+
+@dataclass
+class Job:  # pylint: disable=too-many-instance-attributes
+    """An analysis submitted to the service
+
+    Args:
+        id (str): job identifier
+        status (str): queued, running, done or failed
+        exit_code (int): exit code a --config run would have returned
+        result (dict): test name to the JSON output of the test
+        error (str): reason of a failed job
+    """
+    id: str
+    status: str = "queued"
+    submitted: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    exit_code: Optional[int] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON view of the job"""
+        return {
+            "id": self.id,
+            "status": self.status,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+            "exit_code": self.exit_code,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class OrionService:  # pylint: disable=too-many-instance-attributes
+    """Runs analysis jobs on a worker pool with shared, warm resources
+
+    Args:
+        base_kwargs (dict): command line options of the service, the
+            defaults of every job
+        prepare (callable): turns the options of a job into run() kwargs:
+            loads the config and its ACKs and validates the options, exiting
+            like the command line on errors
+        convert (callable): converts and validates the options of a
+            request, raises ValueError on unknown or invalid ones
+        workers (int): number of jobs run concurrently
+        version (str): Orion version reported by /health
+        config_dir (str): directory the config paths of jobs must be in,
+            None to only accept config_content
+    """
+
+    def __init__(self, base_kwargs: Dict[str, Any],  # pylint: disable=too-many-arguments
+                 prepare: Callable[[Dict[str, Any]], Dict[str, Any]],
+                 convert: Callable[[Dict[str, Any]], Dict[str, Any]],
+                 workers: int = 4, version: str = "", config_dir: Optional[str] = None):
+        self.base_kwargs = base_kwargs
+        self.version = version
+        self.config_dir = os.path.realpath(config_dir) if config_dir else None
+        self.prepare = prepare
+        self.convert = convert
+        self.logger = SingletonLogger.get_logger("Orion")
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers))
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._clients = {}
+        self._planner = None
+        self._planner_created = 0.0
+
+    def submit(self, request: Dict[str, Any]) -> Job:
+        """Queue a job
+
+        Args:
+            request (dict): {"config": path} or {"config_content": text},
+                plus optional "options"
+
+        Raises:
+            ValueError: on a malformed request, invalid options or a config
+                path outside the config directory
+
+        Returns:
+            Job: the queued job
+        """
+        if not isinstance(request, dict):
+            raise ValueError("request body must be a JSON object")
+        options = request.get("options") or {}
+        if not isinstance(options, dict):
+            raise ValueError("options must be a JSON object")
+        kwargs = dict(self.base_kwargs)
+        kwargs.update(self.convert(options))
+        if request.get("config_content") is not None:
+            kwargs["config_content"] = str(request["config_content"])
+        elif request.get("config"):
+            kwargs["config"] = self._config_path(str(request["config"]))
+        else:
+            raise ValueError("config or config_content is required")
+        kwargs["output_format"] = cnsts.JSON
+
+        job = Job(id=uuid_lib.uuid4().hex)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+        self._executor.submit(self._run, job, kwargs)
+        self.logger.info("Queued job %s", job.id)
+        return job
+
+    def _config_path(self, config: str) -> str:
+        """Resolve a config path of a request inside the config directory.
+
+        The API is unauthenticated, so a job may not name any other file of
+        the host: symbolic links are resolved before the path is checked.
+        """
+        if self.config_dir is None:
+            raise ValueError("config paths are not accepted by this service, send config_content "
+                             "or start it with --serve-config-dir")
+        path = os.path.realpath(os.path.join(self.config_dir, config))
+        if os.path.commonpath([self.config_dir, path]) != self.config_dir:
+            raise ValueError(f"config {config} is outside the config directory of the service")
+        return path
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Job with the given id, None when unknown or evicted"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> list:
+        """Status of every kept job, oldest first"""
+        with self._lock:
+            return [{"id": job.id, "status": job.status} for job in self._jobs.values()]
+
+    def shutdown(self) -> None:
+        """Wait for the running jobs and stop the worker pool"""
+        self._executor.shutdown(wait=True)
+
+    def _evict(self) -> None:
+        """Drop the oldest finished jobs beyond SERVE_MAX_JOBS."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.done.is_set()]
+        for job_id in finished[:max(0, len(self._jobs) - cnsts.SERVE_MAX_JOBS)]:
+            del self._jobs[job_id]
+
+    def _client(self, es_server: str):
+        with self._lock:
+            if es_server not in self._clients:
+                self._clients[es_server] = Matcher.create_client(
+                    es_server, verify_certs=False,
+                    pool_maxsize=max(5, self._executor._max_workers),  # pylint: disable=protected-access
+                    record=self.base_kwargs.get("record"), replay=self.base_kwargs.get("replay"),
+                )
+            return self._clients[es_server]
+
+    def _query_planner(self) -> QueryPlanner:
+        with self._lock:
+            now = time.monotonic()
+            if self._planner is None or now - self._planner_created > cnsts.METRIC_ROWS_TTL:
+                if self._planner is not None:
+                    self._planner.log_summary()
+                self._planner = QueryPlanner()
+                self._planner_created = now
+            return self._planner
+
+    def _run(self, job: Job, kwargs: Dict[str, Any]) -> None:
+        job.status = "running"
+        job.started = time.time()
+        content_path = None
+        try:
+            if "config_content" in kwargs:
+                fd, content_path = tempfile.mkstemp(suffix=".yaml")
+                with os.fdopen(fd, "w", encoding="utf-8") as config_file:
+                    config_file.write(kwargs.pop("config_content"))
+                kwargs["config"] = content_path
+            kwargs = self.prepare(kwargs)
+            if not kwargs.get("from_snapshot"):
+                kwargs["_es_client"] = self._client(kwargs["es_server"])
+                kwargs["_query_planner"] = self._query_planner()
+            results, results_pull, analyses_by_pr = run(**kwargs)
+            job.result = format_results(results, results_pull, analyses_by_pr)
+            job.exit_code = 2 if results.regression_flag or results_pull.regression_flag else 0
+            job.status = "done"
+        except SystemExit as e:
+            # The command line would have exited: no data (3) or invalid input (1)
+            job.exit_code = e.code if isinstance(e.code, int) else 1
+            job.result = {}
+            job.status = "done" if job.exit_code in (0, 3) else "failed"
+            if job.status == "failed":
+                job.error = "the analysis exited, see the service log"
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            self.logger.error("Job %s failed", job.id, exc_info=e)
+            job.exit_code = 1
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            if content_path is not None:
+                os.remove(content_path)
+            job.finished = time.time()
+            job.done.set()
+            self.logger.info("Job %s %s (exit code %s)", job.id, job.status, job.exit_code)
+
+
+def format_results(results, results_pull, analyses_by_pr) -> Dict[str, Any]:
+    """JSON output of a run, per test, as --output-format json prints it
+
+    Args:
+        results (TestResults): periodic results
+        results_pull (TestResults): pull request results
+        analyses_by_pr (dict): PR number to its analyses
+
+    Returns:
+        dict: test name to its rows, or to the combined periodic and pull
+        output in --pr-analysis runs
+    """
+    formatter = FormatterFactory.get_formatter(cnsts.JSON)
+    output = {}
+    for analysis in results.analyses:
+        if results_pull.analyses:
+            pulls = [
+                (pr_num, next((a for a in analyses_by_pr.get(pr_num, [])
+                               if a.test_name == analysis.test_name), None))
+                for pr_num in results_pull.prs
+            ]
+            output[analysis.test_name] = formatter.format_pr(analysis, pulls)
+        else:
+            output[analysis.test_name] = json.loads(formatter.format(analysis)[analysis.test_name])
+    return output
+
+
+def _handler(service: OrionService):
+    """Request handler class bound to a service."""
+
+    class Handler(BaseHTTPRequestHandler):
+        """HTTP/JSON API of the service"""
+
+        def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+            service.logger.debug("%s - %s", self.address_string(), format % args)
+
+        def _send(self, status: int, body: Any) -> None:
+            payload = json.dumps(body, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):  # pylint: disable=invalid-name
+            """Health, job list and job status"""
+            url = urlparse(self.path)
+            parts = [part for part in url.path.split("/") if part]
+            if parts == ["health"]:
+                self._send(200, {"status": "ok", "version": service.version})
+            elif parts == ["jobs"]:
+                self._send(200, service.jobs())
+            elif len(parts) == 2 and parts[0] == "jobs":
+                job = service.get(parts[1])
+                if job is None:
+                    self._send(404, {"error": f"unknown job {parts[1]}"})
+                    return
+                wait = parse_qs(url.query).get("wait")
+                if wait:
+                    try:
+                        job.done.wait(min(float(wait[0]), 3600.0))
+                    except ValueError:
+                        self._send(400, {"error": "wait must be a number of seconds"})
+                        return
+                self._send(200, job.to_dict())
+            else:
+                self._send(404, {"error": f"unknown path {url.path}"})
+
+        def do_POST(self):  # pylint: disable=invalid-name
+            """Job submission"""
+            if urlparse(self.path).path.rstrip("/") != "/jobs":
+                self._send(404, {"error": f"unknown path {self.path}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                request = json.loads(self.rfile.read(length) or b"{}")
+                job = service.submit(request)
+            except (ValueError, json.JSONDecodeError) as e:
+                self._send(400, {"error": str(e)})
+                return
+            self._send(202, {"id": job.id, "status": job.status})
+
+    return Handler
+
+
+def create_server(service: OrionService, host: str, port: int) -> ThreadingHTTPServer:
+    """HTTP server of a service, not yet serving
+
+    Args:
+        service (OrionService): service handling the jobs
+        host (str): address to listen on
+        port (int): port to listen on, 0 picks a free one
+
+    Returns:
+        ThreadingHTTPServer: call serve_forever() to handle requests
+    """
+    return ThreadingHTTPServer((host, port), _handler(service))
+
+
+def convert_options(options: dict, defaults: dict, command: click.Command) -> dict:
+    """Convert the options of a job as the command line would
+
+    Args:
+        options (dict): option name (e.g. "hunter-analyze" or
+            "hunter_analyze") to its value, as JSON
+        defaults (dict): command line options of the service
+        command (click.Command): the orion command, whose options a job may set
+
+    Raises:
+        ValueError: on an unknown, fixed or invalid option
+
+    Returns:
+        dict: the converted options, overriding the defaults
+    """
+    params = {param.name: param for param in command.params}
+    names = {}
+    for key in options:
+        name = key.lstrip("-").replace("-", "_")
+        if name not in params or name in SERVE_FIXED_OPTIONS:
+            raise ValueError(f"option {key} cannot be set on a job")
+        names[name] = options[key]
+
+    ctx = click.Context(command)
+    ctx.params = dict(defaults)
+    converted = {}
+    # Flags first, the callbacks of other options check them
+    for name in sorted(names, key=lambda n: not params[n].is_flag):
+        value = names[name]
+        if params[name].multiple and not isinstance(value, list):
+            value = [value]
+        try:
+            converted[name] = params[name].process_value(ctx, value)
+        except (click.ClickException, json.JSONDecodeError) as e:
+            raise ValueError(f"invalid {name}: {e}") from e
+        ctx.params[name] = converted[name]
+
+    chosen = [name for name in ALGORITHM_OPTIONS if converted.get(name)]
+    if len(chosen) > 1:
+        raise ValueError(f"options {', '.join(chosen)} are mutually exclusive")
+    if chosen:
+        # The algorithm of the job replaces the one of the service
+        for name in ALGORITHM_OPTIONS:
+            converted.setdefault(name, [] if name == "algorithms" else False)
+    return converted
+
+
+def prepare_job(kwargs: dict, ack_index: AckIndex, logger) -> dict:
+    """Load the config and ACKs of a job and validate its options
+
+    Exits like a --config run on invalid input.
+
+    Args:
+        kwargs (dict): options of the job
+        ack_index (AckIndex): ACK maps shared by the jobs
+        logger (SingletonLogger): logger instance
+
+    Returns:
+        dict: the run() kwargs of the job
+    """
+    kwargs["input_vars"] = dict(kwargs["input_vars"])
+    kwargs["config"] = load_config(kwargs["config"], kwargs["input_vars"])
+    version, test_type = extract_version_and_test(kwargs["config"], kwargs["input_vars"])
+    kwargs["ackMap"] = ack_index.ack_map(version=version, test_type=test_type)
+    prepare_run(kwargs, logger)
+    return kwargs
+
+
+def run_service(kwargs: dict, logger, command: click.Command) -> int:
+    """Serve analysis jobs over HTTP until interrupted (--serve)
+
+    Jobs share one set of ACK providers queried once per version and test
+    type, and the OpenSearch clients, compiled configs and fetched metric
+    rows of the service.
+
+    Args:
+        kwargs (dict): command line options, the defaults of every job
+        logger (SingletonLogger): logger instance
+        command (click.Command): the orion command, converting the options
+            of the jobs
+
+    Returns:
+        int: 1 if the server could not start, else 0
+    """
+    providers, _, _ = get_ack_providers(kwargs, {}, logger)
+    ack_index = AckIndex(providers)
+    service = OrionService(
+        kwargs,
+        lambda job_kwargs: prepare_job(job_kwargs, ack_index, logger),
+        lambda options: convert_options(options, kwargs, command),
+        workers=kwargs["serve_workers"], version=__version__, config_dir=kwargs["serve_config_dir"],
+    )
+    try:
+        server = create_server(service, kwargs["serve_host"], kwargs["serve_port"])
+    except OSError as e:
+        logger.error("Could not listen on %s:%d: %s", kwargs["serve_host"], kwargs["serve_port"], e)
+        service.shutdown()
+        return 1
+    host, port = server.server_address[:2]
+    logger.info("🏹 Orion service listening on http://%s:%d", host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Stopping Orion service")
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
@@ -0,0 +1,220 @@
+"""
+Module for saving and loading per-test data snapshots.
+
+A snapshot holds the assembled dataframe and metrics_config produced by
+Utils.process_test so a later run can re-analyze the same data without
+querying OpenSearch. The metric settings (direction, threshold, ...) are
+taken from the current test definition when a snapshot is loaded, the
+saved metrics_config only tells which metric each column came from.
+"""
+
+import copy
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from orion.config import _substitute_vars
+from orion.logger import SingletonLogger
+
+SNAPSHOT_VERSION = 1
+
+
+def snapshot_run_type(test: Dict[str, Any]) -> str:
+    """Return the run type suffix used to tell pull snapshots apart.
+
+    Args:
+        test (dict): test configuration
+
+    Returns:
+        str: "pull_<number>" for pull jobs, "" otherwise
+    """
+    metadata = test.get("metadata", {})
+    pull_number = metadata.get("pullNumber", 0)
+    if metadata.get("jobType") == "pull" and pull_number:
+        return f"pull_{pull_number}"
+    return ""
+
+
+def snapshot_path(
+    snapshot_dir: str, test_name: str, run_type: str = "", extension: str = "json"
+) -> str:
+    """Build the path of the snapshot file for a test.
+
+    Args:
+        snapshot_dir (str): directory holding snapshots
+        test_name (str): name of the test
+        run_type (str): optional run type suffix
+        extension (str): file extension
+
+    Returns:
+        str: path to the snapshot file
+    """
+    suffix = f"_{run_type}" if run_type else ""
+    safe_name = re.sub(r"[^\w.-]", "_", f"{test_name}{suffix}")
+    return os.path.join(snapshot_dir, f"{safe_name}.{extension}")
+
+
+def dataframe_to_json(dataframe: pd.DataFrame) -> Dict[str, Any]:
+    """Convert a dataframe to JSON-compatible data.
+
+    Args:
+        dataframe (pd.DataFrame): dataframe to convert
+
+    Returns:
+        dict: columns, index and data of the dataframe
+    """
+    return json.loads(dataframe.to_json(orient="split"))
+
+
+def dataframe_from_json(frame: Dict[str, Any]) -> pd.DataFrame:
+    """Rebuild a dataframe converted by dataframe_to_json.
+
+    Args:
+        frame (dict): columns, index and data of the dataframe
+
+    Returns:
+        pd.DataFrame: the dataframe
+    """
+    return pd.DataFrame(
+        frame["data"], columns=frame["columns"], index=frame["index"]
+    ).infer_objects()
+
+
+def save_snapshot(
+    snapshot_dir: str,
+    test: Dict[str, Any],
+    dataframe: pd.DataFrame,
+    metrics_config: Dict[str, Any],
+) -> str:
+    """Write the assembled data of a test to the snapshot directory.
+
+    Args:
+        snapshot_dir (str): directory holding snapshots
+        test (dict): test configuration
+        dataframe (pd.DataFrame): assembled test dataframe
+        metrics_config (dict): metrics configuration
+
+    Returns:
+        str: path of the written snapshot
+    """
+    logger = SingletonLogger.get_logger("Orion")
+    os.makedirs(snapshot_dir, exist_ok=True)
+    path = snapshot_path(snapshot_dir, test["name"], snapshot_run_type(test))
+    payload = {
+        "version": SNAPSHOT_VERSION,
+        "test_name": test["name"],
+        "metrics_config": metrics_config,
+        "metadata_columns": test.get("metadata_columns", []),
+        "dataframe": dataframe_to_json(dataframe),
+    }
+    with open(path, "w", encoding="utf-8") as snapshot_file:
+        json.dump(payload, snapshot_file, default=str)
+    logger.info("Saved data snapshot for test %s to %s", test["name"], path)
+    return path
+
+
+def _find_metric(
+    metrics: List[Dict[str, Any]], saved: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """Find the current definition of a saved metric.
+
+    A metric expanded from a group_by template is matched by expanding the
+    template with the value saved for the group_by field.
+
+    Args:
+        metrics (list): metric definitions of the current test
+        saved (dict): metric saved in the snapshot
+
+    Returns:
+        dict: copy of the matching metric definition, or None
+    """
+    for metric in metrics:
+        if "group_by" not in metric:
+            if metric.get("name") == saved.get("name"):
+                return copy.deepcopy(metric)
+            continue
+        fields = metric["group_by"]
+        field = fields[0] if isinstance(fields, list) else fields
+        if field not in saved:
+            continue
+        candidate = copy.deepcopy(metric)
+        candidate.pop("group_by")
+        candidate[field] = saved[field]
+        _substitute_vars(candidate, {field: saved[field]})
+        if candidate.get("name") == saved.get("name"):
+            return candidate
+    return None
+
+
+def current_metrics_config(
+    test: Dict[str, Any], saved_config: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Rebuild the metrics_config of a snapshot from the current test definition.
+
+    Settings are normalized the way Utils.get_metric_data does it. Columns
+    whose metric is no longer configured are left out.
+
+    Args:
+        test (dict): test configuration
+        saved_config (dict): metrics_config saved in the snapshot
+
+    Returns:
+        dict: column name to metric settings
+    """
+    logger = SingletonLogger.get_logger("Orion")
+    metrics = test.get("metrics") or []
+    metrics_config = {}
+    for column, saved in saved_config.items():
+        metric = _find_metric(metrics, saved)
+        if metric is None:
+            logger.warning(
+                "Metric %s of the snapshot of test %s is no longer configured, skipping column %s",
+                saved.get("name"), test["name"], column,
+            )
+            continue
+        metric["labels"] = metric.get("labels")
+        metric["direction"] = int(metric.get("direction", 1))
+        metric["threshold"] = abs(int(metric.get("threshold", test.get("threshold", 0))))
+        metric["timestamp"] = metric.get("timestamp", test.get("timestamp", "timestamp"))
+        metric["correlation"] = metric.get("correlation", "")
+        metric["context"] = metric.get("context", 5)
+        metrics_config[column] = metric
+    return metrics_config
+
+
+def load_snapshot(
+    snapshot_dir: str, test: Dict[str, Any]
+) -> Tuple[Optional[pd.DataFrame], Optional[Dict[str, Any]]]:
+    """Load the data of a test from the snapshot directory.
+
+    Restores test["metadata_columns"] as process_test would have set it.
+    Only the data comes from the snapshot, the metric settings come from
+    the current test definition.
+
+    Args:
+        snapshot_dir (str): directory holding snapshots
+        test (dict): test configuration
+
+    Returns:
+        tuple: (dataframe, metrics_config), or (None, None) when no
+        snapshot exists for the test
+    """
+    logger = SingletonLogger.get_logger("Orion")
+    path = snapshot_path(snapshot_dir, test["name"], snapshot_run_type(test))
+    if not os.path.isfile(path):
+        logger.error("No data snapshot found for test %s at %s", test["name"], path)
+        return None, None
+    with open(path, "r", encoding="utf-8") as snapshot_file:
+        payload = json.load(snapshot_file)
+    if payload.get("version") != SNAPSHOT_VERSION:
+        logger.error(
+            "Unsupported snapshot version %s in %s", payload.get("version"), path
+        )
+        return None, None
+    dataframe = dataframe_from_json(payload["dataframe"])
+    test["metadata_columns"] = payload.get("metadata_columns", [])
+    logger.info("Loaded data snapshot for test %s from %s", test["name"], path)
+    return dataframe, current_metrics_config(test, payload["metrics_config"])
@@ -0,0 +1,93 @@
+"""
+Unit tests for orion/algorithms/algorithmFactory.py
+"""
+
+# pylint: disable = missing-function-docstring
+# pylint: disable = import-error
+
+import os
+import subprocess
+import sys
+from importlib.metadata import EntryPoint
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from orion import constants as cnsts
+from orion.algorithms import Algorithm
+from orion.algorithms.algorithmFactory import (
+    AlgorithmFactory,
+    load_algorithm,
+    registered_algorithms,
+)
+from orion.consensus import parse_algorithms
+
+
+class PluginAlgorithm(Algorithm):
+    """Algorithm registered through an entry point in the tests"""
+
+    def _analyze(self):
+        return self.setup_series(), {}
+
+
+class NotAnAlgorithm:  # pylint: disable = too-few-public-methods
+    """Entry point target that is not an Algorithm"""
+
+
+def _entry_points(**targets):
+    points = [
+        EntryPoint(name=name, value=value, group="orion.algorithms")
+        for name, value in targets.items()
+    ]
+    registered_algorithms.cache_clear()
+    return patch("orion.algorithms.algorithmFactory.entry_points", return_value=points)
+
+
+@pytest.fixture(autouse=True)
+def _clear_registry():
+    registered_algorithms.cache_clear()
+    yield
+    registered_algorithms.cache_clear()
+
+
+def test_builtin_algorithms_are_registered():
+    assert set(registered_algorithms()) >= {
+        cnsts.EDIVISIVE, cnsts.EDIVISIVE_FAST, cnsts.ISOLATION_FOREST, cnsts.CMR, cnsts.CUSUM,
+    }
+    with pytest.raises(ValueError):
+        load_algorithm("no-such-algorithm")
+
+
+def test_entry_point_algorithm_is_loaded():
+    with _entry_points(plugin=f"{__name__}:PluginAlgorithm", **{cnsts.CMR: f"{__name__}:PluginAlgorithm"}):
+        assert load_algorithm("plugin") is PluginAlgorithm
+        # built-in names cannot be taken over
+        assert load_algorithm(cnsts.CMR).__name__ == "CMR"
+        assert parse_algorithms(["plugin", "CMR"]) == ["plugin", "cmr"]
+        dataframe = pd.DataFrame({"uuid": ["u1"], "ocpVersion": ["4.19"], "timestamp": [1_700_000_000]})
+        algorithm = AlgorithmFactory().instantiate_algorithm(
+            "plugin", dataframe, {"name": "t", "uuid_field": "uuid", "version_field": "ocpVersion"}, {}, {}
+        )
+    assert isinstance(algorithm, PluginAlgorithm)
+
+
+def test_entry_point_must_be_an_algorithm():
+    with _entry_points(broken=f"{__name__}:NotAnAlgorithm"):
+        with pytest.raises(ValueError):
+            load_algorithm("broken")
+
+
+def test_algorithms_are_imported_on_demand():
+    code = (
+        "import sys\n"
+        "from orion.algorithms import AlgorithmFactory\n"
+        "assert 'sklearn' not in sys.modules\n"
+        "from orion.algorithms.algorithmFactory import load_algorithm\n"
+        "load_algorithm('cmr')\n"
+        "assert 'sklearn' not in sys.modules\n"
+        "load_algorithm('IsolationForest')\n"
+        "assert 'sklearn' in sys.modules\n"
+    )
+    repo_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=repo_root)
@@ -0,0 +1,157 @@
+"""
+Unit tests for orion/baseline_cache.py
+"""
+
+# pylint: disable = missing-function-docstring
+# pylint: disable = import-error
+
+import os
+import time
+from unittest.mock import patch
+
+import pandas as pd
+from otava.analysis import TTestStats
+from otava.series import ChangePoint, Metric, Series
+
+from orion.baseline_cache import BaselineCache
+from orion.pipeline.analysis_result import AnalysisResult
+from orion.run_test import run
+from orion.visualization import VizData
+
+
+def _make_test():
+    return {
+        "name": "pr-test",
+        "uuid_field": "uuid",
+        "version_field": "ocpVersion",
+        "metadata": {"platform": "AWS", "jobType": "pull", "pullNumber": 0},
+        "metrics": [],
+    }
+
+
+def _make_options(**overrides):
+    options = {
+        "config": {"tests": [_make_test()]},
+        "pr_analysis": True,
+        "pull_numbers": [11, 12],
+        "lookback": "15d",
+        "hunter_analyze": True,
+        "ackMap": None,
+    }
+    options.update(overrides)
+    return options
+
+
+def test_key_depends_on_relevant_options_only():
+    test = _make_test()
+    base = BaselineCache.key(test, _make_options())
+    assert base == BaselineCache.key(test, _make_options(pull_numbers=[99]))
+    assert base != BaselineCache.key(test, _make_options(lookback="30d"))
+    assert base != BaselineCache.key(test, _make_options(ackMap={"ack": [{"uuid": "u"}]}))
+    assert base != BaselineCache.key(test, _make_options(anomaly_model_dir="models"))
+    assert base != BaselineCache.key(test, _make_options(online_state="state.json"))
+    assert base == BaselineCache.key(test, _make_options(save_data_path="other.csv", _es_client=object()))
+
+    other_test = _make_test()
+    other_test["metadata"]["platform"] = "GCP"
+    assert base != BaselineCache.key(other_test, _make_options())
+
+
+def _make_analysis(test_name):
+    dataframe = pd.DataFrame({
+        "uuid": ["u1", "u2", "u3"],
+        "timestamp": [1704067200, 1704153600, 1704240000],
+        "ocpVersion": ["4.19", "4.19", "4.20"],
+        "cpu_avg": [10.0, 10.5, 20.0],
+    })
+    metrics_config = {"cpu_avg": {"name": "cpu", "metric_of_interest": "cpu", "direction": 1, "threshold": 0}}
+    change_points = {"cpu_avg": [ChangePoint(
+        index=2, qhat=0.0, time=1704240000, metric="cpu_avg",
+        stats=TTestStats(mean_1=10.25, mean_2=20.0, std_1=0.25, std_2=0.0, pvalue=0.01),
+    )]}
+    series = Series(
+        test_name=test_name, branch=None, time=list(dataframe["timestamp"]),
+        metrics={"cpu_avg": Metric(1, 1.0)}, data={"cpu_avg": dataframe["cpu_avg"]},
+        attributes={"uuid": dataframe["uuid"]},
+    )
+    analysis = AnalysisResult(
+        test_name=test_name, test={"name": test_name}, dataframe=dataframe,
+        metrics_config=metrics_config, change_points_by_metric=change_points, series=series,
+        regression_flag=True, avg_values=dataframe[["cpu_avg"]].iloc[:2].mean(), collapse=False,
+        display_fields=[], column_group_size=5, uuid_field="uuid", version_field="ocpVersion",
+        sippy_pr_search=False, github_repos=[], change_points_by_algorithm={"cmr": change_points},
+    )
+    viz_data = VizData(test_name, dataframe, metrics_config, change_points, "uuid", "ocpVersion",
+                       acked_entries=[{"uuid": "u1"}])
+    return analysis, viz_data
+
+
+def test_put_and_get(tmp_path):
+    cache = BaselineCache(str(tmp_path), max_age_hours=1)
+    assert cache.get("abc") is None
+    analysis, viz_data = _make_analysis("pr-test")
+    cache.put("abc", (analysis, viz_data))
+    assert [p for p in os.listdir(tmp_path) if p.endswith(".tmp")] == []
+
+    cached, cached_viz = cache.get("abc")
+    pd.testing.assert_frame_equal(cached.dataframe, analysis.dataframe)
+    pd.testing.assert_series_equal(cached.avg_values, analysis.avg_values)
+    assert cached.change_points_by_metric == analysis.change_points_by_metric
+    assert cached.change_points_by_algorithm == analysis.change_points_by_algorithm
+    assert cached.series.time == analysis.series.time
+    assert list(cached.series.data["cpu_avg"]) == list(analysis.series.data["cpu_avg"])
+    assert cached.series.metrics["cpu_avg"].direction == 1
+    assert (cached.test, cached.metrics_config, cached.regression_flag) == (
+        analysis.test, analysis.metrics_config, True
+    )
+    pd.testing.assert_frame_equal(cached_viz.dataframe, viz_data.dataframe)
+    assert cached_viz.acked_entries == [{"uuid": "u1"}]
+
+    cache.put("no-viz", (analysis, None))
+    assert cache.get("no-viz")[1] is None
+
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    cache = BaselineCache(str(tmp_path), max_age_hours=1)
+    with open(os.path.join(str(tmp_path), "abc.json"), "w", encoding="utf-8") as cache_file:
+        cache_file.write('{"version": 0}')
+    assert cache.get("abc") is None
+
+
+def test_stale_entry_is_ignored(tmp_path):
+    cache = BaselineCache(str(tmp_path), max_age_hours=1)
+    cache.put("abc", _make_analysis("pr-test"))
+    two_hours_ago = time.time() - 7200
+    os.utime(os.path.join(str(tmp_path), "abc.json"), (two_hours_ago, two_hours_ago))
+    assert cache.get("abc") is None
+
+
+def _fake_analyze(test, kwargs, is_pull=False, coordinator=None):  # pylint: disable = unused-argument
+    analysis, _ = _make_analysis(test["name"])
+    analysis.regression_flag = False
+    return analysis, None
+
+
+def test_run_reuses_periodic_baseline(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    options = _make_options(baseline_cache=cache_dir, baseline_cache_max_age=1)
+    with patch("orion.run_test.analyze", side_effect=_fake_analyze) as analyze_mock:
+        results, results_pull, _ = run(**options)
+    assert analyze_mock.call_count == 3
+    assert [a.test_name for a in results.analyses] == ["pr-test"]
+    assert len(results_pull.analyses) == 2
+
+    save_data_path = str(tmp_path / "data.csv")
+    options = _make_options(
+        baseline_cache=cache_dir, baseline_cache_max_age=1, pull_numbers=[13],
+        save_data_path=save_data_path,
+    )
+    with patch("orion.run_test.analyze", side_effect=_fake_analyze) as analyze_mock:
+        results, results_pull, _ = run(**options)
+    pull_flags = [call.args[2] for call in analyze_mock.call_args_list]
+    assert pull_flags == [True]
+    assert [a.test_name for a in results.analyses] == ["pr-test"]
+    assert len(results_pull.analyses) == 1
+    # the periodic data is still saved on a cache hit
+    saved = pd.read_csv(str(tmp_path / "data-pr-test.csv"), index_col=0)
+    assert list(saved["uuid"]) == ["u1", "u2", "u3"]
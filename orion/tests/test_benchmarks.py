@@ -0,0 +1,76 @@
+"""
+Unit tests for the benchmark suite in benchmarks/
+"""
+
+# pylint: disable = missing-function-docstring
+# pylint: disable = import-error
+
+import json
+from unittest.mock import patch
+
+from benchmarks.harness import MAX_REPEAT, Benchmark, Result, compare, load_results, measure, save_results
+from benchmarks.suite import Scenario, collect
+from main import main
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = {
+        "fast": Result("fast", 0.001, 0.001, 1000),
+        "slow": Result("slow", 1.1, 1.0, 10 * 2**20),
+        "gone": Result("gone", 1.0, 1.0, 0),
+    }
+    results = [
+        # doubled, but within the noise floor
+        Result("fast", 0.002, 0.002, 2000),
+        Result("slow", 1.6, 1.5, 13 * 2**20),
+        Result("new", 1.0, 1.0, 0),
+    ]
+    comparisons = {c.name: c for c in compare(results, baseline, time_tolerance=0.3, memory_tolerance=0.2)}
+    assert comparisons["fast"].regressions == []
+    assert comparisons["slow"].regressions == ["time x1.50", "memory x1.30"]
+    assert comparisons["new"].baseline is None and comparisons["gone"].current is None
+    # on a machine twice as slow as the baseline's, 1.5s is an improvement
+    scaled = {c.name: c for c in compare(results, baseline, scale=2.0)}
+    assert scaled["slow"].regressions == ["memory x1.30"]
+
+
+def test_results_round_trip(tmp_path):
+    calls = []
+    benchmark = Benchmark("stage.work", lambda values: calls.append(sum(values)), lambda: ([1, 2],))
+    assert benchmark.stage == "stage"
+    result = measure(benchmark, repeat=2, warmup=1, min_time=0)
+    assert calls == [3, 3, 3, 3]
+    # fast benchmarks are repeated until they were timed long enough, up to
+    # MAX_REPEAT times; collecting the garbage of the test process before
+    # each call is what makes them slow here
+    calls.clear()
+    with patch("benchmarks.harness.gc"):
+        measure(benchmark, repeat=2, warmup=1, min_time=1e-3)
+    assert 2 + 3 <= len(calls) <= 2 + MAX_REPEAT
+    assert result.min_seconds <= result.seconds
+
+    path = tmp_path / "results.json"
+    save_results(str(path), [result], {"runs": 3}, 0.05)
+    assert json.loads(path.read_text(encoding="utf-8"))["scenario"] == {"runs": 3}
+    assert load_results(str(path))["results"] == {"stage.work": result}
+
+
+def test_suite_covers_every_stage(tmp_path):
+    options = main.make_context("orion", ["--hunter-analyze", "--config", "x.yaml"]).params
+    options.update(ackMap=None)
+    benchmarks = collect(Scenario(runs=12, metrics=4, changepoints=1, docs_per_metric=2), options, str(tmp_path))
+    names = [benchmark.name for benchmark in benchmarks]
+    assert {name.split(".")[0] for name in names} == {"fetch", "assemble", "analyze", "format", "report"}
+    assert "analyze.EDivisiveFast" in names and "format.junit" in names
+
+    assemble = next(b for b in benchmarks if b.name == "assemble.dataframe")
+    frame, metrics_config, _ = assemble.func(*assemble.setup())
+    assert len(frame) == 12
+    assert sorted(metrics_config) == ["agg0_avg", "agg1_avg", "std0_value", "std1_value"]
+
+    analyze = next(b for b in benchmarks if b.name == "analyze.EDivisive")
+    _, change_points = analyze.func(*analyze.setup())
+    # the regression at run 6 is found in every metric
+    assert {name: [cp.index for cp in cps] for name, cps in change_points.items()} == {
+        name: [6] for name in metrics_config
+    }
@@ -0,0 +1,118 @@
+"""
+Unit tests for orion/cassette.py
+"""
+
+# pylint: disable = missing-function-docstring
+# pylint: disable = import-error
+
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from opensearchpy.exceptions import ConnectionError as OpenSearchConnectionError, NotFoundError
+
+from orion import utils
+from orion.cassette import Cassette, canonical_request, prepare_cassette, request_key
+from orion.fake_opensearch import FakeOpenSearch, generate_runs
+from orion.logger import SingletonLogger
+from orion.matcher import Matcher
+from orion.run_test import get_start_timestamp
+
+AVG_LATENCY = {
+    "name": "podReadyLatency", "metricName.keyword": "podReadyLatency",
+    "metric_of_interest": "value", "agg": {"agg_type": "avg"},
+}
+
+
+def test_request_key_ignores_json_key_order():
+    first = canonical_request("post", "/idx/_search?size=10", None, b'{"query": {"match_all": {}}, "size": 1}')
+    second = canonical_request("POST", "/idx/_search", {"size": 10}, '{"size": 1, "query": {"match_all": {}}}')
+    assert first == second
+    assert request_key(first) == request_key(second)
+    terms = canonical_request("POST", "/idx/_search", None, {"query": {"terms": {"uuid.keyword": ["b", "a"]}}})
+    assert terms["body"] == {"query": {"terms": {"uuid.keyword": ["a", "b"]}}}
+    assert request_key(first) != request_key(canonical_request("POST", "/other/_search", {"size": 10}, None))
+
+
+def test_replay_serves_the_recorded_run(tmp_path):
+    store = FakeOpenSearch()
+    metadata, metrics = generate_runs(runs=8, docs_per_metric=2, regression_at=5, seed=3)
+    store.bulk_index("perf-scale-ci", metadata, id_field="uuid")
+    store.bulk_index("ripsaw-kube-burner", metrics)
+    server = store.create_server()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    cassette = str(tmp_path / "cassette")
+
+    def analyze(client):
+        match = Matcher(index="perf-scale-ci", es=client)
+        runs = match.get_uuid_by_metadata({"benchmark.keyword": "node-density"}, lookback_size=8)
+        match.index = "ripsaw-kube-burner"
+        rows = match.get_agg_metrics_batch([run["uuid"] for run in runs], [AVG_LATENCY])
+        with pytest.raises(NotFoundError):
+            client.search(index="missing", body={})
+        return runs, rows
+
+    try:
+        recorded = analyze(Matcher.create_client(url, verify_certs=False, record=cassette))
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert os.listdir(cassette)
+    assert all(name.endswith(".json.gz") for name in os.listdir(cassette))
+
+    # the server is gone, nothing leaves the process
+    before = store.requests
+    replayed = analyze(Matcher.create_client(url, verify_certs=False, replay=cassette))
+    assert replayed == recorded
+    assert store.requests == before
+
+
+def test_replay_order_and_missing_requests(tmp_path):
+    cassette = Cassette(str(tmp_path))
+    request = canonical_request("POST", "/idx/_count", None, None)
+    cassette.record(request, 200, "application/json", '{"count": 1}')
+    cassette.record(request, 200, "application/json", '{"count": 2}')
+
+    client = Matcher.create_client("http://localhost:9200", replay=str(tmp_path))
+    # responses are served in the order they were recorded, the last one repeated
+    assert [client.count(index="idx")["count"] for _ in range(3)] == [1, 2, 2]
+    with pytest.raises(OpenSearchConnectionError, match="re-record the run with --record"):
+        client.count(index="other")
+
+
+def test_replay_keeps_the_lookback_of_the_recorded_run(tmp_path, monkeypatch):
+    store = FakeOpenSearch()
+    start = (datetime.now(timezone.utc) - timedelta(days=8)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    metadata, _ = generate_runs(runs=8, start=start, seed=3)
+    store.bulk_index("perf-scale-ci", metadata, id_field="uuid")
+    logger = SingletonLogger.get_logger("Orion")
+    test = {"name": "lookback", "metadata": {"benchmark.keyword": "node-density"}}
+
+    def runs(kwargs):
+        prepare_cassette(kwargs, logger)
+        client = Matcher.create_client(store_url, verify_certs=False,
+                                       record=kwargs.get("record"), replay=kwargs.get("replay"))
+        match = Matcher(index="perf-scale-ci", es=client)
+        return match.get_uuid_by_metadata(test["metadata"], get_start_timestamp(kwargs, test, False))
+
+    server = store.create_server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    store_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        recorded = runs({"record": str(tmp_path), "lookback": "5d", "since": None})
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert 4 <= len(recorded) <= 6
+
+    class Later(datetime):
+        """A day after the recording"""
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.now(tz) + timedelta(days=1)
+
+    monkeypatch.setattr(utils, "datetime", Later)
+    assert runs({"replay": str(tmp_path), "lookback": "5d", "since": None, "es_server": ""}) == recorded
@@ -1,6 +1,7 @@
 # pylint: disable=protected-access
 """Tests for CMR direction filtering in _analyze()."""
 
+import numpy
 import pandas as pd
 from orion.algorithms.cmr.cmr import CMR
 
@@ -107,3 +108,62 @@ def test_cmr_keeps_direction_zero():
 
     assert len(change_points.get("metric_neutral", [])) == 1, \
         "direction=0 should keep all changepoints"
+
+
+def test_cmr_compare_filters_every_run_by_direction():
+    """compare checks several runs against one averaged row and filters each by direction."""
+    baseline_runs = pd.DataFrame({
+        "uuid": ["uuid-1", "uuid-2"],
+        "ocpVersion": ["4.19", "4.19"],
+        "timestamp": [1700000000, 1700100000],
+        "buildUrl": ["http://build1", "http://build2"],
+        "metric_up": [90.0, 110.0],
+        "metric_down": [90.0, 110.0],
+    })
+    pull_runs = pd.DataFrame({
+        "uuid": ["pr-1", "pr-2"],
+        "ocpVersion": ["4.20", "4.20"],
+        "timestamp": [1700200000, 1700300000],
+        "buildUrl": ["http://pr1", "http://pr2"],
+        "metric_up": [150.0, 50.0],
+        "metric_down": [150.0, 50.0],
+    })
+    algorithm = CMR(
+        dataframe=baseline_runs,
+        test=_make_test_config(),
+        options={"ackMap": None},
+        metrics_config=_make_metrics_config(),
+    )
+
+    baseline = algorithm.average_runs(baseline_runs)
+    results = algorithm.compare(baseline, pull_runs)
+
+    assert baseline["metric_up"][0] == 100.0
+    assert baseline["uuid"][0] == "uuid-1,uuid-2"
+    assert [len(r["metric_up"]) for r in results] == [1, 0]
+    assert [len(r["metric_down"]) for r in results] == [0, 1]
+    assert results[0]["metric_up"][0].stats.mean_2 == 150.0
+    assert results[1]["metric_down"][0].stats.mean_1 == 100.0
+
+
+def test_cmr_average_runs_only_averages_float64_and_int64_values():
+    """Columns are averaged by the type of their first value, as the per-value loop did."""
+    runs = pd.DataFrame({
+        "uuid": ["uuid-1", "uuid-2"],
+        "timestamp": [1700000000, 1700100000],
+        "metric_up": [90.0, 110.0],
+        "int32": pd.array([1, 2], dtype="int32"),
+        "float32": pd.array([1.5, 2.5], dtype="float32"),
+        "passed": [True, False],
+        "mixed": pd.Series([numpy.float64(3.0), numpy.float64(5.0)], dtype=object),
+    })
+    averaged = CMR.average_runs(runs)
+
+    assert list(averaged.columns) == list(runs.columns)
+    assert averaged["timestamp"][0] == 1700050000
+    assert averaged["metric_up"][0] == 100.0
+    assert averaged["mixed"][0] == 4.0
+    assert averaged["uuid"][0] == "uuid-1,uuid-2"
+    assert averaged["int32"][0] == "1,2"
+    assert averaged["float32"][0] == "1.5,2.5"
+    assert averaged["passed"][0] == "True,False"
@@ -7,11 +7,13 @@ Unit tests for config validation in orion/config.py
 
 import tempfile
 import os
+from unittest.mock import patch
 
 import pytest
 import yaml
 
-from orion.config import load_config, collect_pull_numbers
+from orion import config as orion_config
+from orion.config import load_config, collect_pull_numbers, clear_config_cache
 
 
 def _write_config(tmp_dir, config_dict, filename="config.yaml"):
@@ -260,3 +262,70 @@ class TestCollectPullNumbers:  # pylint: disable=missing-class-docstring
     def test_rejects_negative_in_list(self):
         with pytest.raises(ValueError, match="invalid pull number"):
             collect_pull_numbers({}, {"pull_numbers": [100, -5]})
+
+
+class TestCompiledConfigCache:
+    """Tests for the process cache of compiled configs."""
+
+    @pytest.fixture(autouse=True)
+    def _clean_cache(self):
+        clear_config_cache()
+        yield
+        clear_config_cache()
+
+    @staticmethod
+    def _write_templates(tmp_dir):
+        _write_config(tmp_dir, [{"name": "podReadyLatency", "metricName": "podLatency"}],
+                      "metrics.yaml")
+        with open(os.path.join(tmp_dir, "config.yaml"), "w", encoding="utf-8") as f:
+            f.write(
+                "metricsFile: metrics.yaml\n"
+                "tests:\n"
+                "  - name: test1\n"
+                "    metadata:\n"
+                "      ocpVersion: '{{ version }}'\n"
+            )
+        return os.path.join(tmp_dir, "config.yaml")
+
+    def test_reuses_compiled_config(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = self._write_templates(tmp_dir)
+            first = load_config(path, {"version": "4.19"})
+            first["tests"][0]["metadata"]["ocpVersion"] = "changed"
+            with patch.object(orion_config, "render_template") as render:
+                second = load_config(path, {"version": "4.19"})
+            render.assert_not_called()
+            assert second["tests"][0]["metadata"]["ocpVersion"] == "4.19"
+            assert second["tests"][0]["metrics"][0]["name"] == "podReadyLatency"
+
+    def test_input_vars_and_referenced_files_invalidate(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = self._write_templates(tmp_dir)
+            load_config(path, {"version": "4.19"})
+            other = load_config(path, {"version": "4.20"})
+            assert other["tests"][0]["metadata"]["ocpVersion"] == "4.20"
+
+            metrics_path = os.path.join(tmp_dir, "metrics.yaml")
+            _write_config(tmp_dir, [{"name": "etcdCPU", "metricName": "cpu"}],
+                          "metrics.yaml")
+            stat = os.stat(metrics_path)
+            os.utime(metrics_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            reloaded = load_config(path, {"version": "4.19"})
+            assert reloaded["tests"][0]["metrics"][0]["name"] == "etcdCPU"
+            # the changed file replaces its entries instead of adding new ones
+            assert len(orion_config._COMPILED_CONFIGS) == 2  # pylint: disable=protected-access
+            assert len(orion_config._RENDERED_FILES) == 2  # pylint: disable=protected-access
+
+    def test_caches_keep_the_most_recently_used_entries(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = self._write_templates(tmp_dir)
+            with patch.object(orion_config, "_CACHE_SIZE", 2):
+                for version in ("4.18", "4.19", "4.18", "4.20"):
+                    load_config(path, {"version": version})
+                assert [key[1] for key in orion_config._COMPILED_CONFIGS] == [  # pylint: disable=protected-access
+                    orion_config._vars_digest(  # pylint: disable=protected-access
+                        {**{k.lower(): v for k, v in os.environ.items()}, "version": version}
+                    )
+                    for version in ("4.18", "4.20")
+                ]
+                assert len(orion_config._RENDERED_FILES) == 2  # pylint: disable=protected-access
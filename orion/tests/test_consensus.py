@@ -0,0 +1,143 @@
+"""
+Unit tests for orion/consensus.py
+"""
+
+# pylint: disable = missing-function-docstring
+# pylint: disable = import-error
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from otava.analysis import TTestStats
+from otava.series import ChangePoint
+
+from orion.consensus import consensus_change_points, parse_algorithms, required_votes
+from orion.pipeline.formatters.json_formatter import JsonFormatter
+from orion.run_test import analyze
+from orion.snapshot import save_snapshot
+
+TEST = {
+    "name": "consensus-test",
+    "uuid_field": "uuid",
+    "version_field": "ocpVersion",
+    "metadata": {"jobType": "periodic"},
+    "metrics": [
+        {"name": metric, "metric_of_interest": metric, "direction": 0}
+        for metric in ("cpu_avg", "mem_avg")
+    ],
+}
+METRICS_CONFIG = {
+    metric: {
+        "name": metric, "metric_of_interest": metric, "labels": [],
+        "direction": 0, "threshold": 0, "correlation": "", "context": 5,
+    }
+    for metric in ("cpu_avg", "mem_avg")
+}
+
+
+def _change_point(metric, index):
+    return ChangePoint(
+        index=index, qhat=0.0, time=index, metric=metric,
+        stats=TTestStats(mean_1=1.0, mean_2=2.0, std_1=0.0, std_2=0.0, pvalue=0.0),
+    )
+
+
+def test_parse_algorithms():
+    assert parse_algorithms([" EDivisive", "cmr", ""]) == ["edivisive", "cmr"]
+    assert not parse_algorithms(None)
+    with pytest.raises(ValueError):
+        parse_algorithms(["edivisive", "prophet"])
+    with pytest.raises(ValueError):
+        parse_algorithms(["cmr", "cmr"])
+
+
+def test_required_votes():
+    assert required_votes(3, None) == 2
+    assert required_votes(2, None) == 2
+    assert required_votes(3, 1) == 1
+    assert required_votes(2, 5) == 2
+
+
+def test_consensus_keeps_agreed_change_points():
+    by_algorithm = {
+        "edivisive": {"cpu_avg": [_change_point("cpu_avg", 5), _change_point("cpu_avg", 9)]},
+        "isolation": {"cpu_avg": [_change_point("cpu_avg", 9)], "mem_avg": [_change_point("mem_avg", 3)]},
+        "cmr": {"cpu_avg": [], "mem_avg": [_change_point("mem_avg", 3)]},
+    }
+    consensus = consensus_change_points(by_algorithm, ["cpu_avg", "mem_avg"], 2)
+    assert [cp.index for cp in consensus["cpu_avg"]] == [9]
+    assert [cp.index for cp in consensus["mem_avg"]] == [3]
+    assert consensus["cpu_avg"][0] is by_algorithm["edivisive"]["cpu_avg"][1]
+
+
+def test_consensus_tolerance_groups_nearby_change_points():
+    by_algorithm = {
+        "edivisive": {"cpu_avg": [_change_point("cpu_avg", 37)], "mem_avg": [_change_point("mem_avg", 20)]},
+        "cmr": {"cpu_avg": [_change_point("cpu_avg", 39)], "mem_avg": [_change_point("mem_avg", 39)]},
+    }
+    assert not any(consensus_change_points(by_algorithm, ["cpu_avg", "mem_avg"], 2).values())
+    consensus = consensus_change_points(by_algorithm, ["cpu_avg", "mem_avg"], 2, tolerance=2)
+    # reported on the run of the first listed algorithm, too far apart for mem
+    assert consensus["cpu_avg"] == [by_algorithm["edivisive"]["cpu_avg"][0]]
+    assert consensus["mem_avg"] == []
+
+
+def _make_dataframe(n_runs=40):
+    rng = np.random.default_rng(1)
+    cpu = rng.normal(100, 1, n_runs)
+    cpu[-1] = 160
+    return pd.DataFrame({
+        "uuid": [f"uuid-{i}" for i in range(n_runs)],
+        "timestamp": [f"2024-01-{1 + i // 2:02d}T{12 * (i % 2):02d}:00:00" for i in range(n_runs)],
+        "ocpVersion": ["4.19"] * n_runs,
+        "cpu_avg": cpu,
+        "mem_avg": rng.normal(50, 1, n_runs),
+    })
+
+
+def test_analyze_runs_every_algorithm_on_one_frame(tmp_path):
+    save_snapshot(str(tmp_path), TEST, _make_dataframe(), METRICS_CONFIG)
+    kwargs = {
+        "from_snapshot": str(tmp_path),
+        "algorithms": ["isolation", "cmr", "cusum"],
+        "consensus_min": None,
+        "ackMap": None,
+        "collapse": False,
+    }
+    analysis, _ = analyze(TEST, kwargs)
+
+    last = len(_make_dataframe()) - 1
+    assert set(analysis.change_points_by_algorithm) == {"isolation", "cmr", "cusum"}
+    assert [cp.index for cp in analysis.change_points_by_algorithm["cmr"]["cpu_avg"]] == [last]
+    assert [cp.index for cp in analysis.change_points_by_metric["cpu_avg"]] == [last]
+    assert analysis.regression_flag
+
+    records = json.loads(JsonFormatter().format(analysis)["consensus-test"])
+    assert set(records[last]["metrics"]["cpu_avg"]["algorithms"]) >= {"cmr", "isolation"}
+    assert records[last]["is_changepoint"]
+
+
+def test_analyze_agrees_across_cmr_and_edivisive(tmp_path):
+    dataframe = _make_dataframe()
+    # a regression two runs before the latest: E-Divisive splits there, CMR
+    # flags the latest run
+    dataframe.loc[len(dataframe) - 2:, "cpu_avg"] = 130
+    save_snapshot(str(tmp_path), TEST, dataframe, METRICS_CONFIG)
+    kwargs = {
+        "from_snapshot": str(tmp_path),
+        "algorithms": ["edivisive", "cmr"],
+        "consensus_min": 2,
+        "ackMap": None,
+        "collapse": False,
+    }
+    last = len(dataframe) - 1
+    analysis, _ = analyze(TEST, dict(kwargs, consensus_tolerance=0))
+    assert [cp.index for cp in analysis.change_points_by_algorithm["edivisive"]["cpu_avg"]] == [last - 1]
+    assert [cp.index for cp in analysis.change_points_by_algorithm["cmr"]["cpu_avg"]] == [last]
+    assert not analysis.regression_flag
+
+    analysis, _ = analyze(TEST, kwargs)
+    assert [cp.index for cp in analysis.change_points_by_metric["cpu_avg"]] == [last - 1]
+    assert analysis.regression_flag
@@ -0,0 +1,93 @@
+"""
+Unit tests for orion/algorithms/cusum
+"""
+
+# pylint: disable = missing-function-docstring
+# pylint: disable = import-error
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from orion import constants as cnsts
+from orion.algorithms.algorithmFactory import AlgorithmFactory
+from orion.algorithms.cusum import CUSUM
+from orion.algorithms.cusum.online import new_metric_state, state_path, update
+from orion.run_test import get_algorithm_type
+
+TEST = {"name": "cusum-test", "uuid_field": "uuid", "version_field": "ocpVersion"}
+METRICS_CONFIG = {
+    "cpu_avg": {"direction": 0, "threshold": 0, "correlation": "", "context": 5},
+    "mem_avg": {"direction": 0, "threshold": 0, "correlation": "", "context": 5},
+}
+
+
+def _make_dataframe(n_runs=60, shift_at=40):
+    rng = np.random.default_rng(3)
+    cpu = rng.normal(100, 1, n_runs)
+    cpu[shift_at:] += 10
+    return pd.DataFrame({
+        "uuid": [f"uuid-{i}" for i in range(n_runs)],
+        "timestamp": [1_700_000_000 + i * 86400 for i in range(n_runs)],
+        "ocpVersion": ["4.19"] * n_runs,
+        "cpu_avg": cpu,
+        "mem_avg": rng.normal(50, 1, n_runs),
+    })
+
+
+def _analyze(dataframe, options):
+    algorithm = CUSUM(dataframe, TEST, {"ackMap": None, **options}, METRICS_CONFIG)
+    return algorithm, algorithm.get_analysis_results()[1]
+
+
+def test_update_detects_shift_after_warmup():
+    metric_state = new_metric_state()
+    detections = [update(metric_state, value, 5.0) for value in [10.0, 10.2, 9.8] * 4]
+    assert not any(detections)
+    mean_1, _, mean_2 = update(metric_state, 20.0, 5.0)
+    assert mean_1 == pytest.approx(10.0)
+    assert mean_2 == 20.0
+    assert metric_state["n"] == 1
+
+
+def test_replays_window_without_state():
+    algorithm, change_points = _analyze(_make_dataframe(), {})
+    assert [cp.index for cp in change_points["cpu_avg"]] == [40]
+    assert change_points["cpu_avg"][0].stats.mean_2 > change_points["cpu_avg"][0].stats.mean_1
+    assert not change_points["mem_avg"]
+    assert algorithm.regression_flag
+
+
+def test_state_only_processes_new_runs(tmp_path):
+    dataframe = _make_dataframe()
+    _, first = _analyze(dataframe.iloc[:45].reset_index(drop=True), {"online_state": str(tmp_path)})
+    path = state_path(str(tmp_path), TEST)
+    assert os.path.isfile(path)
+    with open(path, encoding="utf-8") as state_file:
+        assert json.load(state_file)["last_timestamp"] == int(dataframe["timestamp"][44])
+
+    # The window slid forward: the shift is still reported from the state
+    window = dataframe.iloc[10:].reset_index(drop=True)
+    _, second = _analyze(window, {"online_state": str(tmp_path)})
+    assert [cp.index for cp in first["cpu_avg"]] == [40]
+    assert [cp.index for cp in second["cpu_avg"]] == [30]
+    with open(path, encoding="utf-8") as state_file:
+        assert json.load(state_file)["last_timestamp"] == int(dataframe["timestamp"].iloc[-1])
+
+
+def test_threshold_change_resets_state(tmp_path):
+    _analyze(_make_dataframe(), {"online_state": str(tmp_path)})
+    _, change_points = _analyze(_make_dataframe(), {"online_state": str(tmp_path), "cusum_threshold": 1000})
+    assert not change_points["cpu_avg"]
+
+
+def test_cusum_is_selected():
+    kwargs = {"hunter_analyze": False, "anomaly_detection": False, "cmr": False, "cusum": True}
+    assert get_algorithm_type(kwargs) == cnsts.CUSUM
+    algorithm = AlgorithmFactory().instantiate_algorithm(
+        cnsts.CUSUM, _make_dataframe(), TEST, {}, METRICS_CONFIG
+    )
+    assert isinstance(algorithm, CUSUM)
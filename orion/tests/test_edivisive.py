@@ -0,0 +1,164 @@
+"""
+Unit tests for orion/algorithms/edivisive/edivisive.py
+"""
+
+# pylint: disable = missing-function-docstring
+# pylint: disable = import-error
+
+import json
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+from otava.analysis import TTestStats, compute_change_points
+from otava.series import AnalysisOptions
+from otava.series import ChangePoint as SeriesChangePoint
+
+from orion.algorithms.edivisive.edivisive import EDivisive
+from orion.algorithms.edivisive.incremental import incremental_change_points, state_path
+
+
+def _make_dataframe(n_metrics=4, n_runs=40):
+    rng = np.random.default_rng(7)
+    data = {
+        "uuid": [f"uuid-{i}" for i in range(n_runs)],
+        "timestamp": [1_700_000_000 + i * 86400 for i in range(n_runs)],
+        "ocpVersion": ["4.19"] * n_runs,
+    }
+    for m in range(n_metrics):
+        values = rng.normal(100, 1, n_runs)
+        values[n_runs // 2 + m:] += 20
+        data[f"metric{m}_avg"] = values
+    return pd.DataFrame(data)
+
+
+def _make_metrics_config(n_metrics=4):
+    return {
+        f"metric{m}_avg": {
+            "direction": 0, "threshold": 0, "correlation": "", "context": 5,
+        }
+        for m in range(n_metrics)
+    }
+
+
+def _analyze(workers):
+    test = {"name": "edivisive-test", "uuid_field": "uuid", "version_field": "ocpVersion"}
+    options = {"ackMap": None, "analysis_workers": workers}
+    algorithm = EDivisive(_make_dataframe(), test, options, _make_metrics_config())
+    return algorithm.get_analysis_results()[1]
+
+
+def test_parallel_analysis_matches_serial():
+    serial = _analyze(1)
+    parallel = _analyze(3)
+    assert list(parallel) == list(serial)
+    for metric, change_points in serial.items():
+        assert [cp.index for cp in parallel[metric]] == [cp.index for cp in change_points]
+        assert [cp.stats.pvalue for cp in parallel[metric]] == [cp.stats.pvalue for cp in change_points]
+    assert [cp.index for cp in serial["metric1_avg"]] == [21]
+
+
+def _long_values(n_runs=400):
+    rng = np.random.default_rng(11)
+    values = rng.normal(100, 1, n_runs)
+    values[120:] += 15
+    values[300:] -= 10
+    return list(values)
+
+
+def test_incremental_without_state_matches_otava(tmp_path):
+    serial = _analyze(1)
+    test = {"name": "edivisive-test", "uuid_field": "uuid", "version_field": "ocpVersion"}
+    options = {"ackMap": None, "incremental_state": str(tmp_path)}
+    algorithm = EDivisive(_make_dataframe(), test, options, _make_metrics_config())
+    incremental = algorithm.get_analysis_results()[1]
+    assert os.path.isfile(state_path(str(tmp_path), test))
+    for metric, change_points in serial.items():
+        assert [cp.index for cp in incremental[metric]] == [cp.index for cp in change_points]
+
+
+def test_incremental_reuses_appended_runs():
+    values = _long_values()
+    uuids = [f"uuid-{i}" for i in range(len(values))]
+    analysis_options = AnalysisOptions()
+    _, state, reused = incremental_change_points(values[:-2], uuids[:-2], None, analysis_options)
+    assert not reused
+
+    with patch("orion.algorithms.edivisive.incremental.compute_change_points",
+               wraps=compute_change_points) as compute_mock:
+        change_points, _, reused = incremental_change_points(values, uuids, state, analysis_options)
+    assert reused
+    assert compute_mock.call_args.kwargs["new_data"] == 2
+    assert compute_mock.call_args.kwargs["old_weak_cp"]
+    full, _, _ = incremental_change_points(values, uuids, None, analysis_options)
+    assert [cp.index for cp in change_points] == [cp.index for cp in full]
+
+
+def test_incremental_recomputes_after_dropped_runs():
+    values = _long_values()
+    uuids = [f"uuid-{i}" for i in range(len(values))]
+    analysis_options = AnalysisOptions()
+    _, state, _ = incremental_change_points(values[:-2], uuids[:-2], None, analysis_options)
+    change_points, _, reused = incremental_change_points(values[3:], uuids[3:], state, analysis_options)
+    assert not reused
+    full, _, _ = incremental_change_points(values[3:], uuids[3:], None, analysis_options)
+    assert [cp.index for cp in change_points] == [cp.index for cp in full]
+
+
+def test_incremental_state_is_json(tmp_path):
+    test = {"name": "edivisive-test", "uuid_field": "uuid", "version_field": "ocpVersion"}
+    options = {"ackMap": None, "incremental_state": str(tmp_path)}
+    dataframe = _make_dataframe()
+    EDivisive(dataframe.iloc[:-1], test, options, _make_metrics_config()).get_analysis_results()
+    with open(state_path(str(tmp_path), test), encoding="utf-8") as state_file:
+        assert json.load(state_file)["metrics"]["metric0_avg"]["uuids"][-1] == "uuid-38"
+
+    with patch("orion.algorithms.edivisive.incremental.compute_change_points",
+               wraps=compute_change_points) as compute_mock:
+        incremental = EDivisive(dataframe, test, options, _make_metrics_config()).get_analysis_results()[1]
+    assert all(call.kwargs.get("new_data") == 1 for call in compute_mock.call_args_list)
+    for metric, change_points in _analyze(1).items():
+        assert [cp.index for cp in incremental[metric]] == [cp.index for cp in change_points]
+
+
+def test_incremental_recomputes_changed_history():
+    values = _long_values()
+    uuids = [f"uuid-{i}" for i in range(len(values))]
+    analysis_options = AnalysisOptions()
+    _, state, _ = incremental_change_points(values[:-1], uuids[:-1], None, analysis_options)
+    values[10] += 1
+    _, _, reused = incremental_change_points(values, uuids, state, analysis_options)
+    assert not reused
+
+
+def _change_point(metric, index, mean_1=100.0, mean_2=120.0):
+    return SeriesChangePoint(
+        index=index, qhat=0.0, time=1_700_000_000 + index * 86400, metric=metric,
+        stats=TTestStats(mean_1=mean_1, mean_2=mean_2, std_1=1.0, std_2=1.0, pvalue=0.0001),
+    )
+
+
+def test_ack_and_correlation_filtering():
+    metrics_config = _make_metrics_config(3)
+    metrics_config["metric0_avg"].update(correlation="metric1_avg", context=2)
+    metrics_config["metric2_avg"].update(correlation="metric1_avg", context=2)
+    computed = {
+        # 10 is backed by metric1 at 11, 20 by nothing, 30 by the acked 31
+        "metric0_avg": [_change_point("metric0_avg", i) for i in (10, 20, 30)],
+        # the last changepoint in its window (9) went the wrong way
+        "metric2_avg": [_change_point("metric2_avg", 7)],
+        "metric1_avg": [_change_point("metric1_avg", 5), _change_point("metric1_avg", 11),
+                        _change_point("metric1_avg", 31)],
+    }
+    computed["metric1_avg"].insert(1, _change_point("metric1_avg", 9, mean_2=80.0))
+    metrics_config["metric1_avg"]["direction"] = 1
+    test = {"name": "edivisive-test", "uuid_field": "uuid", "version_field": "ocpVersion"}
+    ack_map = {"ack": [{"uuid": "uuid-31", "metric": "metric1_avg"},
+                       {"uuid": "missing", "metric": "metric1_avg"}]}
+    algorithm = EDivisive(_make_dataframe(3), test, {"ackMap": ack_map}, metrics_config)
+    with patch.object(EDivisive, "_compute_change_points", return_value=computed):
+        change_points = algorithm.get_analysis_results()[1]
+    assert [cp.index for cp in change_points["metric0_avg"]] == [10]
+    assert not change_points["metric2_avg"]
+    assert [cp.index for cp in change_points["metric1_avg"]] == [5, 11]
@@ -0,0 +1,145 @@
+"""
+Unit tests for orion/algorithms/edivisive_fast
+"""
+
+# pylint: disable = missing-function-docstring
+# pylint: disable = import-error
+
+import glob
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+from otava.analysis import compute_change_points as otava_change_points
+
+from orion import constants as cnsts
+from orion.algorithms.algorithmFactory import AlgorithmFactory
+from orion.algorithms.edivisive.edivisive import EDivisive
+from orion.algorithms.edivisive_fast import EDivisiveFast
+from orion.algorithms.edivisive_fast.engine import compute_change_points
+from orion.fake_opensearch import FakeOpenSearch
+from orion.matcher import Matcher
+from orion.run_test import get_algorithm_type
+
+CI_TESTS = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                        "hack", "ci-tests")
+
+
+def _series(kind, seed, n_runs=260):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(100, 2, n_runs)
+    values[n_runs // 3:] += 8
+    values[2 * n_runs // 3:] -= 5
+    if kind == "integer":
+        values = np.round(values)
+    elif kind == "constant":
+        values = np.full(n_runs, 5.0)
+        values[n_runs // 2:] = 7.0
+    return list(values)
+
+
+@pytest.mark.parametrize("kind", ["normal", "integer", "constant"])
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_engine_matches_otava(kind, seed):
+    values = _series(kind, seed)
+    expected, _ = otava_change_points(values, window_len=50, max_pvalue=0.001)
+    actual = compute_change_points(values, window_len=50, max_pvalue=0.001)
+    assert [cp.index for cp in actual] == [cp.index for cp in expected]
+    for fast, reference in zip(actual, expected):
+        assert fast.stats.pvalue == pytest.approx(reference.stats.pvalue, rel=1e-9, abs=1e-300)
+        assert fast.stats.mean_1 == pytest.approx(reference.stats.mean_1)
+        assert fast.stats.mean_2 == pytest.approx(reference.stats.mean_2)
+
+
+def test_engine_short_series():
+    assert not compute_change_points([1.0])
+    assert not compute_change_points([1.0, 1.0, 1.0])
+
+
+def _make_dataframe(n_metrics=3, n_runs=60):
+    rng = np.random.default_rng(5)
+    data = {
+        "uuid": [f"uuid-{i}" for i in range(n_runs)],
+        "timestamp": [1_700_000_000 + i * 86400 for i in range(n_runs)],
+        "ocpVersion": ["4.19"] * n_runs,
+    }
+    for m in range(n_metrics):
+        values = rng.normal(100, 1, n_runs)
+        values[n_runs // 2 + m:] += 20
+        data[f"metric{m}_avg"] = values
+    return pd.DataFrame(data)
+
+
+def test_algorithm_matches_edivisive():
+    test = {"name": "edivisive-fast-test", "uuid_field": "uuid", "version_field": "ocpVersion"}
+    metrics_config = {
+        f"metric{m}_avg": {"direction": 0, "threshold": 0, "correlation": "", "context": 5}
+        for m in range(3)
+    }
+    options = {"ackMap": None}
+    expected = EDivisive(_make_dataframe(), test, options, metrics_config).get_analysis_results()[1]
+    actual = EDivisiveFast(_make_dataframe(), test, options, metrics_config).get_analysis_results()[1]
+    assert list(actual) == list(expected)
+    for metric, change_points in expected.items():
+        assert [(cp.index, cp.time) for cp in actual[metric]] == \
+            [(cp.index, cp.time) for cp in change_points]
+    assert [cp.index for cp in actual["metric1_avg"]] == [31]
+
+
+def _ci_tests_dataframe(metric_file):
+    """Runs of the hack/ci-tests data, indexed by its loader and fetched as orion does"""
+    store = FakeOpenSearch()
+    server = store.create_server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        for args in (["--metadata"], ["--metric-file", metric_file, "--count", "5"]):
+            subprocess.run([sys.executable, os.path.join(CI_TESTS, "load_metrics_to_opensearch.py"),
+                            "--es-server", url, *args], check=True, capture_output=True)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    with open(os.path.join(CI_TESTS, "metadata_data.json"), encoding="utf-8") as metadata_file:
+        runs = sorted(json.load(metadata_file), key=lambda run: run["timestamp"])
+    with open(metric_file, encoding="utf-8") as template:
+        name = json.load(template)["metricName"]
+    metric = {"name": name, "metricName.keyword": name, "metric_of_interest": "value", "agg": {"agg_type": "avg"}}
+    match = Matcher(index="orion-integration-test-metrics", es=store.client())
+    rows = {row["uuid"]: row["value_avg"]
+            for row in match.get_agg_metrics_batch([run["uuid"] for run in runs], [metric])[name]}
+    return pd.DataFrame({
+        "uuid": [run["uuid"] for run in runs],
+        "timestamp": [run["timestamp"] for run in runs],
+        "ocpVersion": [run["ocpVersion"] for run in runs],
+        f"{name}_avg": [rows[run["uuid"]] for run in runs],
+    }), f"{name}_avg"
+
+
+@pytest.mark.parametrize("metric_file", sorted(glob.glob(os.path.join(CI_TESTS, "metric_data*.json"))),
+                         ids=os.path.basename)
+def test_algorithm_matches_edivisive_on_ci_tests_data(metric_file):
+    dataframe, column = _ci_tests_dataframe(metric_file)
+    test = {"name": "ci-tests", "uuid_field": "uuid", "version_field": "ocpVersion"}
+    metrics_config = {column: {"direction": 0, "threshold": 0, "correlation": "", "context": 5}}
+    options = {"ackMap": None}
+    expected = EDivisive(dataframe.copy(), test, options, metrics_config).get_analysis_results()[1]
+    actual = EDivisiveFast(dataframe.copy(), test, options, metrics_config).get_analysis_results()[1]
+    assert expected[column]
+    assert [(cp.index, cp.time) for cp in actual[column]] == [(cp.index, cp.time) for cp in expected[column]]
+    for fast, reference in zip(actual[column], expected[column]):
+        assert fast.stats.pvalue == pytest.approx(reference.stats.pvalue, rel=1e-9, abs=1e-300)
+
+
+def test_hunter_fast_is_selected():
+    kwargs = {"hunter_analyze": False, "hunter_fast": True, "anomaly_detection": False, "cmr": False}
+    assert get_algorithm_type(kwargs) == cnsts.EDIVISIVE_FAST
+    algorithm = AlgorithmFactory().instantiate_algorithm(
+        cnsts.EDIVISIVE_FAST, _make_dataframe(), {"name": "t", "uuid_field": "uuid"}, {}, {}
+    )
+    assert isinstance(algorithm, EDivisiveFast)
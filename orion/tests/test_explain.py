@@ -0,0 +1,121 @@
+"""
+Unit tests for orion/explain.py
+"""
+
+# pylint: disable = missing-function-docstring
+# pylint: disable = import-error
+
+import json
+from unittest.mock import MagicMock, patch
+
+from opensearch_dsl import Search
+from opensearch_dsl.response import Response
+
+from main import main
+from orion import constants as cnsts
+from orion.explain import explain_test, format_plans
+from orion.matcher import Matcher
+
+
+def _test(metrics):
+    return {
+        "name": "node-density",
+        "uuid_field": "uuid",
+        "version_field": "ocpVersion",
+        "metadata": {"benchmark.keyword": "node-density"},
+        "metrics": metrics,
+    }
+
+
+def _options(**overrides):
+    options = main.make_context("orion", ["--explain", "--config", "x.yaml"]).params
+    options.update(metadata_index="perf-scale-ci", benchmark_index="ripsaw-kube-burner*")
+    options.update(overrides)
+    return options
+
+
+def _uuid_hits(n):
+    return [MagicMock(to_dict=MagicMock(return_value={"_source": {"uuid": f"u{i}"}})) for i in range(n)]
+
+
+def _sample_response():
+    return Response(search=Search(), response={"hits": {"hits": [{"_source": {"uuid": "u0", "ocpVersion": "4.19"}}]}})
+
+
+def test_metric_doc_counts_parses_filter_buckets():
+    match = Matcher(index="ripsaw", es=MagicMock())
+    response = Response(search=Search(), response={"hits": {"hits": []}, "aggregations": {
+        "cpu": {"doc_count": 12, "sample": {"hits": {"hits": [{"_source": {"value": 1.5}}]}}},
+        "mem": {"doc_count": 0, "sample": {"hits": {"hits": []}}},
+    }})
+    metrics = [{"name": "cpu", "metricName": "cpu", "metric_of_interest": "value"},
+               {"name": "mem", "metricName": "mem", "metric_of_interest": "value"}]
+    with patch.object(Search, "execute", autospec=True, return_value=response) as execute:
+        counts = match.metric_doc_counts(["u1", "u2"], metrics)
+    assert counts == {"cpu": (12, len(json.dumps({"value": 1.5}))), "mem": (0, 0)}
+    aggs = execute.call_args.args[0].to_dict()["aggs"]
+    assert aggs["cpu"]["filter"] == {"bool": {"must": [{"match": {"metricName": "cpu"}}]}}
+    assert aggs["cpu"]["aggs"]["sample"]["top_hits"]["size"] == 1
+
+
+def test_explain_plans_chunks_and_flags_costly_metrics():
+    metrics = [
+        {"name": f"agg{i}", "metricName": f"m{i}", "metric_of_interest": "value",
+         "agg": {"agg_type": "avg"}, "labels": ["x"], "threshold": 10}
+        for i in range(16)
+    ] + [
+        {"name": "latency", "metricName": "podLatency", "metric_of_interest": "P99", "direction": 1},
+        {"name": "empty", "metricName": "none", "metric_of_interest": "value"},
+    ]
+    match = Matcher(index="perf-scale-ci", es=MagicMock())
+
+    def doc_counts(uuids, chunk, source_fields=None):  # pylint: disable=unused-argument
+        return {m["name"]: ({"latency": 40, "empty": 0}.get(m["name"], 4), 200) for m in chunk}
+
+    with patch.object(Search, "count", autospec=True, return_value=4), \
+            patch.object(Search, "execute", autospec=True, return_value=_sample_response()), \
+            patch.object(match, "query_index", return_value=_uuid_hits(4)), \
+            patch.object(match, "metric_doc_counts", side_effect=doc_counts):
+        plan = explain_test(_test(metrics), match, _options())
+
+    assert plan.runs == 4
+    assert [s.stage for s in plan.searches] == [
+        "metadata lookup", "aggregation chunk", "aggregation chunk", "standard chunk",
+    ]
+    assert plan.searches[0].index == "perf-scale-ci"
+    assert plan.searches[0].round_trips == 2
+    assert [len(s.metrics) for s in plan.searches[1:]] == [15, 1, 2]
+    assert all(s.index == "ripsaw-kube-burner*" for s in plan.searches[1:])
+    standard = plan.searches[3]
+    assert standard.hits == 40
+    assert standard.bytes == 40 * 200
+    assert standard.warnings == [
+        "latency: 10.0 documents per run, consider narrowing its filters or using an agg",
+        "empty: no document matches",
+    ]
+    # the rendered search is the one get_results_batch issues
+    should = standard.body["query"]["bool"]["should"]
+    assert should[0] == {"bool": {"must": [{"match": {"metricName": "podLatency"}}]}}
+
+    report = format_plans([plan])
+    assert "node-density | Query plan (4 runs)" in report
+    assert "... 2 more" in report
+    assert json.loads(format_plans([plan], "json"))["total"]["round_trips"] == plan.round_trips
+
+
+def test_explain_flags_aggregation_bucket_limit():
+    metrics = [{"name": "cpu", "metricName": "cpu", "metric_of_interest": "value", "agg": {"agg_type": "avg"}}]
+    match = Matcher(index="perf-scale-ci", es=MagicMock())
+    # a low bucket limit crosses it with a few dozen runs
+    with patch.object(cnsts, "EXPLAIN_MAX_BUCKETS", 50), \
+            patch.object(Search, "count", autospec=True, return_value=40), \
+            patch.object(Search, "execute", autospec=True, return_value=_sample_response()), \
+            patch.object(match, "query_index", return_value=_uuid_hits(30)), \
+            patch.object(match, "metric_doc_counts", return_value={"cpu": (30, 0)}):
+        plan = explain_test(_test(metrics), match, _options(lookback_size=30))
+    assert plan.searches[0].warnings == [
+        "40 runs match, only the newest 30 (--lookback-size) are analyzed"
+    ]
+    assert plan.searches[1].warnings == [
+        "60 buckets exceed the default search.max_buckets of 50"
+    ]
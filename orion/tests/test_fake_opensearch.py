@@ -0,0 +1,124 @@
+"""
+Unit tests for orion/fake_opensearch.py
+"""
+
+# pylint: disable = missing-function-docstring
+# pylint: disable = import-error
+
+import json
+import threading
+import urllib.request
+
+import pytest
+from opensearchpy.exceptions import NotFoundError, RequestError
+
+from orion.fake_opensearch import FakeOpenSearch, generate_runs
+from orion.matcher import Matcher
+
+AVG_LATENCY = {
+    "name": "podReadyLatency", "metricName.keyword": "podReadyLatency",
+    "metric_of_interest": "value", "agg": {"agg_type": "avg"},
+}
+
+
+@pytest.fixture(name="store")
+def fixture_store():
+    store = FakeOpenSearch()
+    metadata, metrics = generate_runs(runs=12, docs_per_metric=3, regression_at=8, seed=7)
+    store.bulk_index("perf-scale-ci", metadata, id_field="uuid")
+    store.bulk_index("ripsaw-kube-burner", metrics)
+    return store
+
+
+def test_matcher_runs_end_to_end(store):
+    match = Matcher(index="perf-scale-ci", es=store.client())
+    runs = match.get_uuid_by_metadata({"benchmark.keyword": "node-density", "platform": "aws"}, lookback_size=5)
+    # newest first, the analyzed platform field matches whatever the case
+    assert [run["ocpVersion"][-17:] for run in runs] == [
+        f"2026-01-{day:02d}-000000" for day in range(12, 7, -1)
+    ]
+    uuids = [run["uuid"] for run in runs]
+
+    match.index = "ripsaw-kube-burner"
+    rows = match.get_agg_metrics_batch(uuids, [AVG_LATENCY])["podReadyLatency"]
+    assert {row["uuid"] for row in rows} == set(uuids)
+    assert all(row["timestamp"].endswith("00:00:30.000Z") for row in rows)
+    # runs from the 9th on regressed by 1.5x
+    values = sorted(row["value_avg"] for row in rows)
+    assert 900 < values[0] < 1100 and all(1400 < value < 1600 for value in values[1:])
+
+    match.search_size = 4
+    before = store.requests
+    docs = match.get_results_batch(uuids, [{"name": "lat", "metricName": "podReadyLatency", "metric_of_interest": "value"}])
+    assert len(docs["lat"]) == 15
+    # 15 hits in pages of 4, ended by an empty page
+    assert store.requests - before == 5
+
+
+def test_queries_follow_opensearch_semantics(store):
+    client = store.client()
+
+    def count(query):
+        return client.count(index="perf-scale-ci", body={"query": query})["count"]
+
+    assert count({"match": {"ocpVersion": "nightly"}}) == 12
+    assert count({"match": {"ocpVersion.keyword": "nightly"}}) == 0
+    assert count({"wildcard": {"ocpVersion": {"value": "4.20*"}}}) == 12
+    assert count({"range": {"timestamp": {"gt": "2026-01-10T00:00:00Z", "lt": "2026-01-12"}}}) == 1
+    assert count({"bool": {"must_not": [{"match": {"benchmark": "node-density"}}]}}) == 0
+    assert count({"terms": {"workerNodesCount": ["24"]}}) == 12
+
+    with pytest.raises(RequestError, match="illegal_argument_exception"):
+        client.search(index="perf-scale-ci", body={"aggs": {"x": {"terms": {"field": "platform"}}}})
+    with pytest.raises(RequestError, match="illegal_argument_exception"):
+        client.search(index="perf-scale-ci", body={"size": 10001})
+    with pytest.raises(NotFoundError):
+        client.search(index="missing", body={})
+    assert client.search(index="missing*", body={})["hits"]["total"]["value"] == 0
+
+
+def test_search_after_skips_ties():
+    store = FakeOpenSearch()
+    store.bulk_index("idx", [{"timestamp": "2026-01-01T00:00:00Z", "n": n} for n in range(3)])
+    store.index("idx", {"timestamp": "2026-01-02T00:00:00Z", "n": 3})
+    body = {"size": 2, "sort": [{"timestamp": {"order": "desc"}}]}
+    first = store.search("idx", body)["hits"]["hits"]
+    assert [hit["_source"]["n"] for hit in first] == [3, 0]
+    after = store.search("idx", {**body, "search_after": first[-1]["sort"]})["hits"]["hits"]
+    # like a cluster, documents sharing the last sort value are not returned again
+    assert after == []
+
+
+def test_load_json_and_http_bulk(tmp_path):
+    path = tmp_path / "rhoso.json"
+    path.write_text(json.dumps({
+        "metadata": [{"uuid": "a", "timestamp": "2026-02-11T07:17:21Z"}],
+        "metrics": [{"uuid": "a", "raw": [1.0, 2.0, 3.0, 4.0]}],
+    }), encoding="utf-8")
+    store = FakeOpenSearch()
+    assert store.load_json(str(path), "meta", "metrics") == 2
+
+    server = store.create_server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        bulk = "\n".join([json.dumps({"index": {"_index": "metrics", "_id": "b"}}),
+                          json.dumps({"uuid": "b", "raw": [10.0]})]) + "\n"
+        request = urllib.request.Request(f"{url}/_bulk", data=bulk.encode("utf-8"), method="POST",
+                                         headers={"Content-Type": "application/x-ndjson"})
+        with urllib.request.urlopen(request) as response:
+            assert json.load(response)["errors"] is False
+
+        client = Matcher.create_client(url, verify_certs=False)
+        response = client.search(index="metrics", body={"size": 0, "aggs": {
+            "uuid": {"terms": {"field": "uuid.keyword"}, "aggs": {
+                "p": {"percentiles": {"field": "raw", "percents": [50]}},
+                "n": {"value_count": {"field": "raw"}},
+            }},
+        }})
+        buckets = {b["key"]: (b["p"]["values"]["50.0"], b["n"]["value"])
+                   for b in response["aggregations"]["uuid"]["buckets"]}
+        assert buckets == {"a": (2.5, 4), "b": (10.0, 1)}
+    finally:
+        server.shutdown()
+        server.server_close()
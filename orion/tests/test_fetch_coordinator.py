@@ -0,0 +1,103 @@
+"""
+Unit tests for orion/fetch_coordinator.py
+"""
+
+# pylint: disable = missing-function-docstring
+# pylint: disable = import-error
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+from orion.fetch_coordinator import FetchCoordinator
+
+CHUNK = [{"name": "cpu", "metric_of_interest": "value", "agg": {"agg_type": "avg"}}]
+
+
+def _make_match():
+    match = MagicMock()
+    match.index = "bench-index"
+
+    def _agg_batch(uuids, metrics_list, timestamp_field="timestamp"):  # pylint: disable = unused-argument
+        return {"cpu": [{"uuid": u, "value_avg": float(len(u))} for u in uuids]}
+
+    def _results_batch(uuids, metrics_list, timestamp_field="timestamp", trim_source=False):  # pylint: disable = unused-argument
+        return {"cpu": [{"uuid": u, "value": 1.0} for u in uuids]}
+
+    match.get_agg_metrics_batch.side_effect = _agg_batch
+    match.get_results_batch.side_effect = _results_batch
+    return match
+
+
+def test_concurrent_requests_share_one_query():
+    match = _make_match()
+    coordinator = FetchCoordinator(participants=3, max_wait=5)
+    requests = [["p1", "p2"], ["a1"], ["b1", "p2"]]
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [
+            executor.submit(coordinator.get_agg_metrics_batch, match, uuids, CHUNK)
+            for uuids in requests
+        ]
+        results = [f.result() for f in futures]
+
+    assert match.get_agg_metrics_batch.call_count == 1
+    assert sorted(match.get_agg_metrics_batch.call_args[0][0]) == ["a1", "b1", "p1", "p2"]
+    for uuids, result in zip(requests, results):
+        assert sorted(row["uuid"] for row in result["cpu"]) == sorted(uuids)
+
+
+def test_standard_requests_are_coalesced_separately():
+    match = _make_match()
+    coordinator = FetchCoordinator(participants=2, max_wait=5)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        agg = executor.submit(coordinator.get_agg_metrics_batch, match, ["u1"], CHUNK)
+        std = executor.submit(coordinator.get_results_batch, match, ["u2"], CHUNK)
+        assert agg.result()["cpu"][0]["uuid"] == "u1"
+        assert std.result()["cpu"][0]["uuid"] == "u2"
+
+    assert match.get_agg_metrics_batch.call_count == 1
+    assert match.get_results_batch.call_count == 1
+
+
+def test_leave_releases_waiting_leader():
+    match = _make_match()
+    coordinator = FetchCoordinator(participants=2, max_wait=30)
+    done = threading.Event()
+
+    def _request():
+        coordinator.get_results_batch(match, ["u1"], CHUNK)
+        done.set()
+
+    worker = threading.Thread(target=_request)
+    worker.start()
+    assert not done.wait(0.2)
+    coordinator.leave()
+    assert done.wait(5)
+    worker.join()
+
+
+def test_single_participant_does_not_wait():
+    match = _make_match()
+    coordinator = FetchCoordinator(participants=1, max_wait=30)
+    result = coordinator.get_results_batch(match, ["u1"], CHUNK)
+    assert result == {"cpu": [{"uuid": "u1", "value": 1.0}]}
+
+
+def test_errors_reach_every_requester():
+    match = _make_match()
+    match.get_agg_metrics_batch.side_effect = RuntimeError("boom")
+    coordinator = FetchCoordinator(participants=2, max_wait=5)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(coordinator.get_agg_metrics_batch, match, [u], CHUNK)
+            for u in ("u1", "u2")
+        ]
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result()
+    assert match.get_agg_metrics_batch.call_count == 1
@@ -0,0 +1,154 @@
+"""
+Unit tests for orion/fleet.py and the --configs entry point
+"""
+
+# pylint: disable = missing-function-docstring
+# pylint: disable = import-error
+
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from orion.ack_providers import AckIndex, JiraAckProvider
+from orion.fleet import FleetConfig, expand_config_paths, run_configs, run_fleet
+from orion.logger import SingletonLogger
+from orion.run_test import TestResults
+
+
+def _results(name, regression=False):
+    return (
+        TestResults(analyses=[name], regression_flag=regression, prs=[], viz_data=[f"viz-{name}"]),
+        TestResults(analyses=[], regression_flag=False, prs=[], viz_data=[]),
+        {},
+    )
+
+
+def _fake_run(**kwargs):
+    test = kwargs["config"]["tests"][0]
+    if test["name"] == "no-data":
+        raise SystemExit(3)
+    return _results(test["name"], regression=test["name"] == "regressed")
+
+
+def _config(path, *names):
+    return FleetConfig(path, {"config": {"tests": [{"name": name} for name in names]}})
+
+
+def test_expand_config_paths(tmp_path):
+    for name in ("b.yaml", "a.yaml", "c.yml"):
+        (tmp_path / name).write_text("tests: []\n", encoding="utf-8")
+    pattern = os.path.join(str(tmp_path), "*.yaml")
+    paths = expand_config_paths(f"{pattern}, {tmp_path / 'a.yaml'}")
+    assert [os.path.basename(p) for p in paths] == ["a.yaml", "b.yaml"]
+    with pytest.raises(ValueError, match="no config file matches"):
+        expand_config_paths(os.path.join(str(tmp_path), "*.json"))
+
+
+def test_run_fleet_groups_tests_per_config():
+    configs = [
+        _config("first.yaml", "ok", "regressed"),
+        _config("second.yaml", "ok", "no-data", "other"),
+    ]
+    with patch("orion.fleet.run", side_effect=_fake_run) as run_mock:
+        run_configs(configs, workers=3)
+    assert run_mock.call_count == 5
+    results, results_pull, analyses_by_pr = configs[0].results
+    assert results.analyses == ["ok", "regressed"]
+    assert results.viz_data == ["viz-ok", "viz-regressed"]
+    assert results.regression_flag
+    assert not results_pull.analyses and not analyses_by_pr
+    assert configs[0].exit_code == 0
+    # like a separate run, the test without data ends its config
+    assert configs[1].results is None
+    assert configs[1].exit_code == 3
+
+
+def test_ack_index_queries_providers_once_per_version():
+    provider = MagicMock()
+    provider.get_acks.return_value = [{"uuid": "u1", "metric": "m"}, {"uuid": "u1", "metric": "m"}]
+    provider.merge_acks.side_effect = lambda lists: lists[0][:1]
+    index = AckIndex([provider])
+    assert index.ack_map("4.19", "node-density") == {"ack": [{"uuid": "u1", "metric": "m"}]}
+    index.ack_map("4.19", "node-density")
+    index.ack_map("4.20", "node-density")
+    assert provider.get_acks.call_count == 2
+    assert AckIndex([]).ack_map("4.19") is None
+
+
+def test_configs_share_client_and_ack_index(tmp_path):
+    for name, version in (("a.yaml", "4.19"), ("b.yaml", "4.19")):
+        (tmp_path / name).write_text(
+            "tests:\n"
+            f"  - name: test-{name[0]}\n"
+            "    metadata:\n"
+            f"      ocpVersion: '{version}'\n"
+            "      benchmark.keyword: node-density\n"
+            "    metrics: []\n",
+            encoding="utf-8",
+        )
+    kwargs = {
+        "configs": os.path.join(str(tmp_path), "*.yaml"),
+        "input_vars": {},
+        "from_snapshot": None,
+        "metadata_index": "perf-scale-ci",
+        "es_server": "https://localhost:9200",
+        "pr_analysis": False,
+        "ack": "",
+        "jira_ack": False,
+        "jira_auto_create": False,
+        "fleet_workers": 2,
+        "output_format": "json",
+        "save_output_path": str(tmp_path / "output.json"),
+    }
+    client = object()
+    with patch("orion.fleet.run", side_effect=_fake_run) as run_mock, \
+            patch("orion.matcher.Matcher.create_client", return_value=client) as create_client, \
+            patch("orion.ack_providers.index.AckIndex.ack_map", return_value=None) as ack_map, \
+            patch("orion.fleet.write_results", side_effect=[0, 2]) as write_results:
+        exit_code = run_fleet(kwargs, SingletonLogger.get_logger("Orion"))
+    assert exit_code == 2
+    written = [c.args[0]["config"]["tests"][0]["name"] for c in write_results.call_args_list]
+    assert written == ["test-a", "test-b"]
+    create_client.assert_called_once()
+    assert ack_map.call_count == 2
+    calls = sorted(run_mock.call_args_list, key=lambda c: c.kwargs["config"]["tests"][0]["name"])
+    assert [c.kwargs["config"]["tests"][0]["name"] for c in calls] == ["test-a", "test-b"]
+    assert all(c.kwargs["_es_client"] is client for c in calls)
+
+
+def test_configs_get_the_jira_provider_of_their_settings(tmp_path):
+    for name, jira_url in (("a.yaml", "https://jira-a"), ("b.yaml", "https://jira-b"), ("c.yaml", "https://jira-a")):
+        (tmp_path / name).write_text(
+            f"jira_url: {jira_url}\n"
+            "tests:\n"
+            f"  - name: test-{name[0]}\n"
+            "    metadata:\n"
+            "      ocpVersion: '4.19'\n"
+            "    metrics: []\n",
+            encoding="utf-8",
+        )
+    kwargs = {
+        "configs": os.path.join(str(tmp_path), "*.yaml"),
+        "input_vars": {},
+        "from_snapshot": str(tmp_path),
+        "metadata_index": None,
+        "es_server": None,
+        "pr_analysis": False,
+        "ack": "",
+        "jira_ack": True,
+        "jira_auto_create": False,
+        "fleet_workers": 2,
+    }
+
+    def create_provider(_kwargs, config, _logger):
+        return MagicMock(spec=JiraAckProvider, url=config["jira_url"])
+
+    with patch("orion.fleet.run", side_effect=_fake_run), \
+            patch("orion.ack_providers.factory.create_jira_provider", side_effect=create_provider) as create, \
+            patch("orion.ack_providers.index.AckIndex.ack_map", return_value=None), \
+            patch("orion.fleet.write_results", return_value=0) as write_results:
+        assert run_fleet(kwargs, SingletonLogger.get_logger("Orion")) == 0
+    assert create.call_count == 2
+    written = {c.args[0]["config"]["tests"][0]["name"]: c.args[2].url for c in write_results.call_args_list}
+    assert written == {"test-a": "https://jira-a", "test-b": "https://jira-b", "test-c": "https://jira-a"}
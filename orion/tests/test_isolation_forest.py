@@ -0,0 +1,118 @@
+"""
+Unit tests for orion/algorithms/isolationforest/isolationForest.py
+"""
+
+# pylint: disable = missing-function-docstring
+# pylint: disable = import-error
+
+import os
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+from orion.algorithms.isolationforest.isolationForest import IsolationForestWeightedMean
+
+TEST = {"name": "iforest-test", "uuid_field": "uuid", "version_field": "ocpVersion"}
+
+
+def _make_dataframe(n_runs=80):
+    rng = np.random.default_rng(9)
+    up = rng.normal(100, 1, n_runs)
+    down = rng.normal(100, 1, n_runs)
+    up[50] = 200
+    down[50] = 40
+    up[2] = 300  # inside the moving average warm-up
+    return pd.DataFrame({
+        "uuid": [f"uuid-{i}" for i in range(n_runs)],
+        "timestamp": [1_700_000_000 + i * 86400 for i in range(n_runs)],
+        "ocpVersion": ["4.19"] * n_runs,
+        "up_avg": up,
+        "down_avg": down,
+    })
+
+
+def _analyze(directions, options=None):
+    metrics_config = {
+        metric: {"direction": direction, "threshold": 0}
+        for metric, direction in directions.items()
+    }
+    algorithm = IsolationForestWeightedMean(_make_dataframe(), TEST, options or {}, metrics_config)
+    return algorithm, algorithm.get_analysis_results()[1]
+
+
+def test_percent_change_against_moving_average():
+    algorithm, change_points = _analyze({"up_avg": 0, "down_avg": 0})
+    assert [cp.index for cp in change_points["up_avg"]] == [50]
+    assert [cp.index for cp in change_points["down_avg"]] == [50]
+    cp = change_points["up_avg"][0]
+    assert cp.stats.mean_2 == 200
+    assert cp.stats.mean_1 == _make_dataframe()["up_avg"][46:51].mean()
+    assert cp.time == 1_700_000_000 + 50 * 86400
+    assert algorithm.regression_flag
+
+
+def test_direction_filters_cells():
+    _, change_points = _analyze({"up_avg": -1, "down_avg": 1})
+    assert not change_points["up_avg"]
+    assert not change_points["down_avg"]
+    _, change_points = _analyze({"up_avg": 1, "down_avg": -1})
+    assert [cp.index for cp in change_points["up_avg"]] == [50]
+    assert [cp.index for cp in change_points["down_avg"]] == [50]
+
+
+def test_parallel_fit_matches_serial():
+    _, serial = _analyze({"up_avg": 0, "down_avg": 0})
+    _, parallel = _analyze({"up_avg": 0, "down_avg": 0}, {"analysis_workers": 2})
+    for metric, change_points in serial.items():
+        assert [cp.index for cp in parallel[metric]] == [cp.index for cp in change_points]
+
+
+def _analyze_frame(dataframe, options):
+    metrics_config = {"up_avg": {"direction": 0, "threshold": 0}, "down_avg": {"direction": 0, "threshold": 0}}
+    algorithm = IsolationForestWeightedMean(dataframe, TEST, options, metrics_config)
+    return algorithm.get_analysis_results()[1]
+
+
+def test_stored_model_scores_only_new_runs(tmp_path):
+    options = {"anomaly_model_dir": str(tmp_path)}
+    dataframe = _make_dataframe()
+    first = _analyze_frame(dataframe.iloc[:78].reset_index(drop=True), options)
+    _, reference = _analyze({"up_avg": 0, "down_avg": 0})
+    assert [cp.index for cp in first["up_avg"]] == [cp.index for cp in reference["up_avg"]]
+    assert len(list(tmp_path.glob("*.iforest.pkl"))) == 1
+
+    with patch.object(IsolationForest, "fit", autospec=True, side_effect=IsolationForest.fit) as fit, \
+            patch.object(IsolationForest, "decision_function", autospec=True,
+                         side_effect=IsolationForest.decision_function) as score:
+        second = _analyze_frame(dataframe.iloc[2:].reset_index(drop=True), options)
+    fit.assert_not_called()
+    assert len(score.call_args[0][1]) == 2
+    assert [cp.index for cp in second["up_avg"]] == [48]
+
+
+def test_stale_model_is_refit(tmp_path):
+    options = {"anomaly_model_dir": str(tmp_path), "anomaly_refit_hours": 1}
+    _analyze_frame(_make_dataframe(), options)
+    with patch("orion.algorithms.isolationforest.model_store.time.time", return_value=time.time() + 7200), \
+            patch.object(IsolationForest, "fit", autospec=True, side_effect=IsolationForest.fit) as fit:
+        _analyze_frame(_make_dataframe(), options)
+    fit.assert_called_once()
+
+
+def test_model_writable_by_others_is_refit(tmp_path):
+    options = {"anomaly_model_dir": str(tmp_path), "anomaly_refit_hours": 24}
+    _analyze_frame(_make_dataframe(), options)
+    (path,) = [str(p) for p in tmp_path.iterdir()]
+    os.chmod(path, 0o666)
+    with patch.object(IsolationForest, "fit", autospec=True, side_effect=IsolationForest.fit) as fit:
+        _analyze_frame(_make_dataframe(), options)
+    fit.assert_called_once()
+
+    os.chmod(path, 0o600)
+    with patch("orion.algorithms.isolationforest.model_store.os.getuid", return_value=os.getuid() + 1), \
+            patch.object(IsolationForest, "fit", autospec=True, side_effect=IsolationForest.fit) as fit:
+        _analyze_frame(_make_dataframe(), options)
+    fit.assert_called_once()
@@ -1,7 +1,7 @@
 """
 Test that _attach_viz_to_jira scopes attachments per PR.
 
-The fix (main.py) calls auto_create_jira_issues once per PR and stores
+The fix (orion/reporting/results.py) calls auto_create_jira_issues once per PR and stores
 results in issue_keys_by_test_pull_by_pr keyed by pr_num. Each PR's
 viz files are then attached only to that PR's JIRA issues.
 
@@ -12,7 +12,7 @@ import os
 import tempfile
 from unittest.mock import MagicMock, call
 
-from main import auto_create_jira_issues, _attach_viz_to_jira, build_viz_output_file
+from orion.reporting.results import auto_create_jira_issues, _attach_viz_to_jira, build_viz_output_file
 
 
 def _make_regression(test_name, uuid, metric, pct_change=-10.0):
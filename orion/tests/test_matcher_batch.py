@@ -644,6 +644,50 @@ class TestGetResultsBatch:
         assert result["podReadyLatency"][0]["P99"] == 4500
 
 
+class TestGetResultsBatchTrimSource:
+    """Tests for Matcher.get_results_batch with trim_source."""
+
+    def test_routes_pages_and_limits_source(self, matcher_instance, monkeypatch):
+        metrics_list = _make_standard_metrics()
+        pages = [
+            [_make_fake_hit({
+                "uuid": "uuid1",
+                "metricName": "podLatencyQuantilesMeasurement",
+                "quantileName": "Ready",
+                "P99": 4500,
+                "timestamp": "2024-02-09T12:00:00",
+            })],
+            [_make_fake_hit({
+                "uuid": "uuid2",
+                "metricName": "containerCPU",
+                "labels": {"namespace": "openshift-kube-apiserver"},
+                "cpu": 0.55,
+                "timestamp": "2024-02-09T13:00:00",
+            })],
+        ]
+        searches = []
+
+        def _pages(search):
+            searches.append(search)
+            yield from pages
+
+        monkeypatch.setattr(matcher_instance, "iter_hit_pages", _pages)
+        monkeypatch.setattr(matcher_instance, "query_index",
+                            lambda *a, **k: pytest.fail("raw hits collected"))
+
+        result = matcher_instance.get_results_batch(
+            ["uuid1", "uuid2"], metrics_list, trim_source=True
+        )
+
+        assert [doc["P99"] for doc in result["podReadyLatency"]] == [4500]
+        assert [doc["cpu"] for doc in result["apiserverCPU"]] == [0.55]
+        includes = searches[0].to_dict()["_source"]["includes"]
+        assert set(includes) == {
+            "uuid", "timestamp", "P99", "cpu", "metricName", "quantileName",
+            "jobName", "labels.namespace",
+        }
+
+
 class TestGetNested:
     """Unit tests for Matcher._get_nested."""
 
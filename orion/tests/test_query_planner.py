@@ -0,0 +1,138 @@
+"""
+Unit tests for orion/query_planner.py
+"""
+
+# pylint: disable = missing-function-docstring
+# pylint: disable = import-error
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+from orion.fake_opensearch import FakeOpenSearch
+from orion.fetch_coordinator import FetchCoordinator
+from orion.matcher import Matcher
+from orion.query_planner import QueryPlanner
+
+CPU = {"metricName": "containerCPU", "metric_of_interest": "value", "agg": {"agg_type": "avg"}}
+
+
+def _make_match(delay=0.0):
+    match = MagicMock()
+    match.index = "bench-index"
+    match.uuid_field = "uuid"
+
+    def _rows(uuids, metrics_list, value_field):
+        time.sleep(delay)
+        return {
+            metric["name"]: [{"uuid": u, value_field: metric["metricName"]} for u in uuids]
+            for metric in metrics_list
+        }
+
+    match.get_agg_metrics_batch.side_effect = (
+        lambda uuids, metrics_list, timestamp_field="timestamp": _rows(uuids, metrics_list, "value_avg")
+    )
+    match.get_results_batch.side_effect = (
+        lambda uuids, metrics_list, timestamp_field="timestamp", trim_source=False:
+        _rows(uuids, metrics_list, "value")
+    )
+    return match
+
+
+def test_pairs_are_fetched_once():
+    match = _make_match()
+    planner = QueryPlanner()
+    first = planner.get_agg_metrics_batch(match, ["u1", "u2"], [dict(CPU, name="cpu")])
+    # Same query under another name, on overlapping runs
+    second = planner.get_agg_metrics_batch(match, ["u2", "u3"], [dict(CPU, name="kubelet", labels=["x"])])
+
+    assert [row["uuid"] for row in first["cpu"]] == ["u1", "u2"]
+    assert [row["uuid"] for row in second["kubelet"]] == ["u2", "u3"]
+    assert match.get_agg_metrics_batch.call_count == 2
+    assert match.get_agg_metrics_batch.call_args.args[0] == ["u3"]
+    assert planner.requested_pairs == 4
+    assert planner.fetched_pairs == 3
+    assert planner.dedup_ratio() == 4 / 3
+
+    planner.get_agg_metrics_batch(match, ["u1", "u3"], [dict(CPU, name="cpu")])
+    assert match.get_agg_metrics_batch.call_count == 2
+
+
+def test_different_filters_with_the_same_name_are_separate_specs():
+    match = _make_match()
+    planner = QueryPlanner()
+    planner.get_results_batch(match, ["u1"], [dict(CPU, name="cpu")])
+    result = planner.get_results_batch(match, ["u1"], [dict(CPU, name="cpu", metricName="etcdCPU")])
+    assert result["cpu"][0]["value"] == "etcdCPU"
+    # standard and aggregation queries never share rows
+    agg = planner.get_agg_metrics_batch(match, ["u1"], [dict(CPU, name="cpu")])
+    assert agg["cpu"][0]["value_avg"] == "containerCPU"
+    assert match.get_results_batch.call_count == 2
+
+
+def test_concurrent_requests_wait_for_the_fetching_thread():
+    match = _make_match(delay=0.2)
+    planner = QueryPlanner()
+    barrier = threading.Barrier(4)
+
+    def request(name):
+        barrier.wait()
+        return planner.get_results_batch(match, ["u1", "u2"], [dict(CPU, name=name)])
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(request, ["a", "b", "c", "d"]))
+    assert match.get_results_batch.call_count == 1
+    assert all(len(result[name]) == 2 for result, name in zip(results, "abcd"))
+
+
+def test_coordinator_fetches_through_planner():
+    match = _make_match()
+    planner = QueryPlanner()
+    planner.get_agg_metrics_batch(match, ["u1"], [dict(CPU, name="cpu")])
+    coordinator = FetchCoordinator(participants=1, planner=planner)
+    result = coordinator.get_agg_metrics_batch(match, ["u1", "u2"], [dict(CPU, name="cpu")])
+    assert sorted(row["uuid"] for row in result["cpu"]) == ["u1", "u2"]
+    assert match.get_agg_metrics_batch.call_args.args[0] == ["u2"]
+
+
+def test_plan_counts_distinct_specs():
+    tests = [
+        {"name": "a", "metrics": [dict(CPU, name="cpu", threshold=10), dict(CPU, name="etcd", metricName="etcd")]},
+        {"name": "b", "metrics": [dict(CPU, name="cpuUsage", direction=1)]},
+    ]
+    assert QueryPlanner().plan(tests) == 2
+
+
+def test_overlapping_filters_get_the_rows_of_their_own_batch():
+    store = FakeOpenSearch()
+    store.bulk_index("latency", [
+        {"uuid": f"u{run}", "timestamp": f"2026-01-0{run + 1}T00:00:00Z", "metricName": "podLatency",
+         "quantileName": quantile, "value": run * 10 + offset}
+        for run in range(4)
+        for offset, quantile in enumerate(("Ready", "Scheduled", "Initialized"))
+    ])
+    match = Matcher(index="latency", es=store.client())
+    ready = {"name": "ready", "metricName": "podLatency", "quantileName": "Ready", "metric_of_interest": "value"}
+    latency = {"name": "latency", "metricName": "podLatency", "metric_of_interest": "value"}
+    scheduled = {"name": "scheduled", "metricName": "podLatency", "quantileName": "Scheduled",
+                 "metric_of_interest": "value"}
+    # a document of several metrics goes to the first of them in its batch
+    requests = [
+        (["u0", "u1", "u2"], [ready, latency]),
+        (["u1", "u2", "u3"], [latency]),
+        (["u0", "u3"], [scheduled, latency, ready]),
+        (["u0", "u1", "u2", "u3"], [ready, scheduled, latency]),
+    ]
+
+    def values(result):
+        return {name: sorted(row["value"] for row in rows) for name, rows in result.items()}
+
+    unplanned = [values(match.get_results_batch(uuids, metrics)) for uuids, metrics in requests]
+    planner = QueryPlanner()
+    planned = [values(planner.get_results_batch(match, uuids, metrics)) for uuids, metrics in requests]
+    assert planned == unplanned
+    assert unplanned[0]["latency"] == [1, 2, 11, 12, 21, 22]
+    assert not unplanned[2]["ready"]
+    # the last batch only fetches the run its specs have not seen
+    assert planner.fetched_pairs < planner.requested_pairs
@@ -0,0 +1,171 @@
+"""
+Unit tests for orion/server.py and the --serve entry point
+"""
+
+# pylint: disable = missing-function-docstring
+# pylint: disable = import-error
+
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from main import main
+from orion.ack_providers import AckIndex
+from orion.logger import SingletonLogger
+from orion.server import OrionService, convert_options, create_server, prepare_job, run_service
+from orion.snapshot import save_snapshot
+
+CONFIG = """
+tests:
+  - name: snap-test
+    uuid_field: uuid
+    version_field: ocpVersion
+    metadata:
+      ocpVersion: '4.19'
+    metadata_columns: [jobName]
+    metrics:
+      - name: cpu
+        metric_of_interest: cpu
+        direction: 0
+"""
+
+
+def _base_kwargs(tmp_path):
+    kwargs = main.make_context("orion", ["--serve"]).params
+    kwargs["from_snapshot"] = str(tmp_path)
+    return kwargs
+
+
+def _save_data(tmp_path):
+    test = {"name": "snap-test", "uuid_field": "uuid", "version_field": "ocpVersion",
+            "metadata": {"ocpVersion": "4.19"}, "metadata_columns": ["jobName"]}
+    df = pd.DataFrame({
+        "uuid": [f"uuid-{i}" for i in range(6)],
+        "timestamp": [f"2024-01-0{i + 1}T00:00:00" for i in range(6)],
+        "ocpVersion": ["4.19"] * 6,
+        "jobName": ["job"] * 6,
+        "prs": [[] for _ in range(6)],
+        "cpu_avg": [10.0, 10.5, 9.5, 10.0, 10.2, np.nan],
+    })
+    metrics_config = {"cpu_avg": {
+        "name": "cpu", "metric_of_interest": "cpu", "labels": [], "direction": 0,
+        "threshold": 0, "correlation": "", "context": 5,
+    }}
+    save_snapshot(str(tmp_path), test, df, metrics_config)
+
+
+@pytest.fixture(name="service_url")
+def _service_url(tmp_path):
+    _save_data(tmp_path)
+    base = _base_kwargs(tmp_path)
+    logger = SingletonLogger.get_logger("Orion")
+    service = OrionService(base, lambda kwargs: prepare_job(kwargs, AckIndex([]), logger),
+                           lambda options: convert_options(options, base, main),
+                           workers=2, version="test", config_dir=str(tmp_path))
+    server = create_server(service, "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    service.shutdown()
+
+
+def _request(url, body=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(url, data=data, method="POST" if data else "GET")
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_job_returns_json_output(service_url):
+    assert _request(f"{service_url}/health") == (200, {"status": "ok", "version": "test"})
+    status, job = _request(f"{service_url}/jobs", {"config_content": CONFIG, "options": {"cmr": True}})
+    assert status == 202
+    status, job = _request(f"{service_url}/jobs/{job['id']}?wait=30")
+    assert status == 200
+    assert job["status"] == "done", job["error"]
+    assert job["exit_code"] in (0, 2)
+    rows = job["result"]["snap-test"]
+    assert rows and all("uuid" in row for row in rows)
+    _, jobs = _request(f"{service_url}/jobs")
+    assert jobs == [{"id": job["id"], "status": "done"}]
+
+
+def test_invalid_requests(service_url):
+    assert _request(f"{service_url}/jobs", {"options": {}})[0] == 400
+    status, body = _request(f"{service_url}/jobs", {"config": "x.yaml", "options": {"serve-port": 1}})
+    assert status == 400 and "serve-port" in body["error"]
+    status, body = _request(f"{service_url}/jobs", {"config": "x.yaml", "options": {"cmr": True, "cusum": True}})
+    assert status == 400 and "mutually exclusive" in body["error"]
+    # options reading, writing or unpickling files, or naming the server to query
+    for option in ("baseline-cache", "anomaly_model_dir", "incremental-state", "save-snapshot",
+                   "online-state", "from-snapshot", "record", "replay", "save-output-path",
+                   "es-server", "metadata-index"):
+        status, body = _request(f"{service_url}/jobs", {"config": "x.yaml", "options": {option: "/tmp/x"}})
+        assert status == 400 and option in body["error"]
+    assert _request(f"{service_url}/jobs/unknown")[0] == 404
+    # a config that does not load fails the job, not the service
+    _, job = _request(f"{service_url}/jobs", {"config": "missing.yaml"})
+    _, job = _request(f"{service_url}/jobs/{job['id']}?wait=30")
+    assert job["status"] == "failed" and job["exit_code"] == 1
+    assert _request(f"{service_url}/health")[0] == 200
+
+
+def test_config_paths_stay_in_the_config_directory(service_url, tmp_path):
+    (tmp_path / "config.yaml").write_text(CONFIG, encoding="utf-8")
+    status, job = _request(f"{service_url}/jobs", {"config": "config.yaml", "options": {"cmr": True}})
+    assert status == 202
+    _, job = _request(f"{service_url}/jobs/{job['id']}?wait=30")
+    assert job["status"] == "done", job["error"]
+    outside = tmp_path.parent / "outside.yaml"
+    outside.write_text(CONFIG, encoding="utf-8")
+    (tmp_path / "link.yaml").symlink_to(outside)
+    for config in ("../outside.yaml", str(outside), "link.yaml", "/etc/hostname"):
+        status, body = _request(f"{service_url}/jobs", {"config": config})
+        assert status == 400 and "outside the config directory" in body["error"]
+
+
+def test_config_paths_need_a_config_directory(tmp_path):
+    service = OrionService(_base_kwargs(tmp_path), None, lambda options: {}, workers=1)
+    try:
+        with pytest.raises(ValueError, match="config_content"):
+            service.submit({"config": "config.yaml"})
+    finally:
+        service.shutdown()
+
+
+def test_convert_options_as_the_command_line(tmp_path):
+    base = _base_kwargs(tmp_path)
+    converted = convert_options(
+        {"--hunter-analyze": True, "lookback": "5d", "input_vars": {"version": "4.19"},
+         "pull-number": 1234, "display": "buildUrl,ocpVirt"},
+        base, main,
+    )
+    assert converted["hunter_analyze"] is True
+    assert converted["cmr"] is False and converted["algorithms"] == []
+    assert converted["input_vars"] == {"version": "4.19"}
+    assert converted["pull_number"] == (1234,)
+    assert converted["display"] == ["buildUrl", "ocpVirt"]
+    with pytest.raises(ValueError, match="lookback_size"):
+        convert_options({"lookback_size": "many"}, base, main)
+    with pytest.raises(ValueError, match="algorithms"):
+        convert_options({"algorithms": "nope"}, base, main)
+
+
+def test_run_service_reports_a_busy_port(tmp_path):
+    busy = create_server(OrionService({}, None, None, workers=1), "127.0.0.1", 0)
+    kwargs = _base_kwargs(tmp_path)
+    kwargs["serve_port"] = busy.server_address[1]
+    try:
+        assert run_service(kwargs, SingletonLogger.get_logger("Orion"), main) == 1
+    finally:
+        busy.server_close()
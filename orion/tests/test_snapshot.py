@@ -0,0 +1,147 @@
+"""
+Unit tests for orion/snapshot.py
+"""
+
+# pylint: disable = missing-function-docstring
+# pylint: disable = import-error
+
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from orion.run_test import analyze
+from orion.snapshot import (
+    load_snapshot,
+    save_snapshot,
+    snapshot_path,
+    snapshot_run_type,
+)
+
+
+def _make_test(name="snap-test", job_type="periodic", pull_number=0):
+    return {
+        "name": name,
+        "uuid_field": "uuid",
+        "version_field": "ocpVersion",
+        "metadata": {"jobType": job_type, "pullNumber": pull_number},
+        "metadata_columns": ["jobName"],
+        "metrics": [{"name": "cpu", "metric_of_interest": "cpu", "direction": 0}],
+    }
+
+
+def _make_dataframe():
+    return pd.DataFrame({
+        "uuid": ["uuid-1", "uuid-2", "uuid-3"],
+        "timestamp": [
+            "2024-01-01T00:00:00", "2024-01-02T00:00:00", "2024-01-03T00:00:00"
+        ],
+        "ocpVersion": ["4.19", "4.19", "4.20"],
+        "jobName": ["job", "job", "job"],
+        "prs": [["pr-1"], [], ["pr-2", "pr-3"]],
+        "cpu_avg": [10.0, np.nan, 30.0],
+    })
+
+
+def _make_metrics_config():
+    return {
+        "cpu_avg": {
+            "name": "cpu",
+            "metric_of_interest": "cpu",
+            "labels": None,
+            "direction": 0,
+            "threshold": 0,
+            "correlation": "",
+            "timestamp": "timestamp",
+            "context": 5,
+        }
+    }
+
+
+def test_snapshot_run_type():
+    assert snapshot_run_type(_make_test()) == ""
+    assert snapshot_run_type(_make_test(job_type="pull", pull_number=42)) == "pull_42"
+
+
+def test_snapshot_path_sanitizes_name(tmp_path):
+    path = snapshot_path(str(tmp_path), "a/b c", "pull_1")
+    assert path == os.path.join(str(tmp_path), "a_b_c_pull_1.json")
+
+
+def test_save_and_load_round_trip(tmp_path):
+    test = _make_test()
+    df = _make_dataframe()
+    save_snapshot(str(tmp_path), test, df, _make_metrics_config())
+
+    loaded_test = _make_test()
+    loaded_test.pop("metadata_columns")
+    loaded_df, metrics_config = load_snapshot(str(tmp_path), loaded_test)
+
+    pd.testing.assert_frame_equal(loaded_df, df)
+    assert metrics_config == _make_metrics_config()
+    assert loaded_test["metadata_columns"] == ["jobName"]
+
+
+def test_pull_snapshots_are_kept_apart(tmp_path):
+    save_snapshot(str(tmp_path), _make_test(), _make_dataframe(), _make_metrics_config())
+    loaded_df, metrics_config = load_snapshot(
+        str(tmp_path), _make_test(job_type="pull", pull_number=7)
+    )
+    assert loaded_df is None
+    assert metrics_config is None
+
+
+def test_analyze_from_snapshot_skips_opensearch(tmp_path):
+    test = _make_test()
+    df = _make_dataframe().dropna().reset_index(drop=True)
+    save_snapshot(str(tmp_path), test, df, _make_metrics_config())
+
+    kwargs = {
+        "from_snapshot": str(tmp_path),
+        "hunter_analyze": False,
+        "anomaly_detection": False,
+        "cmr": True,
+        "ackMap": None,
+        "collapse": False,
+    }
+    with patch("orion.run_test.Matcher") as matcher_cls, \
+            patch("orion.run_test.Utils") as utils_cls:
+        analysis, viz_data = analyze(_make_test(), kwargs)
+
+    matcher_cls.assert_not_called()
+    utils_cls.assert_not_called()
+    assert viz_data is None
+    assert analysis.test_name == "snap-test"
+    assert analysis.regression_flag
+    assert len(analysis.change_points_by_metric["cpu_avg"]) == 1
+
+
+def test_analyze_from_snapshot_uses_the_changed_threshold(tmp_path):
+    runs = 20
+    df = pd.DataFrame({
+        "uuid": [f"uuid-{i}" for i in range(runs)],
+        "timestamp": [f"2024-01-{i + 1:02d}T00:00:00" for i in range(runs)],
+        "ocpVersion": ["4.19"] * runs,
+        "jobName": ["job"] * runs,
+        "prs": [[] for _ in range(runs)],
+        # a 10% regression at run 14
+        "cpu_avg": [100.0 + (i % 3) * 0.5 for i in range(14)] + [110.0 + (i % 3) * 0.5 for i in range(6)],
+    })
+    save_snapshot(str(tmp_path), _make_test(), df, _make_metrics_config())
+    kwargs = {
+        "from_snapshot": str(tmp_path),
+        "hunter_analyze": True,
+        "anomaly_detection": False,
+        "cmr": False,
+        "ackMap": None,
+        "collapse": False,
+    }
+    analysis, _ = analyze(_make_test(), kwargs)
+    assert [cp.index for cp in analysis.change_points_by_metric["cpu_avg"]] == [14]
+
+    # the threshold was raised after the snapshot was taken
+    test = _make_test()
+    test["metrics"][0]["threshold"] = 20
+    analysis, _ = analyze(test, kwargs)
+    assert not analysis.change_points_by_metric["cpu_avg"]
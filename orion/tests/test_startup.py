@@ -0,0 +1,97 @@
+"""
+Startup benchmark for main.py
+
+`python -X importtime` reports the cumulative import time of every module.
+The CLI module itself must stay light: the analysis, output and ACK
+subsystems are imported by the code paths that use them.
+"""
+
+# pylint: disable = missing-function-docstring
+
+import os
+import re
+import subprocess
+import sys
+import time
+
+import pytest
+
+# Budget for `import main`, in microseconds. Importing the heavy subsystems
+# eagerly took over a second.
+IMPORT_BUDGET_US = 500_000
+
+# Budget for a whole `main.py --help` or `--version` process, in seconds,
+# interpreter startup included. With the heavy subsystems it took over 0.7s.
+# Wall-clock time depends on the machine, so it is only checked when
+# ORION_STARTUP_TIMING is set.
+CLI_BUDGET_S = 0.6
+
+HEAVY_MODULES = ("pandas", "numpy", "otava", "sklearn", "plotly", "opensearchpy", "jira")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _python(*args):
+    return subprocess.run(
+        [sys.executable, *args], check=True, cwd=REPO_ROOT,
+        capture_output=True, text=True,
+    )
+
+
+def _imported_modules(stderr):
+    return {match.group(1) for match in re.finditer(r"^import time:.*\|\s*(\S+)\s*$", stderr, re.MULTILINE)}
+
+
+def _cumulative_import_time(stderr, module):
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s*\d+\s*\|\s*(\d+)\s*\|\s*(\S+)\s*$", line)
+        if match and match.group(2) == module:
+            return int(match.group(1))
+    raise AssertionError(f"{module} not found in -X importtime output")
+
+
+def test_import_main_within_budget():
+    result = _python("-X", "importtime", "-c", "import main")
+    assert _cumulative_import_time(result.stderr, "main") < IMPORT_BUDGET_US
+
+
+def test_import_main_skips_heavy_modules():
+    code = (
+        "import sys\n"
+        "import main\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    assert _python("-c", code).stdout.strip() == ""
+
+
+def test_report_mode_skips_analysis_modules():
+    code = (
+        "import sys\n"
+        "from orion.reporting.standalone import generate_report, load_json_files\n"
+        "assert 'otava' not in sys.modules and 'pandas' not in sys.modules\n"
+        "from orion.reporting import ReportType\n"
+        "assert 'otava' in sys.modules\n"
+    )
+    _python("-c", code)
+
+
+def test_version_option():
+    from version import __version__  # pylint: disable=import-outside-toplevel
+    result = _python("main.py", "--version")
+    assert result.returncode == 0
+    assert result.stdout.strip() == f"main.py {__version__}"
+
+
+@pytest.mark.parametrize("option", ["--version", "--help"])
+def test_cli_skips_heavy_modules(option):
+    result = _python("-X", "importtime", "main.py", option)
+    assert result.returncode == 0 and result.stdout
+    assert not set(HEAVY_MODULES) & _imported_modules(result.stderr)
+
+
+@pytest.mark.skipif(not os.environ.get("ORION_STARTUP_TIMING"), reason="set ORION_STARTUP_TIMING to check wall-clock time")
+@pytest.mark.parametrize("option", ["--version", "--help"])
+def test_cli_starts_within_budget(option):
+    start = time.perf_counter()
+    _python("main.py", option)
+    assert time.perf_counter() - start < CLI_BUDGET_S
@@ -8,6 +8,7 @@ Unit tests for orion/utils.py
 # pylint: disable = missing-class-docstring
 
 import logging
+from unittest.mock import MagicMock
 
 import pandas as pd
 import pytest
@@ -85,3 +86,115 @@ class TestStandardizeTimestamp:
         ts = pd.Timestamp("2024-03-15 08:00:00", tz="UTC")
         result = utils.standardize_timestamp(ts)
         assert result == "2024-03-15T08:00:00"
+
+
+# ---------------------------------------------------------------------------
+# expand_window
+# ---------------------------------------------------------------------------
+
+def _expand_options(**overrides):
+    options = {
+        "uuid": "",
+        "baseline": "",
+        "benchmark_index": "bench-index",
+        "metadata_index": "meta-index",
+        "node_count": False,
+        "display": [],
+        "convert_tinyurl": False,
+        "save_data_path": "data.csv",
+    }
+    options.update(overrides)
+    return options
+
+
+def _expand_test():
+    return {
+        "name": "expand-test",
+        "metadata": {"platform": "AWS"},
+        "metrics": [{
+            "name": "cpu",
+            "metricName": "containerCPU",
+            "metric_of_interest": "value",
+            "labels": None,
+            "direction": 1,
+            "threshold": 0,
+            "timestamp": "timestamp",
+            "correlation": "",
+            "context": 5,
+        }],
+    }
+
+
+def _current_dataframe():
+    # Timestamps already converted to epoch seconds by the algorithm
+    return pd.DataFrame({
+        "uuid": ["u3", "u4"],
+        "cpu_value": [3.0, 4.0],
+        "timestamp": [1704240000, 1704326400],  # 2024-01-03, 2024-01-04
+        "ocpVersion": ["4.20", "4.20"],
+        "prs": [[], []],
+    })
+
+
+def _expand_match_mock(runs):
+    match = MagicMock()
+    match.get_uuid_by_metadata.return_value = runs
+    match.get_results_batch.return_value = {"cpu": [
+        {"uuid": "u1", "timestamp": "2024-01-01T00:00:00Z", "value": 1.0},
+        {"uuid": "u2", "timestamp": "2024-01-02T00:00:00Z", "value": 2.0},
+    ]}
+    match.get_results.return_value = [
+        {"uuid": "u1", "ocpVersion": "4.19"},
+        {"uuid": "u2", "ocpVersion": "4.19"},
+    ]
+
+    def _convert_to_df(data, columns=None, timestamp_field="timestamp"):
+        df = pd.json_normalize(data).sort_values(by=[timestamp_field])
+        return pd.DataFrame(df, columns=columns) if columns is not None else df
+
+    match.convert_to_df.side_effect = _convert_to_df
+    return match
+
+
+class TestExpandWindow:
+    def test_fetches_only_older_runs(self, utils):
+        runs = [
+            {"uuid": "u3", "buildUrl": "b3"},
+            {"uuid": "u2", "buildUrl": "b2"},
+            {"uuid": "u1", "buildUrl": "b1"},
+        ]
+        match = _expand_match_mock(runs)
+        utils.sippy_pr_search = MagicMock(return_value=[])
+
+        expanded = utils.expand_window(
+            _expand_test(), match, _expand_options(), _current_dataframe(), "", 2
+        )
+
+        _, kwargs = match.get_uuid_by_metadata.call_args
+        assert kwargs["lookback_size"] == 3
+        assert kwargs["since_date"].isoformat() == "2024-01-03T00:00:00"
+        fetched_uuids = match.get_results_batch.call_args[0][0]
+        assert sorted(fetched_uuids) == ["u1", "u2"]
+        assert list(expanded["uuid"]) == ["u1", "u2", "u3", "u4"]
+        assert list(expanded["cpu_value"]) == [1.0, 2.0, 3.0, 4.0]
+        assert list(expanded["timestamp"]) == [
+            "2024-01-01T00:00:00", "2024-01-02T00:00:00",
+            "2024-01-03T00:00:00", "2024-01-04T00:00:00",
+        ]
+
+    def test_no_older_runs_returns_none(self, utils):
+        match = _expand_match_mock([{"uuid": "u3", "buildUrl": "b3"}])
+        expanded = utils.expand_window(
+            _expand_test(), match, _expand_options(), _current_dataframe(), "", 5
+        )
+        assert expanded is None
+        match.get_results_batch.assert_not_called()
+
+    def test_baseline_is_not_expanded(self, utils):
+        match = _expand_match_mock([])
+        expanded = utils.expand_window(
+            _expand_test(), match, _expand_options(baseline="u1,u2"),
+            _current_dataframe(), "", 5
+        )
+        assert expanded is None
+        match.get_uuid_by_metadata.assert_not_called()
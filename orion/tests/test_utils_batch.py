@@ -16,7 +16,7 @@ import pandas as pd
 import pytest
 
 from orion.logger import SingletonLogger
-from orion.utils import Utils
+from orion.utils import MetricFrameBuffer, Utils
 
 
 # ---------------------------------------------------------------------------
@@ -406,7 +406,8 @@ class TestMetadataPopBeforeBatch:
         metric = _std_metric("checkPopStd")
         metrics = [copy.deepcopy(metric)]
 
-        def capture_batch_args(_uuids, metrics_list, _ts_field):
+        def capture_batch_args(_uuids, metrics_list, _ts_field, trim_source=False):
+            assert not trim_source
             for m in metrics_list:
                 assert "labels" not in m, "labels should be popped"
                 assert "direction" not in m, "direction should be popped"
@@ -671,7 +672,7 @@ class TestCustomTimestampBatch:
 
         captured_ts = {}
 
-        def capture_ts(_uuids, _chunk, ts_field):
+        def capture_ts(_uuids, _chunk, ts_field, trim_source=False):  # pylint: disable = unused-argument
             captured_ts["value"] = ts_field
             return {"latMetric": _std_batch_data()}
 
@@ -731,3 +732,45 @@ class TestCustomTimestampBatch:
         assert match_mock.get_agg_metrics_batch.call_count == 1
         assert ts_fields_seen == ["iso_timestamp"]
         assert len(df_list) == 2
+
+
+# ---------------------------------------------------------------------------
+# Tests: streaming mode
+# ---------------------------------------------------------------------------
+
+class TestStreamMetrics:
+
+    def test_stream_trims_source_and_buffers(self, utils, match_mock):
+        metrics = [copy.deepcopy(_std_metric("lat1")), copy.deepcopy(_agg_metric("cpuA"))]
+        match_mock.get_results_batch.return_value = {"lat1": _std_batch_data()}
+        match_mock.get_agg_metrics_batch.return_value = {"cpuA": _agg_batch_data()}
+
+        buffer, config, _ = utils.get_metric_data(
+            UUIDS, metrics, match_mock, test_threshold=0, stream=True
+        )
+
+        assert isinstance(buffer, MetricFrameBuffer)
+        assert len(buffer) == 2
+        assert match_mock.get_results_batch.call_args.kwargs["trim_source"] is True
+        assert set(config) == {"lat1_value", "cpuA_avg"}
+
+    def test_buffer_matches_list_assembly(self, utils, match_mock):
+        def _run(stream):
+            metrics = [
+                copy.deepcopy(_agg_metric("cpuA")),
+                copy.deepcopy(_std_metric("lat1")),
+                copy.deepcopy(_std_metric("lat2", metric_of_interest="ms")),
+            ]
+            match_mock.get_agg_metrics_batch.return_value = {"cpuA": _agg_batch_data()}
+            match_mock.get_results_batch.return_value = {
+                "lat1": _std_batch_data(),
+                "lat2": _std_batch_data(metric_of_interest="ms")[:1],
+            }
+            frames, _, _ = utils.get_metric_data(
+                UUIDS, metrics, match_mock, test_threshold=0, stream=stream
+            )
+            runs = [{"uuid": u, "buildUrl": f"http://ci/{u}"} for u in UUIDS]
+            options = {"display": [], "convert_tinyurl": False}
+            return utils._assemble_dataframe(frames, runs, {}, {}, {}, options)
+
+        pd.testing.assert_frame_equal(_run(stream=True), _run(stream=False))
@@ -0,0 +1,116 @@
+"""
+Unit tests for orion/watch.py and the --watch entry point
+"""
+
+# pylint: disable = missing-function-docstring
+# pylint: disable = import-error
+
+import json
+from unittest.mock import MagicMock, patch
+
+from opensearch_dsl import Search
+
+from main import main
+from orion.logger import SingletonLogger
+from orion.matcher import Matcher
+from orion.run_test import TestResults
+from orion.watch import Watermarks, find_new_runs, run_watch
+
+CONFIG = """
+tests:
+  - name: node-density
+    metadata:
+      benchmark.keyword: node-density
+    metrics: []
+  - name: cluster-density
+    metadata:
+      benchmark.keyword: cluster-density-v2
+    metrics: []
+"""
+
+
+def _test(name, benchmark):
+    return {"name": name, "uuid_field": "uuid", "version_field": "ocpVersion",
+            "metadata": {"benchmark.keyword": benchmark}}
+
+
+def test_watermarks_are_persisted(tmp_path):
+    test = _test("node-density", "node-density")
+    key = Watermarks.key(test, "perf-scale-ci")
+    marks = Watermarks(str(tmp_path))
+    marks.set(key, "2024-01-02T00:00:00Z")
+    marks.save()
+    assert Watermarks(str(tmp_path)).get(key) == "2024-01-02T00:00:00Z"
+    # another metadata matches other runs, and starts over
+    assert Watermarks.key(_test("node-density", "node-density-cni"), "perf-scale-ci") != key
+    assert Watermarks.key(test, "other-index") != key
+
+
+def test_idle_tests_cost_one_count_query():
+    tests = [_test("a", "a"), _test("b", "b"), _test("c", "c")]
+    marks = Watermarks()
+    marks.set(Watermarks.key(tests[0]), "2024-01-01T00:00:00Z")
+    marks.set(Watermarks.key(tests[1]), "2024-01-01T00:00:00Z")
+    matcher = MagicMock()
+    matcher.count_runs_since.side_effect = [0, 2]
+    matcher.latest_run_timestamp.return_value = "2024-01-03T00:00:00Z"
+
+    pending = find_new_runs(tests, lambda test: matcher, marks)
+
+    assert [(test["name"], latest) for test, _, latest in pending] == [
+        ("b", "2024-01-03T00:00:00Z"), ("c", "2024-01-03T00:00:00Z"),
+    ]
+    assert matcher.count_runs_since.call_count == 2
+    assert matcher.count_runs_since.call_args.args[1] == "2024-01-01T00:00:00Z"
+    assert matcher.latest_run_timestamp.call_count == 2
+
+
+def test_count_runs_since_filters_on_the_watermark():
+    matcher = Matcher(index="perf-scale-ci", es=MagicMock())
+    with patch.object(Search, "count", autospec=True, return_value=4) as count:
+        assert matcher.count_runs_since({"benchmark.keyword": "node-density"}, "2024-01-01T00:00:00Z") == 4
+    query = count.call_args.args[0].to_dict()["query"]["bool"]
+    assert query["must"] == [{"match": {"benchmark.keyword": "node-density"}}]
+    assert query["filter"] == [{"range": {"timestamp": {"gt": "2024-01-01T00:00:00Z"}}}]
+
+
+def _fake_run(**kwargs):
+    name = kwargs["config"]["tests"][0]["name"]
+    return (
+        TestResults(analyses=[name], regression_flag=False, prs=[], viz_data=[]),
+        TestResults(analyses=[], regression_flag=False, prs=[], viz_data=[]),
+        {},
+    )
+
+
+def test_watch_analyzes_only_tests_with_new_runs(tmp_path):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(CONFIG, encoding="utf-8")
+    kwargs = main.make_context("orion", ["--watch", "--config", str(config_path)]).params
+    kwargs.update(
+        es_server="https://localhost:9200", metadata_index="perf-scale-ci",
+        watch_interval=0, watch_state=str(tmp_path / "state"),
+    )
+    counts = {"node-density": 0, "cluster-density-v2": 1}
+    with patch("orion.matcher.Matcher.create_client", return_value=object()), \
+            patch("orion.matcher.Matcher.count_runs_since",
+                  side_effect=lambda metadata, *args: counts[metadata["benchmark.keyword"]]) as count, \
+            patch("orion.matcher.Matcher.latest_run_timestamp", return_value="2024-01-05T00:00:00Z"), \
+            patch("orion.fleet.run", side_effect=_fake_run) as run_mock, \
+            patch("orion.watch.write_results", return_value=0) as write_results:
+        assert run_watch(kwargs, SingletonLogger.get_logger("Orion"), cycles=2) == 0
+
+    analyzed = [c.kwargs["config"]["tests"][0]["name"] for c in run_mock.call_args_list]
+    # the first cycle analyzes every test, the second only the one with new runs
+    assert sorted(analyzed[:2]) == ["cluster-density", "node-density"]
+    assert analyzed[2:] == ["cluster-density"]
+    assert count.call_count == 2
+    assert write_results.call_count == 3
+    with open(tmp_path / "state" / "watermarks.json", encoding="utf-8") as marks_file:
+        assert set(json.load(marks_file).values()) == {"2024-01-05T00:00:00Z"}
+
+
+def test_watch_rejects_pr_analysis(tmp_path):
+    kwargs = main.make_context("orion", ["--watch", "--config", "x.yaml", "--pr-analysis"]).params
+    kwargs["watch_state"] = str(tmp_path)
+    assert run_watch(kwargs, SingletonLogger.get_logger("Orion"), cycles=1) == 1
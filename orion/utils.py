@@ -1,5 +1,5 @@
 # pylint: disable=cyclic-import
-# pylint: disable = line-too-long, too-many-arguments, consider-using-enumerate, broad-exception-caught
+# pylint: disable = line-too-long, too-many-lines, too-many-arguments, consider-using-enumerate, broad-exception-caught
 """
 module for all utility functions orion uses
 """
@@ -11,7 +11,6 @@ import urllib.parse
 import xml.etree.ElementTree as ET
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
-from functools import reduce
 from typing import List, Any, Dict, Tuple
 import pandas as pd
 import requests
@@ -21,6 +20,55 @@ from orion.config import expand_group_by
 from orion.matcher import Matcher
 from orion.logger import SingletonLogger
 from orion.constants import BATCH_METRIC_CHUNK_SIZE
+from orion.snapshot import save_snapshot
+
+
+class MetricFrameBuffer:
+    """Merges per-metric dataframes on the run uuid as they arrive
+
+    Only the merged per-run values and a uuid to timestamp map are kept, so a
+    metric dataframe can be released as soon as it has been appended.
+
+    Args:
+        uuid_field (str): field holding the run UUID
+    """
+
+    def __init__(self, uuid_field: str = "uuid"):
+        self.uuid_field = uuid_field
+        self.frames = 0
+        self.merged = None
+        self.timestamps = {}
+
+    def __len__(self) -> int:
+        return self.frames
+
+    def append(self, df: pd.DataFrame) -> None:
+        """Fold one metric dataframe into the buffer
+
+        Args:
+            df (pd.DataFrame): metric dataframe with a uuid and timestamp column
+        """
+        if "timestamp" in df.columns:
+            for uuid, timestamp in zip(df[self.uuid_field], df["timestamp"]):
+                self.timestamps.setdefault(uuid, timestamp)
+            df = df.drop(columns=["timestamp"])
+        if self.merged is None:
+            self.merged = df
+        else:
+            self.merged = pd.merge(self.merged, df, on=self.uuid_field, how="outer")
+        self.frames += 1
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Return the merged metrics with the first timestamp seen for each run
+
+        Returns:
+            pd.DataFrame: one column per metric plus uuid and timestamp
+        """
+        uuid_timestamp_map = pd.DataFrame({
+            self.uuid_field: list(self.timestamps.keys()),
+            "timestamp": list(self.timestamps.values()),
+        })
+        return self.merged.merge(uuid_timestamp_map, on=self.uuid_field, how="left")
 
 
 class Utils:
@@ -38,10 +86,13 @@ class Utils:
         self.uuid_field = uuid_field
         self.version_field = version_field
         self.logger = SingletonLogger.get_logger("Orion")
+        # Optional FetchCoordinator shared with concurrent analyses
+        self.coordinator = None
 
     # pylint: disable=too-many-locals
     def get_metric_data(
-        self, uuids: List[str], metrics: Dict[str, Any], match: Matcher, test_threshold: int, timestamp_field: str="timestamp"
+        self, uuids: List[str], metrics: Dict[str, Any], match: Matcher, test_threshold: int, timestamp_field: str="timestamp",
+        stream: bool = False
     ) -> Tuple[List[pd.DataFrame], Dict[str, Any], List[str]]:
         """Gets details metrics based on metric yaml list
 
@@ -51,11 +102,14 @@ class Utils:
             match (Matcher): current matcher instance
             test_threshold (int): default threshold for metrics
             timestamp_field (str): field name for timestamps
+            stream (bool): merge each metric into a MetricFrameBuffer as soon
+                as its chunk is fetched and only fetch the fields needed
 
         Returns:
-            tuple: (dataframe_list, metrics_config, metadata_columns)
+            tuple: (dataframe_list, metrics_config, metadata_columns), where
+                dataframe_list is a MetricFrameBuffer when stream is set
         """
-        dataframe_list = []
+        dataframe_list = MetricFrameBuffer(self.uuid_field) if stream else []
         metrics_config = {}
         metadata_columns = []
         global_timestamp_field = timestamp_field
@@ -98,7 +152,7 @@ class Utils:
                 self._process_std_batch(
                     uuids, group, match, meta_by_name,
                     dataframe_list, metrics_config, ts_field,
-                    metadata_columns
+                    metadata_columns, trim_source=stream
                 )
 
         return dataframe_list, metrics_config, metadata_columns
@@ -140,9 +194,14 @@ class Utils:
                     "Batching aggregation metrics chunk %d-%d of %d",
                     i + 1, i + len(chunk), len(agg_metrics),
                 )
-                batch_results = match.get_agg_metrics_batch(
-                    uuids, chunk, timestamp_field
-                )
+                if self.coordinator is not None:
+                    batch_results = self.coordinator.get_agg_metrics_batch(
+                        match, uuids, chunk, timestamp_field
+                    )
+                else:
+                    batch_results = match.get_agg_metrics_batch(
+                        uuids, chunk, timestamp_field
+                    )
                 for metric in chunk:
                     name = metric["name"]
                     data = batch_results.get(name, [])
@@ -180,7 +239,7 @@ class Utils:
 
     def _process_std_batch(self, uuids, std_metrics, match, meta_by_name,
                            dataframe_list, metrics_config, timestamp_field,
-                           metadata_columns=None):
+                           metadata_columns=None, trim_source=False):
         """Batch standard metrics into chunked ES queries with fallback."""
         for i in range(0, len(std_metrics), BATCH_METRIC_CHUNK_SIZE):
             chunk = std_metrics[i:i + BATCH_METRIC_CHUNK_SIZE]
@@ -189,9 +248,14 @@ class Utils:
                     "Batching standard metrics chunk %d-%d of %d",
                     i + 1, i + len(chunk), len(std_metrics),
                 )
-                batch_results = match.get_results_batch(
-                    uuids, chunk, timestamp_field
-                )
+                if self.coordinator is not None:
+                    batch_results = self.coordinator.get_results_batch(
+                        match, uuids, chunk, timestamp_field, trim_source=trim_source
+                    )
+                else:
+                    batch_results = match.get_results_batch(
+                        uuids, chunk, timestamp_field, trim_source=trim_source
+                    )
                 for metric in chunk:
                     name = metric["name"]
                     data = batch_results.get(name, [])
@@ -585,30 +649,51 @@ class Utils:
 
         metrics = test["metrics"]
         dataframe_list, metrics_config, metadata_columns = self.get_metric_data(
-            uuids, metrics, match, test_threshold, timestamp_field
+            uuids, metrics, match, test_threshold, timestamp_field,
+            stream=options.get("stream_metrics", False),
         )
         test["metadata_columns"] = metadata_columns
         if not dataframe_list:
             return None, metrics_config
 
-        uuid_timestamp_map = pd.DataFrame()
-        for df in dataframe_list:
-            if "timestamp" in df.columns:
-                uuid_timestamp_map = pd.concat(
-                    [uuid_timestamp_map, df[[self.uuid_field, "timestamp"]].drop_duplicates()]
-                )
-        uuid_timestamp_map = uuid_timestamp_map.drop_duplicates(subset=[self.uuid_field])
+        merged_df = self._assemble_dataframe(
+            dataframe_list, runs, buildUrls, versions, prs, options
+        )
+        # save the dataframe
+        output_file_path = f"{options['save_data_path'].split('.')[0]}-{test['name']}.csv"
+        match.save_results(merged_df, csv_file_path=output_file_path)
+        if options.get("save_snapshot"):
+            save_snapshot(options["save_snapshot"], test, merged_df, metrics_config)
+        return merged_df, metrics_config
 
-        for i, df in enumerate(dataframe_list):
-            dataframe_list[i] = df.drop(columns=["timestamp"], errors="ignore")
+    def _assemble_dataframe(
+        self,
+        dataframe_list: List[pd.DataFrame],
+        runs: List[Dict[str, Any]],
+        buildUrls: Dict[str, str],
+        versions: Dict[str, Any],
+        prs: Dict[str, List[str]],
+        options: Dict[str, Any],
+    ) -> pd.DataFrame:
+        """Merge per-metric dataframes on uuid and add run metadata columns
 
-        merged_df = reduce(
-            lambda left, right: pd.merge(left, right, on=self.uuid_field, how="outer"),
-            dataframe_list,
-        )
+        Args:
+            dataframe_list (list): per-metric dataframes or a MetricFrameBuffer
+            runs (list): runs returned by the metadata lookup
+            buildUrls (dict): uuid to build url
+            versions (dict): uuid to version
+            prs (dict): uuid to list of PRs
+            options (dict): options for the run
 
-        merged_df = merged_df.merge(uuid_timestamp_map, on=self.uuid_field, how="left")
-        merged_df = merged_df.sort_values(by="timestamp")
+        Returns:
+            pd.DataFrame: merged dataframe sorted by timestamp
+        """
+        if not isinstance(dataframe_list, MetricFrameBuffer):
+            buffer = MetricFrameBuffer(self.uuid_field)
+            for df in dataframe_list:
+                buffer.append(df)
+            dataframe_list = buffer
+        merged_df = dataframe_list.to_dataframe().sort_values(by="timestamp")
 
         if len(versions) > 0 :
             merged_df.loc[:, self.version_field] = merged_df[self.uuid_field].apply(
@@ -628,11 +713,96 @@ class Utils:
             merged_df.loc[:, "buildUrl"] = merged_df[self.uuid_field].apply(
                 lambda uuid: shortened.get(uuid, buildUrls[uuid])
             )
-        merged_df = merged_df.reset_index(drop=True)
-        # save the dataframe
+        return merged_df.reset_index(drop=True)
+
+    def expand_window(
+        self,
+        test: Dict[str, Any],
+        match: Matcher,
+        options: Dict[str, Any],
+        dataframe: pd.DataFrame,
+        start_timestamp: datetime,
+        extra_points: int,
+    ) -> pd.DataFrame:
+        """Prepend up to extra_points runs older than the oldest run in dataframe
+
+        Only the older runs are looked up and only their metrics are fetched;
+        the runs already in dataframe are reused as they are.
+
+        Args:
+            test (dict): test configuration, already processed by process_test
+            match (Matcher): the matcher object
+            options (dict): options for the run
+            dataframe (pd.DataFrame): dataframe returned by process_test
+            start_timestamp (datetime): lower bound for the older runs, if any
+            extra_points (int): maximum number of older runs to add
+
+        Returns:
+            pd.DataFrame: expanded dataframe, or None when there is nothing to add
+        """
+        if options["baseline"] not in ("", None):
+            self.logger.info("Window expansion: baseline UUIDs are fixed, nothing to expand")
+            return None
+        test_threshold = test.get("threshold", 0)
+        timestamp_field = test.get("timestamp", "timestamp")
+        current_df = dataframe.copy()
+        if pd.api.types.is_numeric_dtype(current_df["timestamp"]):
+            current_df["timestamp"] = pd.to_datetime(
+                current_df["timestamp"], unit="s"
+            ).dt.strftime("%Y-%m-%dT%H:%M:%S")
+        oldest_timestamp = pd.to_datetime(current_df["timestamp"]).min().to_pydatetime()
+        known_uuids = set(current_df[self.uuid_field])
+
+        match.index = options.get("metadata_index") or test.get("metadata_index")
+        metadata = (
+            self.extract_metadata_from_test(test)
+            if options["uuid"] in ("", None)
+            else self.get_metadata_with_uuid(options["uuid"], match)
+        )
+        # One extra run covers the oldest known run, whose metadata timestamp
+        # can precede the timestamp of its metrics.
+        runs = match.get_uuid_by_metadata(
+            metadata,
+            lookback_date=start_timestamp,
+            lookback_size=extra_points + 1,
+            timestamp_field=timestamp_field,
+            additional_fields=options.get("display", []),
+            since_date=oldest_timestamp,
+        )
+        runs = [run for run in runs if run[self.uuid_field] not in known_uuids][:extra_points]
+        if not runs:
+            self.logger.info("Window expansion: no runs older than %s", oldest_timestamp)
+            return None
+        uuids = list(dict.fromkeys(run[self.uuid_field] for run in runs))
+        buildUrls = {run[self.uuid_field]: run["buildUrl"] for run in runs}
+        versions, prs = self.map_prs_version(uuids, match, timestamp_field)
+        match.index = options.get("benchmark_index") or test.get("benchmark_index")
+        uuids = self.filter_uuids_on_index(
+            metadata,
+            options["benchmark_index"],
+            uuids,
+            match,
+            options["baseline"],
+            options["node_count"],
+        )
+        if not uuids:
+            return None
+        self.logger.info("Window expansion: fetching metrics for %d older runs", len(uuids))
+        dataframe_list, _, _ = self.get_metric_data(
+            uuids, test["metrics"], match, test_threshold, timestamp_field,
+            stream=options.get("stream_metrics", False),
+        )
+        if not dataframe_list:
+            return None
+        older_df = self._assemble_dataframe(
+            dataframe_list, runs, buildUrls, versions, prs, options
+        )
+        older_df = older_df[older_df[self.uuid_field].isin(uuids)]
+        expanded_df = pd.concat([older_df, current_df], ignore_index=True)
+        expanded_df = expanded_df.sort_values(by="timestamp").reset_index(drop=True)
         output_file_path = f"{options['save_data_path'].split('.')[0]}-{test['name']}.csv"
-        match.save_results(merged_df, csv_file_path=output_file_path)
-        return merged_df, metrics_config
+        match.save_results(expanded_df, csv_file_path=output_file_path)
+        return expanded_df
 
 
     def shorten_urls_batch(self, urls_by_uuid: Dict[str, str]) -> Dict[str, str]:
@@ -886,11 +1056,13 @@ def generate_tabular_output(data: list, metric_name: str, uuid_field: str = "uui
     return highlighted_table
 
 
-def get_subtracted_timestamp(time_duration: str, start_timestamp=datetime.now(timezone.utc)) -> datetime:
+def get_subtracted_timestamp(time_duration: str, start_timestamp=None) -> datetime:
     """Get subtracted datetime from now
 
     Args:
         time_duration (str): time_gap in XdYh format
+        start_timestamp (datetime or str): time to subtract from, as a
+            datetime or a %Y-%m-%d date; now when omitted
 
     Returns:
         datetime: return datetime of given timegap from now
@@ -903,6 +1075,8 @@ def get_subtracted_timestamp(time_duration: str, start_timestamp=datetime.now(ti
     hours = int(reg_ex.group(2)) if reg_ex.group(2) else 0
     duration_to_subtract = timedelta(days=days, hours=hours)
     logger.info("Duration to subtract: %s", duration_to_subtract)
+    if start_timestamp is None:
+        start_timestamp = datetime.now(timezone.utc)
     if isinstance(start_timestamp, str):
         start_timestamp = datetime.strptime(start_timestamp, "%Y-%m-%d")
     logger.info("Start timestamp: %s", start_timestamp)
@@ -0,0 +1,241 @@
+"""
+Module for analyzing the runs of a config as they land.
+
+With --watch, Orion keeps running and polls the metadata index every
+--watch-interval seconds. Each test has a high-watermark, the timestamp of
+the newest run already analyzed: a poll costs one count query per test, and
+only the tests with runs newer than their watermark are analyzed. The
+watermarks are kept in the --watch-state directory so a restarted watcher
+does not re-analyze the runs it has already seen.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import orion.constants as cnsts
+from orion.ack_providers import AckIndex, JiraAckProvider
+from orion.ack_providers.factory import create_jira_provider, get_ack_providers
+from orion.config import load_config
+from orion.fleet import FleetConfig, run_configs
+from orion.logger import SingletonLogger
+from orion.matcher import Matcher
+from orion.query_planner import QueryPlanner
+from orion.reporting.results import write_results
+from orion.utils import Utils
+
+WATERMARKS_FILE = "watermarks.json"
+
+
+class Watermarks:
+    """Timestamp of the newest analyzed run of every watched test
+
+    Args:
+        state_dir (str): directory of the watermark file, None keeps the
+            watermarks in memory only
+    """
+
+    def __init__(self, state_dir: Optional[str] = None):
+        self.state_dir = state_dir
+        self.logger = SingletonLogger.get_logger("Orion")
+        self._marks: Dict[str, str] = {}
+        if state_dir:
+            self._load()
+
+    @staticmethod
+    def key(test: Dict[str, Any], metadata_index: str = "") -> str:
+        """Watermark key of a test: its name and a digest of the runs it matches
+
+        Args:
+            test (dict): test configuration
+            metadata_index (str): --metadata-index, when set
+
+        Returns:
+            str: key, changed when the metadata or index of the test changes
+        """
+        matched = {
+            "metadata": test.get("metadata", {}),
+            "index": metadata_index or test.get("metadata_index"),
+        }
+        digest = hashlib.sha256(
+            json.dumps(matched, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        return f"{test['name']}:{digest[:12]}"
+
+    def get(self, key: str) -> Optional[str]:
+        """Watermark of a test, None before its first analysis"""
+        return self._marks.get(key)
+
+    def set(self, key: str, timestamp: str) -> None:
+        """Move the watermark of a test"""
+        self._marks[key] = timestamp
+
+    def _path(self) -> str:
+        return os.path.join(self.state_dir, WATERMARKS_FILE)
+
+    def _load(self) -> None:
+        path = self._path()
+        if not os.path.isfile(path):
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as marks_file:
+                self._marks = dict(json.load(marks_file))
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            self.logger.warning("Could not read watermarks %s: %s", path, e)
+
+    def save(self) -> None:
+        """Store the watermarks in the state directory, if any"""
+        if not self.state_dir:
+            return
+        os.makedirs(self.state_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.state_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as marks_file:
+                json.dump(self._marks, marks_file, indent=2, sort_keys=True)
+            os.replace(tmp_path, self._path())
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            self.logger.warning("Could not store watermarks in %s: %s", self.state_dir, e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def find_new_runs(
+    tests: List[Dict[str, Any]],
+    matcher_for: Callable[[Dict[str, Any]], Matcher],
+    watermarks: Watermarks,
+    metadata_index: str = "",
+) -> List[Tuple[Dict[str, Any], str, str]]:
+    """Tests with runs newer than their watermark
+
+    A test with a watermark costs one count query, plus one query for the
+    newest timestamp when it has new runs. A test without a watermark is
+    always returned, with the timestamp of its newest run.
+
+    Args:
+        tests (list): test configurations
+        matcher_for (callable): matcher of the metadata index of a test
+        watermarks (Watermarks): watermarks of the tests
+        metadata_index (str): --metadata-index, when set
+
+    Returns:
+        list: (test, watermark key, newest run timestamp) of the tests to analyze
+    """
+    logger = SingletonLogger.get_logger("Orion")
+    pending = []
+    for test in tests:
+        key = Watermarks.key(test, metadata_index)
+        matcher = matcher_for(test)
+        metadata = Utils(test["uuid_field"], test["version_field"]).extract_metadata_from_test(
+            copy.deepcopy(test)
+        )
+        timestamp_field = test.get("timestamp", "timestamp")
+        mark = watermarks.get(key)
+        if mark is not None:
+            count = matcher.count_runs_since(metadata, mark, timestamp_field)
+            if not count:
+                logger.debug("%s: no run since %s", test["name"], mark)
+                continue
+            logger.info("%s: %d new runs since %s", test["name"], count, mark)
+        latest = matcher.latest_run_timestamp(metadata, timestamp_field)
+        if latest is None:
+            logger.info("%s: no run matches the metadata yet", test["name"])
+            continue
+        pending.append((test, key, latest))
+    return pending
+
+
+def run_watch(kwargs: dict, logger, cycles: Optional[int] = None) -> int:  # pylint: disable=too-many-locals
+    """Analyze the tests of --config as new runs land (--watch)
+
+    Every --watch-interval seconds, each test costs one count query for runs
+    newer than its watermark; only tests with new runs are analyzed and
+    reported as a --config run would report them. The OpenSearch client and
+    the fetched metric rows of older runs are reused between cycles.
+
+    Args:
+        kwargs (dict): command line options
+        logger (SingletonLogger): logger instance
+        cycles (int): number of polls before returning, None to poll until
+            interrupted
+
+    Returns:
+        int: 1 on invalid options, else 2 if a regression was found, else 0
+    """
+    if kwargs.get("pr_analysis") or kwargs.get("from_snapshot"):
+        logger.error("--watch cannot be used with --pr-analysis or --from-snapshot")
+        return 1
+    if not kwargs["metadata_index"] or not kwargs["es_server"]:
+        logger.error("metadata-index and es-server flags must be provided")
+        return 1
+
+    es_client = Matcher.create_client(
+        kwargs["es_server"], verify_certs=False, pool_maxsize=max(5, kwargs["fleet_workers"]),
+        record=kwargs.get("record"), replay=kwargs.get("replay"),
+    )
+    watermarks = Watermarks(kwargs.get("watch_state"))
+    planner = None
+    planner_created = 0.0
+    jira_provider = None
+    exit_code = 0
+    cycle = 0
+    logger.info("Watching %s every %.0f seconds", kwargs["config"], kwargs["watch_interval"])
+    while True:
+        started = time.monotonic()
+        try:
+            config = load_config(kwargs["config"], kwargs["input_vars"])
+            pending = find_new_runs(
+                config["tests"],
+                lambda test: Matcher(
+                    index=kwargs["metadata_index"] or test["metadata_index"],
+                    version_field=test["version_field"],
+                    uuid_field=test["uuid_field"],
+                    es=es_client,
+                ),
+                watermarks,
+                kwargs["metadata_index"],
+            )
+            if pending:
+                if planner is None or started - planner_created > cnsts.METRIC_ROWS_TTL:
+                    planner = QueryPlanner()
+                    planner_created = started
+                # ACKs are re-read on every cycle with new runs, idle cycles skip them
+                providers, version, test_type = get_ack_providers(kwargs, config, logger)
+                if jira_provider is None:
+                    jira_provider = next((p for p in providers if isinstance(p, JiraAckProvider)), None)
+                    if kwargs.get("jira_auto_create") and not jira_provider:
+                        jira_provider = create_jira_provider(kwargs, config, logger)
+                ack_map = AckIndex(providers).ack_map(version=version, test_type=test_type)
+                test_configs = [
+                    FleetConfig(test["name"], dict(
+                        kwargs, config={**config, "tests": [test]}, ackMap=ack_map,
+                        _es_client=es_client, _query_planner=planner,
+                    ))
+                    for test, _, _ in pending
+                ]
+                run_configs(test_configs, kwargs["fleet_workers"])
+                for test_config, (_, key, latest) in zip(test_configs, pending):
+                    if test_config.results is not None:
+                        code = write_results(test_config.kwargs, test_config.results, jira_provider, logger)
+                        if code == 2:
+                            exit_code = 2
+                    elif test_config.exit_code not in (0, 3):
+                        logger.error("%s failed with exit code %d", test_config.path, test_config.exit_code)
+                        continue
+                    watermarks.set(key, latest)
+                watermarks.save()
+            else:
+                logger.info("No new runs for the %d tests of %s", len(config["tests"]), kwargs["config"])
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            # A failed poll is retried on the next cycle
+            logger.error("Watch cycle failed: %s", e)
+        except SystemExit as e:
+            logger.error("Watch cycle stopped with exit code %s", e.code)
+
+        cycle += 1
+        if cycles is not None and cycle >= cycles:
+            return exit_code
+        time.sleep(max(0.0, kwargs["watch_interval"] - (time.monotonic() - started)))
@@ -35,7 +35,7 @@ setup(
             'orion = main:main',
         ],
     },
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     license="MIT",
     classifiers=[
         'Programming Language :: Python :: 3.14',